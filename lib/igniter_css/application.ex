@@ -9,10 +9,14 @@ defmodule IgniterCss.Application do
 
   use Application
 
+  # Version of the css_tools wheel shipped in priv/python, see rebuild_wheel.sh
+  @css_tools_version "0.1.3"
+  @css_tools_wheel "css_tools-#{@css_tools_version}-py3-none-any.whl"
+
   @impl true
   def start(_type, _args) do
     Application.ensure_all_started(:pythonx)
-    wheel_path = Application.app_dir(:igniter_css, "priv/python/css_tools-0.1.2-py3-none-any.whl")
+    wheel_path = Application.app_dir(:igniter_css, "priv/python/#{@css_tools_wheel}")
 
     # Set configuration directly
     pyproject_toml = """
@@ -22,7 +26,7 @@ defmodule IgniterCss.Application do
     requires-python = "==3.13.*"
     dependencies = [
       "tinycss2==1.4.0",
-      "css_tools==0.1.2"
+      "css_tools==#{@css_tools_version}"
     ]
     [tool.uv.sources]
     css_tools = { path = "#{wheel_path}" }
@@ -30,6 +34,17 @@ defmodule IgniterCss.Application do
 
     Pythonx.uv_init(pyproject_toml)
 
+    # Import css_tools and run it once now, so the first call from the
+    # parsers does not pay for imports
+    Pythonx.eval(
+      """
+      import css_tools
+
+      css_tools.warmup()
+      """,
+      %{}
+    )
+
     children = []
 
     # See https://hexdocs.pm/elixir/Supervisor.html
@@ -10,6 +10,15 @@ defmodule IgniterCss.CSS.CssProcessor do
 
   alias IgniterCss.Parsers.Parser
 
+  # Properties that need vendor prefixes
+  @properties_needing_prefixes [
+    {"user-select", ["-webkit-", "-moz-", "-ms-"]},
+    {"appearance", ["-webkit-", "-moz-"]},
+    {"backdrop-filter", ["-webkit-"]},
+    {"text-size-adjust", ["-webkit-", "-ms-"]},
+    {"font-smoothing", ["-webkit-", "-moz-osx-"]}
+  ]
+
   @doc """
   Processes a CSS file for production by:
   1. Adding vendor prefixes for browser compatibility
@@ -17,6 +26,9 @@ defmodule IgniterCss.CSS.CssProcessor do
   3. Sorting properties for better diff comparison
   4. Minifying the CSS
 
+  All steps run as passes over a single parse of the stylesheet, in one
+  call to Python, and the result is written once at the end.
+
   ## Parameters
 
     * `css_content` - The CSS content as a string
@@ -28,7 +40,7 @@ defmodule IgniterCss.CSS.CssProcessor do
 
   ## Returns
 
-  The processed CSS as a string
+  The processed CSS as a string; it is beautified when `:minify` is `false`
   """
   def process_for_production(css_content, opts \\ []) do
     # Default options
@@ -43,12 +55,25 @@ defmodule IgniterCss.CSS.CssProcessor do
         opts
       )
 
-    # Process the CSS according to options
-    css_content
-    |> maybe_add_prefixes(opts[:add_prefixes])
-    |> maybe_remove_duplicates(opts[:remove_duplicates])
-    |> maybe_sort_properties(opts[:sort])
-    |> maybe_minify(opts[:minify])
+    passes =
+      Enum.concat([
+        if(opts[:add_prefixes], do: browser_compatibility_passes(), else: []),
+        if(opts[:remove_duplicates], do: ["remove_duplicates"], else: []),
+        if(opts[:sort], do: ["sort_properties"], else: []),
+        if(opts[:minify], do: ["minify"], else: [])
+      ])
+
+    {result, _globals} =
+      Pythonx.eval(
+        """
+        from css_tools.passes import optimize_css
+
+        optimize_css(css_code, passes)
+        """,
+        %{"css_code" => css_content, "passes" => passes}
+      )
+
+    Pythonx.decode(result)
   end
 
   @doc """
@@ -64,33 +89,30 @@ defmodule IgniterCss.CSS.CssProcessor do
   The CSS with compatibility fixes applied
   """
   def apply_browser_compatibility(css_content) do
-    # Properties that need vendor prefixes
-    properties_needing_prefixes = [
-      {"user-select", ["-webkit-", "-moz-", "-ms-"]},
-      {"appearance", ["-webkit-", "-moz-"]},
-      {"backdrop-filter", ["-webkit-"]},
-      {"text-size-adjust", ["-webkit-", "-ms-"]},
-      {"font-smoothing", ["-webkit-", "-moz-osx-"]}
-    ]
-
-    # Start with the original CSS
-    css_with_prefixes = css_content
-
-    # Add each set of prefixes
-    css_with_prefixes =
-      Enum.reduce(properties_needing_prefixes, css_with_prefixes, fn {property, prefixes}, css ->
-        Parser.add_vendor_prefixes(css, property, prefixes)
-      end)
-
-    # Add the hide-scrollbar property
-    css_with_hide_scrollbar = Parser.add_hide_scrollbar_property(css_with_prefixes)
+    # Add every prefix in one pass over one parse, then the hide-scrollbar
+    # property, in a single call to Python
+    {result, _globals} =
+      Pythonx.eval(
+        """
+        from css_tools.modifier import add_property_to_selector
+        from css_tools.prefixer import add_prefixes
+
+        css_with_prefixes = add_prefixes(css_code, property_prefixes, {})
+        add_property_to_selector(css_with_prefixes, ".hide-scrollbar", "display", "none")
+        """,
+        %{"css_code" => css_content, "property_prefixes" => @properties_needing_prefixes}
+      )
 
-    css_with_hide_scrollbar
+    Pythonx.decode(result)
   end
 
   @doc """
   Extracts critical CSS by identifying and extracting all styles needed for above-the-fold content.
 
+  Rules are matched per member of their selector list, including inside
+  `@media` and other grouping at-rules; a rule listing both critical and
+  other selectors is split between the two results.
+
   ## Parameters
 
     * `css_content` - The full CSS content as a string
@@ -101,52 +123,20 @@ defmodule IgniterCss.CSS.CssProcessor do
   A tuple with `{critical_css, non_critical_css}`
   """
   def extract_critical_css(css_content, critical_selectors) do
-    # Use Enum.reduce to accumulate both results in a single pass
-    {critical_css, non_critical_css} =
-      Enum.reduce(
-        critical_selectors,
-        # Initial accumulator: {critical_css, non_critical_css}
-        {"", css_content},
-        fn selector, {critical_acc, non_critical_acc} ->
-          # Find selectors in the CSS that match this critical selector
-          {result, _globals} =
-            Pythonx.eval(
-              """
-              import tinycss2
-              from css_tools.parser import parse_stylesheet, get_selector_text, get_rule_declarations
-
-              rules = parse_stylesheet(css_code)
-              matching_rules = []
-
-              for rule in rules:
-                  if rule.type == "qualified-rule":
-                      selector = get_selector_text(rule)
-                      if selector == critical_selector or critical_selector in selector.split(','):
-                          declarations = get_rule_declarations(rule)
-                          serialized_content = tinycss2.serialize(declarations).strip()
-                          serialized_content = "\\n".join("    " + line.strip() for line in serialized_content.splitlines() if line.strip())
-                          formatted_rule = f"{selector} {{\\n{serialized_content}\\n}}\\n"
-                          matching_rules.append(formatted_rule)
-
-              result = "\\n".join(matching_rules)
-              result
-              """,
-              %{"css_code" => non_critical_acc, "critical_selector" => selector}
-            )
-
-          # Extract the matching rules
-          matching_css = Pythonx.decode(result)
-
-          # Update both critical and non-critical CSS
-          updated_critical = critical_acc <> matching_css <> "\n"
-          updated_non_critical = Parser.remove_selector(non_critical_acc, selector)
-
-          # Return updated tuple for next iteration
-          {updated_critical, updated_non_critical}
-        end
+    # Partition the stylesheet in a single pass over one parse, rather than
+    # reparsing it for every critical selector
+    {result, _globals} =
+      Pythonx.eval(
+        """
+        from css_tools.critical import partition
+
+        critical_css, non_critical_css = partition(css_code, critical_selectors)
+        [critical_css, non_critical_css]
+        """,
+        %{"css_code" => css_content, "critical_selectors" => critical_selectors}
       )
 
-    # Return the final result
+    [critical_css, non_critical_css] = Pythonx.decode(result)
     {critical_css, non_critical_css}
   end
 
@@ -156,7 +146,9 @@ defmodule IgniterCss.CSS.CssProcessor do
   ## Parameters
 
     * `css_files` - Map of `{filename, content}` pairs
-    * `opts` - Options (same as process_for_production)
+    * `opts` - Options (same as process_for_production), plus `:workers` and
+      `:python_executable` to parse the files in parallel
+      (see `IgniterCss.Parsers.Parser.merge_stylesheets/2`)
 
   ## Returns
 
@@ -167,35 +159,23 @@ defmodule IgniterCss.CSS.CssProcessor do
     css_contents = Map.values(css_files)
 
     # Merge the CSS files
-    merged = Parser.merge_stylesheets(css_contents)
+    merged =
+      Parser.merge_stylesheets(css_contents, Keyword.take(opts, [:workers, :python_executable]))
 
     # Process the merged result for production
     process_for_production(merged, opts)
   end
 
-  # Helper functions for conditional processing
-
-  defp maybe_add_prefixes(css, true) do
-    apply_browser_compatibility(css)
-  end
-
-  defp maybe_add_prefixes(css, false), do: css
-
-  defp maybe_remove_duplicates(css, true) do
-    Parser.remove_duplicates(css)
-  end
-
-  defp maybe_remove_duplicates(css, false), do: css
-
-  defp maybe_sort_properties(css, true) do
-    Parser.sort_properties(css)
-  end
-
-  defp maybe_sort_properties(css, false), do: css
-
-  defp maybe_minify(css, true) do
-    Parser.minify(css)
+  # The passes doing what apply_browser_compatibility/1 does
+  defp browser_compatibility_passes do
+    [
+      {"prefix", %{"property_prefixes" => @properties_needing_prefixes, "value_prefixes" => %{}}},
+      {"add_property",
+       %{
+         "selector" => ".hide-scrollbar",
+         "property_name" => "display",
+         "property_value" => "none"
+       }}
+    ]
   end
-
-  defp maybe_minify(css, false), do: css
 end
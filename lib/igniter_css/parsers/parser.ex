@@ -145,6 +145,74 @@ defmodule IgniterCss.Parsers.Parser do
     )
   end
 
+  @doc """
+  Adds vendor-prefixed declarations from a table, in a single pass over the
+  stylesheet.
+
+  Unlike `add_vendor_prefixes/4`, every property is handled in one call, the
+  rest of the stylesheet keeps its formatting, prefixed declarations that are
+  already present are not added again, and rules nested in `@media`,
+  `@supports` and `@keyframes` are prefixed too.
+
+  ## Parameters
+
+    * `property_prefixes` - Map (or list of tuples) of property names to the
+      prefixes to add, e.g. `%{"user-select" => ["-webkit-", "-moz-"]}`
+    * `value_prefixes` - Map of property names to maps of values to the
+      values to add before them, e.g.
+      `%{"display" => %{"flex" => ["-webkit-box", "-ms-flexbox"]}}`
+      (default: none)
+
+  ## Examples
+
+  ```elixir
+  iex> IgniterCss.Parsers.CSS.Parser.add_prefixes(".a { user-select: none; }", %{"user-select" => ["-webkit-"]})
+  {:ok, :add_prefixes, ".a { -webkit-user-select: none; user-select: none; }"}
+  ```
+  """
+  def add_prefixes(
+        file_path_or_content,
+        property_prefixes,
+        value_prefixes \\ %{},
+        type \\ :content
+      ) do
+    call_nif_fn(
+      file_path_or_content,
+      __ENV__.function,
+      fn file_content ->
+        {result, _globals} =
+          Pythonx.eval(
+            """
+            from css_tools.prefixer import add_prefixes
+
+            try:
+                result = {"status": "ok", "result": add_prefixes(css_code, property_prefixes, value_prefixes)}
+            except Exception as e:
+                result = {"status": "error", "message": f"Failed to parse CSS: {str(e)}"}
+
+            result
+            """,
+            %{
+              "css_code" => file_content,
+              "property_prefixes" => property_prefixes,
+              "value_prefixes" => value_prefixes
+            }
+          )
+
+        parsed_result = Pythonx.decode(result)
+
+        case parsed_result do
+          %{"status" => "ok", "result" => modified_css} ->
+            {:ok, __ENV__.function, modified_css}
+
+          %{"status" => "error", "message" => message} ->
+            {:error, __ENV__.function, message}
+        end
+      end,
+      type
+    )
+  end
+
   @doc """
   Analyzes a CSS stylesheet and returns various statistics.
 
@@ -198,6 +266,66 @@ defmodule IgniterCss.Parsers.Parser do
     )
   end
 
+  @doc """
+  Analyzes a CSS stylesheet like `analyze_css/2`, computing and returning only
+  the requested statistics.
+
+  `fields` is a list of keys of the `analyze_css/2` result, or `:summary` for
+  the counts only (`"selectors_count"`, `"unique_selectors"`,
+  `"properties_count"`, `"unique_properties"`, `"most_used_properties"`,
+  `"colors_used"`, `"fonts_used"`, `"media_queries_count"`,
+  `"comments_count"`, `"file_size_bytes"` and `"imports_count"`). Sections
+  that are not requested, such as the per-selector properties, are neither
+  built nor sent back.
+
+  ## Examples
+
+  ```elixir
+  iex> IgniterCss.Parsers.CSS.Parser.analyze_css_fields(css_code, ["selectors_count", "imports"])
+  %{"selectors_count" => 15, "imports" => []}
+
+  iex> IgniterCss.Parsers.CSS.Parser.analyze_css_fields(css_code, :summary)
+  %{"selectors_count" => 15, "unique_selectors" => 12, ...}
+  ```
+  """
+  def analyze_css_fields(file_path_or_content, fields, type \\ :content)
+      when is_list(fields) or fields == :summary do
+    call_nif_fn(
+      file_path_or_content,
+      __ENV__.function,
+      fn file_content ->
+        {result, _globals} =
+          Pythonx.eval(
+            """
+            from css_tools.parser import analyze_stylesheet
+
+            try:
+                result = {"status": "ok", "result": analyze_stylesheet(css_code, fields)}
+            except Exception as e:
+                result = {"status": "error", "message": f"Failed to parse CSS: {str(e)}"}
+
+            result
+            """,
+            %{
+              "css_code" => file_content,
+              "fields" => if(fields == :summary, do: "summary", else: fields)
+            }
+          )
+
+        parsed_result = Pythonx.decode(result)
+
+        case parsed_result do
+          %{"status" => "ok", "result" => analyzed_css} ->
+            {:ok, __ENV__.function, analyzed_css}
+
+          %{"status" => "error", "message" => message} ->
+            {:error, __ENV__.function, message}
+        end
+      end,
+      type
+    )
+  end
+
   @doc """
   Extracts all color values from a CSS stylesheet.
 
@@ -429,21 +557,42 @@ defmodule IgniterCss.Parsers.Parser do
   @doc """
   Merges multiple CSS stylesheets into one, removing duplicates.
 
+  ## Options
+
+    * `:workers` - Parse the stylesheets on a pool of this many Python worker
+      processes before merging them in order (default: parse sequentially)
+    * `:python_executable` - Python interpreter used to start the workers
+    * `:group_identical` - Also fold rules with identical declarations into
+      one rule with a selector list, when that cannot change which
+      declarations win (default: `false`)
+
   ## Examples
 
   ```elixir
   iex> IgniterCss.Parsers.CSS.Parser.merge_stylesheets([css_code1, css_code2])
   "merged css"
+
+  iex> IgniterCss.Parsers.CSS.Parser.merge_stylesheets(css_list, workers: 4)
+  "merged css"
+
+  iex> IgniterCss.Parsers.CSS.Parser.merge_stylesheets([".a { color: red; }", ".b { color: red; }"], group_identical: true)
+  ".a, .b {\n    color: red;\n}"
   ```
   """
-  def merge_stylesheets(css_list) when is_list(css_list) do
+  def merge_stylesheets(css_list, opts \\ []) when is_list(css_list) do
     {result, _globals} =
       Pythonx.eval(
         """
         from css_tools.modifier import merge_stylesheets
+        from css_tools.parallel import merge_stylesheets as parallel_merge_stylesheets
 
         try:
-          modified_css = merge_stylesheets(css_list)
+          if workers and workers > 1:
+              modified_css = parallel_merge_stylesheets(
+                  css_list, group_identical, workers=workers, python_executable=python_executable
+              )
+          else:
+              modified_css = merge_stylesheets(css_list, group_identical)
           result = {"status": "ok", "result": modified_css}
 
         except Exception as e:
@@ -452,7 +601,12 @@ defmodule IgniterCss.Parsers.Parser do
 
         result
         """,
-        %{"css_list" => css_list}
+        %{
+          "css_list" => css_list,
+          "group_identical" => Keyword.get(opts, :group_identical, false),
+          "workers" => Keyword.get(opts, :workers),
+          "python_executable" => Keyword.get(opts, :python_executable)
+        }
       )
 
     parsed_result = Pythonx.decode(result)
@@ -466,6 +620,78 @@ defmodule IgniterCss.Parsers.Parser do
     end
   end
 
+  @doc """
+  Runs a list of operations on named stylesheets in a single call to Python.
+
+  Each stylesheet is parsed once and shared by every operation on it, and
+  all results come back together, so a whole codemod costs one crossing
+  into Python instead of one per function call.
+
+  Operations are `{op, args}` tuples, where `op` is the name of a css_tools
+  function, such as `"add_property_to_selector"`, `"remove_selector"`,
+  `"minify_css"`, `"analyze_stylesheet"` or `"extract_colors"`, and `args`
+  its keyword arguments. `"doc"` names the stylesheet to work on. Operations
+  returning CSS store it back into their stylesheet, so later operations see
+  the change, and the changed stylesheets are returned under `"documents"`.
+
+  A failing operation gets `%{"status" => "error", "message" => message}` in
+  its place among the results. The message starts with `"Failed to parse CSS: "`
+  for invalid CSS and with the operation name otherwise, as in
+  `"minify_css failed: ..."`, or is `"Unknown operation: ..."` or
+  `"Unknown document: ..."`.
+
+  ## Options
+
+    * `:stop_on_error` - Skip the remaining operations after the first one
+      that fails (default: `false`)
+
+  ## Examples
+
+  ```elixir
+  iex> IgniterCss.Parsers.CSS.Parser.batch(%{"app" => css_code}, [
+  ...>   {"add_property_to_selector",
+  ...>    %{"doc" => "app", "selector" => ".hide-scrollbar", "property_name" => "display", "property_value" => "none"}},
+  ...>   {"selector_exists", %{"doc" => "app", "selector" => ".header"}}
+  ...> ])
+  {:ok, :batch,
+   %{
+     "results" => [%{"status" => "ok", "result" => nil}, %{"status" => "ok", "result" => true}],
+     "documents" => %{"app" => "updated css"}
+   }}
+  ```
+  """
+  def batch(documents, ops, opts \\ []) when is_map(documents) and is_list(ops) do
+    {result, _globals} =
+      Pythonx.eval(
+        """
+        from css_tools.dispatch import run
+
+        try:
+            result = {"status": "ok", "result": run(ops, documents, stop_on_error)}
+        except Exception as e:
+            # Operations report their own errors; this is a batch that cannot run
+            result = {"status": "error", "message": f"Invalid batch: {str(e)}"}
+
+        result
+        """,
+        %{
+          "documents" => documents,
+          "ops" => ops,
+          "stop_on_error" => Keyword.get(opts, :stop_on_error, false)
+        }
+      )
+
+    parsed_result = Pythonx.decode(result)
+
+    case parsed_result do
+      %{"status" => "ok", "result" => batch_result} ->
+        {:ok, __ENV__.function, batch_result}
+
+      %{"status" => "error", "message" => message} ->
+        {:error, __ENV__.function, message}
+    end
+  end
+
   @doc """
   Removes a CSS selector and all its properties.
   **Note**: If a block is empty after removal, it will be removed as well.
@@ -720,6 +946,90 @@ defmodule IgniterCss.Parsers.Parser do
     )
   end
 
+  @doc """
+  Runs optimization passes over a stylesheet, parsing it once and writing it
+  once, and reports what each pass did.
+
+  Each pass does what the function it is named after does, without
+  writing and re-parsing the stylesheet in between:
+
+    * `"prefix"` - `add_prefixes/4`, with the `"property_prefixes"` and
+      `"value_prefixes"` options (default: the common vendor prefixes)
+    * `"add_property"` - adds a property to a selector, with the `"selector"`,
+      `"property_name"`, `"property_value"` and `"important"` options
+    * `"remove_duplicates"` - `remove_duplicates/2`
+    * `"sort_properties"` - `sort_properties/2`
+    * `"minify"` - `minify/2`
+
+  A pass is given as its name, or as a `{name, options}` tuple. The result
+  is minified when the `"minify"` pass runs, and beautified otherwise.
+
+  The report gives the bytes each pass saved, which writes the stylesheet
+  once more after every pass. Builds that do not need the report can run
+  the passes through `css_tools.passes.optimize_css`, as
+  `IgniterCss.CSS.CssProcessor.process_for_production/2` does.
+
+  ## Examples
+
+  ```elixir
+  iex> IgniterCss.Parsers.CSS.Parser.optimize(".a { user-select: none; } .a { color: red; }", ["prefix", "remove_duplicates", "minify"])
+  {:ok, :optimize,
+   %{
+     "css" => ".a{-moz-user-select:none;-ms-user-select:none;-webkit-user-select:none;user-select:none;}",
+     "report" => %{
+       "input_bytes" => 44,
+       "output_bytes" => 89,
+       "passes" => [
+         %{"name" => "prefix", "bytes_before" => 55, "bytes_after" => 141, "bytes_saved" => -86, "seconds" => 7.6e-5},
+         %{"name" => "remove_duplicates", "bytes_before" => 141, "bytes_after" => 117, "bytes_saved" => 24, "seconds" => 1.4e-5},
+         %{"name" => "minify", "bytes_before" => 117, "bytes_after" => 89, "bytes_saved" => 28, "seconds" => 4.5e-5}
+       ],
+       "parse_seconds" => 3.3e-4,
+       "serialize_seconds" => 4.2e-5,
+       "total_seconds" => 5.8e-4
+     }
+   }}
+  ```
+  """
+  def optimize(
+        file_path_or_content,
+        passes \\ ["prefix", "remove_duplicates", "sort_properties", "minify"],
+        type \\ :content
+      ) do
+    call_nif_fn(
+      file_path_or_content,
+      __ENV__.function,
+      fn file_content ->
+        {result, _globals} =
+          Pythonx.eval(
+            """
+            from css_tools.passes import run_passes
+
+            try:
+                optimized_css, report = run_passes(css_code, passes, measure=True)
+                result = {"status": "ok", "result": {"css": optimized_css, "report": report}}
+            except Exception as e:
+                result = {"status": "error", "message": f"Failed to parse CSS: {str(e)}"}
+
+            result
+            """,
+            %{"css_code" => file_content, "passes" => passes}
+          )
+
+        parsed_result = Pythonx.decode(result)
+
+        case parsed_result do
+          %{"status" => "ok", "result" => optimized} ->
+            {:ok, __ENV__.function, optimized}
+
+          %{"status" => "error", "message" => message} ->
+            {:error, __ENV__.function, message}
+        end
+      end,
+      type
+    )
+  end
+
   @doc """
   Checks if the CSS code is valid by attempting to parse it.
   Returns :ok if valid, or {:error, reason} if invalid.
@@ -772,6 +1082,65 @@ defmodule IgniterCss.Parsers.Parser do
     )
   end
 
+  @doc """
+  Finds every syntax error and warning in a CSS stylesheet, with its position.
+
+  Unlike `validate_css/2`, which stops at the first problem, all problems
+  are returned, ordered by position. Lines and columns start at 1;
+  `"byte_offset"` is the position in the binary. Errors of severity
+  `"error"` are the ones `validate_css/2` rejects a stylesheet for.
+
+  ## Examples
+
+  ```elixir
+  iex> IgniterCss.Parsers.CSS.Parser.css_errors(".a { color: red\n  margin: 0; }")
+  [
+    %{
+      "kind" => "missing-semicolon",
+      "severity" => "error",
+      "message" => "CSS syntax error: Missing semicolon after 'color: red'",
+      "line" => 1,
+      "column" => 6,
+      "offset" => 5,
+      "byte_offset" => 5
+    }
+  ]
+  ```
+  """
+  def css_errors(file_path_or_content, type \\ :content) do
+    call_nif_fn(
+      file_path_or_content,
+      __ENV__.function,
+      fn file_content ->
+        {result, _globals} =
+          Pythonx.eval(
+            """
+            from css_tools.validation import find_css_errors
+
+            try:
+                result = {"status": "ok", "result": find_css_errors(css_code)}
+            except Exception as e:
+                result = {"status": "error", "message": f"Failed to parse CSS: {str(e)}"}
+
+            result
+            """,
+            %{"css_code" => file_content}
+          )
+
+        parsed_result = Pythonx.decode(result)
+
+        case parsed_result do
+          %{"status" => "ok", "result" => errors} ->
+            {:ok, __ENV__.function, errors}
+
+          %{"status" => "error", "message" => message} ->
+            {:error, __ENV__.function, message}
+        end
+      end,
+      type
+    )
+  end
+
   @doc """
   Replaces an entire CSS rule for a specific selector with new declarations.
 
@@ -1069,22 +1438,9 @@ defmodule IgniterCss.Parsers.Parser do
         {result, _globals} =
           Pythonx.eval(
             """
-            from css_tools.parser import parse_stylesheet, get_selector_text
-
-            if isinstance(selector, bytes):
-                selector = selector.decode('utf-8')
+            from css_tools.parser import selector_exists
 
-            rules = parse_stylesheet(css_code)
-            exists = False
-
-            for rule in rules:
-                if rule.type == "qualified-rule":
-                    rule_selector = get_selector_text(rule)
-                    if rule_selector == selector:
-                        exists = True
-                        break
-
-            result = exists
+            result = selector_exists(css_code, selector)
             result
             """,
             %{
@@ -1132,28 +1488,10 @@ defmodule IgniterCss.Parsers.Parser do
         {result, _globals} =
           Pythonx.eval(
             """
-            import tinycss2
-            from css_tools.parser import parse_stylesheet, get_selector_text, get_rule_declarations
+            from css_tools.parser import get_selector_properties
 
             try:
-                if isinstance(selector, bytes):
-                    selector = selector.decode('utf-8')
-
-                rules = parse_stylesheet(css_code)
-                properties = None
-
-                for rule in rules:
-                    if rule.type == "qualified-rule":
-                        rule_selector = get_selector_text(rule)
-                        if rule_selector == selector:
-                            declarations = get_rule_declarations(rule)
-                            properties = {}
-                            for decl in declarations:
-                                if decl.type == "declaration":
-                                    value = tinycss2.serialize(decl.value).strip()
-                                    properties[decl.name] = value
-                            break
-
+                properties = get_selector_properties(css_code, selector)
                 result = {"status": "ok", "result": properties}
             except Exception as e:
                 result = {"status": "error", "message": f"Failed to parse CSS: {str(e)}"}
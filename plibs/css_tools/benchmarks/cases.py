@@ -0,0 +1,235 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""
+The benchmarked calls, one per public function of the main modules.
+
+Each case prepares its arguments from a corpus outside of the timed region
+and returns a callable that does the measured work. Functions are looked up
+by name, so the same cases run against older checkouts: a function that
+does not exist there is reported as skipped.
+"""
+
+import io
+import tinycss2
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from corpora import TARGET_SELECTOR, html_for
+
+ALL_EXTRACTORS = ["analysis", "colors", "fonts", "animations", "media_queries", "comments"]
+
+
+class Case(NamedTuple):
+    """
+    One benchmarked call.
+
+    Attributes:
+        module: Name of the css_tools module defining the function
+        function: Name of the function
+        prepare: Called with (function, css) and returns the callable to time
+    """
+
+    module: str
+    function: str
+    prepare: Callable[[Callable[..., Any], str], Callable[[], Any]]
+
+
+def _rules(css: str) -> List[Any]:
+    return tinycss2.parse_stylesheet(css, skip_whitespace=True, skip_comments=True)
+
+
+def _qualified_rules(css: str) -> List[Any]:
+    rules = []
+    pending = _rules(css)
+    while pending:
+        rule = pending.pop()
+        if rule.type == "qualified-rule":
+            rules.append(rule)
+        elif rule.type == "at-rule" and rule.content is not None and rule.lower_at_keyword in ("media", "supports"):
+            pending.extend(tinycss2.parse_rule_list(rule.content, skip_whitespace=True, skip_comments=True))
+    rules.reverse()
+    return rules
+
+
+def _document(function: Callable[..., Any], css: str) -> Callable[[], Any]:
+    return lambda: function(css)
+
+
+def _with(*args: Any, **kwargs: Any) -> Callable[[Callable[..., Any], str], Callable[[], Any]]:
+    return lambda function, text: lambda: function(text, *args, **kwargs)
+
+
+def _per_rule(function: Callable[..., Any], css: str) -> Callable[[], Any]:
+    rules = _qualified_rules(css)
+    return lambda: [function(rule) for rule in rules]
+
+
+def _declaration_blocks(css: str) -> List[str]:
+    return [tinycss2.serialize(rule.content) for rule in _qualified_rules(css)]
+
+
+def _parse_declarations(function: Callable[..., Any], css: str) -> Callable[[], Any]:
+    blocks = _declaration_blocks(css)
+    return lambda: [function(block) for block in blocks]
+
+
+def _serialize_declarations(function: Callable[..., Any], css: str) -> Callable[[], Any]:
+    blocks = [tinycss2.parse_blocks_contents(block) for block in _declaration_blocks(css)]
+    return lambda: [function(block) for block in blocks]
+
+
+def _serialize_stylesheet(function: Callable[..., Any], css: str) -> Callable[[], Any]:
+    rules = tinycss2.parse_stylesheet(css)
+    return lambda: function(rules)
+
+
+def _top_level_rules(function: Callable[..., Any], css: str) -> Callable[[], Any]:
+    rules = _rules(css)
+    return lambda: function(rules)
+
+
+def _colors_and_fonts(function: Callable[..., Any], css: str) -> Callable[[], Any]:
+    values = []
+    for rule in _qualified_rules(css):
+        for declaration in tinycss2.parse_blocks_contents(rule.content, skip_whitespace=True, skip_comments=True):
+            if declaration.type == "declaration":
+                values.append((tinycss2.serialize(declaration.value), declaration.lower_name))
+    return lambda: [function(value, name) for value, name in values]
+
+
+def _keyframes(function: Callable[..., Any], css: str) -> Callable[[], Any]:
+    rules = [rule for rule in _rules(css) if rule.type == "at-rule" and rule.lower_at_keyword == "keyframes"]
+    return lambda: [function(rule) for rule in rules]
+
+
+def _iter_rules(function: Callable[..., Any], css: str) -> Callable[[], Any]:
+    data = css.encode("utf-8")
+    return lambda: sum(1 for _ in function(data))
+
+
+def _stream(*args: Any) -> Callable[[Callable[..., Any], str], Callable[[], Any]]:
+    def prepare(function: Callable[..., Any], css: str) -> Callable[[], Any]:
+        data = css.encode("utf-8")
+        return lambda: function(data, *args)
+    return prepare
+
+
+def _minify_stream(function: Callable[..., Any], css: str) -> Callable[[], Any]:
+    data = css.encode("utf-8")
+    return lambda: function(data, io.StringIO())
+
+
+def _unused_selectors(function: Callable[..., Any], css: str) -> Callable[[], Any]:
+    html = html_for(css)
+    return lambda: function(css, html)
+
+
+def _halves(css: str) -> List[str]:
+    # Split at a top-level boundary so both halves are valid stylesheets
+    rules = tinycss2.parse_stylesheet(css)
+    half = len(rules) // 2
+    return [tinycss2.serialize(rules[:half]), tinycss2.serialize(rules[half:])]
+
+
+def _merge(function: Callable[..., Any], css: str) -> Callable[[], Any]:
+    sheets = _halves(css)
+    return lambda: function(sheets)
+
+
+def _table_statistics(function: Callable[..., Any], css: str) -> Callable[[], Any]:
+    sheets = _halves(css)
+
+    def call() -> Any:
+        table = function(sheets)
+        return table.most_used_properties(), table.media_property_counts(), table.property_file_counts()
+    return call
+
+
+def _make_declaration(function: Callable[..., Any], css: str) -> Callable[[], Any]:
+    return lambda: [function("margin", f"{index}px", index % 2 == 0) for index in range(1000)]
+
+
+_EDITS = [
+    {"op": "add_property_to_selector", "selector": TARGET_SELECTOR, "property_name": "display", "property_value": "none"},
+    {"op": "modify_property_value", "selector": TARGET_SELECTOR, "property_name": "color", "new_value": "red"},
+    {"op": "remove_property_from_selector", "selector": TARGET_SELECTOR, "property_name": "margin"},
+    {"op": "replace_selector_rule", "selector": TARGET_SELECTOR, "new_declarations": "color: blue;"},
+]
+
+
+def _batch(function: Callable[..., Any], css: str) -> Callable[[], Any]:
+    ops = [("analyze_stylesheet", {"doc": "main"})]
+    ops += [(edit["op"], {**edit, "doc": "main"}) for edit in _EDITS]
+    ops += [("extract_colors", {"doc": "main"}), ("minify_css", {"doc": "main"})]
+    return lambda: function(ops, {"main": css})
+
+
+CASES: List[Case] = [
+    # parser
+    Case("parser", "as_document", _document),
+    Case("parser", "parse_stylesheet", _document),
+    Case("parser", "iter_rules", _iter_rules),
+    Case("parser", "parse_declarations", _parse_declarations),
+    Case("parser", "serialize_stylesheet", _serialize_stylesheet),
+    Case("parser", "serialize_declarations", _serialize_declarations),
+    Case("parser", "get_rule_declarations", _per_rule),
+    Case("parser", "get_selector_text", _per_rule),
+    Case("parser", "extract_rules_by_selector", _with(".c1")),
+    Case("parser", "selector_exists", _with(".does-not-exist")),
+    Case("parser", "get_selector_properties", _with(TARGET_SELECTOR)),
+    Case("parser", "extract_comments", _document),
+    Case("parser", "extract_colors_and_fonts", _colors_and_fonts),
+    Case("parser", "extract_imports", _top_level_rules),
+    Case("parser", "analyze_stylesheet", _document),
+    Case("parser", "analyze_stylesheet_stream", _stream()),
+    # extractor
+    Case("extractor", "extract_colors", _document),
+    Case("extractor", "extract_media_queries", _document),
+    Case("extractor", "validate_css", _document),
+    Case("extractor", "check_parse_errors", _top_level_rules),
+    Case("extractor", "extract_keyframes", _keyframes),
+    Case("extractor", "extract_animations", _document),
+    Case("extractor", "extract_unused_selectors", _unused_selectors),
+    Case("extractor", "extract_fonts", _document),
+    Case("extractor", "extract_selectors_by_property", _with("color")),
+    Case("extractor", "extract_all", _with(ALL_EXTRACTORS)),
+    Case("extractor", "extract_all_stream", _stream(ALL_EXTRACTORS)),
+    # modifier
+    Case("modifier", "add_property_to_selector", _with(TARGET_SELECTOR, "display", "none")),
+    Case("modifier", "remove_property_from_selector", _with(TARGET_SELECTOR, "margin")),
+    Case("modifier", "remove_selector", _with(TARGET_SELECTOR)),
+    Case("modifier", "modify_property_value", _with(TARGET_SELECTOR, "color", "red")),
+    Case("modifier", "add_prefix_to_property", _with("transition", ["-webkit-", "-moz-"])),
+    Case("modifier", "merge_stylesheets", _merge),
+    Case("modifier", "replace_selector_rule", _with(TARGET_SELECTOR, "color: blue;")),
+    Case("modifier", "make_declaration", _make_declaration),
+    Case("modifier", "apply_edits", _with(_EDITS)),
+    # minifier
+    Case("minifier", "minify_css", _document),
+    Case("minifier", "minify_css_stream", _minify_stream),
+    Case("minifier", "beautify_css", _document),
+    Case("minifier", "sort_properties", _document),
+    Case("minifier", "remove_duplicates", _document),
+    # columnar
+    Case("columnar", "declaration_table", _table_statistics),
+    # validation
+    Case("validation", "find_css_errors", _document),
+    # dispatch
+    Case("dispatch", "run", _batch),
+    # prefixer
+    Case("prefixer", "add_prefixes", _document),
+    # passes
+    Case("passes", "optimize_css", _document),
+]
+
+
+def case_name(case: Case) -> str:
+    """The name a case is reported under, e.g. "parser.analyze_stylesheet"."""
+    return f"{case.module}.{case.function}"
+
+
+def resolve(case: Case, modules: Dict[str, Any]) -> Optional[Callable[..., Any]]:
+    """Return the function of a case, or None if the checkout does not have it."""
+    module = modules.get(case.module)
+    return getattr(module, case.function, None) if module is not None else None
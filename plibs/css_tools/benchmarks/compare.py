@@ -0,0 +1,99 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Compare two result files written by run.py.
+
+    python benchmarks/compare.py before.json after.json [--threshold 0.10]
+
+Prints the median latency and peak memory of every case and corpus found
+in both files, with the after/before ratio, followed by the memory each
+document class retains per rule. Exits with status 1 when a median got
+slower by more than the threshold, so it can gate a CI job.
+"""
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional
+
+
+def _load(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _ratio(before: Optional[float], after: Optional[float]) -> Optional[float]:
+    if not before or after is None:
+        return None
+    return after / before
+
+
+def _format_ratio(ratio: Optional[float]) -> str:
+    return "     -" if ratio is None else f"{ratio:6.2f}x"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown of the median (%(default)s)")
+    args = parser.parse_args(argv)
+
+    before = _load(args.before)
+    after = _load(args.after)
+    for label, results in (("before", before), ("after", after)):
+        meta = results.get("meta", {})
+        print(f"{label:7} {meta.get('revision') or meta.get('src')}  python {meta.get('python')}")
+    print()
+    print(f"{'case':48} {'corpus':24} {'p50 before':>12} {'p50 after':>12} {'time':>7} {'peak':>7}")
+
+    regressions = []
+    for name in sorted(set(before["cases"]) & set(after["cases"])):
+        for corpus in sorted(set(before["cases"][name]) & set(after["cases"][name])):
+            old = before["cases"][name][corpus]
+            new = after["cases"][name][corpus]
+            if "p50" not in old or "p50" not in new:
+                status = old.get("skipped") or old.get("error") or new.get("skipped") or new.get("error")
+                print(f"{name:48} {corpus:24} {status}")
+                continue
+            time_ratio = _ratio(old["p50"], new["p50"])
+            peak_ratio = _ratio(old["peak_bytes"], new["peak_bytes"])
+            print(
+                f"{name:48} {corpus:24} {old['p50'] * 1000:10.2f}ms {new['p50'] * 1000:10.2f}ms"
+                f" {_format_ratio(time_ratio)} {_format_ratio(peak_ratio)}"
+            )
+            if time_ratio is not None and time_ratio > 1 + args.threshold:
+                regressions.append((name, corpus, time_ratio))
+
+    memory_before = before.get("memory", {})
+    memory_after = after.get("memory", {})
+    corpora = sorted(set(memory_before) & set(memory_after))
+    if corpora:
+        print()
+        print(f"{'document':48} {'corpus':24} {'B/rule before':>13} {'B/rule after':>13} {'ratio':>7} {'analyzed':>8}")
+    for corpus in corpora:
+        documents = memory_after[corpus]["documents"]
+        for name in sorted(set(memory_before[corpus]["documents"]) & set(documents)):
+            old = memory_before[corpus]["documents"][name]
+            new = documents[name]
+            if old.get("bytes_per_rule") is None or new.get("bytes_per_rule") is None:
+                print(f"{name:48} {corpus:24} {old.get('skipped') or new.get('skipped') or 'no rules'}")
+                continue
+            print(
+                f"{name:48} {corpus:24} {old['bytes_per_rule']:13.0f} {new['bytes_per_rule']:13.0f}"
+                f" {_format_ratio(_ratio(old['bytes_per_rule'], new['bytes_per_rule']))}"
+                f" {_format_ratio(_ratio(old['analyzed_bytes_per_rule'], new['analyzed_bytes_per_rule']))}"
+            )
+
+    if regressions:
+        print(f"\n{len(regressions)} slower by more than {args.threshold:.0%}:")
+        for name, corpus, ratio in regressions:
+            print(f"  {name} on {corpus}: {ratio:.2f}x")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Deterministic CSS corpora for the benchmarks."""
+
+import random
+from typing import Callable, Dict, List
+
+# Target sizes of the generated corpora, in bytes
+SIZES: Dict[str, int] = {
+    "small": 64 * 1024,
+    "1mb": 1024 * 1024,
+    "4mb": 4 * 1024 * 1024,
+    "10mb": 10 * 1024 * 1024,
+}
+
+# Rule every corpus starts with, so selector-based functions have a target
+TARGET_SELECTOR = ".bench-target"
+TARGET_RULE = f"{TARGET_SELECTOR} {{\n  color: #123456;\n  margin: 0 auto;\n  font-family: Arial, sans-serif;\n}}\n\n"
+
+_PROPERTIES = [
+    ("color", lambda r: f"#{r.randrange(0x1000000):06x}"),
+    ("background-color", lambda r: f"rgba({r.randrange(256)}, {r.randrange(256)}, {r.randrange(256)}, 0.{r.randrange(10)})"),
+    ("margin", lambda r: f"{r.randrange(64)}px {r.randrange(64)}px"),
+    ("padding", lambda r: f"{r.randrange(4)}rem"),
+    ("display", lambda r: r.choice(["block", "flex", "grid", "none", "inline-block"])),
+    ("font-size", lambda r: f"{r.randrange(10, 40)}px"),
+    ("border", lambda r: f"1px solid {r.choice(['red', 'black', '#ccc', 'transparent'])}"),
+    ("transition", lambda r: f"all {r.randrange(1, 9)}00ms ease-in-out"),
+    ("font-family", lambda r: r.choice(["Arial, sans-serif", "'Open Sans', Helvetica", "monospace"])),
+]
+
+
+def _declarations(rng: random.Random, count: int, indent: str = "  ") -> str:
+    lines = []
+    for _ in range(count):
+        name, value = rng.choice(_PROPERTIES)
+        lines.append(f"{indent}{name}: {value(rng)};\n")
+    return "".join(lines)
+
+
+def _rule(rng: random.Random, selector: str, indent: str = "") -> str:
+    return f"{indent}{selector} {{\n{_declarations(rng, rng.randrange(1, 6), indent + '  ')}{indent}}}\n"
+
+
+def _class(rng: random.Random) -> str:
+    return f".c{rng.randrange(5000)}"
+
+
+def nested_media(rng: random.Random, index: int) -> str:
+    """Rules inside @media and @supports blocks nested up to four deep."""
+    depth = rng.randrange(1, 5)
+    opening, closing = [], []
+    for level in range(depth):
+        indent = "  " * level
+        if level % 2 == 0:
+            opening.append(f"{indent}@media (min-width: {rng.randrange(300, 1600)}px) {{\n")
+        else:
+            opening.append(f"{indent}@supports (display: {rng.choice(['grid', 'flex', 'contents'])}) {{\n")
+        closing.insert(0, f"{indent}}}\n")
+    body = "".join(_rule(rng, f"{_class(rng)} {_class(rng)}", "  " * depth) for _ in range(rng.randrange(1, 4)))
+    return "".join(opening) + body + "".join(closing)
+
+
+def selector_lists(rng: random.Random, index: int) -> str:
+    """Rules with long comma-separated selector lists and combinators."""
+    members = []
+    for _ in range(rng.randrange(8, 40)):
+        combinator = rng.choice([" ", " > ", " + ", " ~ "])
+        members.append(f"{_class(rng)}{combinator}{rng.choice(['a', 'li', 'span', _class(rng)])}")
+    return _rule(rng, ",\n".join(members))
+
+
+def comments(rng: random.Random, index: int) -> str:
+    """Rules surrounded by and containing long comments."""
+    text = " ".join(rng.choice(["lorem", "ipsum", "dolor", "sit", "amet"]) for _ in range(rng.randrange(5, 60)))
+    selector = f"{_class(rng)} /* {text[:30]} */"
+    declarations = _declarations(rng, rng.randrange(1, 4))
+    return f"/* {text} */\n{selector} {{\n  /* {text[:40]} */\n{declarations}}}\n"
+
+
+def long_values(rng: random.Random, index: int) -> str:
+    """Rules with long values: gradients, shadows, font stacks, data URIs."""
+    stops = ", ".join(f"#{rng.randrange(0x1000000):06x} {step * 5}%" for step in range(rng.randrange(5, 20)))
+    shadows = ", ".join(f"{rng.randrange(9)}px {rng.randrange(9)}px {rng.randrange(20)}px rgba(0, 0, 0, 0.{rng.randrange(10)})" for _ in range(rng.randrange(3, 10)))
+    data = "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/") for _ in range(rng.randrange(200, 800)))
+    return (
+        f"{_class(rng)} {{\n"
+        f"  background-image: linear-gradient(90deg, {stops});\n"
+        f"  box-shadow: {shadows};\n"
+        f"  font-family: Inter, system-ui, -apple-system, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;\n"
+        f"  mask-image: url(data:image/png;base64,{data});\n"
+        f"}}\n"
+    )
+
+
+_UTILITIES = ["flex", "grid", "hidden", "block", "p", "m", "px", "py", "mt", "mb", "w", "h", "text", "bg", "border", "rounded"]
+_VARIANTS = ["", "sm\\:", "md\\:", "lg\\:", "hover\\:", "focus\\:", "dark\\:"]
+
+
+def tailwind(rng: random.Random, index: int) -> str:
+    """Utility classes with escaped names, custom properties and breakpoints."""
+    utility = f"{rng.choice(_UTILITIES)}-{rng.randrange(96)}"
+    variant = rng.choice(_VARIANTS)
+    rule = (
+        f".{variant}{utility} {{\n"
+        f"  --tw-{rng.choice(['ring', 'shadow', 'bg-opacity'])}: {rng.randrange(100) / 100};\n"
+        f"{_declarations(rng, rng.randrange(1, 3))}}}\n"
+    )
+    if index % 50 == 0:
+        breakpoint = rng.choice([640, 768, 1024, 1280, 1536])
+        rule = f"@media (min-width: {breakpoint}px) {{\n  .{utility} {{\n    {rng.choice(_PROPERTIES)[0]}: inherit;\n  }}\n}}\n" + rule
+    return rule
+
+
+# Generators of one chunk of a corpus, by corpus name
+KINDS: Dict[str, Callable[[random.Random, int], str]] = {
+    "nested_media": nested_media,
+    "selector_lists": selector_lists,
+    "comments": comments,
+    "long_values": long_values,
+    "tailwind": tailwind,
+}
+
+
+def generate(kind: str, size: str, seed: int = 0) -> str:
+    """
+    Generate a corpus of about the given size; the same arguments always give the same CSS.
+
+    Args:
+        kind: One of KINDS
+        size: One of SIZES
+        seed: Seed of the generator
+
+    Returns:
+        The CSS text
+    """
+    rng = random.Random(f"{kind}:{seed}")
+    target = SIZES[size]
+    parts: List[str] = [
+        "@charset \"utf-8\";\n@import url('base.css') screen;\n\n",
+        TARGET_RULE,
+        "@keyframes bench-spin {\n  from { transform: rotate(0deg); }\n  to { transform: rotate(360deg); }\n}\n\n",
+    ]
+    length = sum(len(part) for part in parts)
+    index = 0
+    while length < target:
+        chunk = KINDS[kind](rng, index) + "\n"
+        parts.append(chunk)
+        length += len(chunk)
+        index += 1
+    return "".join(parts)
+
+
+def html_for(css: str, seed: int = 0) -> str:
+    """A deterministic HTML page using about half of the classes of `css`."""
+    rng = random.Random(f"html:{seed}")
+    names = sorted({f"c{number}" for number in range(5000) if rng.random() < 0.5})
+    return "\n".join(f'<div class="{name} wrapper" id="n{name}">x</div>' for name in names)
@@ -0,0 +1,124 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Measure the cold start of css_tools in fresh interpreters.
+
+    python benchmarks/import_time.py --output imports.json
+    python benchmarks/compare.py imports-before.json imports.json
+
+Each sample starts a new Python process and times one statement: importing
+the package or a submodule, warmup(), or importing the minifier and
+minifying a small stylesheet (the first call an application makes). Peak
+memory comes from one extra process running the statement under
+tracemalloc. Results use the layout of run.py, under the corpus name
+"fresh_process", so compare.py works on them too.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from run import DEFAULT_SRC, RESULTS_VERSION, _git_revision, percentile
+
+CORPUS = "fresh_process"
+
+# Statements timed in a fresh interpreter, by case name
+STATEMENTS: Dict[str, str] = {
+    "import.css_tools": "import css_tools",
+    "import.css_tools.parser": "import css_tools.parser",
+    "import.css_tools.extractor": "import css_tools.extractor",
+    "import.css_tools.modifier": "import css_tools.modifier",
+    "import.css_tools.minifier": "import css_tools.minifier",
+    "warmup": "import css_tools; getattr(css_tools, 'warmup', lambda: None)()",
+    "first_call.minify_css": "from css_tools.minifier import minify_css; minify_css('a { color: red; }')",
+}
+
+_SCRIPT = """
+import sys, time, tracemalloc
+sys.path.insert(0, {src!r})
+if {trace!r}:
+    tracemalloc.start()
+start = time.perf_counter()
+exec({statement!r})
+elapsed = time.perf_counter() - start
+peak = tracemalloc.get_traced_memory()[1] if {trace!r} else 0
+print(elapsed, peak)
+"""
+
+
+def sample(src: str, statement: str, trace: bool = False) -> List[float]:
+    """Run a statement in a new interpreter and return [seconds, peak bytes]."""
+    script = _SCRIPT.format(src=src, statement=statement, trace=trace)
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    ).stdout.split()
+    return [float(output[0]), float(output[1])]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--src", default=DEFAULT_SRC, help="src directory of the css_tools checkout to benchmark")
+    parser.add_argument("--repeat", type=int, default=10, help="fresh processes per statement (%(default)s)")
+    parser.add_argument("--output", default=None, help="write the JSON results to this file")
+    args = parser.parse_args(argv)
+    src = os.path.abspath(args.src)
+
+    results: Dict[str, Any] = {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "src": src,
+            "revision": _git_revision(src),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "corpora": {CORPUS: {"bytes": 0}},
+        "cases": {},
+    }
+
+    for name, statement in STATEMENTS.items():
+        try:
+            # The first process only makes sure the bytecode cache is written
+            sample(src, statement)
+            samples = [sample(src, statement)[0] for _ in range(args.repeat)]
+            peak = int(sample(src, statement, trace=True)[1])
+        except subprocess.CalledProcessError as error:
+            message = (error.stderr or "").strip().splitlines()
+            results["cases"][name] = {CORPUS: {"error": message[-1] if message else str(error)}}
+            print(f"{name:40} error: {results['cases'][name][CORPUS]['error']}", file=sys.stderr)
+            continue
+        samples.sort()
+        results["cases"][name] = {CORPUS: {
+            "runs": len(samples),
+            "min": samples[0],
+            "mean": sum(samples) / len(samples),
+            "p50": statistics.median(samples),
+            "p90": percentile(samples, 0.90),
+            "p99": percentile(samples, 0.99),
+            "max": samples[-1],
+            "mb_per_s": None,
+            "peak_bytes": peak,
+        }}
+        print(f"{name:40} p50 {statistics.median(samples) * 1000:8.2f} ms  peak {peak / 1024:8.1f} KB", file=sys.stderr)
+
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Benchmark the public functions of css_tools on generated corpora.
+
+    python benchmarks/run.py --sizes small,1mb --output before.json
+    python benchmarks/run.py --src ../other-checkout/plibs/css_tools/src --output after.json
+    python benchmarks/compare.py before.json after.json
+
+Every case is timed `--repeat` times with the parse cache cleared before
+each call, so the numbers include parsing like a call from Elixir on new
+CSS. Peak memory is measured in an extra call under tracemalloc, which
+slows Python down and is therefore kept out of the timings.
+
+The memory a document keeps alive is reported per rule for every corpus,
+right after parsing and after analyze_stylesheet has cached its per-rule
+state, for each document class in DOCUMENTS the checkout defines.
+"""
+
+import argparse
+import gc
+import importlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SRC = os.path.join(os.path.dirname(HERE), "src")
+
+# Bumped when the layout of the results changes
+RESULTS_VERSION = 1
+
+MODULES = ["parser", "extractor", "modifier", "minifier", "columnar", "validation", "dispatch", "prefixer", "passes"]
+
+# Document classes whose retained memory is measured, as (module, class)
+DOCUMENTS = {
+    "CssDocument": ("parser", "CssDocument"),
+    "CompactDocument": ("compact", "CompactDocument"),
+}
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a non-empty list of samples."""
+    ordered = sorted(samples)
+    rank = max(1, int(round(fraction * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def measure(call: Callable[[], Any], repeat: int, size: int, reset: Optional[Callable[[], None]]) -> Dict[str, Any]:
+    """
+    Time a call and measure its peak memory.
+
+    Args:
+        call: The prepared call
+        repeat: Number of timed runs
+        size: Corpus size in bytes, for throughput
+        reset: Called before each run to clear caches, if given
+
+    Returns:
+        Dict of latency statistics in seconds, throughput and peak memory
+    """
+    samples = []
+    for _ in range(repeat):
+        if reset is not None:
+            reset()
+        gc.collect()
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+
+    if reset is not None:
+        reset()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    median = statistics.median(samples)
+    return {
+        "runs": repeat,
+        "min": min(samples),
+        "mean": statistics.fmean(samples),
+        "p50": median,
+        "p90": percentile(samples, 0.90),
+        "p99": percentile(samples, 0.99),
+        "max": max(samples),
+        "mb_per_s": size / (1024 * 1024) / median if median > 0 else None,
+        "peak_bytes": peak,
+    }
+
+
+def retained(build: Callable[[], Any], then: Optional[Callable[[Any], Any]] = None) -> int:
+    """
+    Bytes still allocated once `build` returned, while its result is alive.
+
+    Args:
+        build: Builds the object to measure, e.g. a document
+        then: Called with the object before measuring, to fill its caches
+
+    Returns:
+        Bytes traced by tracemalloc and not freed
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        kept = build()
+        if then is not None:
+            then(kept)
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del kept
+    return current
+
+
+def count_rules(doc: Any) -> int:
+    """Number of qualified rules and at-rules at any depth of a document."""
+    return sum(1 for node, _ in doc.walk() if node.type in ("qualified-rule", "at-rule"))
+
+
+def measure_memory(css: str, modules: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Measure the memory per rule each document class keeps for a corpus.
+
+    The CSS text itself is retained by every document and included.
+
+    Args:
+        css: The corpus
+        modules: css_tools modules by name, None when missing
+
+    Returns:
+        Dict with the rule count and, per document class, the bytes retained
+        after parsing and after analyze_stylesheet, in total and per rule
+    """
+    parser_module = modules["parser"]
+    rules = count_rules(parser_module.CssDocument(css))
+    analyze = getattr(parser_module, "analyze_stylesheet", None)
+    entry: Dict[str, Any] = {"rules": rules, "documents": {}}
+    for name, (module_name, class_name) in DOCUMENTS.items():
+        document_class = getattr(modules.get(module_name), class_name, None)
+        if document_class is None:
+            entry["documents"][name] = {"skipped": "not defined in this checkout"}
+            continue
+        parsed = retained(lambda: document_class(css))
+        analyzed = retained(lambda: document_class(css), analyze)
+        entry["documents"][name] = {
+            "bytes": parsed,
+            "bytes_per_rule": parsed / rules if rules else None,
+            "analyzed_bytes": analyzed,
+            "analyzed_bytes_per_rule": analyzed / rules if rules else None,
+        }
+    return entry
+
+
+def _git_revision(path: str) -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=path, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--src", default=DEFAULT_SRC, help="src directory of the css_tools checkout to benchmark")
+    parser.add_argument("--sizes", default="small,1mb", help="comma-separated corpus sizes (%(default)s)")
+    parser.add_argument("--corpora", default=None, help="comma-separated corpus kinds (default: all)")
+    parser.add_argument("--filter", default=None, help="only run cases whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case (%(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="corpus seed (%(default)s)")
+    parser.add_argument("--warm", action="store_true", help="keep the parse cache between runs")
+    parser.add_argument("--skip-memory", action="store_true", help="do not measure the memory per rule")
+    parser.add_argument("--output", default=None, help="write the JSON results to this file")
+    args = parser.parse_args(argv)
+
+    src = os.path.abspath(args.src)
+    sys.path.insert(0, src)
+    sys.path.insert(0, HERE)
+    import corpora
+    from cases import CASES, case_name, resolve
+
+    modules = {}
+    for name in MODULES + [module for module, _ in DOCUMENTS.values()]:
+        try:
+            modules[name] = importlib.import_module(f"css_tools.{name}")
+        except ImportError:
+            modules[name] = None
+    parser_module = modules["parser"]
+    reset = None if args.warm else getattr(parser_module, "clear_parse_cache", None)
+
+    sizes = args.sizes.split(",")
+    kinds = args.corpora.split(",") if args.corpora else list(corpora.KINDS)
+    for size in sizes:
+        if size not in corpora.SIZES:
+            parser.error(f"unknown size {size!r}, expected one of {', '.join(corpora.SIZES)}")
+    for kind in kinds:
+        if kind not in corpora.KINDS:
+            parser.error(f"unknown corpus {kind!r}, expected one of {', '.join(corpora.KINDS)}")
+
+    import tinycss2
+    results: Dict[str, Any] = {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "src": src,
+            "revision": _git_revision(src),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "tinycss2": getattr(tinycss2, "__version__", None),
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "warm": args.warm,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "corpora": {},
+        "cases": {},
+        "memory": {},
+    }
+
+    for size in sizes:
+        for kind in kinds:
+            corpus = f"{kind}/{size}"
+            css = corpora.generate(kind, size, args.seed)
+            length = len(css.encode("utf-8"))
+            results["corpora"][corpus] = {"bytes": length}
+
+            if not args.skip_memory:
+                memory = results["memory"][corpus] = measure_memory(css, modules)
+                for name, stats in memory["documents"].items():
+                    if "bytes_per_rule" in stats and stats["bytes_per_rule"] is not None:
+                        print(
+                            f"{'memory.' + name:48} {corpus:24} {stats['bytes_per_rule']:10.0f} B/rule"
+                            f"  analyzed {stats['analyzed_bytes_per_rule']:10.0f} B/rule",
+                            file=sys.stderr,
+                        )
+
+            for case in CASES:
+                name = case_name(case)
+                if args.filter and args.filter not in name:
+                    continue
+                entry = results["cases"].setdefault(name, {})
+                function = resolve(case, modules)
+                if function is None:
+                    entry[corpus] = {"skipped": "not defined in this checkout"}
+                    continue
+                try:
+                    call = case.prepare(function, css)
+                    entry[corpus] = measure(call, args.repeat, length, reset)
+                except Exception as error:
+                    entry[corpus] = {"error": f"{type(error).__name__}: {error}"}
+                    print(f"{name:48} {corpus:24} error: {error}", file=sys.stderr)
+                    continue
+                stats = entry[corpus]
+                print(
+                    f"{name:48} {corpus:24} p50 {stats['p50'] * 1000:10.2f} ms"
+                    f"  {stats['mb_per_s'] or 0:8.2f} MB/s  peak {stats['peak_bytes'] / (1024 * 1024):8.2f} MB",
+                    file=sys.stderr,
+                )
+
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
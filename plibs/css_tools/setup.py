@@ -23,10 +23,13 @@ from setuptools import setup, find_packages
 # ./rebuild_wheel.sh
 setup(
     name="css_tools",
-    version="0.1.2",
+    version="0.1.3",
     packages=find_packages(where="src"),
     package_dir={"": "src"},
     install_requires=[
         "tinycss2>=1.4.0",
     ],
+    extras_require={
+        "numpy": ["numpy>=1.22"],
+    },
 )
@@ -2,6 +2,125 @@
 #
 # SPDX-License-Identifier: MIT
 
-"""CSS tools for Elixir integration."""
+"""
+CSS tools for Elixir integration.
 
-__version__ = "0.1.0"
+Submodules are imported on first use, so `import css_tools` is cheap and a
+call only pays for the modules it needs. The main functions are also
+available from the package itself, e.g. `css_tools.minify_css`. Call
+warmup() at application boot to move the import cost out of the first
+request.
+"""
+
+import importlib
+import time
+
+# Nothing else is imported here, not even typing, which on its own costs
+# more than the rest of `import css_tools`
+
+__version__ = "0.1.3"
+
+SUBMODULES = (
+    "colors", "columnar", "compact", "critical", "dispatch", "emitter", "extractor", "incremental",
+    "instrumentation", "minifier", "modifier", "parallel", "parser", "passes", "prefixer", "selector_index",
+    "spans", "traversal", "usage_index", "validation", "visitors", "worker",
+)
+
+# Modules imported by warmup() unless told otherwise
+WARMUP_MODULES = ("parser", "extractor", "modifier", "minifier")
+
+# Public names re-exported by the package, by defining submodule
+_EXPORTS: dict[str, str] = {
+    **dict.fromkeys((
+        "CssDocument", "as_document", "iter_rules", "parse_stylesheet", "parse_declarations",
+        "serialize_stylesheet", "serialize_declarations", "get_rule_declarations", "get_selector_text",
+        "extract_rules_by_selector", "selector_exists", "get_selector_properties", "extract_comments",
+        "extract_imports", "analyze_stylesheet", "analyze_stylesheet_stream", "configure_parse_cache",
+        "clear_parse_cache", "parse_cache_stats",
+    ), "parser"),
+    **dict.fromkeys((
+        "extract_colors", "extract_media_queries", "validate_css", "extract_keyframes", "extract_animations",
+        "extract_unused_selectors", "extract_fonts", "extract_selectors_by_property", "extract_all",
+        "extract_all_stream",
+    ), "extractor"),
+    **dict.fromkeys((
+        "add_property_to_selector", "remove_property_from_selector", "remove_selector", "modify_property_value",
+        "add_prefix_to_property", "merge_stylesheets", "replace_selector_rule", "apply_edits",
+    ), "modifier"),
+    **dict.fromkeys((
+        "minify_css", "minify_css_stream", "beautify_css", "sort_properties", "remove_duplicates",
+    ), "minifier"),
+    "CompactDocument": "compact",
+    **dict.fromkeys(("DeclarationTable", "declaration_table"), "columnar"),
+    "add_prefixes": "prefixer",
+    **dict.fromkeys(("PassManager", "run_passes", "optimize_css"), "passes"),
+    "find_css_errors": "validation",
+    **dict.fromkeys(("instrument", "instrumented"), "instrumentation"),
+}
+
+__all__ = sorted([*SUBMODULES, *_EXPORTS, "warmup"])
+
+# A small stylesheet reaching the parser, visitor, emitter and modifier paths
+_WARMUP_CSS = """@import url("base.css");
+/* warmup */
+.a, .b > .c:hover { color: #fff; margin: 0 auto; font-family: Arial, sans-serif; }
+@media (min-width: 640px) { .a { color: rgb(0, 0, 0) !important; } }
+@keyframes spin { from { transform: rotate(0deg); } to { transform: rotate(360deg); } }
+"""
+
+
+def __getattr__(name: str) -> object:
+    if name in SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    # Later lookups find the attribute directly and skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
+
+
+def warmup(modules: tuple[str, ...] | list[str] | None = None) -> dict[str, float]:
+    """
+    Import submodules and run a small stylesheet through the main code paths.
+
+    Importing tinycss2 and the css_tools modules, compiling their patterns
+    and registering the visitors otherwise happens during the first call.
+    The warmup stylesheet is parsed into its own document, so the parse
+    cache is left untouched. Calling warmup() again is cheap.
+
+    Args:
+        modules: Submodules to import (default: WARMUP_MODULES); the main
+                 code paths are exercised once the default modules are in
+
+    Returns:
+        Dictionary mapping "import.<module>" and "run" to the seconds spent
+    """
+    timings: dict[str, float] = {}
+    names = WARMUP_MODULES if modules is None else tuple(modules)
+    for name in names:
+        if name not in SUBMODULES:
+            raise Exception(f"Unknown css_tools module: {name}")
+        start = time.perf_counter()
+        importlib.import_module(f".{name}", __name__)
+        timings[f"import.{name}"] = time.perf_counter() - start
+
+    if set(WARMUP_MODULES).issubset(names):
+        from .extractor import extract_all
+        from .minifier import beautify_css, minify_css
+        from .modifier import add_property_to_selector
+        from .parser import CssDocument
+
+        start = time.perf_counter()
+        doc = CssDocument(_WARMUP_CSS)
+        extract_all(doc, ["analysis", "colors", "fonts", "animations", "media_queries", "comments"])
+        minify_css(doc)
+        beautify_css(doc)
+        add_property_to_selector(doc, ".a", "display", "none")
+        timings["run"] = time.perf_counter() - start
+    return timings
@@ -0,0 +1,157 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Recognize CSS colors in tinycss2 token lists."""
+
+import tinycss2
+from typing import Any, Iterable, List, NamedTuple, Optional, Union
+
+# Every named color of CSS Color Module Level 4, plus "transparent"
+NAMED_COLORS = frozenset({
+    "aliceblue", "antiquewhite", "aqua", "aquamarine", "azure", "beige", "bisque", "black",
+    "blanchedalmond", "blue", "blueviolet", "brown", "burlywood", "cadetblue", "chartreuse",
+    "chocolate", "coral", "cornflowerblue", "cornsilk", "crimson", "cyan", "darkblue", "darkcyan",
+    "darkgoldenrod", "darkgray", "darkgreen", "darkgrey", "darkkhaki", "darkmagenta",
+    "darkolivegreen", "darkorange", "darkorchid", "darkred", "darksalmon", "darkseagreen",
+    "darkslateblue", "darkslategray", "darkslategrey", "darkturquoise", "darkviolet", "deeppink",
+    "deepskyblue", "dimgray", "dimgrey", "dodgerblue", "firebrick", "floralwhite", "forestgreen",
+    "fuchsia", "gainsboro", "ghostwhite", "gold", "goldenrod", "gray", "green", "greenyellow",
+    "grey", "honeydew", "hotpink", "indianred", "indigo", "ivory", "khaki", "lavender",
+    "lavenderblush", "lawngreen", "lemonchiffon", "lightblue", "lightcoral", "lightcyan",
+    "lightgoldenrodyellow", "lightgray", "lightgreen", "lightgrey", "lightpink", "lightsalmon",
+    "lightseagreen", "lightskyblue", "lightslategray", "lightslategrey", "lightsteelblue",
+    "lightyellow", "lime", "limegreen", "linen", "magenta", "maroon", "mediumaquamarine",
+    "mediumblue", "mediumorchid", "mediumpurple", "mediumseagreen", "mediumslateblue",
+    "mediumspringgreen", "mediumturquoise", "mediumvioletred", "midnightblue", "mintcream",
+    "mistyrose", "moccasin", "navajowhite", "navy", "oldlace", "olive", "olivedrab", "orange",
+    "orangered", "orchid", "palegoldenrod", "palegreen", "paleturquoise", "palevioletred",
+    "papayawhip", "peachpuff", "peru", "pink", "plum", "powderblue", "purple", "rebeccapurple",
+    "red", "rosybrown", "royalblue", "saddlebrown", "salmon", "sandybrown", "seagreen", "seashell",
+    "sienna", "silver", "skyblue", "slateblue", "slategray", "slategrey", "snow", "springgreen",
+    "steelblue", "tan", "teal", "thistle", "tomato", "transparent", "turquoise", "violet", "wheat",
+    "white", "whitesmoke", "yellow", "yellowgreen",
+})
+
+# Functional color notations, by lowercase function name
+COLOR_FUNCTIONS = frozenset({
+    "rgb", "rgba", "hsl", "hsla", "hwb", "lab", "lch", "oklab", "oklch", "color",
+})
+
+# Properties whose identifiers name fonts or animations, so "Red" in
+# `font-family: Red Hat` is not a color
+NAME_PROPERTIES = frozenset({"font", "font-family", "animation", "animation-name"})
+
+_HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
+
+
+class Color(NamedTuple):
+    """
+    A color found in a CSS value.
+
+    Attributes:
+        kind: "hex", "function" or "named"
+        value: Normalized form: lowercase, hex colors expanded to 6 or 8
+            digits, function arguments with canonical spacing
+        token: The tinycss2 token the color was read from
+    """
+
+    kind: str
+    value: str
+    token: Any
+
+    @property
+    def text(self) -> str:
+        """The color as written in the source."""
+        return tinycss2.serialize([self.token])
+
+
+def _hex_color(token: Any) -> Optional[Color]:
+    digits = token.value
+    if len(digits) not in (3, 4, 6, 8) or not _HEX_DIGITS.issuperset(digits):
+        return None
+    normalized = digits.lower()
+    if len(normalized) < 6:
+        normalized = "".join(digit * 2 for digit in normalized)
+    return Color("hex", "#" + normalized, token)
+
+
+def _argument_text(token: Any) -> str:
+    token_type = token.type
+    if token_type == "number":
+        return token.representation
+    if token_type == "percentage":
+        return token.representation + "%"
+    if token_type == "dimension":
+        return token.representation + token.lower_unit
+    if token_type == "ident":
+        return token.lower_value
+    return tinycss2.serialize([token]).lower()
+
+
+def _function_color(token: Any) -> Color:
+    parts = []
+    for argument in token.arguments:
+        argument_type = argument.type
+        if argument_type == "whitespace" or argument_type == "comment":
+            continue
+        if argument_type == "literal" and argument.value == ",":
+            parts.append(", ")
+        elif argument_type == "literal" and argument.value == "/":
+            parts.append(" / ")
+        else:
+            if parts and parts[-1][-1] != " ":
+                parts.append(" ")
+            parts.append(_argument_text(argument))
+    return Color("function", f"{token.lower_name}({''.join(parts)})", token)
+
+
+def _collect(tokens: Iterable[Any], colors: List[Color]) -> List[Color]:
+    for token in tokens:
+        token_type = token.type
+        if token_type == "hash":
+            color = _hex_color(token)
+            if color is not None:
+                colors.append(color)
+        elif token_type == "ident":
+            if token.lower_value in NAMED_COLORS:
+                colors.append(Color("named", token.lower_value, token))
+        elif token_type == "function":
+            if token.lower_name in COLOR_FUNCTIONS:
+                colors.append(_function_color(token))
+            else:
+                _collect(token.arguments, colors)
+        elif token_type == "() block" or token_type == "[] block":
+            _collect(token.content, colors)
+    return colors
+
+
+def find_colors(tokens: Iterable[Any]) -> List[Color]:
+    """
+    Return every color in a list of component values, in source order.
+
+    Colors nested in other functions, such as gradients or var() fallbacks,
+    are found too; the arguments of a color function are not searched.
+
+    Args:
+        tokens: tinycss2 component values, e.g. a declaration's value
+
+    Returns:
+        A Color for each hash, color function and named color token
+    """
+    return _collect(tokens, [])
+
+
+def parse_colors(value: Union[str, List[Any]]) -> List[Color]:
+    """
+    Return the colors in a CSS value.
+
+    Args:
+        value: The value as CSS text or as tinycss2 component values
+
+    Returns:
+        List of Color objects in source order
+    """
+    if isinstance(value, str):
+        value = tinycss2.parse_component_value_list(value)
+    return find_colors(value)
@@ -0,0 +1,272 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Compact, read-only records of a parsed stylesheet.
+
+A CssDocument keeps every tinycss2 token of the sheet plus the caches built
+from them, which is several kilobytes per rule. A CompactDocument keeps
+what the extractors read and nothing else: a rule is a record holding its
+selector and a tuple of (name, value, important) declarations, with the
+selectors, names and values interned so repeated text is stored once.
+
+    doc = CompactDocument(css)
+    extract_all(doc, ["analysis", "colors", "fonts"])
+
+The read-only extractors and analyze_stylesheet run directly on the
+records. Functions that need the tokens, such as the modifier and the
+minifier, accept a CompactDocument too and parse its text again.
+"""
+
+import sys
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+from .colors import NAME_PROPERTIES, Color, parse_colors
+from .parser import CssDocument, as_document
+
+_intern = sys.intern
+
+
+class Declaration(NamedTuple):
+    """A declaration reduced to its name, stripped value text and !important flag."""
+
+    name: str
+    value: str
+    important: bool
+
+    type = "declaration"
+
+    @property
+    def lower_name(self) -> str:
+        return self.name.lower()
+
+
+class RuleRecord:
+    """
+    A qualified rule: its selector, declarations and nested rules.
+
+    `prelude` only keeps the comments of the selector, which is all that
+    extract_comments reads from it.
+    """
+
+    __slots__ = ("selector", "declarations", "children", "prelude")
+
+    type = "qualified-rule"
+
+    def __init__(self, selector: str, declarations: Tuple[Any, ...], children: Tuple[Any, ...], prelude: Tuple[Any, ...]):
+        self.selector = selector
+        self.declarations = declarations
+        self.children = children
+        self.prelude = prelude
+
+    @property
+    def content(self) -> Optional[Tuple[Any, ...]]:
+        # Only blocks holding nested rules are kept, so a rule with plain
+        # declarations has no content to descend into
+        return self.children or None
+
+
+class AtRuleRecord:
+    """
+    An at-rule: its keyword, prelude text and nested nodes.
+
+    `content` is None for statements such as @import and the tuple of
+    nested nodes otherwise. `prelude` keeps all tokens of a statement, for
+    extract_imports, and only the comments of a block at-rule.
+    """
+
+    __slots__ = ("at_keyword", "lower_at_keyword", "selector", "prelude", "children", "content")
+
+    type = "at-rule"
+
+    def __init__(self, at_keyword: str, selector: str, prelude: Tuple[Any, ...], has_block: bool):
+        self.at_keyword = at_keyword
+        self.lower_at_keyword = _intern(at_keyword.lower())
+        self.selector = selector
+        self.prelude = prelude
+        self.children: Tuple[Any, ...] = ()
+        self.content: Optional[Tuple[Any, ...]] = () if has_block else None
+
+
+class CommentRecord:
+    """A comment between rules."""
+
+    __slots__ = ("value",)
+
+    type = "comment"
+
+    def __init__(self, value: str):
+        self.value = value
+
+
+class ErrorRecord:
+    """A parse error, kept so the extractors report it as they do for tokens."""
+
+    __slots__ = ("kind", "message")
+
+    type = "error"
+
+    def __init__(self, kind: str, message: str):
+        self.kind = kind
+        self.message = message
+
+
+class _Whitespace:
+    __slots__ = ()
+
+    type = "whitespace"
+    value = " "
+
+
+# Whitespace between rules carries nothing the extractors read, so every
+# occurrence is the same object
+WHITESPACE = _Whitespace()
+
+_NO_TOKENS: Tuple[Any, ...] = ()
+_NO_COLORS: List[Color] = []
+
+
+def _comments(prelude: List[Any]) -> Tuple[Any, ...]:
+    comments = tuple(CommentRecord(token.value) for token in prelude if token.type == "comment")
+    return comments or _NO_TOKENS
+
+
+def _declaration(doc: CssDocument, node: Any) -> Any:
+    if node.type == "declaration":
+        return Declaration(_intern(node.name), _intern(doc.value(node)), node.important)
+    return ErrorRecord(node.kind, node.message)
+
+
+def _record(doc: CssDocument, node: Any) -> Tuple[Any, Optional[List[Any]]]:
+    # Returns the record and the nodes whose records become its children
+    if node.type == "qualified-rule":
+        declarations = tuple(
+            _declaration(doc, item) for item in doc.declarations(node) if item.type in ("declaration", "error")
+        )
+        nested = any(token.type == "{} block" for token in node.content)
+        record = RuleRecord(_intern(doc.selector(node)), declarations, _NO_TOKENS, _comments(node.prelude))
+        return record, doc.children(node) if nested else None
+    if node.type == "at-rule":
+        has_block = node.content is not None
+        prelude = _comments(node.prelude) if has_block else tuple(node.prelude)
+        record = AtRuleRecord(_intern(node.at_keyword), _intern(doc.selector(node)), prelude, has_block)
+        return record, doc.children(node) if has_block else None
+    if node.type == "comment":
+        return CommentRecord(node.value), None
+    if node.type == "error":
+        return ErrorRecord(node.kind, node.message), None
+    return WHITESPACE, None
+
+
+def compact_rules(doc: CssDocument) -> List[Any]:
+    """
+    Convert the rule tree of a document into records.
+
+    The conversion is iterative, like css_tools.traversal.walk, so deeply
+    nested stylesheets cannot hit the recursion limit.
+
+    Args:
+        doc: The CssDocument to convert; its caches are used and filled
+
+    Returns:
+        List of records for the top-level nodes
+    """
+    top: List[Any] = []
+    # (remaining nodes, records converted so far, record receiving them)
+    stack: List[Tuple[Any, List[Any], Any]] = [(iter(doc.rules), top, None)]
+    while stack:
+        iterator, records, parent = stack[-1]
+        node = next(iterator, None)
+        if node is None:
+            stack.pop()
+            if parent is not None:
+                parent.children = tuple(records)
+                if parent.type == "at-rule":
+                    parent.content = parent.children
+            continue
+        record, nested = _record(doc, node)
+        records.append(record)
+        if nested:
+            stack.append((iter(nested), [], record))
+    return top
+
+
+class CompactDocument(CssDocument):
+    """
+    A read-only CssDocument made of compact records instead of tokens.
+
+    The stylesheet is parsed once, converted and the tokens are dropped, so
+    a CompactDocument takes a fraction of the memory of a CssDocument. It
+    does not go through the parse cache.
+
+    Args:
+        css: The CSS code as string or bytes
+    """
+
+    compact = True
+
+    def __init__(self, css: Union[str, bytes]):
+        doc = CssDocument(css)
+        self._init_from(doc)
+
+    @classmethod
+    def from_document(cls, doc: CssDocument) -> "CompactDocument":
+        """
+        Build a compact copy of a parsed document, reusing its cached views.
+
+        Args:
+            doc: A CssDocument; it is not modified apart from its caches
+
+        Returns:
+            A CompactDocument for the same stylesheet
+        """
+        compact = cls.__new__(cls)
+        compact._init_from(as_document(doc))
+        return compact
+
+    def _init_from(self, doc: CssDocument) -> None:
+        self.text = doc.text
+        self._size_bytes = doc._size_bytes
+        self._spans = None
+        self.rules = compact_rules(doc)
+        self._reset_caches()
+
+    def _reset_caches(self) -> None:
+        super()._reset_caches()
+        # Colors by value text, so a value repeated across rules is parsed once
+        self._value_colors: Dict[str, List[Color]] = {}
+
+    def selector(self, rule: Any) -> str:
+        """Return the selector text of a rule, or the prelude text of an at-rule."""
+        return rule.selector
+
+    def declarations(self, rule: Any) -> Tuple[Any, ...]:
+        """Return the declarations and declaration errors of a rule."""
+        return getattr(rule, "declarations", _NO_TOKENS)
+
+    def value(self, declaration: Any) -> str:
+        """Return the stripped value text of a declaration."""
+        return declaration.value
+
+    def colors(self, declaration: Any) -> List[Color]:
+        """Return the colors found in a declaration's value."""
+        if declaration.lower_name in NAME_PROPERTIES:
+            return _NO_COLORS
+        colors = self._value_colors.get(declaration.value)
+        if colors is None:
+            # Most values hold no color, and they all share one empty list
+            colors = parse_colors(declaration.value) or _NO_COLORS
+            self._value_colors[declaration.value] = colors
+        return colors
+
+    def children(self, rule: Any) -> Tuple[Any, ...]:
+        """Return the records nested in a rule's block."""
+        return rule.children
+
+    @property
+    def selector_index(self) -> Any:
+        raise Exception("A CompactDocument has no tokens to index; use as_document(doc) first")
+
+    @property
+    def spans(self) -> Any:
+        raise Exception("A CompactDocument has no source positions; use as_document(doc) first")
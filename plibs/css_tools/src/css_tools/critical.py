@@ -0,0 +1,110 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Split a stylesheet into critical and non-critical CSS."""
+
+import tinycss2
+from typing import Any, Iterable, List, Set, Tuple, Union
+from .emitter import Emitter
+from .parser import CssDocument, as_document
+from .selector_index import normalize_selector, selector_members
+from .traversal import has_nested_rules
+from .validation import braces_balanced
+
+
+def _members(prelude: List[Any]) -> List[Tuple[str, str]]:
+    """Return (normalized, source text) for each member of a selector list."""
+    groups: List[List[Any]] = [[]]
+    for token in prelude:
+        if token.type == "literal" and token.value == ",":
+            groups.append([])
+        else:
+            groups[-1].append(token)
+    return [(normalize_selector(group), tinycss2.serialize(group).strip()) for group in groups]
+
+
+def _selector_set(selectors: Iterable[Union[str, bytes]]) -> Set[str]:
+    wanted = set()
+    for selector in selectors:
+        if isinstance(selector, bytes):
+            selector = selector.decode('utf-8')
+        wanted.update(selector_members(selector))
+    return wanted
+
+
+def partition(css: Union[str, bytes, CssDocument], selectors: Iterable[Union[str, bytes]]) -> Tuple[str, str]:
+    """
+    Split a stylesheet into the rules of some selectors and everything else.
+
+    The sheet is walked once. Rules are matched per member of their selector
+    list, ignoring insignificant whitespace: a rule whose members are all
+    critical goes to the critical CSS, and a rule that only has some
+    critical members is split in two, with the same declarations on each
+    side. Rules nested in @media, @supports and other grouping at-rules are
+    matched too, and the at-rule is repeated on each side that keeps some
+    of its rules. Everything else (@import, @font-face, @keyframes, comments)
+    stays in the non-critical CSS.
+
+    Args:
+        css: The CSS code as string or bytes, or a CssDocument
+        selectors: The critical selectors; comma lists are split into members
+
+    Returns:
+        Tuple of (critical_css, rest_css)
+
+    Raises:
+        Exception: If the CSS cannot be properly parsed
+    """
+    doc = as_document(css)
+    wanted = _selector_set(selectors)
+
+    # Validate CSS syntax before proceeding
+    if not braces_balanced(doc.text):
+        raise Exception("CSS syntax error: Unbalanced braces")
+    for rule in doc.rules:
+        if rule.type == 'error':
+            raise Exception(f"CSS parse error: {getattr(rule, 'message', 'Unknown error')}")
+
+    critical = Emitter("preserve")
+    rest = Emitter("preserve")
+
+    def emit_rule(emitter: Emitter, selector: str, rule: Any, depth: int) -> None:
+        emitter.rule_start(selector, depth)
+        emitter.preserved(doc.declarations(rule), depth)
+        emitter.rule_end(depth)
+
+    def process(rules: List[Any], depth: int) -> None:
+        for rule in rules:
+            if rule.type == "qualified-rule":
+                members = _members(rule.prelude)
+                matched = [text for key, text in members if key in wanted]
+                if not matched:
+                    emit_rule(rest, doc.selector(rule), rule, depth)
+                elif len(matched) == len(members):
+                    emit_rule(critical, doc.selector(rule), rule, depth)
+                else:
+                    emit_rule(critical, ", ".join(matched), rule, depth)
+                    emit_rule(rest, ", ".join(text for key, text in members if key not in wanted), rule, depth)
+            elif rule.type == "at-rule" and has_nested_rules(rule):
+                prelude = tinycss2.serialize(rule.prelude).strip()
+                marks = []
+                for emitter in (critical, rest):
+                    marks.append(emitter.mark())
+                    emitter.block_start(rule.at_keyword, prelude, depth)
+
+                process(doc.children(rule), depth + 1)
+
+                # Keep the block only on the sides that received rules
+                for emitter, mark in zip((critical, rest), marks):
+                    if emitter.is_blank_since(mark + 1):
+                        emitter.truncate(mark)
+                    else:
+                        emitter.block_end(depth)
+            elif depth == 0:
+                rest.raw(rule)
+            elif rule.type != "whitespace":
+                rest.write(rest.indent * depth + tinycss2.serialize([rule]).strip() + "\n")
+
+    process(doc.rules, 0)
+    return critical.getvalue().strip(), rest.getvalue().strip()
@@ -0,0 +1,271 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Run a batch of css_tools operations in one call.
+
+A caller crossing a bridge, such as Elixir through Pythonx, pays for every
+crossing: the Python source is compiled, the CSS is converted and each
+result is decoded separately. run() takes named documents and an ordered
+list of operations on them, and returns every result at once:
+
+    run([
+        ("add_property_to_selector", {"doc": "app", "selector": ".hide-scrollbar",
+                                      "property_name": "display", "property_value": "none"}),
+        ("remove_selector", {"doc": "app", "selector": ".legacy"}),
+        ("analyze_stylesheet", {"doc": "app"}),
+        ("extract_colors", {"doc": "admin"}),
+    ], documents={"app": app_css, "admin": admin_css})
+
+An operation is an `(op, args)` pair or a dict with an "op" key plus the
+args, like the edits of modifier.apply_edits. Operations are named after
+the css_tools functions and take their keyword arguments, with the CSS
+argument given as:
+
+    doc    name of a document; it is parsed once and reused by every
+           operation on it
+    css    inline CSS, used by this operation only
+    docs   names of documents, for merge_stylesheets (instead of css_list)
+    into   name of the document receiving the CSS an operation returns
+
+Operations returning CSS store it back into their document (or `into`), so
+later operations see the change, and report None as their result; the
+texts of all changed documents are returned once, at the end.
+
+A failing operation reports its own message: "Failed to parse CSS: ..."
+for a parse error, "<op> failed: ..." for any other error of the function,
+and the message as it is for a batch that names an unknown operation or
+document.
+"""
+
+import importlib
+from typing import Any, Dict, List, Optional, Tuple, Union
+from .parser import CssDocument, as_document
+
+# Operation kinds: "transform" operations return CSS that replaces the
+# document, "read" operations return a result about the document
+TRANSFORM = "transform"
+READ = "read"
+
+# Maps operation names to (module, function, kind). Modules are imported on
+# first use, like the package's own exports.
+OPERATIONS: Dict[str, Tuple[str, str, str]] = {
+    **{name: ("modifier", name, TRANSFORM) for name in (
+        "add_property_to_selector", "remove_property_from_selector", "remove_selector", "modify_property_value",
+        "add_prefix_to_property", "replace_selector_rule", "apply_edits", "merge_stylesheets",
+    )},
+    **{name: ("minifier", name, TRANSFORM) for name in (
+        "minify_css", "beautify_css", "sort_properties", "remove_duplicates",
+    )},
+    **{name: ("parser", name, READ) for name in (
+        "analyze_stylesheet", "selector_exists", "get_selector_properties", "extract_comments",
+    )},
+    **{name: ("extractor", name, READ) for name in (
+        "extract_colors", "extract_media_queries", "extract_animations", "extract_unused_selectors",
+        "extract_fonts", "extract_selectors_by_property", "extract_all",
+    )},
+    "add_prefixes": ("prefixer", "add_prefixes", TRANSFORM),
+    "optimize_css": ("passes", "optimize_css", TRANSFORM),
+    "validate_css": ("dispatch", "_validate", READ),
+    "find_css_errors": ("validation", "find_css_errors", READ),
+    "text": ("dispatch", "_text", READ),
+}
+
+# Arguments naming the CSS an operation works on, rather than passed to it
+_TARGET_ARGUMENTS = ("doc", "css", "docs", "into")
+
+# Messages the css_tools functions start their parse errors with
+_PARSE_ERRORS = ("CSS syntax error", "CSS parse error")
+_PARSE_ERROR_PREFIX = "Failed to parse CSS: "
+
+
+def _validate(css: Union[str, bytes, CssDocument]) -> bool:
+    # validate_css returns the whole text, which a batch does not need back
+    from .extractor import validate_css
+    validate_css(css)
+    return True
+
+
+def _text(css: Union[str, bytes, CssDocument]) -> str:
+    return as_document(css, allow_compact=True).text
+
+
+def _decode(value: Any) -> Any:
+    """Convert bytes, as binaries arrive from Elixir, to strings, inside lists and dicts too."""
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    if isinstance(value, (list, tuple)):
+        return [_decode(item) for item in value]
+    if isinstance(value, dict):
+        return {_decode(key): _decode(item) for key, item in value.items()}
+    return value
+
+
+def _failure(name: str, error: Exception) -> Exception:
+    """Name the operation in the message of an error it raised."""
+    message = str(error)
+    if message.startswith(_PARSE_ERROR_PREFIX):
+        return Exception(message)
+    if message.startswith(_PARSE_ERRORS):
+        return Exception(f"{_PARSE_ERROR_PREFIX}{message}")
+    return Exception(f"{name} failed: {message}")
+
+
+def _split_op(op: Any) -> Tuple[str, Dict[str, Any]]:
+    if isinstance(op, dict):
+        arguments = _decode(op)
+        name = arguments.pop("op", None)
+    elif not isinstance(op, (list, tuple)) or not 1 <= len(op) <= 2:
+        raise Exception(f"An operation must be an (op, args) pair or a dict with an \"op\" key, got: {op!r}")
+    else:
+        name, arguments = _decode(op[0]), _decode(op[1]) if len(op) > 1 else {}
+    if name not in OPERATIONS:
+        raise Exception(f"Unknown operation: {name}")
+    if not isinstance(arguments, dict):
+        raise Exception(f"Arguments of {name} must be a dict")
+    return name, arguments
+
+
+class Dispatcher:
+    """
+    Named documents and the operations run on them.
+
+    A document is kept as the CssDocument of its current text, so every
+    operation on it after the first reuses the parse and its caches. A
+    Dispatcher can be kept between batches to keep its documents warm.
+
+    Args:
+        documents: Initial documents, mapping names to CSS as string or
+                   bytes, or CssDocuments
+    """
+
+    def __init__(self, documents: Optional[Dict[Any, Union[str, bytes, CssDocument]]] = None):
+        self.documents: Dict[str, Union[str, CssDocument]] = {}
+        self.changed: Dict[str, None] = {}  # Names of changed documents, in order
+        for name, css in (documents or {}).items():
+            self.set_document(name, css)
+        self.changed.clear()
+
+    def set_document(self, name: Any, css: Union[str, bytes, CssDocument]) -> None:
+        """Add or replace a document; it is parsed when an operation first needs it."""
+        name = _decode(name)
+        self.documents[name] = css if isinstance(css, CssDocument) else _decode(css)
+        self.changed[name] = None
+
+    def remove_document(self, name: Any) -> None:
+        """Forget a document."""
+        name = _decode(name)
+        self.documents.pop(name, None)
+        self.changed.pop(name, None)
+
+    def document(self, name: str) -> CssDocument:
+        """
+        Return the parsed document of a name.
+
+        Raises:
+            Exception: If there is no document with that name
+        """
+        css = self.documents.get(name)
+        if css is None:
+            raise Exception(f"Unknown document: {name}")
+        if not isinstance(css, CssDocument):
+            css = self.documents[name] = as_document(css)
+        return css
+
+    def text(self, name: str) -> str:
+        """Return the current text of a document."""
+        css = self.documents.get(name)
+        if css is None:
+            raise Exception(f"Unknown document: {name}")
+        return css.text if isinstance(css, CssDocument) else css
+
+    def apply(self, op: Any) -> Any:
+        """
+        Run one operation.
+
+        Args:
+            op: An `(op, args)` pair or a dict with an "op" key
+
+        Returns:
+            The result of the operation, or None if it stored CSS into a
+            document
+
+        Raises:
+            Exception: If the operation is unknown, its document is missing
+                       or the operation itself fails; the message of a
+                       failing operation starts with "Failed to parse CSS: "
+                       for a parse error and "<op> failed: " otherwise
+        """
+        name, arguments = _split_op(op)
+        module, function_name, kind = OPERATIONS[name]
+        function = getattr(importlib.import_module(f".{module}", __package__), function_name)
+
+        doc, css, docs, into = (arguments.pop(key, None) for key in _TARGET_ARGUMENTS)
+        if name == "merge_stylesheets":
+            css = [self.document(source) for source in docs] if docs is not None else arguments.pop("css_list", [])
+        elif doc is not None:
+            css = self.document(doc)
+        elif css is None:
+            raise Exception(f"Operation {name} needs a doc or css argument")
+        try:
+            result = function(css, **arguments)
+        except Exception as e:
+            raise _failure(name, e) from e
+
+        target = into if into is not None else doc if kind == TRANSFORM else None
+        if target is None:
+            return result
+        self.set_document(target, result)
+        return None
+
+    def run(self, ops: List[Any], stop_on_error: bool = False) -> Dict[str, Any]:
+        """
+        Run operations in order and collect their results.
+
+        A failing operation does not stop the batch unless `stop_on_error`
+        is set; its document is left as it was before the operation.
+
+        Args:
+            ops: Ordered list of operations
+            stop_on_error: Skip the remaining operations after the first error
+
+        Returns:
+            Dictionary with "results", one {"status": "ok", "result": ...} or
+            {"status": "error", "message": ...} per operation, and
+            "documents", the texts of the documents changed by the batch
+        """
+        self.changed.clear()
+        results = []
+        failed = False
+        for op in ops:
+            if failed and stop_on_error:
+                results.append({"status": "error", "message": "Skipped after an earlier error"})
+                continue
+            try:
+                results.append({"status": "ok", "result": self.apply(op)})
+            except Exception as e:
+                failed = True
+                results.append({"status": "error", "message": str(e)})
+        return {"results": results, "documents": {name: self.text(name) for name in self.changed}}
+
+
+def run(
+    ops: List[Any],
+    documents: Optional[Dict[Any, Union[str, bytes, CssDocument]]] = None,
+    stop_on_error: bool = False
+) -> Dict[str, Any]:
+    """
+    Run a batch of operations on named documents, see the module docstring.
+
+    Args:
+        ops: Ordered list of `(op, args)` pairs or dicts with an "op" key
+        documents: Mapping of document names to CSS as string or bytes, or
+                   CssDocuments
+        stop_on_error: Skip the remaining operations after the first error
+
+    Returns:
+        Dictionary with the "results" of the operations, in order, and the
+        texts of the changed "documents"
+    """
+    return Dispatcher(documents).run(ops, stop_on_error)
@@ -0,0 +1,158 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Buffered CSS output shared by every serializer in css_tools."""
+
+import tinycss2
+from typing import Any, List, Optional, TextIO
+from . import instrumentation
+
+STYLES = ("minified", "pretty", "preserve")
+
+
+class Emitter:
+    """
+    Write CSS in one of three styles at any nesting depth.
+
+    - "minified": no whitespace and no comments, e.g. `a{color:red;}`
+    - "pretty": one declaration per line, blank line between rules
+    - "preserve": declarations are written as they appear in the source,
+      re-indented to the nesting depth
+
+    Output is collected in a list and joined once, so emitting is linear in
+    the size of the output. With a `sink`, the buffer is written to the sink
+    on every flush() instead, which serializers call after each top-level
+    rule.
+
+    Args:
+        style: One of "minified", "pretty" or "preserve"
+        sink: Optional file-like object receiving the output
+        indent: Indentation unit of the pretty and preserve styles
+    """
+
+    def __init__(self, style: str = "pretty", sink: Optional[TextIO] = None, indent: str = "    "):
+        if style not in STYLES:
+            raise Exception(f"Unknown output style: {style}")
+        self.style = style
+        self.sink = sink
+        self.indent = indent
+        self.parts: List[str] = []
+
+    def write(self, text: str) -> None:
+        """Append raw text to the output."""
+        self.parts.append(text)
+
+    def _indent(self, depth: int) -> str:
+        return "" if self.style == "minified" else self.indent * depth
+
+    def mark(self) -> int:
+        """Return a position in the buffer that truncate() can return to."""
+        return len(self.parts)
+
+    def is_blank_since(self, mark: int) -> bool:
+        """Whether nothing but whitespace was written since `mark`."""
+        return not "".join(self.parts[mark:]).strip()
+
+    def truncate(self, mark: int) -> None:
+        """Drop everything written since `mark`."""
+        del self.parts[mark:]
+
+    def rule_start(self, selector: str, depth: int = 0) -> None:
+        """Open a rule or declaration block."""
+        if self.style == "minified":
+            self.parts.append(f"{selector}{{")
+        else:
+            self.parts.append(f"{self._indent(depth)}{selector} {{\n")
+
+    def rule_end(self, depth: int = 0) -> None:
+        """Close a rule opened with rule_start()."""
+        if self.style == "minified":
+            self.parts.append("}")
+        elif self.style == "pretty":
+            self.parts.append(f"{self._indent(depth)}}}\n\n")
+        else:
+            self.parts.append(f"\n{self._indent(depth)}}}\n")
+
+    def block_start(self, at_keyword: str, prelude: str, depth: int = 0) -> None:
+        """Open an at-rule block such as @media."""
+        if self.style == "minified":
+            self.parts.append(f"@{at_keyword} {prelude}{{")
+        else:
+            self.parts.append(f"{self._indent(depth)}@{at_keyword} {prelude} {{\n")
+
+    def block_end(self, depth: int = 0) -> None:
+        """Close an at-rule block opened with block_start()."""
+        if self.style == "minified":
+            self.parts.append("}")
+        elif self.style == "pretty":
+            self.parts.append(f"{self._indent(depth)}}}\n\n")
+        else:
+            self.parts.append(f"\n{self._indent(depth)}}}\n")
+
+    def statement(self, at_keyword: str, prelude: str, depth: int = 0) -> None:
+        """Write an at-rule without a block, such as @import."""
+        if self.style == "minified":
+            self.parts.append(f"@{at_keyword} {prelude};")
+        elif self.style == "pretty":
+            self.parts.append(f"{self._indent(depth)}@{at_keyword} {prelude};\n\n")
+        else:
+            self.parts.append(f"{self._indent(depth)}@{at_keyword} {prelude};\n")
+
+    def declaration(self, name: str, value: str, important: bool = False, depth: int = 0) -> None:
+        """Write one declaration of a rule opened at `depth`."""
+        if self.style == "minified":
+            self.parts.append(f"{name}:{value}{'!important' if important else ''};")
+        else:
+            self.parts.append(f"{self._indent(depth + 1)}{name}: {value}{' !important' if important else ''};\n")
+
+    def comment(self, text: str, depth: int = 0) -> None:
+        """Write a comment on its own line; minified output drops it."""
+        if self.style != "minified":
+            self.parts.append(f"{self._indent(depth)}/* {text} */\n")
+
+    def preserved(self, nodes: List[Any], depth: int = 0) -> None:
+        """
+        Write the body of a rule opened at `depth` as it appears in the source.
+
+        Every non-blank line of the serialized nodes is stripped and
+        re-indented one level deeper than the rule.
+        """
+        prefix = self._indent(depth + 1)
+        with instrumentation.phase("serialize"):
+            text = tinycss2.serialize(nodes)
+            self.parts.append("\n".join(prefix + line.strip() for line in text.strip().splitlines() if line.strip()))
+
+    def preserved_text(self, text: str, depth: int = 0) -> None:
+        """
+        Write already serialized rule body text as it is.
+
+        Unlike preserved(), lines are neither stripped nor re-indented, so
+        multi-line values and comments are unchanged. Only blank lines
+        around the text are dropped, and a body that starts on the line of
+        the rule is indented one level deeper than the rule.
+        """
+        body = text.strip()
+        if not body:
+            return
+        leading = text[:len(text) - len(text.lstrip())]
+        prefix = leading.rsplit("\n", 1)[1] if "\n" in leading else self._indent(depth + 1)
+        self.parts.append(prefix + body)
+
+    def raw(self, node: Any) -> None:
+        """Write a node exactly as tinycss2 serializes it."""
+        with instrumentation.phase("serialize"):
+            self.parts.append(tinycss2.serialize([node]))
+
+    def flush(self) -> None:
+        """Write the buffered output to the sink, if there is one."""
+        if self.sink is not None and self.parts:
+            with instrumentation.phase("serialize"):
+                self.sink.write("".join(self.parts))
+            self.parts.clear()
+
+    def getvalue(self) -> str:
+        """Return the buffered output as one string."""
+        instrumentation.count("serializes")
+        with instrumentation.phase("serialize"):
+            return "".join(self.parts)
@@ -4,18 +4,66 @@
 
 """CSS extraction utilities using tinycss2."""
 
+import mmap
+import os
 import tinycss2
 import re
-from typing import Dict, List, Any, Tuple, Optional, Union, Set
-from .parser import parse_stylesheet, get_selector_text, get_rule_declarations
+from typing import TYPE_CHECKING, Dict, List, Any, Tuple, Optional, Union, Set
+from .parser import (
+    DEFAULT_STREAM_CHUNK_SIZE, CssDocument, StreamedDocument, as_document, get_selector_text, get_rule_declarations
+)
+from .traversal import child_rules, has_block
+from .validation import braces_balanced, find_css_errors
+from .visitors import Visitor, create_visitor, register_visitor, run_visitors
 
+if TYPE_CHECKING:
+    from .usage_index import UsageIndex
 
-def extract_colors(css: Union[str, bytes]) -> Dict[str, List[str]]:
+# Pseudo-classes and pseudo-elements, with their arguments; an escaped
+# colon is part of a name, as in .md\:flex
+_PSEUDO = re.compile(r'(?<!\\)::?[a-zA-Z-]+(\([^)]*\))?')
+# Selector list separators and combinators other than descendant
+_COMBINATOR = re.compile(r'\s*[,>+~]\s*')
+
+
+@register_visitor("colors")
+class ColorsVisitor(Visitor):
+    """Collect color declarations per selector, including nested rules."""
+
+    color_properties = [
+        'color', 'background-color', 'border-color', 'border-top-color',
+        'border-right-color', 'border-bottom-color', 'border-left-color',
+        'outline-color', 'text-decoration-color', 'box-shadow', 'text-shadow'
+    ]
+
+    def __init__(self, doc):
+        super().__init__(doc)
+        self.colors = {}
+
+    def descend(self, node):
+        # Process media queries and other at-rules with nested content
+        return has_block(node)
+
+    def visit_declaration(self, declaration, rule, ancestors):
+        # Check if it's a color property or has a color value
+        is_color_property = declaration.name in self.color_properties
+        has_color_value = bool(self.doc.colors(declaration))
+        if is_color_property or has_color_value:
+            selector = self.doc.selector(rule)
+            if selector not in self.colors:
+                self.colors[selector] = []
+            self.colors[selector].append(f"{declaration.name}: {self.doc.value(declaration)}")
+
+    def result(self):
+        return self.colors
+
+
+def extract_colors(css: Union[str, bytes, CssDocument]) -> Dict[str, List[str]]:
     """
     Extract all color values from CSS, including those in nested selectors.
 
     Args:
-        css: The CSS code as string or bytes
+        css: The CSS code as string or bytes, or a CssDocument
 
     Returns:
         Dictionary mapping selectors to their color properties
@@ -23,79 +71,71 @@ def extract_colors(css: Union[str, bytes]) -> Dict[str, List[str]]:
     Raises:
         Exception: If the CSS cannot be properly parsed
     """
-    if isinstance(css, bytes):
-        css = css.decode('utf-8')
+    doc = as_document(css, allow_compact=True)
 
     # Validate CSS syntax before proceeding
-    if css.count('{') != css.count('}'):
+    if not braces_balanced(doc.text):
         raise Exception("CSS syntax error: Unbalanced braces")
 
-    # Parse CSS for analysis
-    rules = parse_stylesheet(css)
-
     # Check for parse errors
-    for rule in rules:
+    for rule in doc.rules:
         if hasattr(rule, 'type') and rule.type == 'error':
             raise Exception(f"CSS parse error: {getattr(rule, 'message', 'Unknown error')}")
 
-    colors = {}
+    return run_visitors(doc, {"colors": ColorsVisitor(doc)})["colors"]
 
-    # Regular expressions for different color formats
-    hex_pattern = r'#([0-9a-fA-F]{3}|[0-9a-fA-F]{6}|[0-9a-fA-F]{8})'
-    rgb_pattern = r'rgb\(\s*\d+\s*,\s*\d+\s*,\s*\d+\s*\)'
-    rgba_pattern = r'rgba\(\s*\d+\s*,\s*\d+\s*,\s*\d+\s*,\s*[0-9.]+\s*\)'
-    hsl_pattern = r'hsl\(\s*\d+\s*,\s*\d+%\s*,\s*\d+%\s*\)'
-    hsla_pattern = r'hsla\(\s*\d+\s*,\s*\d+%\s*,\s*\d+%\s*,\s*[0-9.]+\s*\)'
 
-    color_properties = [
-        'color', 'background-color', 'border-color', 'border-top-color',
-        'border-right-color', 'border-bottom-color', 'border-left-color',
-        'outline-color', 'text-decoration-color', 'box-shadow', 'text-shadow'
-    ]
+@register_visitor("media_queries")
+class MediaQueriesVisitor(Visitor):
+    """Collect the rules of every top-level @media block by condition."""
 
-    # Recursive function to process rules
-    def process_rules(rule_list):
-        for rule in rule_list:
-            if rule.type == "qualified-rule":
-                selector = get_selector_text(rule)
-                declarations = get_rule_declarations(rule)
-                for decl in declarations:
-                    if decl.type == "declaration":
-                        value = tinycss2.serialize(decl.value).strip()
-                        # Check if it's a color property or has a color value
-                        is_color_property = decl.name in color_properties
-                        has_color_value = (
-                            re.search(hex_pattern, value) or
-                            re.search(rgb_pattern, value) or
-                            re.search(rgba_pattern, value) or
-                            re.search(hsl_pattern, value) or
-                            re.search(hsla_pattern, value) or
-                            value in ['black', 'white', 'red', 'green', 'blue', 'yellow',
-                                     'purple', 'orange', 'brown', 'gray', 'transparent']
-                        )
-                        if is_color_property or has_color_value:
-                            if selector not in colors:
-                                colors[selector] = []
-                            colors[selector].append(f"{decl.name}: {value}")
-
-            # Process media queries and other at-rules with nested content
-            elif rule.type == "at-rule" and rule.content is not None:
-                # Parse nested rules
-                nested_rules = parse_stylesheet(tinycss2.serialize(rule.content))
-                # Recursively process nested rules
-                process_rules(nested_rules)
-
-    # Start processing rules
-    process_rules(rules)
-
-    return colors
-
-def extract_media_queries(css: Union[str, bytes]) -> Dict[str, List[Dict[str, Any]]]:
+    def __init__(self, doc):
+        super().__init__(doc)
+        self.media_queries = {}
+
+    def visit_at_rule(self, rule, ancestors):
+        if ancestors or rule.lower_at_keyword != "media":
+            return
+
+        condition = self.doc.selector(rule)
+
+        if condition not in self.media_queries:
+            self.media_queries[condition] = []
+
+        # Parse the content of the media query
+        if hasattr(rule, 'content') and rule.content:
+            try:
+                inner_rules = self.doc.children(rule)
+
+                # Check for parse errors in inner rules
+                for inner_rule in inner_rules:
+                    if hasattr(inner_rule, 'type') and inner_rule.type == 'error':
+                        raise Exception(f"CSS parse error in media query: {getattr(inner_rule, 'message', 'Unknown error')}")
+
+                for inner_rule in inner_rules:
+                    if inner_rule.type == "qualified-rule":
+                        props = {}
+                        for decl in self.doc.declarations(inner_rule):
+                            if decl.type == "declaration":
+                                props[decl.name] = self.doc.value(decl)
+
+                        self.media_queries[condition].append({
+                            "selector": self.doc.selector(inner_rule),
+                            "properties": props
+                        })
+            except Exception as e:
+                raise Exception(f"Error parsing media query content: {str(e)}")
+
+    def result(self):
+        return self.media_queries
+
+
+def extract_media_queries(css: Union[str, bytes, CssDocument]) -> Dict[str, List[Dict[str, Any]]]:
     """
     Extract all media queries and their contents.
 
     Args:
-        css: The CSS code as string or bytes
+        css: The CSS code as string or bytes, or a CssDocument
 
     Returns:
         Dictionary mapping media query conditions to their rules
@@ -103,68 +143,30 @@ def extract_media_queries(css: Union[str, bytes]) -> Dict[str, List[Dict[str, An
     Raises:
         Exception: If the CSS cannot be properly parsed
     """
-    if isinstance(css, bytes):
-        css = css.decode('utf-8')
+    doc = as_document(css, allow_compact=True)
 
     # Validate CSS syntax before proceeding
     # Check for unbalanced braces - a common CSS error
-    if css.count('{') != css.count('}'):
+    if not braces_balanced(doc.text):
         raise Exception("CSS syntax error: Unbalanced braces")
 
-    rules = parse_stylesheet(css)
-
     # Check for parse errors
-    for rule in rules:
+    for rule in doc.rules:
         if hasattr(rule, 'type') and rule.type == 'error':
             raise Exception(f"CSS parse error: {getattr(rule, 'message', 'Unknown error')}")
 
-    media_queries = {}
-
-    for rule in rules:
-        if rule.type == "at-rule" and rule.lower_at_keyword == "media":
-            condition = tinycss2.serialize(rule.prelude).strip()
+    return run_visitors(doc, {"media_queries": MediaQueriesVisitor(doc)})["media_queries"]
 
-            if condition not in media_queries:
-                media_queries[condition] = []
 
-            # Parse the content of the media query
-            if hasattr(rule, 'content') and rule.content:
-                try:
-                    inner_rules = tinycss2.parse_stylesheet(
-                        rule.content, skip_whitespace=False, skip_comments=False
-                    )
-
-                    # Check for parse errors in inner rules
-                    for inner_rule in inner_rules:
-                        if hasattr(inner_rule, 'type') and inner_rule.type == 'error':
-                            raise Exception(f"CSS parse error in media query: {getattr(inner_rule, 'message', 'Unknown error')}")
-
-                    for inner_rule in inner_rules:
-                        if inner_rule.type == "qualified-rule":
-                            selector = get_selector_text(inner_rule)
-                            declarations = get_rule_declarations(inner_rule)
-
-                            props = {}
-                            for decl in declarations:
-                                if decl.type == "declaration":
-                                    props[decl.name] = tinycss2.serialize(decl.value).strip()
-
-                            media_queries[condition].append({
-                                "selector": selector,
-                                "properties": props
-                            })
-                except Exception as e:
-                    raise Exception(f"Error parsing media query content: {str(e)}")
-
-    return media_queries
-
-
-def validate_css(css: Union[str, bytes]) -> str:
+def validate_css(css: Union[str, bytes, CssDocument]) -> str:
     """
     Validates CSS syntax and returns decoded string.
 
+    Use css_tools.validation.find_css_errors to get every error with its
+    position instead of the first one.
+
     Args:
-        css: The CSS code as string or bytes
+        css: The CSS code as string or bytes, or a CssDocument
 
     Returns:
         Decoded CSS string
@@ -172,41 +174,20 @@ def validate_css(css: Union[str, bytes]) -> str:
     Raises:
         Exception: If the CSS cannot be properly parsed
     """
+    doc = as_document(css)
+    errors = [error for error in find_css_errors(doc) if error["severity"] == "error"]
 
-    if isinstance(css, bytes):
-        css = css.decode('utf-8')
+    # Report the first problem of the first check that finds one, braces
+    # first, then rules that do not parse, then missing semicolons
+    for kind in ("unbalanced-braces", "parse-error", "missing-semicolon"):
+        for error in errors:
+            if error["kind"] == kind:
+                if kind == "unbalanced-braces":
+                    raise Exception("CSS syntax error: Unbalanced braces")
+                raise Exception(error["message"])
 
-    # Check for unbalanced braces - a common CSS error
-    if css.count('{') != css.count('}'):
-        raise Exception("CSS syntax error: Unbalanced braces")
+    return doc.text
 
-    # Parse the CSS to detect syntax errors
-    rules = tinycss2.parse_stylesheet(css, skip_whitespace=False, skip_comments=False)
-    check_parse_errors(rules)
-
-    # Check each rule for proper declaration syntax
-    for rule in rules:
-        if rule.type == 'qualified-rule' and rule.content:
-            # Parse declarations, keeping comments to avoid issues
-            declarations = tinycss2.parse_declaration_list(rule.content, skip_whitespace=False, skip_comments=False)
-
-            # Check for missing semicolons between properties
-            # Look for patterns like "property: value property:" which indicate missing semicolon
-            for i, decl in enumerate(declarations):
-                if hasattr(decl, 'type') and decl.type == 'declaration':
-                    # Check if the value contains what looks like another property
-                    value_str = tinycss2.serialize(decl.value).strip()
-                    # Look for patterns like "value property-name:" indicating missing semicolon
-                    if value_str and ':' in value_str:
-                        # But ignore if it's a valid CSS value with colons (like calc() or url())
-                        if not any(func in value_str.lower() for func in ['calc(', 'url(', 'var(', 'rgb(', 'rgba(', 'hsl(', 'hsla(']):
-                            # Check if there's a property-like pattern
-                            parts = value_str.split()
-                            for part in parts[1:]:  # Skip the first value part
-                                if part.endswith(':') or (len(parts) > parts.index(part) + 1 and parts[parts.index(part) + 1].startswith(':')):
-                                    raise Exception(f"CSS syntax error: Missing semicolon after '{decl.name}: {parts[0]}'")
-
-    return css
 
 def check_parse_errors(rules, context=""):
     """
@@ -241,9 +222,7 @@ def extract_keyframes(rule):
         return keyframes
 
     try:
-        keyframe_rules = tinycss2.parse_stylesheet(
-            rule.content, skip_whitespace=False, skip_comments=False
-        )
+        keyframe_rules = child_rules(rule)
 
         # Check for parse errors in keyframe rules
         check_parse_errors(keyframe_rules, "in @keyframes")
@@ -266,17 +245,18 @@ def extract_keyframes(rule):
     return keyframes
 
 
-def find_animation_usage(rules):
-    """
-    Find all elements using animations.
+@register_visitor("animations")
+class AnimationsVisitor(Visitor):
+    """Collect top-level @keyframes rules and the selectors using them."""
 
-    Args:
-        rules: List of CSS rules
-
-    Returns:
-        Dictionary mapping animation names to lists of selectors using them
-    """
-    animation_usage = {}
+    # List of possible keyframes at-keywords (standard and vendor prefixed)
+    keyframes_keywords = [
+        "keyframes",
+        "-webkit-keyframes",
+        "-moz-keyframes",
+        "-ms-keyframes",
+        "-o-keyframes"
+    ]
 
     # List of animation-related properties (including vendor prefixes)
     animation_properties = [
@@ -287,33 +267,79 @@ def find_animation_usage(rules):
         "-o-animation", "-o-animation-name"
     ]
 
-    for rule in rules:
-        if rule.type == "qualified-rule":
-            selector = get_selector_text(rule)
-            declarations = get_rule_declarations(rule)
-
-            for decl in declarations:
-                if decl.type == "declaration" and decl.name in animation_properties:
-                    value = tinycss2.serialize(decl.value).strip()
-                    # Simple extraction, might need more complex parsing for multiple animations
-                    animation_name = value.split()[0]
-
-                    # Normalize animation name (remove quotes if present)
-                    animation_name = animation_name.strip("'\"")
-
-                    if animation_name not in animation_usage:
-                        animation_usage[animation_name] = []
-                    animation_usage[animation_name].append(selector)
-
-    return animation_usage
-
-
-def extract_animations(css: Union[str, bytes]) -> Dict[str, Dict[str, Any]]:
+    def __init__(self, doc):
+        super().__init__(doc)
+        self.animations = {}
+        self.animation_usage = {}
+
+    def visit_at_rule(self, rule, ancestors):
+        if ancestors:
+            return
+
+        # Check if this is a keyframes rule (standard or vendor prefixed)
+        if rule.lower_at_keyword not in self.keyframes_keywords and rule.at_keyword.lower() not in self.keyframes_keywords:
+            return
+
+        # Extract animation name
+        animation_name = self.doc.selector(rule)
+        # Normalize animation name (remove quotes if present)
+        animation_name = animation_name.strip("'\"")
+
+        # Extract keyframes
+        keyframes = {}
+        if hasattr(rule, 'content') and rule.content:
+            try:
+                keyframe_rules = self.doc.children(rule)
+
+                # Check for parse errors in keyframe rules
+                check_parse_errors(keyframe_rules, "in @keyframes")
+
+                for keyframe_rule in keyframe_rules:
+                    if keyframe_rule.type == "qualified-rule":
+                        # The "selector" for keyframes is the percentage or keywords (from/to)
+                        props = {}
+                        for decl in self.doc.declarations(keyframe_rule):
+                            if decl.type == "declaration":
+                                props[decl.name] = self.doc.value(decl)
+
+                        keyframes[self.doc.selector(keyframe_rule)] = props
+            except Exception as e:
+                raise Exception(f"Error parsing @keyframes content: {str(e)}")
+
+        self.animations[animation_name] = keyframes
+
+    def visit_declaration(self, declaration, rule, ancestors):
+        if ancestors or declaration.name not in self.animation_properties:
+            return
+
+        value = self.doc.value(declaration)
+        # Simple extraction, might need more complex parsing for multiple animations
+        animation_name = value.split()[0]
+
+        # Normalize animation name (remove quotes if present)
+        animation_name = animation_name.strip("'\"")
+
+        if animation_name not in self.animation_usage:
+            self.animation_usage[animation_name] = []
+        self.animation_usage[animation_name].append(self.doc.selector(rule))
+
+    def result(self):
+        # Combine the keyframes with the elements using them
+        result = {}
+        for name, keyframes in self.animations.items():
+            result[name] = {
+                "keyframes": keyframes,
+                "used_by": self.animation_usage.get(name, [])
+            }
+        return result
+
+
+def extract_animations(css: Union[str, bytes, CssDocument]) -> Dict[str, Dict[str, Any]]:
     """
     Extract all CSS animations and keyframes, including vendor-prefixed ones.
 
     Args:
-        css: The CSS code as string or bytes
+        css: The CSS code as string or bytes, or a CssDocument
 
     Returns:
         Dictionary mapping animation names to their keyframes
@@ -321,152 +347,160 @@ def extract_animations(css: Union[str, bytes]) -> Dict[str, Dict[str, Any]]:
     Raises:
         Exception: If the CSS cannot be properly parsed
     """
-    # Validate and decode CSS
-    if isinstance(css, bytes):
-        css = css.decode('utf-8')
+    doc = as_document(css, allow_compact=True)
 
     # Validate CSS syntax
-    if css.count('{') != css.count('}'):
+    if not braces_balanced(doc.text):
         raise Exception("CSS syntax error: Unbalanced braces")
 
-    # Parse CSS
-    rules = parse_stylesheet(css)
-
     # Check for parse errors
-    for rule in rules:
+    for rule in doc.rules:
         if hasattr(rule, 'type') and rule.type == 'error':
             raise Exception(f"CSS parse error: {getattr(rule, 'message', 'Unknown error')}")
 
-    animations = {}
+    return run_visitors(doc, {"animations": AnimationsVisitor(doc)})["animations"]
 
-    # List of possible keyframes at-keywords (standard and vendor prefixed)
-    keyframes_keywords = [
-        "keyframes",
-        "-webkit-keyframes",
-        "-moz-keyframes",
-        "-ms-keyframes",
-        "-o-keyframes"
-    ]
 
-    # First pass: Find all @keyframes rules (including vendor prefixed)
-    for rule in rules:
-        if rule.type == "at-rule":
-            # Check if this is a keyframes rule (standard or vendor prefixed)
-            is_keyframes = False
-            animation_name = ""
-
-            # Check against all possible keyframes at-keywords
-            for keyword in keyframes_keywords:
-                if rule.lower_at_keyword == keyword or rule.at_keyword.lower() == keyword:
-                    is_keyframes = True
-                    break
-
-            if is_keyframes:
-                # Extract animation name
-                animation_name = tinycss2.serialize(rule.prelude).strip()
-                # Normalize animation name (remove quotes if present)
-                animation_name = animation_name.strip("'\"")
-
-                # Extract keyframes
-                keyframes = {}
-                if hasattr(rule, 'content') and rule.content:
-                    try:
-                        keyframe_rules = tinycss2.parse_stylesheet(
-                            rule.content, skip_whitespace=False, skip_comments=False
-                        )
-
-                        # Check for parse errors in keyframe rules
-                        for keyframe_rule in keyframe_rules:
-                            if hasattr(keyframe_rule, 'type') and keyframe_rule.type == 'error':
-                                raise Exception(f"CSS parse error in @keyframes: {getattr(keyframe_rule, 'message', 'Unknown error')}")
-
-                        for keyframe_rule in keyframe_rules:
-                            if keyframe_rule.type == "qualified-rule":
-                                # The "selector" for keyframes is the percentage or keywords (from/to)
-                                percentage = get_selector_text(keyframe_rule)
-                                declarations = get_rule_declarations(keyframe_rule)
-
-                                props = {}
-                                for decl in declarations:
-                                    if decl.type == "declaration":
-                                        props[decl.name] = tinycss2.serialize(decl.value).strip()
-
-                                keyframes[percentage] = props
-                    except Exception as e:
-                        raise Exception(f"Error parsing @keyframes content: {str(e)}")
-
-                animations[animation_name] = keyframes
-
-    # Second pass: Find all elements using animations
-    animation_usage = find_animation_usage(rules)
-
-    # Combine the results
-    result = {}
-    for name, keyframes in animations.items():
-        result[name] = {
-            "keyframes": keyframes,
-            "used_by": animation_usage.get(name, [])
-        }
-
-    return result
-
-def extract_unused_selectors(css: Union[str, bytes], html_content: str) -> List[str]:
+@register_visitor("unused_selectors")
+class UnusedSelectorsVisitor(Visitor):
+    """
+    Collect top-level class and ID selectors not used by some templates.
+
+    Args:
+        doc: The CssDocument being visited
+        html_content: HTML or template source, or a UsageIndex such as
+            css_tools.parallel.build_usage_index returns
+    """
+
+    def __init__(self, doc, html_content: Union[str, "UsageIndex"] = ""):
+        super().__init__(doc)
+        # Imported here so that importing the extractor does not load the
+        # template scanner and its JSON cache support
+        from .usage_index import UsageIndex
+        if isinstance(html_content, UsageIndex):
+            self.usage = html_content
+        else:
+            self.usage = UsageIndex.from_text(html_content)
+        self.all_selectors = []
+        self.seen = set()
+
+    def visit_rule(self, rule, ancestors):
+        if ancestors:
+            return
+
+        selector = self.doc.selector(rule)
+        # Skip pseudo-elements and pseudo-classes for simplicity
+        base_selector = _PSEUDO.sub('', selector)
+
+        # Process complex selectors
+        parts = _COMBINATOR.split(base_selector)
+        for part in parts:
+            part = part.strip()
+            if part and part not in self.seen:
+                self.seen.add(part)
+                self.all_selectors.append(part)
+
+    def _is_used(self, selector):
+        # Names are read from the tokens, so escapes like .md\:flex are undone
+        tokens = tinycss2.parse_component_value_list(selector)
+        for previous, token in zip([None] + tokens, tokens):
+            if token.type == "hash" and token.is_identifier:
+                if not self.usage.uses_id(token.value):
+                    return False
+            elif token.type == "ident" and previous == ".":
+                if not self.usage.uses_class(token.value):
+                    return False
+        return True
+
+    def result(self):
+        unused_selectors = []
+
+        # Only class and ID selectors are checked; element selectors would
+        # need proper HTML parsing
+        for selector in self.all_selectors:
+            if selector.startswith(('.', '#')) and not self._is_used(selector):
+                unused_selectors.append(selector)
+
+        return unused_selectors
+
+
+def extract_unused_selectors(css: Union[str, bytes, CssDocument], html_content: Union[str, "UsageIndex"]) -> List[str]:
     """
     Extract CSS selectors that are not used in the given HTML content.
 
     Args:
-        css: The CSS code as string or bytes
-        html_content: The HTML content to check against
+        css: The CSS code as string or bytes, or a CssDocument
+        html_content: The HTML content to check against, or a UsageIndex
+            of a whole project (see css_tools.parallel.build_usage_index)
 
     Returns:
         List of unused selectors
     """
-    if isinstance(css, bytes):
-        css = css.decode('utf-8')
+    doc = as_document(css, allow_compact=True)
+    visitor = UnusedSelectorsVisitor(doc, html_content)
+    return run_visitors(doc, {"unused_selectors": visitor})["unused_selectors"]
 
-    rules = parse_stylesheet(css)
-    all_selectors = []
-    unused_selectors = []
 
-    for rule in rules:
-        if rule.type == "qualified-rule":
-            selector = get_selector_text(rule)
-            # Skip pseudo-elements and pseudo-classes for simplicity
-            base_selector = re.sub(r'::?[a-zA-Z-]+(\([^)]*\))?', '', selector)
-
-            # Process complex selectors
-            parts = re.split(r'\s*[,>+~]\s*', base_selector)
-            for part in parts:
-                part = part.strip()
-                if part and part not in all_selectors:
-                    all_selectors.append(part)
-
-    # Basic check for unused selectors
-    for selector in all_selectors:
-        # Extract class and ID selectors
-        if selector.startswith('.'):
-            # Class selector
-            class_name = selector[1:]
-            if f'class="{class_name}"' not in html_content and f"class='{class_name}'" not in html_content:
-                unused_selectors.append(selector)
-        elif selector.startswith('#'):
-            # ID selector
-            id_name = selector[1:]
-            if f'id="{id_name}"' not in html_content and f"id='{id_name}'" not in html_content:
-                unused_selectors.append(selector)
-        else:
-            # Element selector - more complex, would need proper HTML parsing
-            pass
+@register_visitor("fonts")
+class FontsVisitor(Visitor):
+    """Collect font declarations per selector, combining nested selectors."""
+
+    # List of font-related properties
+    font_properties = [
+        'font', 'font-family', 'font-size', 'font-weight', 'font-style',
+        'font-variant', 'line-height', 'text-transform', 'letter-spacing'
+    ]
+
+    def __init__(self, doc):
+        super().__init__(doc)
+        self.fonts = {}
+        # Combined selector of every qualified rule seen so far, by id
+        self.full_selectors = {}
 
-    return unused_selectors
+    def descend(self, node):
+        # Enter nested rules as well as media queries and other at-rules
+        return (node.type == "qualified-rule" and bool(node.content)) or has_block(node)
 
+    def visit_rule(self, rule, ancestors):
+        if not ancestors:
+            # Validate declarations of top-level rules
+            for decl in self.doc.declarations(rule):
+                if decl.type == "error":
+                    raise Exception(f"CSS parse error in declaration: {getattr(decl, 'message', 'Unknown error')}")
 
-def extract_fonts(css: Union[str, bytes]) -> Dict[str, List[Dict[str, Any]]]:
+        # At-rules keep the selector as is, so the parent selector comes
+        # from the closest enclosing qualified rule
+        parent_selector = ""
+        for ancestor in reversed(ancestors):
+            if ancestor.type == "qualified-rule":
+                parent_selector = self.full_selectors[id(ancestor)]
+                break
+
+        selector = self.doc.selector(rule)
+        # Handle nested selectors by combining with parent selector
+        full_selector = f"{parent_selector} {selector}".strip() if parent_selector else selector
+        self.full_selectors[id(rule)] = full_selector
+
+    def visit_declaration(self, declaration, rule, ancestors):
+        if declaration.name in self.font_properties:
+            full_selector = self.full_selectors[id(rule)]
+            if full_selector not in self.fonts:
+                self.fonts[full_selector] = []
+            self.fonts[full_selector].append({
+                "property": declaration.name,
+                "value": self.doc.value(declaration)
+            })
+
+    def result(self):
+        return self.fonts
+
+
+def extract_fonts(css: Union[str, bytes, CssDocument]) -> Dict[str, List[Dict[str, Any]]]:
     """
     Extract all font-related properties, including those in nested rules and media queries.
 
     Args:
-        css: The CSS code as string or bytes
+        css: The CSS code as string or bytes, or a CssDocument
 
     Returns:
         Dictionary mapping selectors to their font properties
@@ -474,86 +508,46 @@ def extract_fonts(css: Union[str, bytes]) -> Dict[str, List[Dict[str, Any]]]:
     Raises:
         Exception: If the CSS cannot be properly parsed or has invalid syntax
     """
-    if isinstance(css, bytes):
-        css = css.decode('utf-8')
-
-    # Parse CSS for analysis
-    rules = parse_stylesheet(css)
+    doc = as_document(css, allow_compact=True)
 
     # Check for parse errors
-    for rule in rules:
+    for rule in doc.rules:
         if hasattr(rule, 'type') and rule.type == 'error':
             raise Exception(f"CSS parse error: {getattr(rule, 'message', 'Unknown error')}")
 
-    # Validate declarations
-    for rule in rules:
-        if rule.type == "qualified-rule":
-            declarations = get_rule_declarations(rule)
-            for decl in declarations:
-                if decl.type == "error":
-                    raise Exception(f"CSS parse error in declaration: {getattr(decl, 'message', 'Unknown error')}")
+    return run_visitors(doc, {"fonts": FontsVisitor(doc)})["fonts"]
 
-    fonts = {}
 
-    # List of font-related properties
-    font_properties = [
-        'font', 'font-family', 'font-size', 'font-weight', 'font-style',
-        'font-variant', 'line-height', 'text-transform', 'letter-spacing'
-    ]
+@register_visitor("selectors_by_property")
+class SelectorsByPropertyVisitor(Visitor):
+    """Collect the value of one property per selector, including nested rules."""
 
-    # Recursive function to process rules
-    def process_rules(rule_list, parent_selector=""):
-        for rule in rule_list:
-            if rule.type == "qualified-rule":
-                selector = get_selector_text(rule)
-                # Handle nested selectors by combining with parent selector
-                full_selector = f"{parent_selector} {selector}".strip() if parent_selector else selector
+    def __init__(self, doc, property_name: str):
+        super().__init__(doc)
+        self.property_name = property_name.lower()
+        self.selectors = {}
 
-                declarations = get_rule_declarations(rule)
-                font_decls = []
+    def descend(self, node):
+        # Process media queries and other at-rules with nested content
+        return has_block(node)
 
-                for decl in declarations:
-                    if decl.type == "declaration" and decl.name in font_properties:
-                        value = tinycss2.serialize(decl.value).strip()
-                        font_decls.append({
-                            "property": decl.name,
-                            "value": value
-                        })
+    def visit_declaration(self, declaration, rule, ancestors):
+        if declaration.name.lower() == self.property_name:
+            value = self.doc.value(declaration)
+            if declaration.important:
+                value += " !important"
+            self.selectors[self.doc.selector(rule)] = value
 
-                if font_decls:
-                    if full_selector not in fonts:
-                        fonts[full_selector] = []
-                    fonts[full_selector].extend(font_decls)
-
-                # Process nested rules within this rule
-                if hasattr(rule, 'content') and rule.content:
-                    nested_rules = parse_stylesheet(tinycss2.serialize(rule.content))
-                    process_rules(nested_rules, full_selector)
-
-            # Process media queries and other at-rules with nested content
-            elif rule.type == "at-rule" and rule.content is not None:
-                # For media queries, we want to keep the selector as is
-                if rule.lower_at_keyword == "media":
-                    # Parse nested rules
-                    nested_rules = parse_stylesheet(tinycss2.serialize(rule.content))
-                    # Process nested rules with the same parent selector
-                    process_rules(nested_rules, parent_selector)
-                else:
-                    # For other at-rules, we want to combine the selectors
-                    nested_rules = parse_stylesheet(tinycss2.serialize(rule.content))
-                    process_rules(nested_rules, parent_selector)
-
-    # Start processing rules
-    process_rules(rules)
-
-    return fonts
-
-def extract_selectors_by_property(css: Union[str, bytes], property_name: str) -> Dict[str, str]:
+    def result(self):
+        return self.selectors
+
+
+def extract_selectors_by_property(css: Union[str, bytes, CssDocument], property_name: str) -> Dict[str, str]:
     """
     Extract all selectors that use a specific CSS property and their values.
 
     Args:
-        css: The CSS code as string or bytes
+        css: The CSS code as string or bytes, or a CssDocument
         property_name: The name of the property to extract (case-insensitive)
 
     Returns:
@@ -562,45 +556,89 @@ def extract_selectors_by_property(css: Union[str, bytes], property_name: str) ->
     Raises:
         Exception: If the CSS cannot be properly parsed
     """
-    if isinstance(css, bytes):
-        css = css.decode('utf-8')
+    doc = as_document(css, allow_compact=True)
 
     # Validate CSS syntax before proceeding
-    if css.count('{') != css.count('}'):
+    if not braces_balanced(doc.text):
         raise Exception("CSS syntax error: Unbalanced braces")
 
-    # Parse CSS for analysis
-    rules = parse_stylesheet(css)
+    # Check for parse errors
+    for rule in doc.rules:
+        if hasattr(rule, 'type') and rule.type == 'error':
+            raise Exception(f"CSS parse error: {getattr(rule, 'message', 'Unknown error')}")
+
+    visitor = SelectorsByPropertyVisitor(doc, property_name)
+    return run_visitors(doc, {"selectors_by_property": visitor})["selectors_by_property"]
+
+
+def extract_all(
+    css: Union[str, bytes, CssDocument],
+    extractors: List[str],
+    options: Optional[Dict[str, Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """
+    Run several extractors over a single traversal of the stylesheet.
+
+    Any name registered with css_tools.visitors.register_visitor can be
+    requested, e.g. "analysis", "colors", "fonts", "animations",
+    "media_queries", "comments", "selectors_by_property" or
+    "unused_selectors".
+
+    Args:
+        css: The CSS code as string or bytes, or a CssDocument
+        extractors: Names of the extractors to run
+        options: Optional mapping of extractor names to keyword arguments for
+                 their visitors, e.g. {"selectors_by_property": {"property_name": "color"}}
+
+    Returns:
+        Dictionary mapping each requested extractor name to its result
+
+    Raises:
+        Exception: If the CSS cannot be properly parsed or an extractor is unknown
+    """
+    doc = as_document(css, allow_compact=True)
+    options = options or {}
+
+    # Validate CSS syntax before proceeding
+    if not braces_balanced(doc.text):
+        raise Exception("CSS syntax error: Unbalanced braces")
 
     # Check for parse errors
-    for rule in rules:
+    for rule in doc.rules:
         if hasattr(rule, 'type') and rule.type == 'error':
             raise Exception(f"CSS parse error: {getattr(rule, 'message', 'Unknown error')}")
 
-    selectors = {}
+    visitors = {name: create_visitor(name, doc, **options.get(name, {})) for name in extractors}
+    return run_visitors(doc, visitors)
 
-    # Recursive function to process rules
-    def process_rules(rule_list):
-        for rule in rule_list:
-            if rule.type == "qualified-rule":
-                selector = get_selector_text(rule)
-                declarations = get_rule_declarations(rule)
 
-                for decl in declarations:
-                    if decl.type == "declaration" and decl.name.lower() == property_name.lower():
-                        value = tinycss2.serialize(decl.value).strip()
-                        if decl.important:
-                            value += " !important"
-                        selectors[selector] = value
-
-            # Process media queries and other at-rules with nested content
-            elif rule.type == "at-rule" and rule.content is not None:
-                # Parse nested rules
-                nested_rules = parse_stylesheet(tinycss2.serialize(rule.content))
-                # Recursively process nested rules
-                process_rules(nested_rules)
-
-    # Start processing rules
-    process_rules(rules)
-
-    return selectors
+def extract_all_stream(
+    source: Union[str, "os.PathLike[str]", bytes, memoryview, mmap.mmap, Any],
+    extractors: List[str],
+    options: Optional[Dict[str, Dict[str, Any]]] = None,
+    chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE
+) -> Dict[str, Any]:
+    """
+    Run several extractors over a stylesheet read from a file or buffer.
+
+    Like extract_all, but the stylesheet is read and parsed one top-level
+    rule at a time, so it is never held in memory whole.
+
+    Args:
+        source: A path, a file object, or a bytes-like object such as an mmap
+        extractors: Names of the extractors to run
+        options: Optional mapping of extractor names to keyword arguments for
+                 their visitors
+        chunk_size: Number of bytes read at a time
+
+    Returns:
+        Dictionary mapping each requested extractor name to its result
+
+    Raises:
+        Exception: If the CSS cannot be properly parsed or an extractor is unknown
+    """
+    doc = StreamedDocument(source, chunk_size)
+    options = options or {}
+
+    visitors = {name: create_visitor(name, doc, **options.get(name, {})) for name in extractors}
+    return run_visitors(doc, visitors)
@@ -0,0 +1,224 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Re-parse only the parts of a stylesheet touched by an edit."""
+
+import tinycss2
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from . import instrumentation
+from .parser import CssDocument, _parse_cache, ParseCache, as_document
+from .spans import SpanIndex, line_starts, node_offsets
+
+# A text edit: replace the characters in [start, end) with the new text
+TextEdit = Tuple[int, int, str]
+
+# Rule appended to a re-parsed region to check that the region is closed
+_SENTINEL = "x{}"
+
+
+def _normalize_edits(edits: Iterable[Union[TextEdit, Dict[str, Any]]], length: int) -> List[TextEdit]:
+    normalized = []
+    for edit in edits:
+        if isinstance(edit, dict):
+            edit = (edit["start"], edit["end"], edit.get("text", ""))
+        start, end, text = edit
+        if isinstance(text, bytes):
+            text = text.decode('utf-8')
+        if not 0 <= start <= end <= length:
+            raise Exception(f"Invalid edit range: {start}-{end}")
+        normalized.append((start, end, text))
+
+    normalized.sort(key=lambda edit: (edit[0], edit[1]))
+    for previous, edit in zip(normalized, normalized[1:]):
+        if edit[0] < previous[1]:
+            raise Exception(f"Overlapping edit ranges: {previous[0]}-{previous[1]} and {edit[0]}-{edit[1]}")
+    return normalized
+
+
+def _parse_region(text: str) -> Optional[List[Any]]:
+    """
+    Parse a region of a stylesheet, or return None if it does not end cleanly.
+
+    A rule is appended to the region before parsing: it only comes back as
+    a rule of its own if nothing in the region (an open block, string,
+    comment or parenthesis) is left to swallow what follows.
+    """
+    instrumentation.count("region_parses")
+    with instrumentation.phase("tokenize"):
+        nodes = tinycss2.parse_stylesheet(text + _SENTINEL, skip_whitespace=False, skip_comments=False)
+    if not nodes or nodes[-1].type != "qualified-rule":
+        return None
+    last = nodes[-1]
+    if line_starts(text + _SENTINEL)[last.source_line - 1] + last.source_column - 1 != len(text):
+        return None
+    return nodes[:-1]
+
+
+def _edit_regions(doc: CssDocument, edits: List[TextEdit]) -> List[Tuple[int, int, List[TextEdit]]]:
+    """Group edits by the range of top-level nodes [first, stop) they touch."""
+    spans = doc.spans
+    regions = []
+    for start, end, text in edits:
+        first = spans.node_at(start)
+        stop = spans.node_at(max(start, end - 1)) + 1
+        if regions and first <= regions[-1][1]:
+            previous = regions.pop()
+            regions.append((previous[0], max(previous[1], stop), previous[2] + [(start, end, text)]))
+        else:
+            regions.append((first, stop, [(start, end, text)]))
+    return regions
+
+
+def _splice(text: str, offset: int, edits: List[TextEdit]) -> str:
+    """Apply sorted edits, given in document offsets, to a slice starting at `offset`."""
+    parts = []
+    position = offset
+    for start, end, replacement in edits:
+        parts.append(text[position - offset:start - offset])
+        parts.append(replacement)
+        position = end
+    parts.append(text[position - offset:])
+    return "".join(parts)
+
+
+def update(css: Union[str, bytes, CssDocument], edits: Iterable[Union[TextEdit, Dict[str, Any]]]) -> CssDocument:
+    """
+    Apply text edits to a parsed stylesheet, re-tokenizing only what changed.
+
+    The top-level rules overlapping the edited ranges are re-parsed from the
+    new text and spliced into the rule list; every other node is reused as
+    is, together with its cached selectors, declarations and values. When an
+    edit leaves a rule or comment open, the re-parsed region grows over the
+    following rules until it ends cleanly, so the result always matches a
+    full parse of the new text. If the analysis of the old document was
+    already computed, its counters are patched with the edited rules' deltas.
+
+    Unchanged nodes keep the source_line/source_column of the old text; use
+    the returned document's `spans` for offsets. The new document shares its
+    per-node caches with the old one, minus the entries of the replaced
+    rules: the old document still answers every query for its own text, but
+    recomputes the views of those rules on their next use.
+
+    Args:
+        css: The stylesheet as CSS code or CssDocument
+        edits: (start, end, text) tuples or {"start", "end", "text"} dicts
+            replacing the characters [start, end) of the old text; the ranges
+            must not overlap
+
+    Returns:
+        A new CssDocument for the edited text; the text and rules of the old
+        one are left unchanged
+
+    Raises:
+        Exception: If an edit range is out of bounds or overlaps another
+    """
+    doc = as_document(css)
+    edits = _normalize_edits(edits, len(doc.text))
+    if not edits:
+        return doc
+
+    spans = doc.spans
+    count = len(doc.rules)
+    if count == 0:
+        return as_document(_splice(doc.text, 0, edits))
+
+    regions = _edit_regions(doc, edits)
+    rules: List[Any] = []
+    starts: List[int] = []
+    parts: List[str] = []
+    removed: List[Any] = []
+    added: List[Any] = []
+    position = 0  # Index of the first old node not copied or replaced yet
+    shift = 0
+
+    index = 0
+    while index < len(regions):
+        first, stop, region_edits = regions[index]
+        index += 1
+
+        # Whitespace next to the region would merge with whitespace inside it
+        while first > position and doc.rules[first - 1].type == "whitespace":
+            first -= 1
+
+        # Grow the region until its new text ends between two rules, doubling
+        # the number of extra rules each time so a runaway block that swallows
+        # the rest of the sheet costs O(n log n) rather than O(n^2)
+        extra = 1
+        while True:
+            while stop < count and doc.rules[stop].type == "whitespace":
+                stop += 1
+            # Absorb the following regions the extended range now reaches
+            while index < len(regions) and regions[index][0] <= stop:
+                stop = max(stop, regions[index][1])
+                region_edits = region_edits + regions[index][2]
+                index += 1
+            begin = spans.span(first)[0]
+            finish = spans.span(stop - 1)[1]
+            region_text = _splice(doc.text[begin:finish], begin, region_edits)
+            if stop >= count:
+                instrumentation.count("region_parses")
+                with instrumentation.phase("tokenize"):
+                    new_nodes = tinycss2.parse_stylesheet(region_text, skip_whitespace=False, skip_comments=False)
+                break
+            new_nodes = _parse_region(region_text)
+            if new_nodes is not None:
+                break
+            stop = min(count, stop + extra)
+            extra *= 2
+
+        # Copy the untouched nodes before the region
+        rules.extend(doc.rules[position:first])
+        starts.extend(start + shift for start in spans.starts[position:first])
+        parts.append(doc.text[spans.starts[position]:begin])
+
+        rules.extend(new_nodes)
+        starts.extend(node_offsets(new_nodes, region_text, begin + shift))
+        parts.append(region_text)
+        removed.extend(doc.rules[first:stop])
+        added.extend(new_nodes)
+
+        shift += len(region_text) - (finish - begin)
+        position = stop
+
+    if position < count:
+        rules.extend(doc.rules[position:])
+        starts.extend(start + shift for start in spans.starts[position:])
+        parts.append(doc.text[spans.starts[position]:])
+
+    text = "".join(parts)
+    updated = CssDocument.from_rules(text, rules, SpanIndex(starts, len(text)))
+    _carry_caches(doc, updated, removed)
+    if "analysis_state" in doc._views:
+        updated._views["analysis_state"] = doc._views["analysis_state"].replace(updated, removed, added)
+
+    if _parse_cache.max_bytes > 0:
+        data = text.encode('utf-8', 'surrogatepass')
+        updated._size_bytes = len(data)
+        _parse_cache.put(ParseCache.key(data), updated, len(data))
+    return updated
+
+
+def _carry_caches(old: CssDocument, new: CssDocument, removed: List[Any]) -> None:
+    """
+    Share the per-node caches of `old` with `new`, minus the removed subtrees.
+
+    Entries are checked against the node they were computed for, so both
+    documents can use the same dictionaries; dropping the removed nodes only
+    keeps them from piling up over a series of updates.
+    """
+    pending = list(removed)
+    while pending:
+        node = pending.pop()
+        old._selectors.pop(id(node), None)
+        old._values.pop(id(node), None)
+        old._colors.pop(id(node), None)
+        for cache in (old._declarations, old._children):
+            entry = cache.pop(id(node), None)
+            if entry is not None and entry[0] is node:
+                pending.extend(entry[1])
+    new._selectors = old._selectors
+    new._declarations = old._declarations
+    new._children = old._children
+    new._values = old._values
+    new._colors = old._colors
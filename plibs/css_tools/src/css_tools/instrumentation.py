@@ -0,0 +1,201 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Opt-in timing and counters for the work done inside css_tools calls.
+
+Wrap a call in `instrument()` to see where its time goes:
+
+    with instrument() as recorder:
+        minify_css(css)
+    recorder.as_dict()
+    # {"total_seconds": 0.41,
+    #  "phases": {"decode": {...}, "tokenize": {"seconds": 0.22, "calls": 1}, ...},
+    #  "counters": {"parses": 1, "nested_reparses": 812, "serializes": 1, ...}}
+
+or get the stats next to the result with `instrumented(minify_css, css)`.
+
+Phases are timed exclusively: while a nested phase runs, for example a
+block re-parsed in the middle of a traversal, its time is charged to the
+nested phase only, so the phase times add up to at most the total.
+
+When no recorder is active, `phase()` returns a shared no-op context
+manager and `count()` returns after one context variable lookup, so the
+instrumented code paths cost next to nothing. Recording follows the
+current context: threads started inside an `instrument()` block and
+process-pool workers are not recorded.
+"""
+
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Phases recorded by css_tools
+PHASES = ("decode", "cache_lookup", "split", "tokenize", "reparse", "traverse", "serialize")
+
+_current: ContextVar[Optional["Recorder"]] = ContextVar("css_tools_recorder", default=None)
+
+
+class Recorder:
+    """
+    Per-phase wall time and event counters of one instrumented block.
+
+    Args:
+        hook: Optional callable receiving as_dict() when the block exits
+    """
+
+    def __init__(self, hook: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.hook = hook
+        self.seconds: Dict[str, float] = {}
+        self.calls: Counter = Counter()
+        self.counters: Counter = Counter()
+        self.total_seconds = 0.0
+        # [phase, start, time spent in nested phases] of the open phases
+        self._stack: List[List[Any]] = []
+
+    def enter(self, name: str) -> None:
+        """Start timing a phase; prefer the phase() context manager."""
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def exit(self) -> None:
+        """Stop timing the innermost open phase."""
+        name, start, nested = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        self.seconds[name] = self.seconds.get(name, 0.0) + elapsed - nested
+        self.calls[name] += 1
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """Add to a counter."""
+        self.counters[name] += amount
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Return the recorded data.
+
+        Returns:
+            Dictionary with total_seconds, phases (name to seconds and calls),
+            unattributed_seconds (time outside of any phase, such as visitor
+            and emitter code) and counters (name to count)
+        """
+        return {
+            "total_seconds": self.total_seconds,
+            "unattributed_seconds": max(0.0, self.total_seconds - sum(self.seconds.values())),
+            "phases": {
+                name: {"seconds": self.seconds[name], "calls": self.calls[name]}
+                for name in sorted(self.seconds)
+            },
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+
+class _Phase:
+    __slots__ = ("recorder",)
+
+    def __init__(self, recorder: Recorder):
+        self.recorder = recorder
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.recorder.exit()
+
+
+class _NoPhase:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+
+_NO_PHASE = _NoPhase()
+
+
+def phase(name: str) -> Any:
+    """
+    Context manager timing a phase of the current call, if instrumented.
+
+    Args:
+        name: Phase name, usually one of PHASES
+
+    Returns:
+        A context manager; a shared no-op one when nothing is recording
+    """
+    recorder = _current.get()
+    if recorder is None:
+        return _NO_PHASE
+    recorder.enter(name)
+    return _Phase(recorder)
+
+
+def count(name: str, amount: int = 1) -> None:
+    """
+    Add to a counter of the current call, if instrumented.
+
+    Args:
+        name: Counter name, e.g. "parses" or "nested_reparses"
+        amount: Value to add
+    """
+    recorder = _current.get()
+    if recorder is not None:
+        recorder.counters[name] += amount
+
+
+def enabled() -> bool:
+    """Whether a recorder is active in the current context."""
+    return _current.get() is not None
+
+
+@contextmanager
+def instrument(hook: Optional[Callable[[Dict[str, Any]], None]] = None) -> Iterator[Recorder]:
+    """
+    Record phase timings and counters of everything run in the block.
+
+    Blocks can be nested; the inner block gets its own recorder and the
+    outer one does not see the inner block's work.
+
+    Args:
+        hook: Optional callable receiving the recorded dict on exit, even
+              when the block raises
+
+    Yields:
+        The Recorder, readable once the block has exited
+    """
+    recorder = Recorder(hook)
+    token = _current.set(recorder)
+    start = time.perf_counter()
+    try:
+        yield recorder
+    finally:
+        recorder.total_seconds = time.perf_counter() - start
+        # Close phases left open by an exception
+        while recorder._stack:
+            recorder.exit()
+        _current.reset(token)
+        if hook is not None:
+            hook(recorder.as_dict())
+
+
+def instrumented(function: Callable[..., Any], *args: Any, **kwargs: Any) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Call a function under instrument() and return its result with the stats.
+
+    Args:
+        function: Any css_tools function, or a function calling several
+        *args: Positional arguments of the function
+        **kwargs: Keyword arguments of the function
+
+    Returns:
+        Tuple of (result, recorded dict)
+    """
+    with instrument() as recorder:
+        result = function(*args, **kwargs)
+    return result, recorder.as_dict()
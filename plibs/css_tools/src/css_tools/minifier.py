@@ -4,165 +4,172 @@
 
 """CSS minification utilities using tinycss2."""
 
+import mmap
+import os
 import tinycss2
 import re
-from typing import Dict, List, Any, Tuple, Optional, Union
-from .parser import parse_stylesheet, get_selector_text, get_rule_declarations
+from typing import Iterable, List, Any, TextIO, Optional, Union
+from .emitter import Emitter
+from .parser import DEFAULT_STREAM_CHUNK_SIZE, CssDocument, StreamedDocument, as_document
+from .traversal import NESTING_AT_RULES
 
 
-def minify_css(css: Union[str, bytes]) -> str:
-    """
-    Minify CSS by removing comments, whitespace, and unnecessary characters.
+# Whitespace around selector combinators and commas, dropped when minifying
+_SELECTOR_SPACE = re.compile(r'\s*([,>+~])\s*')
 
-    Args:
-        css: The CSS code as string or bytes
+# At-rules whose block is written as a list of nested rules
+RULE_BLOCK_AT_RULES = NESTING_AT_RULES | {"keyframes", "-webkit-keyframes", "-moz-keyframes", "-o-keyframes"}
 
-    Returns:
-        Minified CSS as a string
-    """
-    if isinstance(css, bytes):
-        css = css.decode('utf-8')
 
-    rules = parse_stylesheet(css)
-    minified_css = ""
+def _emit_rules(doc: CssDocument, rule_list: Iterable[Any], emitter: Emitter, depth: int = 0) -> None:
+    """Write rules in the emitter's style, recursing into nested at-rules."""
+    minified = emitter.style == "minified"
 
-    for rule in rules:
+    for rule in rule_list:
         if rule.type == "qualified-rule":
-            selector = get_selector_text(rule)
-            # Remove whitespace in selectors
-            selector = re.sub(r'\s*([,>+~])\s*', r'\1', selector)
-
-            declarations = get_rule_declarations(rule)
-            # Filter out comments and whitespace
-            declarations = [decl for decl in declarations if decl.type == "declaration"]
-
-            # Serialize declarations without whitespace
-            content = ""
-            for decl in declarations:
-                value = tinycss2.serialize(decl.value).strip()
-                # Minimize color values
-                if value.startswith('#'):
-                    # Convert #RRGGBB to #RGB when possible
-                    if len(value) == 7 and value[1] == value[2] and value[3] == value[4] and value[5] == value[6]:
-                        value = '#' + value[1] + value[3] + value[5]
-
-                important = "!important" if decl.important else ""
-                content += f"{decl.name}:{value}{important};"
-
-            if content:
-                minified_css += f"{selector}{{{content}}}"
+            selector = doc.selector(rule)
+            declarations = doc.declarations(rule)
+            if minified:
+                # Remove whitespace in selectors
+                selector = _SELECTOR_SPACE.sub(r'\1', selector)
+                # Rules without declarations are dropped
+                if not any(decl.type == "declaration" for decl in declarations):
+                    continue
+            elif ',' in selector:
+                # Format selector nicely (one selector per line for multiple selectors)
+                selector = (',\n' + emitter.indent * depth).join(s.strip() for s in selector.split(','))
+
+            _emit_declaration_block(doc, selector, declarations, emitter, depth)
 
         elif rule.type == "at-rule":
-            if rule.lower_at_keyword == "media" or rule.lower_at_keyword == "keyframes":
-                prelude = tinycss2.serialize(rule.prelude).strip()
-
-                # Recursively minify the content of the at-rule
-                inner_css = tinycss2.serialize(rule.content)
-                minified_inner = minify_css(inner_css)
-
-                minified_css += f"@{rule.lower_at_keyword} {prelude}{{{minified_inner}}}"
+            prelude = tinycss2.serialize(rule.prelude).strip()
+
+            if rule.lower_at_keyword in RULE_BLOCK_AT_RULES:
+                emitter.block_start(rule.lower_at_keyword, prelude, depth)
+                _emit_rules(doc, doc.children(rule), emitter, depth + 1)
+                emitter.block_end(depth)
+            elif rule.content is not None:
+                # At-rules holding declarations, such as @font-face or @page
+                header = f"@{rule.lower_at_keyword} {prelude}".strip()
+                _emit_declaration_block(doc, header, doc.declarations(rule), emitter, depth)
             else:
                 # For other at-rules like @charset, @import, etc.
-                prelude = tinycss2.serialize(rule.prelude).strip()
-                minified_css += f"@{rule.lower_at_keyword} {prelude};"
+                emitter.statement(rule.lower_at_keyword, prelude, depth)
+
+        elif rule.type == "comment" and not minified:
+            emitter.comment(rule.value, depth)
+            emitter.write("\n")
+
+
+def _emit_declaration_block(doc: CssDocument, header: str, declarations: List[Any], emitter: Emitter, depth: int) -> None:
+    """Write a block of declarations and comments under a selector or at-rule header."""
+    minified = emitter.style == "minified"
+
+    emitter.rule_start(header, depth)
+    for decl in declarations:
+        if decl.type == "declaration":
+            value = doc.value(decl)
+            if minified:
+                value = _minify_value(value)
+            emitter.declaration(decl.name, value, decl.important, depth)
+        elif decl.type == "comment":
+            emitter.comment(decl.value, depth + 1)
+    emitter.rule_end(depth)
+
 
-    return minified_css
+def _minify_value(value: str) -> str:
+    """Shorten a declaration value for minified output."""
+    # Convert #RRGGBB to #RGB when possible
+    if len(value) == 7 and value[0] == '#' and value[1] == value[2] and value[3] == value[4] and value[5] == value[6]:
+        return '#' + value[1] + value[3] + value[5]
+    return value
 
 
-def beautify_css(css: Union[str, bytes]) -> str:
+def minify_css(css: Union[str, bytes, CssDocument]) -> str:
     """
-    Beautify CSS by adding proper indentation and formatting.
+    Minify CSS by removing comments, whitespace, and unnecessary characters.
 
     Args:
-        css: The CSS code as string or bytes
+        css: The CSS code as string or bytes, or a CssDocument
 
     Returns:
-        Beautified CSS as a string
+        Minified CSS as a string
     """
-    if isinstance(css, bytes):
-        css = css.decode('utf-8')
+    doc = as_document(css)
+    emitter = Emitter("minified")
+    _emit_rules(doc, doc.rules, emitter)
+    return emitter.getvalue()
 
-    # First parse the CSS
-    rules = parse_stylesheet(css)
-    beautified_css = ""
 
-    for rule in rules:
-        if rule.type == "qualified-rule":
-            selector = get_selector_text(rule)
-            # Format selector nicely (one selector per line for multiple selectors)
-            if ',' in selector:
-                selector = ',\n'.join([s.strip() for s in selector.split(',')])
+def minify_css_stream(
+    source: Union[str, "os.PathLike[str]", bytes, memoryview, mmap.mmap, Any],
+    output: Union[str, "os.PathLike[str]", TextIO, None] = None,
+    chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE
+) -> Optional[str]:
+    """
+    Minify a stylesheet read from a file or buffer one top-level rule at a time.
 
-            declarations = get_rule_declarations(rule)
-            formatted_content = ""
+    The output is the same as minify_css. When `output` is given, each rule
+    is written as soon as it is minified, so neither the input nor the
+    output is ever held in memory whole.
 
-            for decl in declarations:
-                if decl.type == "declaration":
-                    value = tinycss2.serialize(decl.value).strip()
-                    important = " !important" if decl.important else ""
-                    formatted_content += f"    {decl.name}: {value}{important};\n"
-                elif decl.type == "comment":
-                    formatted_content += f"    /* {decl.value} */\n"
+    Args:
+        source: A path, a file object, or a bytes-like object such as an mmap
+        output: A path or text file object to write to, or None to return
+                the minified CSS as a string
+        chunk_size: Number of bytes read at a time
 
-            beautified_css += f"{selector} {{\n{formatted_content}}}\n\n"
+    Returns:
+        Minified CSS as a string if no output was given, otherwise None
+    """
+    if isinstance(output, (str, os.PathLike)):
+        with open(output, 'w', encoding='utf-8') as file:
+            return minify_css_stream(source, file, chunk_size)
 
-        elif rule.type == "at-rule":
-            if rule.lower_at_keyword == "media" or rule.lower_at_keyword == "keyframes":
-                prelude = tinycss2.serialize(rule.prelude).strip()
-
-                # Recursively beautify the content of the at-rule
-                inner_css = tinycss2.serialize(rule.content)
-                inner_rules = parse_stylesheet(inner_css)
-
-                formatted_inner = ""
-                for inner_rule in inner_rules:
-                    if inner_rule.type == "qualified-rule":
-                        inner_selector = get_selector_text(inner_rule)
-                        inner_declarations = get_rule_declarations(inner_rule)
-
-                        inner_content = ""
-                        for inner_decl in inner_declarations:
-                            if inner_decl.type == "declaration":
-                                inner_value = tinycss2.serialize(inner_decl.value).strip()
-                                inner_important = " !important" if inner_decl.important else ""
-                                inner_content += f"        {inner_decl.name}: {inner_value}{inner_important};\n"
-                            elif inner_decl.type == "comment":
-                                inner_content += f"        /* {inner_decl.value} */\n"
-
-                        formatted_inner += f"    {inner_selector} {{\n{inner_content}    }}\n\n"
-
-                beautified_css += f"@{rule.lower_at_keyword} {prelude} {{\n{formatted_inner}}}\n\n"
-            else:
-                # For other at-rules like @charset, @import, etc.
-                prelude = tinycss2.serialize(rule.prelude).strip()
-                beautified_css += f"@{rule.lower_at_keyword} {prelude};\n\n"
+    doc = StreamedDocument(source, chunk_size, strict=False)
+    emitter = Emitter("minified", sink=output)
+    for rule in doc.rules:
+        _emit_rules(doc, [rule], emitter)
+        emitter.flush()
+    return emitter.getvalue() if output is None else None
 
-        elif rule.type == "comment":
-            beautified_css += f"/* {rule.value} */\n\n"
 
-    return beautified_css
+def beautify_css(css: Union[str, bytes, CssDocument]) -> str:
+    """
+    Beautify CSS by adding proper indentation and formatting.
+
+    Nested at-rules such as @media, @supports and @keyframes are indented
+    one level per nesting depth.
+
+    Args:
+        css: The CSS code as string or bytes, or a CssDocument
+
+    Returns:
+        Beautified CSS as a string
+    """
+    doc = as_document(css)
+    emitter = Emitter("pretty")
+    _emit_rules(doc, doc.rules, emitter)
+    return emitter.getvalue()
 
 
-def sort_properties(css: Union[str, bytes]) -> str:
+def sort_properties(css: Union[str, bytes, CssDocument]) -> str:
     """
     Sort CSS properties alphabetically within each rule.
 
     Args:
-        css: The CSS code as string or bytes
+        css: The CSS code as string or bytes, or a CssDocument
 
     Returns:
         CSS with properties sorted alphabetically
     """
-    if isinstance(css, bytes):
-        css = css.decode('utf-8')
+    doc = as_document(css)
 
-    rules = parse_stylesheet(css)
-    sorted_css = ""
+    emitter = Emitter("pretty")
 
-    for rule in rules:
+    for rule in doc.rules:
         if rule.type == "qualified-rule":
-            selector = get_selector_text(rule)
-            declarations = get_rule_declarations(rule)
+            declarations = doc.declarations(rule)
 
             # Separate declarations and comments
             decls = []
@@ -174,50 +181,48 @@ def sort_properties(css: Union[str, bytes]) -> str:
                 elif item.type == "comment":
                     comments.append(item)
 
-            # Sort declarations by property name
-            sorted_decls = sorted(decls, key=lambda d: d.name)
+            emitter.rule_start(doc.selector(rule))
 
-            # Combine sorted declarations with comments
-            sorted_content = ""
-            for decl in sorted_decls:
-                value = tinycss2.serialize(decl.value).strip()
-                important = " !important" if decl.important else ""
-                sorted_content += f"    {decl.name}: {value}{important};\n"
+            # Sort declarations by property name
+            for decl in sorted(decls, key=lambda d: d.name):
+                emitter.declaration(decl.name, doc.value(decl), decl.important)
 
             # Add comments at the end
             for comment in comments:
-                sorted_content += f"    /* {comment.value} */\n"
+                emitter.comment(comment.value, 1)
 
-            sorted_css += f"{selector} {{\n{sorted_content}}}\n\n"
+            emitter.rule_end()
 
         else:
             # Keep other rules as they are
-            sorted_css += tinycss2.serialize([rule]) + "\n"
+            emitter.raw(rule)
+            emitter.write("\n")
 
-    return sorted_css
+    return emitter.getvalue()
 
 
-def remove_duplicates(css: Union[str, bytes]) -> str:
+def remove_duplicates(css: Union[str, bytes, CssDocument]) -> str:
     """
     Remove duplicate selectors and properties from CSS.
 
     Args:
-        css: The CSS code as string or bytes
+        css: The CSS code as string or bytes, or a CssDocument
 
     Returns:
         CSS with duplicates removed
     """
-    if isinstance(css, bytes):
-        css = css.decode('utf-8')
+    doc = as_document(css)
 
-    rules = parse_stylesheet(css)
+    # Work on a copy so the document's rule list is left untouched
+    rules = list(doc.rules)
     selectors_map = {}  # Maps selectors to rule index
     media_queries_map = {}  # Maps media query conditions to their rules
+    media_contents = {}  # Maps id of a merged media rule to its merged content
 
     # First pass: identify duplicates
     for i, rule in enumerate(rules):
         if rule.type == "qualified-rule":
-            selector = get_selector_text(rule)
+            selector = doc.selector(rule)
 
             if selector in selectors_map:
                 # Duplicate selector found
@@ -225,8 +230,8 @@ def remove_duplicates(css: Union[str, bytes]) -> str:
                 existing_rule = rules[existing_idx]
 
                 # Merge declarations
-                existing_decls = get_rule_declarations(existing_rule)
-                new_decls = get_rule_declarations(rule)
+                existing_decls = list(doc.declarations(existing_rule))
+                new_decls = doc.declarations(rule)
 
                 # Track existing properties to avoid duplicates
                 existing_props = {}
@@ -259,26 +264,26 @@ def remove_duplicates(css: Union[str, bytes]) -> str:
                 existing_media_rule = media_queries_map[media_condition]
 
                 # Parse the content of both media queries
-                existing_content = parse_stylesheet(tinycss2.serialize(existing_media_rule.content))
-                new_content = parse_stylesheet(tinycss2.serialize(rule.content))
+                existing_content = list(media_contents.get(id(existing_media_rule), doc.children(existing_media_rule)))
+                new_content = doc.children(rule)
 
                 # Create a map of selectors to their rules in existing content
                 existing_selectors = {}
                 for existing_rule in existing_content:
                     if existing_rule.type == "qualified-rule":
-                        selector = get_selector_text(existing_rule)
+                        selector = doc.selector(existing_rule)
                         existing_selectors[selector] = existing_rule
 
                 # Merge the content rules
                 for content_rule in new_content:
                     if content_rule.type == "qualified-rule":
-                        selector = get_selector_text(content_rule)
+                        selector = doc.selector(content_rule)
 
                         if selector in existing_selectors:
                             # Merge declarations with existing rule
                             existing_rule = existing_selectors[selector]
-                            existing_decls = get_rule_declarations(existing_rule)
-                            new_decls = get_rule_declarations(content_rule)
+                            existing_decls = list(doc.declarations(existing_rule))
+                            new_decls = doc.declarations(content_rule)
 
                             # Track existing properties
                             existing_props = {}
@@ -299,8 +304,8 @@ def remove_duplicates(css: Union[str, bytes]) -> str:
                             # Add new selector rule
                             existing_content.append(content_rule)
 
-                # Update the existing media rule's content
-                existing_media_rule.content = existing_content
+                # Record the merged content of the existing media rule
+                media_contents[id(existing_media_rule)] = existing_content
                 # Mark current rule as deleted
                 rules[i] = None
             else:
@@ -308,99 +313,60 @@ def remove_duplicates(css: Union[str, bytes]) -> str:
                 media_queries_map[media_condition] = rule
 
     # Second pass: build result with duplicates removed
-    cleaned_css = ""
+    emitter = Emitter("pretty")
     for rule in rules:
         if rule is None:
             continue  # Skip deleted rules
 
         if rule.type == "qualified-rule":
-            selector = get_selector_text(rule)
-            declarations = get_rule_declarations(rule)
-
-            # Remove duplicate properties
-            unique_props = {}
-            unique_decls = []
-
-            for decl in declarations:
-                if decl.type == "declaration":
-                    # Newer declarations override older ones
-                    unique_props[decl.name] = decl
-                else:
-                    # Keep non-declaration nodes (like comments)
-                    unique_decls.append(decl)
-
-            # Add unique declarations
-            for decl in unique_props.values():
-                unique_decls.append(decl)
-
-            # Sort declarations for consistency
-            declaration_nodes = [d for d in unique_decls if d.type == "declaration"]
-            sorted_decls = sorted(declaration_nodes, key=lambda d: d.name)
-            comment_nodes = [d for d in unique_decls if d.type == "comment"]
-
-            # Format the content
-            content = ""
-            for decl in sorted_decls:
-                value = tinycss2.serialize(decl.value).strip()
-                important = " !important" if decl.important else ""
-                content += f"    {decl.name}: {value}{important};\n"
-
-            # Add comments at the end
-            for comment in comment_nodes:
-                content += f"    /* {comment.value} */\n"
-
-            cleaned_css += f"{selector} {{\n{content}}}\n\n"
+            _emit_unique_declarations(doc, rule, emitter, 0)
 
         elif rule.type == "at-rule" and rule.at_keyword.lower() == "media":
             # Format media query
             media_condition = tinycss2.serialize(rule.prelude).strip()
+            emitter.block_start("media", media_condition)
 
             # Format the content
-            content = ""
-            for content_rule in rule.content:
+            for content_rule in media_contents.get(id(rule), doc.children(rule)):
                 if content_rule.type == "qualified-rule":
-                    selector = get_selector_text(content_rule)
-                    declarations = get_rule_declarations(content_rule)
-
-                    # Remove duplicate properties
-                    unique_props = {}
-                    unique_decls = []
-
-                    for decl in declarations:
-                        if decl.type == "declaration":
-                            # Newer declarations override older ones
-                            unique_props[decl.name] = decl
-                        else:
-                            # Keep non-declaration nodes (like comments)
-                            unique_decls.append(decl)
-
-                    # Add unique declarations
-                    for decl in unique_props.values():
-                        unique_decls.append(decl)
-
-                    # Sort declarations for consistency
-                    declaration_nodes = [d for d in unique_decls if d.type == "declaration"]
-                    sorted_decls = sorted(declaration_nodes, key=lambda d: d.name)
-                    comment_nodes = [d for d in unique_decls if d.type == "comment"]
-
-                    # Format declarations
-                    rule_content = ""
-                    for decl in sorted_decls:
-                        value = tinycss2.serialize(decl.value).strip()
-                        important = " !important" if decl.important else ""
-                        rule_content += f"        {decl.name}: {value}{important};\n"
-
-                    # Add comments at the end
-                    for comment in comment_nodes:
-                        rule_content += f"        /* {comment.value} */\n"
-
-                    content += f"    {selector} {{\n{rule_content}    }}\n\n"
+                    _emit_unique_declarations(doc, content_rule, emitter, 1)
                 elif content_rule.type == "comment":
-                    content += f"    /* {content_rule.value} */\n"
-
-            cleaned_css += f"@media {media_condition} {{\n{content}}}\n\n"
+                    emitter.comment(content_rule.value, 1)
+                elif content_rule.type == "at-rule":
+                    # Keep nested at-rules as they are
+                    emitter.write(emitter.indent)
+                    emitter.raw(content_rule)
+                    emitter.write("\n")
+
+            emitter.block_end()
         else:
             # Keep other rules as they are
-            cleaned_css += tinycss2.serialize([rule]) + "\n"
+            emitter.raw(rule)
+            emitter.write("\n")
+
+    return emitter.getvalue()
+
+
+def _emit_unique_declarations(doc: CssDocument, rule: Any, emitter: Emitter, depth: int) -> None:
+    """Write a rule keeping the last value of each property, sorted by name, then its comments."""
+    # Newer declarations override older ones
+    unique_props = {}
+    comment_nodes = []
+
+    for decl in doc.declarations(rule):
+        if decl.type == "declaration":
+            unique_props[decl.name] = decl
+        elif decl.type == "comment":
+            comment_nodes.append(decl)
+
+    emitter.rule_start(doc.selector(rule), depth)
+
+    # Sort declarations for consistency
+    for decl in sorted(unique_props.values(), key=lambda d: d.name):
+        emitter.declaration(decl.name, doc.value(decl), decl.important, depth)
+
+    # Add comments at the end
+    for comment in comment_nodes:
+        emitter.comment(comment.value, depth + 1)
 
-    return cleaned_css
+    emitter.rule_end(depth)
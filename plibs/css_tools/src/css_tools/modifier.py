@@ -5,12 +5,16 @@
 """CSS modification utilities using tinycss2."""
 
 import tinycss2
-from typing import Dict, List, Any, Tuple, Optional, Union
-from .parser import parse_stylesheet, get_selector_text, get_rule_declarations
+from typing import Dict, Iterable, List, Any, Tuple, Optional, Union
+from .emitter import Emitter
+from .parser import CssDocument, as_document, parse_stylesheet
+from .selector_index import normalize_selector
+from .traversal import NESTING_AT_RULES
+from .validation import braces_balanced
 
 
 def add_property_to_selector(
-    css: Union[str, bytes],
+    css: Union[str, bytes, CssDocument],
     selector: str,
     property_name: str,
     property_value: str,
@@ -20,7 +24,7 @@ def add_property_to_selector(
     Add a CSS property to a specific selector, or create the selector if it doesn't exist.
 
     Args:
-        css: The CSS code as string or bytes
+        css: The CSS code as string or bytes, or a CssDocument
         selector: The CSS selector to modify
         property_name: The property name to add
         property_value: The property value to add
@@ -29,78 +33,52 @@ def add_property_to_selector(
     Returns:
         Modified CSS as a string
     """
-    if isinstance(css, bytes):
-        css = css.decode('utf-8')
+    doc = as_document(css)
 
-    rules = parse_stylesheet(css)
-    found_selector = False
-    modified_css = ""
+    rules = doc.rules
+    target_ids = doc.selector_index.rule_ids(selector, top_level=True)
+    found_selector = bool(target_ids)
+    emitter = Emitter("preserve")
 
     for rule in rules:
         if rule.type == "qualified-rule":
-            rule_selector = get_selector_text(rule)
-            declarations = get_rule_declarations(rule)
-
-            if rule_selector == selector:
-                found_selector = True
+            rule_selector = doc.selector(rule)
+            declarations = list(doc.declarations(rule))
 
+            if id(rule) in target_ids:
                 # Check if the property already exists
                 property_exists = False
                 for i, decl in enumerate(declarations):
                     if decl.type == "declaration" and decl.name == property_name:
                         property_exists = True
                         # Replace the existing property
-                        declarations[i] = tinycss2.ast.Declaration(
-                            name=property_name,
-                            value=[
-                                tinycss2.ast.WhitespaceToken(value=" ", line=0, column=0),
-                                tinycss2.ast.IdentToken(value=property_value, line=0, column=0)
-                            ],
-                            important=important,
-                            line=0,
-                            column=0,
-                            lower_name=property_name.lower(),
-                        )
+                        declarations[i] = make_declaration(property_name, property_value, important)
                         break
 
                 # Add the property if it doesn't exist
                 if not property_exists:
                     if declarations and declarations[-1].type != "whitespace":
                         declarations.append(tinycss2.ast.WhitespaceToken(line=0, column=0, value='\n    '))
-                    declarations.append(
-                        tinycss2.ast.Declaration(
-                            name=property_name,
-                            value=[
-                                tinycss2.ast.WhitespaceToken(value=" ", line=0, column=0),
-                                tinycss2.ast.IdentToken(value=property_value, line=0, column=0)
-                            ],
-                            important=important,
-                            line=0,
-                            column=0,
-                            lower_name=property_name.lower(),
-                        )
-                    )
+                    declarations.append(make_declaration(property_name, property_value, important))
 
             # Format and add the rule to the result
-            serialized_content = tinycss2.serialize(declarations).strip()
-            serialized_content = "\n".join("    " + line.strip() for line in serialized_content.splitlines() if line.strip())
-            formatted_rule = f"{rule_selector} {{\n{serialized_content}\n}}\n"
-            modified_css += formatted_rule
+            emitter.rule_start(rule_selector)
+            emitter.preserved(declarations)
+            emitter.rule_end()
 
         else:
             # Keep other rules as they are
-            modified_css += tinycss2.serialize([rule])
+            emitter.raw(rule)
 
     # Create the selector if it doesn't exist
     if not found_selector:
-        new_rule = f"\n{selector} {{\n    {property_name}: {property_value}{' !important' if important else ''};\n}}\n"
-        modified_css += new_rule
+        emitter.write(f"\n{selector} {{\n    {property_name}: {property_value}{' !important' if important else ''};\n}}\n")
 
-    return modified_css.strip()
+    return emitter.getvalue().strip()
 
 
 def remove_property_from_selector(
-    css: Union[str, bytes],
+    css: Union[str, bytes, CssDocument],
     selector: str,
     property_name: str
 ) -> str:
@@ -108,25 +86,25 @@ def remove_property_from_selector(
     Remove a CSS property from a specific selector.
 
     Args:
-        css: The CSS code as string or bytes
+        css: The CSS code as string or bytes, or a CssDocument
         selector: The CSS selector to modify
         property_name: The property name to remove
 
     Returns:
         Modified CSS as a string
     """
-    if isinstance(css, bytes):
-        css = css.decode('utf-8')
+    doc = as_document(css)
 
-    rules = parse_stylesheet(css)
-    modified_css = ""
+    rules = doc.rules
+    target_ids = doc.selector_index.rule_ids(selector, top_level=True)
+    emitter = Emitter("preserve")
 
     for rule in rules:
         if rule.type == "qualified-rule":
-            rule_selector = get_selector_text(rule)
-            declarations = get_rule_declarations(rule)
+            rule_selector = doc.selector(rule)
+            declarations = doc.declarations(rule)
 
-            if rule_selector == selector:
+            if id(rule) in target_ids:
                 # Filter out the property to remove
                 filtered_declarations = []
                 for decl in declarations:
@@ -137,25 +115,28 @@ def remove_property_from_selector(
 
             # Only add the rule if it has declarations
             if declarations:
-                serialized_content = tinycss2.serialize(declarations).strip()
-                if serialized_content:  # Only include if there are actual declarations
-                    serialized_content = "\n".join("    " + line.strip() for line in serialized_content.splitlines() if line.strip())
-                    formatted_rule = f"{rule_selector} {{\n{serialized_content}\n}}\n"
-                    modified_css += formatted_rule
+                mark = emitter.mark()
+                emitter.rule_start(rule_selector)
+                emitter.preserved(declarations)
+                if emitter.is_blank_since(mark + 1):
+                    # Only include if there are actual declarations
+                    emitter.truncate(mark)
+                else:
+                    emitter.rule_end()
 
         else:
             # Keep other rules as they are
-            modified_css += tinycss2.serialize([rule])
+            emitter.raw(rule)
 
-    return modified_css.strip()
+    return emitter.getvalue().strip()
 
 
-def remove_selector(css: Union[str, bytes], selector: Union[str, bytes]) -> str:
+def remove_selector(css: Union[str, bytes, CssDocument], selector: Union[str, bytes]) -> str:
     """
     Remove a CSS selector and all its properties.
 
     Args:
-        css: The CSS code as string or bytes
+        css: The CSS code as string or bytes, or a CssDocument
         selector: The CSS selector to remove
 
     Returns:
@@ -164,8 +145,7 @@ def remove_selector(css: Union[str, bytes], selector: Union[str, bytes]) -> str:
     Raises:
         Exception: If the CSS cannot be properly parsed
     """
-    if isinstance(css, bytes):
-        css = css.decode('utf-8')
+    doc = as_document(css)
 
     # Ensure selector is also a string, not bytes
     if isinstance(selector, bytes):
@@ -173,57 +153,57 @@ def remove_selector(css: Union[str, bytes], selector: Union[str, bytes]) -> str:
 
     # Validate CSS syntax before proceeding
     # Check for unbalanced braces - a common CSS error
-    if css.count('{') != css.count('}'):
+    if not braces_balanced(doc.text):
         raise Exception("CSS syntax error: Unbalanced braces")
 
     # Parse CSS for further analysis
-    rules = parse_stylesheet(css)
+    rules = doc.rules
 
     # Check for parse errors
     for rule in rules:
         if hasattr(rule, 'type') and rule.type == 'error':
             raise Exception(f"CSS parse error: {getattr(rule, 'message', 'Unknown error')}")
 
+    target_ids = doc.selector_index.rule_ids(selector)
+
+    emitter = Emitter("preserve")
+
     # Function to process rule blocks with potential nesting
     def process_rule_block(rules):
-        result = ""
         for rule in rules:
             if rule.type == "qualified-rule":
-                rule_selector = get_selector_text(rule)
-                if rule_selector != selector:
+                if id(rule) not in target_ids:
                     # Keep rules that don't match the selector to be removed
-                    declarations = get_rule_declarations(rule)
-                    serialized_content = tinycss2.serialize(declarations).strip()
-                    serialized_content = "\n".join("    " + line.strip() for line in serialized_content.splitlines() if line.strip())
-                    formatted_rule = f"{rule_selector} {{\n{serialized_content}\n}}\n"
-                    result += formatted_rule
+                    emitter.rule_start(doc.selector(rule))
+                    emitter.preserved(doc.declarations(rule))
+                    emitter.rule_end()
             elif rule.type == "at-rule" and rule.content is not None:
                 # Handle at-rules with blocks (e.g., media queries)
                 at_keyword = rule.at_keyword
                 prelude = tinycss2.serialize(rule.prelude).strip()
 
-                # Parse the content of the at-rule
-                inner_rules = parse_stylesheet(tinycss2.serialize(rule.content))
+                mark = emitter.mark()
+                emitter.block_start(at_keyword, prelude)
 
                 # Process the inner rules recursively
-                inner_content = process_rule_block(inner_rules)
+                process_rule_block(doc.children(rule))
 
                 # Only include the at-rule if it has content after processing
-                if inner_content.strip():
-                    result += f"@{at_keyword} {prelude} {{\n{inner_content}\n}}\n"
+                if emitter.is_blank_since(mark + 1):
+                    emitter.truncate(mark)
+                else:
+                    emitter.block_end()
             else:
                 # Keep other rules as they are
-                result += tinycss2.serialize([rule])
-
-        return result
+                emitter.raw(rule)
 
     # Start processing from the top level
-    modified_css = process_rule_block(rules)
+    process_rule_block(rules)
 
-    return modified_css.strip()
+    return emitter.getvalue().strip()
 
 def modify_property_value(
-    css: Union[str, bytes],
+    css: Union[str, bytes, CssDocument],
     selector: Union[str, bytes],
     property_name: Union[str, bytes],
     new_value: Union[str, bytes],
@@ -233,7 +213,7 @@ def modify_property_value(
     Modify the value of a CSS property for a specific selector.
 
     Args:
-        css: The CSS code as string or bytes
+        css: The CSS code as string or bytes, or a CssDocument
         selector: The CSS selector to modify
         property_name: The property name to modify
         new_value: The new property value
@@ -243,8 +223,7 @@ def modify_property_value(
         Modified CSS as a string
     """
     # Convert all byte parameters to strings
-    if isinstance(css, bytes):
-        css = css.decode('utf-8')
+    doc = as_document(css)
     if isinstance(selector, bytes):
         selector = selector.decode('utf-8')
     if isinstance(property_name, bytes):
@@ -252,62 +231,56 @@ def modify_property_value(
     if isinstance(new_value, bytes):
         new_value = new_value.decode('utf-8')
 
-    rules = parse_stylesheet(css)
-    modified_css = ""
-    property_found = False
+    rules = doc.rules
+    emitter = Emitter("preserve")
+
+    # Decide up front whether the property exists on the selector, so a
+    # missing property is added in the same pass instead of reparsing output
+    target_ids = doc.selector_index.rule_ids(selector, top_level=True)
+    property_found = any(
+        decl.type == "declaration" and decl.name == property_name
+        for _, rule, _ in doc.selector_index.lookup(selector, top_level=True)
+        for decl in doc.declarations(rule)
+    )
+    found_selector = False
 
     for rule in rules:
         if rule.type == "qualified-rule":
-            rule_selector = get_selector_text(rule)
-            declarations = get_rule_declarations(rule)
+            rule_selector = doc.selector(rule)
+            declarations = list(doc.declarations(rule))
 
-            if rule_selector == selector:
+            if id(rule) in target_ids and property_found:
                 # Modify the property value
                 for i, decl in enumerate(declarations):
                     if decl.type == "declaration" and decl.name == property_name:
-                        property_found = True
                         # Use existing important flag if not specified
                         is_important = important if important is not None else decl.important
-                        declarations[i] = tinycss2.ast.Declaration(
-                            name=property_name,
-                            value=[
-                                tinycss2.ast.WhitespaceToken(value=" ", line=0, column=0),
-                                tinycss2.ast.IdentToken(value=new_value, line=0, column=0)
-                            ],
-                            important=is_important,
-                            line=0,
-                            column=0,
-                            lower_name=property_name.lower(),
-                        )
+                        declarations[i] = make_declaration(property_name, new_value, is_important)
+            elif id(rule) in target_ids:
+                # Property wasn't found but selector exists, so add the property
+                found_selector = True
+                if declarations and declarations[-1].type != "whitespace":
+                    declarations.append(tinycss2.ast.WhitespaceToken(line=0, column=0, value='\n    '))
+                declarations.append(make_declaration(property_name, new_value, important or False))
 
             # Format and add the rule to the result
-            serialized_content = tinycss2.serialize(declarations).strip()
-            serialized_content = "\n".join("    " + line.strip() for line in serialized_content.splitlines() if line.strip())
-            formatted_rule = f"{rule_selector} {{\n{serialized_content}\n}}\n"
-            modified_css += formatted_rule
+            emitter.rule_start(rule_selector)
+            emitter.preserved(declarations)
+            emitter.rule_end()
 
         else:
             # Keep other rules as they are
-            modified_css += tinycss2.serialize([rule])
-
-    # If the property wasn't found, add it
-    if not property_found and selector:
-        # Check if selector already exists in the result
-        if selector not in modified_css:
-            # Add new rule with the property
-            new_rule = f"\n{selector} {{\n    {property_name}: {new_value}{' !important' if important else ''};\n}}\n"
-            modified_css += new_rule
-        else:
-            # Property wasn't found but selector exists, so add_property would be needed
-            # This is a bit tricky since we've already formatted the CSS
-            # For simplicity, we'll call add_property on our current result
-            return add_property_to_selector(modified_css, selector, property_name, new_value, important or False)
+            emitter.raw(rule)
+
+    # If neither the property nor the selector was found, add a new rule
+    if not property_found and not found_selector and selector:
+        emitter.write(f"\n{selector} {{\n    {property_name}: {new_value}{' !important' if important else ''};\n}}\n")
 
-    return modified_css.strip()
+    return emitter.getvalue().strip()
 
 
 def add_prefix_to_property(
-    css: Union[str, bytes],
+    css: Union[str, bytes, CssDocument],
     property_name: Union[str, bytes],
     prefixes: List[str]
 ) -> str:
@@ -315,175 +288,294 @@ def add_prefix_to_property(
     Add vendor prefixes to a CSS property throughout the stylesheet.
 
     Args:
-        css: The CSS code as string or bytes
+        css: The CSS code as string or bytes, or a CssDocument
         property_name: The property name to prefix
         prefixes: List of prefixes to add (e.g., ['-webkit-', '-moz-'])
 
     Returns:
         Modified CSS as a string
     """
-    if isinstance(css, bytes):
-        css = css.decode('utf-8')
+    doc = as_document(css)
     if isinstance(property_name, bytes):
         property_name = property_name.decode('utf-8')
 
-    rules = parse_stylesheet(css)
-    modified_css = ""
+    rules = doc.rules
+    emitter = Emitter("preserve")
 
     def process_declarations(declarations):
         """Helper function to process declarations and add prefixes"""
         new_declarations = []
         for decl in declarations:
-            new_declarations.append(decl)
             if decl.type == "declaration" and decl.name == property_name:
                 # Add prefixed versions before the standard property
                 for prefix in prefixes:
-                    prefixed_prop = tinycss2.ast.Declaration(
+                    new_declarations.append(tinycss2.ast.Declaration(
                         name=f"{prefix}{property_name}",
                         value=decl.value,  # Use the same value as the original property
                         important=decl.important,
                         line=0,
                         column=0,
                         lower_name=f"{prefix}{property_name}".lower(),
-                    )
-                    # Insert prefixed property before the original
-                    new_declarations.insert(len(new_declarations) - 1, prefixed_prop)
+                    ))
                     # Add whitespace between properties
-                    new_declarations.insert(
-                        len(new_declarations) - 1,
-                        tinycss2.ast.WhitespaceToken(line=0, column=0, value='\n    ')
-                    )
+                    new_declarations.append(tinycss2.ast.WhitespaceToken(line=0, column=0, value='\n    '))
+            new_declarations.append(decl)
         return new_declarations
 
     def process_rules(rules_list, indent_level=0):
         """Recursively process rules, handling nested at-rules"""
-        result = ""
-        indent = "    " * indent_level
-
         for rule in rules_list:
             if rule.type == "qualified-rule":
                 # Regular CSS rule
-                rule_selector = get_selector_text(rule)
-                declarations = get_rule_declarations(rule)
+                rule_selector = doc.selector(rule)
+                declarations = doc.declarations(rule)
 
-                # Process declarations to add prefixes
-                new_declarations = process_declarations(declarations)
-
-                # Format and add the rule to the result
-                serialized_content = tinycss2.serialize(new_declarations).strip()
-                serialized_content = "\n".join(indent + "    " + line.strip()
-                                              for line in serialized_content.splitlines() if line.strip())
-
-                formatted_rule = f"{indent}{rule_selector} {{\n{serialized_content}\n{indent}}}\n"
-                result += formatted_rule
+                # Process declarations to add prefixes and add the rule to the result
+                emitter.rule_start(rule_selector, indent_level)
+                emitter.preserved(process_declarations(declarations), indent_level)
+                emitter.rule_end(indent_level)
 
             elif rule.type == "at-rule" and rule.content is not None:
                 # Handle at-rules with blocks like @media
                 at_keyword = rule.at_keyword
                 prelude = tinycss2.serialize(rule.prelude).strip()
 
-                # Parse the content of the at-rule
-                content_rules = parse_stylesheet(tinycss2.serialize(rule.content))
-
                 # Process the nested rules
-                inner_content = process_rules(content_rules, indent_level + 1)
-
-                # Format the at-rule
-                formatted_at_rule = f"{indent}@{at_keyword} {prelude} {{\n{inner_content}{indent}}}\n"
-                result += formatted_at_rule
+                emitter.block_start(at_keyword, prelude, indent_level)
+                process_rules(doc.children(rule), indent_level + 1)
+                emitter.write(f"{emitter.indent * indent_level}}}\n")
 
             else:
                 # Keep other rules as they are (at-rules without blocks, comments, etc.)
-                result += indent + tinycss2.serialize([rule])
-
-        return result
+                emitter.write(emitter.indent * indent_level)
+                emitter.raw(rule)
 
     # Start processing from the top level
-    modified_css = process_rules(rules)
+    process_rules(rules)
+
+    return emitter.getvalue().strip()
+
+
+# At-rules whose blocks hold no style rules, so moving a rule past them
+# cannot change which declaration wins
+_CASCADE_NEUTRAL_AT_RULES = {
+    "font-face", "keyframes", "-webkit-keyframes", "-moz-keyframes", "-o-keyframes", "counter-style",
+    "property", "font-feature-values", "font-palette-values", "import", "charset", "namespace",
+}
+
+# Shorthands whose longhands do not share their first name segment
+_PROPERTY_FAMILIES = {
+    "top": "inset", "right": "inset", "bottom": "inset", "left": "inset",
+    "align": "place", "justify": "place", "row": "gap", "column": "gap", "columns": "gap",
+    "line": "font", "white": "text",
+}
+
+
+def _property_family(name: str) -> str:
+    """Group a property with the shorthands and longhands it can override."""
+    name = name.lower()
+    if name.startswith("--"):
+        return name
+    if name.startswith("-"):
+        name = name.split("-", 2)[-1]
+    family = name.split("-", 1)[0]
+    return _PROPERTY_FAMILIES.get(family, family)
+
+
+# One entry of a rule body in merge records: (node type, declaration name
+# or None, serialized text, key used to group identical bodies or None)
+MergeItem = Tuple[str, Optional[str], str, Optional[Tuple[Any, ...]]]
+
+# One top-level rule in merge records: (selector, body items) for a style
+# rule, or (None, (serialized text, whether it is a cascade barrier))
+MergeRecord = Tuple[Optional[str], Any]
 
-    return modified_css.strip()
 
-def merge_stylesheets(css_list: List[Union[str, bytes]]) -> str:
+def merge_records(css: Union[str, bytes, CssDocument], group_identical: bool = False) -> List[MergeRecord]:
     """
-    Merge multiple CSS stylesheets into one, removing duplicates.
+    Reduce a stylesheet to what merge_stylesheets needs of it.
+
+    Records hold only selector and declaration texts, so they are about
+    the size of the source and cheap to send between processes, unlike
+    the parsed document.
 
     Args:
-        css_list: List of CSS stylesheets as strings or bytes
+        css: The CSS code as string or bytes, or a CssDocument
+        group_identical: Also compute the keys used to group identical bodies
 
     Returns:
-        Merged CSS as a string
+        One record per top-level rule, see MergeRecord
     """
-    all_rules = []
-    selector_map = {}  # Maps selectors to their rule index in all_rules
+    doc = as_document(css)
+    records = []
+    for rule in doc.rules:
+        if rule.type == "qualified-rule":
+            items = []
+            for node in doc.declarations(rule):
+                if node.type == "declaration":
+                    key = (node.lower_name, doc.value(node), node.important) if group_identical else None
+                    # tinycss2 ends every declaration with ';' when serializing a body
+                    items.append((node.type, node.name, node.serialize() + ";", key))
+                elif node.type == "comment":
+                    items.append((node.type, None, node.serialize(), ("/**/", node.value, False)))
+                else:
+                    items.append((node.type, None, node.serialize(), None))
+            records.append((doc.selector(rule), items))
+        else:
+            barrier = (
+                rule.type == "at-rule"
+                and rule.content is not None
+                and rule.lower_at_keyword not in _CASCADE_NEUTRAL_AT_RULES
+            )
+            records.append((None, (tinycss2.serialize([rule]), barrier)))
+    return records
+
+
+def _body_key(items: List[MergeItem]) -> Optional[Tuple[Any, ...]]:
+    """Canonical form of a declaration block, or None if it should not be grouped."""
+    key = []
+    for node_type, _, _, item_key in items:
+        if item_key is not None:
+            key.append(item_key)
+        elif node_type != "whitespace":
+            return None
+    return tuple(key)
+
+
+def _group_identical_bodies(all_rules: List[MergeRecord], merged_declarations: Dict[int, List[MergeItem]]) -> None:
+    """
+    Fold rules into an earlier rule with the same declaration block.
+
+    A rule is folded only when no rule in between declares a property of
+    the same family and no grouping at-rule such as @media sits in
+    between, so every declaration keeps winning over the same
+    declarations as before. Selectors with vendor-prefixed pseudo-classes
+    are never grouped, as one unknown selector would drop the whole rule.
+    """
+    first_with_body: Dict[Tuple[Any, ...], int] = {}
+    last_family: Dict[str, int] = {}
+    last_barrier = -1
+    for index, (selector, body) in enumerate(all_rules):
+        if selector is None:
+            if body[1]:
+                last_barrier = index
+            continue
+        declarations = merged_declarations[index]
+        key = _body_key(declarations) if ":-" not in selector else None
+        families = {_property_family(name) for node_type, name, _, _ in declarations if node_type == "declaration"}
+        if "all" in families:
+            last_barrier = index
+        target = first_with_body.get(key) if key else None
+        if (
+            target is not None
+            and target > last_barrier
+            and all(last_family.get(family) == target for family in families)
+        ):
+            target_selector, target_body = all_rules[target]
+            all_rules[target] = (f"{target_selector}, {selector}", target_body)
+            all_rules[index] = (None, None)
+            continue
+        if key:
+            first_with_body[key] = index
+        for family in families:
+            last_family[family] = index
+
+
+def merge_from_records(sheets: Iterable[List[MergeRecord]], group_identical: bool = False) -> str:
+    """
+    Merge stylesheets reduced by merge_records, see merge_stylesheets.
 
-    for css in css_list:
-        if isinstance(css, bytes):
-            css = css.decode('utf-8')
+    Args:
+        sheets: The records of each stylesheet, in order
+        group_identical: Fold rules with identical declaration blocks; the
+                         records must have been made with group_identical
 
-        rules = parse_stylesheet(css)
+    Returns:
+        Merged CSS as a string
+    """
+    all_rules: List[MergeRecord] = []
+    selector_map = {}  # Maps selectors to their rule index in all_rules
+    merged_declarations = {}  # Maps rule index in all_rules to its declarations
+    merged_positions = {}  # Maps rule index to the position of each property in its declarations
 
-        for rule in rules:
-            if rule.type == "qualified-rule":
-                selector = get_selector_text(rule)
-
-                if selector in selector_map:
-                    # Merge declarations with existing rule
-                    existing_rule_idx = selector_map[selector]
-                    existing_rule = all_rules[existing_rule_idx]
-
-                    # Get declarations from both rules
-                    existing_decls = get_rule_declarations(existing_rule)
-                    new_decls = get_rule_declarations(rule)
-
-                    # Create a map of existing declarations to avoid duplicates
-                    existing_props = {
-                        decl.name: i
-                        for i, decl in enumerate(existing_decls)
-                        if decl.type == "declaration"
-                    }
-
-                    # Add new declarations if they don't exist
-                    for decl in new_decls:
-                        if decl.type == "declaration":
-                            if decl.name in existing_props:
-                                # Replace existing declaration (newer takes precedence)
-                                existing_decls[existing_props[decl.name]] = decl
-                            else:
-                                # Add new declaration
-                                existing_decls.append(decl)
-
-                    # Update the rule content
-                    existing_rule.content = tinycss2.serialize(existing_decls)
-                else:
-                    # Add new rule
-                    all_rules.append(rule)
-                    selector_map[selector] = len(all_rules) - 1
-            else:
+    for records in sheets:
+        for selector, body in records:
+            if selector is None:
                 # For at-rules and comments, just add them
-                all_rules.append(rule)
+                all_rules.append((None, body))
+            elif selector in selector_map:
+                # Merge declarations with existing rule
+                index = selector_map[selector]
+                existing_decls = merged_declarations[index]
+                existing_props = merged_positions[index]
+                added = {}
+
+                for item in body:
+                    if item[0] == "declaration":
+                        name = item[1]
+                        if name in existing_props:
+                            # Replace existing declaration (newer takes precedence)
+                            existing_decls[existing_props[name]] = item
+                        else:
+                            # Add new declaration
+                            added[name] = len(existing_decls)
+                            existing_decls.append(item)
+                # Properties added by this rule are replaced from the next one on
+                existing_props.update(added)
+            else:
+                # Add new rule, keeping a private copy of its declarations
+                all_rules.append((selector, None))
+                index = len(all_rules) - 1
+                selector_map[selector] = index
+                merged_declarations[index] = list(body)
+                merged_positions[index] = {
+                    item[1]: i
+                    for i, item in enumerate(body)
+                    if item[0] == "declaration"
+                }
+
+    if group_identical:
+        _group_identical_bodies(all_rules, merged_declarations)
 
     # Serialize the merged rules
-    merged_css = ""
-    for rule in all_rules:
-        if rule.type == "qualified-rule":
-            selector = get_selector_text(rule)
-            declarations = get_rule_declarations(rule)
+    emitter = Emitter("preserve")
+    for i, (selector, body) in enumerate(all_rules):
+        if selector is not None:
+            emitter.rule_start(selector)
+            emitter.preserved_text("".join(item[2] for item in merged_declarations[i]))
+            emitter.rule_end()
+        elif body is not None:
+            emitter.write(body[0])
 
-            serialized_content = tinycss2.serialize(declarations).strip()
-            serialized_content = "\n".join("    " + line.strip() for line in serialized_content.splitlines() if line.strip())
-            formatted_rule = f"{selector} {{\n{serialized_content}\n}}\n"
-            merged_css += formatted_rule
-        else:
-            merged_css += tinycss2.serialize([rule])
+    return emitter.getvalue().strip()
+
+
+def merge_stylesheets(css_list: List[Union[str, bytes, CssDocument]], group_identical: bool = False) -> str:
+    """
+    Merge multiple CSS stylesheets into one, removing duplicates.
+
+    Rules with the same selector are merged into the first one, later
+    declarations replacing earlier ones of the same property. The merge
+    is a single pass over the declarations.
 
-    return merged_css.strip()
+    Args:
+        css_list: List of CSS stylesheets as strings, bytes or CssDocuments
+        group_identical: Also fold rules whose declaration blocks are
+                         identical into one rule with a selector list, where
+                         that cannot change which declarations win
+
+    Returns:
+        Merged CSS as a string
+    """
+    return merge_from_records((merge_records(css, group_identical) for css in css_list), group_identical)
 
-def replace_selector_rule(css: Union[str, bytes], selector: Union[str, bytes], new_declarations: Union[str, bytes]) -> str:
+
+def replace_selector_rule(css: Union[str, bytes, CssDocument], selector: Union[str, bytes], new_declarations: Union[str, bytes]) -> str:
     """
     Replace an entire CSS rule for a specific selector with new declarations.
 
     Args:
-        css: The CSS code as string or bytes
+        css: The CSS code as string or bytes, or a CssDocument
         selector: The CSS selector to replace
         new_declarations: The new CSS declarations as a string (without curly braces)
 
@@ -494,20 +586,19 @@ def replace_selector_rule(css: Union[str, bytes], selector: Union[str, bytes], n
         Exception: If the CSS cannot be properly parsed or new declarations are invalid
     """
     # Ensure input types are correct
-    if isinstance(css, bytes):
-        css = css.decode('utf-8')
+    doc = as_document(css)
     if isinstance(selector, bytes):
         selector = selector.decode('utf-8')
     if isinstance(new_declarations, bytes):
         new_declarations = new_declarations.decode('utf-8')
 
     # Validate CSS syntax before proceeding
-    if css.count('{') != css.count('}'):
+    if not braces_balanced(doc.text):
         raise Exception("CSS syntax error: Unbalanced braces")
 
     # Basic validation of the original CSS by parsing it
     try:
-        rules = parse_stylesheet(css)
+        rules = doc.rules
 
         # Check for parse errors in the original CSS
         for rule in rules:
@@ -535,29 +626,38 @@ def replace_selector_rule(css: Union[str, bytes], selector: Union[str, bytes], n
     except Exception as e:
         raise Exception(f"Invalid declaration syntax: {str(e)}")
 
+    target_ids = doc.selector_index.rule_ids(selector)
+
     # Flatten nested selectors if present in the CSS
-    flattened_css = ""
+    emitter = Emitter("preserve")
     selector_found = False
 
     def flatten_nested_css(rules, parent_selector=None):
-        nonlocal flattened_css, selector_found
+        nonlocal selector_found
 
         for rule in rules:
             if rule.type == "qualified-rule":
-                current_selector = get_selector_text(rule)
+                current_selector = doc.selector(rule)
                 combined_selector = current_selector
 
                 if parent_selector:
                     combined_selector = f"{parent_selector} {current_selector}"
 
-                if combined_selector == selector:
+                # Top-level and grouped rules are found through the selector index
+                if parent_selector:
+                    is_target = combined_selector == selector
+                else:
+                    is_target = id(rule) in target_ids
+
+                if is_target:
                     # Found the selector to replace
                     selector_found = True
-                    formatted_declarations = "\n".join(f"    {decl};" for decl in new_declarations.split(';') if decl.strip())
-                    flattened_css += f"{selector} {{\n{formatted_declarations}\n}}\n"
+                    emitter.rule_start(selector)
+                    emitter.write("\n".join(f"    {decl};" for decl in new_declarations.split(';') if decl.strip()))
+                    emitter.rule_end()
                 else:
                     # Keep other rules
-                    declarations = get_rule_declarations(rule)
+                    declarations = doc.declarations(rule)
 
                     # Check if this rule contains more nested rules
                     nested_rules = []
@@ -570,10 +670,14 @@ def replace_selector_rule(css: Union[str, bytes], selector: Union[str, bytes], n
                         flatten_nested_css(nested_rules, combined_selector)
                     else:
                         # Regular rule - add it to output
-                        serialized_content = tinycss2.serialize(declarations).strip()
-                        if serialized_content:  # Only add if there's content
-                            serialized_content = "\n".join(f"    {line.strip()}" for line in serialized_content.splitlines() if line.strip())
-                            flattened_css += f"{combined_selector} {{\n{serialized_content}\n}}\n"
+                        mark = emitter.mark()
+                        emitter.rule_start(combined_selector)
+                        emitter.preserved(declarations)
+                        if emitter.is_blank_since(mark + 1):
+                            # Only add if there's content
+                            emitter.truncate(mark)
+                        else:
+                            emitter.rule_end()
 
             elif rule.type == "at-rule" and rule.content:
                 # Handle at-rules like media queries
@@ -581,20 +685,20 @@ def replace_selector_rule(css: Union[str, bytes], selector: Union[str, bytes], n
                 prelude = tinycss2.serialize(rule.prelude).strip()
 
                 # Store the current CSS position
-                current_css_length = len(flattened_css)
+                mark = emitter.mark()
+                emitter.block_start(at_keyword, prelude)
 
                 # Process nested rules in the at-rule
-                inner_rules = parse_stylesheet(tinycss2.serialize(rule.content))
-                flatten_nested_css(inner_rules)
-
-                # If content was added, wrap it in the at-rule
-                if len(flattened_css) > current_css_length:
-                    at_rule_content = flattened_css[current_css_length:]
-                    flattened_css = flattened_css[:current_css_length]
-                    flattened_css += f"@{at_keyword} {prelude} {{\n{at_rule_content}}}\n"
+                flatten_nested_css(doc.children(rule))
+
+                # If content was added, close the at-rule, otherwise drop it
+                if emitter.mark() > mark + 1:
+                    emitter.write("}\n")
+                else:
+                    emitter.truncate(mark)
             else:
                 # Other rules like comments
-                flattened_css += tinycss2.serialize([rule])
+                emitter.raw(rule)
 
     # Process the CSS
     flatten_nested_css(rules)
@@ -602,6 +706,527 @@ def replace_selector_rule(css: Union[str, bytes], selector: Union[str, bytes], n
     # Add the selector if not found
     if not selector_found:
         formatted_declarations = "\n".join(f"    {decl};" for decl in new_declarations.split(';') if decl.strip())
-        flattened_css += f"\n{selector} {{\n{formatted_declarations}\n}}\n"
+        emitter.write(f"\n{selector} {{\n{formatted_declarations}\n}}\n")
+
+    return emitter.getvalue().strip()
+
+
+def make_declaration(property_name: str, property_value: str, important: bool = False) -> Any:
+    """
+    Build a tinycss2 declaration node from a property name and value text.
+
+    The value is tokenized, so multi-part values such as "1px solid #000"
+    serialize exactly as written.
+
+    Args:
+        property_name: The property name
+        property_value: The property value as CSS text
+        important: Whether to mark the property as !important
+
+    Returns:
+        A tinycss2.ast.Declaration
+    """
+    return tinycss2.ast.Declaration(
+        name=property_name,
+        value=[tinycss2.ast.WhitespaceToken(value=" ", line=0, column=0)]
+        + tinycss2.parse_component_value_list(property_value.strip()),
+        important=important,
+        line=0,
+        column=0,
+        lower_name=property_name.lower(),
+    )
+
+
+# Whitespace as tinycss2 tokenizes it
+_CSS_WHITESPACE = " \t\n\r\f"
+
+
+def _push(items: List[Any], item: Any) -> None:
+    """Append an item, joining whitespace text like a re-parse would."""
+    if isinstance(item, str) and items and isinstance(items[-1], str):
+        items[-1] += item
+    else:
+        items.append(item)
+
+
+def _strip(items: List[Any]) -> List[Any]:
+    """Drop the whitespace text at both ends, like str.strip() on the output."""
+    start, end = 0, len(items)
+    while start < end and isinstance(items[start], str):
+        start += 1
+    while end > start and isinstance(items[end - 1], str):
+        end -= 1
+    return items[start:end]
+
+
+class EditableRule:
+    """A qualified rule whose declarations can be edited in place."""
+
+    __slots__ = ("selector", "node", "declarations", "text", "key", "error")
+
+    def __init__(self, selector: str, node: Any = None, text: Optional[str] = None):
+        self.selector = selector
+        self.node = node
+        # Declarations are copied from the document on first edit only
+        self.declarations: Optional[List[Any]] = None
+        # Body as last written, until an edit formats the rule again
+        self.text = text
+        self.key: Optional[str] = None
+        # First parse error among the declarations, False when there is none
+        self.error: Any = None
+
+
+class EditableBlock:
+    """An at-rule with a block, such as @media, whose nested rules can be edited in place."""
+
+    __slots__ = ("at_keyword", "prelude", "node", "children")
+
+    def __init__(self, node: Any):
+        self.at_keyword = node.at_keyword
+        self.prelude = tinycss2.serialize(node.prelude).strip()
+        self.node = node
+        # Nested items, built when an edit first rewrites the block; until
+        # then the block is written as it is in the source
+        self.children: Optional[List[Any]] = None
+
+
+class EditableStylesheet:
+    """
+    A parsed stylesheet prepared for a batch of edits.
+
+    Each single-edit function parses its input, writes the whole sheet back
+    in its own layout and strips the result, so a chain of them rewrites the
+    sheet once per edit: every pass puts a line break after each rule it
+    writes, remove_selector and replace_selector_rule also rewrite nested
+    blocks such as @media, and remove_property_from_selector and
+    replace_selector_rule drop the rules left empty. The stylesheet keeps a
+    skeleton of the parsed tree, made of rules, blocks, whitespace text and
+    other nodes, and replays those passes on it. The result is the output of
+    the chained functions, while the text is parsed and serialized once.
+
+    Args:
+        doc: The CssDocument to edit
+    """
+
+    def __init__(self, doc: CssDocument):
+        self.doc = doc
+        self.items = self._build(doc.rules)
+        # Number of edits replayed so far
+        self.passes = 0
+        # Rules written literally by the current edit
+        self.written: List[EditableRule] = []
+        # Rule appended after the others by the current edit
+        self.appended: Optional[EditableRule] = None
+
+    def _build(self, nodes: List[Any]) -> List[Any]:
+        items: List[Any] = []
+        for node in nodes:
+            if node.type == "whitespace":
+                _push(items, node.value)
+            elif node.type == "qualified-rule":
+                items.append(EditableRule(self.doc.selector(node), node))
+            elif node.type == "at-rule" and node.content is not None:
+                items.append(EditableBlock(node))
+            else:
+                items.append(node)
+        return items
+
+    def begin_edit(self) -> None:
+        """Turn the rules written by the previous edit into what parsing its output gives."""
+        if self.appended is not None:
+            self._reparse_appended(self.appended)
+            self.appended = None
+        for item in self.written:
+            # Rules nested in a block that later edits write as it is keep
+            # their text, only respelled the way tinycss2 serializes tokens
+            item.selector = tinycss2.serialize(tinycss2.parse_component_value_list(item.selector))
+            item.text = tinycss2.serialize(tinycss2.parse_component_value_list(item.text))
+            item.declarations = tinycss2.parse_declaration_list(
+                f"\n{item.text}\n", skip_whitespace=False, skip_comments=False
+            )
+            item.key = None
+            item.error = None
+        self.written = []
+
+    def _reparse_appended(self, item: EditableRule) -> None:
+        # The selector of an appended rule is the one given to the edit, so
+        # its text may not parse back as one rule, e.g. "@page" gives an
+        # at-rule; the rule is then replaced by what parsing gives
+        nodes = tinycss2.parse_stylesheet(
+            f"{item.selector} {{\n{item.text}\n}}", skip_whitespace=False, skip_comments=False
+        )
+        if len(nodes) == 1 and nodes[0].type == "qualified-rule":
+            return
+        self.written.remove(item)
+        self.items.pop()
+        for built in self._build(nodes):
+            _push(self.items, built)
+
+    def key(self, item: EditableRule) -> str:
+        """Return the normalized selector of a rule, as the selector index has it."""
+        if item.key is None:
+            item.key = normalize_selector(item.node.prelude if item.node is not None else item.selector)
+        return item.key
+
+    def declarations(self, item: EditableRule) -> List[Any]:
+        """Return the editable declaration list of a rule."""
+        if item.declarations is None:
+            item.declarations = list(self.doc.declarations(item.node))
+        item.error = None
+        return item.declarations
+
+    def current_declarations(self, item: EditableRule) -> List[Any]:
+        """Return the declarations of a rule without copying them."""
+        return item.declarations if item.declarations is not None else self.doc.declarations(item.node)
+
+    def children(self, item: EditableBlock) -> List[Any]:
+        """Return the nested items of a block."""
+        if item.children is None:
+            item.children = self._build(self.doc.children(item.node))
+        return item.children
+
+    def matching(self, selector: str) -> List[EditableRule]:
+        """Return the top-level rules with exactly this selector."""
+        key = normalize_selector(selector)
+        return [item for item in self.items if isinstance(item, EditableRule) and self.key(item) == key]
+
+    def is_blank(self, item: EditableRule) -> bool:
+        """Whether a rule has nothing but whitespace between its braces."""
+        for token in self.current_declarations(item):
+            if token.type != "whitespace" and (token.type != "error" or tinycss2.serialize([token]).strip()):
+                return False
+        return True
+
+    def ends_line(self, declarations: List[Any]) -> bool:
+        """Whether a declaration added to the list starts on a line of its own."""
+        if not declarations:
+            return True
+        last = declarations[-1]
+        if last.type != "whitespace":
+            return False
+        # A rule written by an earlier edit is parsed again with its closing
+        # brace on a line of its own
+        return self.passes == 0 or any(char in last.value for char in "\n\r\f")
+
+    def _format(self, items: List[Any], item: EditableRule) -> None:
+        # The rule is written again from its declarations and selector text
+        if item.text is not None:
+            item.text = None
+            item.selector = item.selector.strip()
+        # Writing a parse error among the declarations fails in the
+        # single-edit functions as well, e.g. for a nested rule
+        if item.error is None:
+            item.error = next(
+                (token for token in self.current_declarations(item) if token.type == "error"), False
+            )
+        if item.error:
+            tinycss2.serialize([item.error])
+        items.append(item)
+        _push(items, "\n")
+
+    def _keep(self, items: List[Any], item: Any) -> None:
+        # Writing a parse error fails in the single-edit functions as well
+        if not isinstance(item, (str, EditableBlock)) and item.type == "error":
+            tinycss2.serialize([item])
+        _push(items, item)
+
+    def check_syntax(self) -> None:
+        """Raise like remove_selector and replace_selector_rule do on invalid CSS."""
+        if self.passes == 0 and not braces_balanced(self.doc.text):
+            raise Exception("CSS syntax error: Unbalanced braces")
+
+    def check_parse_errors(self) -> None:
+        """Raise on a top-level parse error."""
+        for item in self.items:
+            if getattr(item, 'type', None) == 'error':
+                raise Exception(f"CSS parse error: {getattr(item, 'message', 'Unknown error')}")
+
+    def _write_rule(self, items: List[Any], item: EditableRule, selector: str, text: str) -> None:
+        # The selector is written as given, so its leading whitespace
+        # belongs to the whitespace before the rule once parsed again
+        stripped = selector.lstrip(_CSS_WHITESPACE)
+        if len(stripped) < len(selector):
+            _push(items, selector[:len(selector) - len(stripped)])
+        item.selector = stripped
+        item.node = None
+        item.declarations = None
+        item.text = text
+        item.key = None
+        item.error = None
+        self.written.append(item)
+        items.append(item)
+        _push(items, "\n")
+
+    def format_rules(self, prune: bool = False, append: Optional[Tuple[str, str]] = None) -> None:
+        """
+        Replay a pass of the functions that edit top-level properties.
+
+        Args:
+            prune: Drop the rules left without declarations, like
+                   remove_property_from_selector
+            append: (selector, body) of a rule written after the others
+        """
+        items: List[Any] = []
+        for item in self.items:
+            if isinstance(item, EditableRule):
+                if prune and self.is_blank(item):
+                    continue
+                self._format(items, item)
+            else:
+                # Whitespace, blocks and other nodes are written as they are
+                self._keep(items, item)
+        if append is not None:
+            _push(items, "\n")
+            self.appended = EditableRule("")
+            self._write_rule(items, self.appended, *append)
+        self.end_edit(items)
+
+    def remove_rules(self, selector: str) -> None:
+        """Replay a pass of remove_selector."""
+        self.end_edit(self._remove_rules(self.items, normalize_selector(selector), True))
+
+    def _remove_rules(self, items: List[Any], key: str, indexed: bool) -> List[Any]:
+        kept: List[Any] = []
+        for item in items:
+            if isinstance(item, EditableRule):
+                # Only rules the selector index covers are matched
+                if indexed and self.key(item) == key:
+                    continue
+                self._format(kept, item)
+            elif isinstance(item, EditableBlock):
+                nested = indexed and item.node.lower_at_keyword in NESTING_AT_RULES
+                children = self._remove_rules(self.children(item), key, nested)
+                # Blocks left with nothing but whitespace are dropped
+                if all(isinstance(child, str) for child in children):
+                    continue
+                item.children = ["\n"]
+                for child in children + ["\n"]:
+                    _push(item.children, child)
+                kept.append(item)
+                _push(kept, "\n")
+            else:
+                self._keep(kept, item)
+        return kept
+
+    def replace_rules(self, selector: str, text: str) -> None:
+        """Replay a pass of replace_selector_rule with the given rule body."""
+        replaced: List[EditableRule] = []
+        items = self._replace_rules(self.items, normalize_selector(selector), selector, text, True, replaced)
+        if not replaced:
+            _push(items, "\n")
+            self.appended = EditableRule("")
+            self._write_rule(items, self.appended, selector, text)
+        self.end_edit(items)
+
+    def _replace_rules(self, items: List[Any], key: str, selector: str, text: str, indexed: bool,
+                       replaced: List[EditableRule]) -> List[Any]:
+        kept: List[Any] = []
+        for item in items:
+            if isinstance(item, EditableRule):
+                if indexed and self.key(item) == key:
+                    replaced.append(item)
+                    self._write_rule(kept, item, selector, text)
+                elif not self.is_blank(item):
+                    self._format(kept, item)
+            elif isinstance(item, EditableBlock) and (item.children is not None or item.node.content):
+                nested = indexed and item.node.lower_at_keyword in NESTING_AT_RULES
+                children = self._replace_rules(self.children(item), key, selector, text, nested, replaced)
+                # Blocks are kept when anything, even whitespace, was written
+                # in them, and closed without a line break of their own
+                if not children:
+                    continue
+                item.children = ["\n"]
+                for child in children:
+                    _push(item.children, child)
+                kept.append(item)
+                _push(kept, "\n")
+            else:
+                self._keep(kept, item)
+        return kept
+
+    def end_edit(self, items: List[Any]) -> None:
+        self.items = _strip(items)
+        self.passes += 1
+
+    def serialize(self) -> str:
+        """Serialize the edited stylesheet."""
+        emitter = Emitter("preserve")
+        self._serialize_items(self.items, emitter)
+        return emitter.getvalue()
+
+    def _serialize_items(self, items: List[Any], emitter: Emitter) -> None:
+        for item in items:
+            if isinstance(item, str):
+                emitter.write(item)
+            elif isinstance(item, EditableRule):
+                emitter.rule_start(item.selector)
+                if item.text is not None:
+                    emitter.write(item.text)
+                else:
+                    emitter.preserved(self.current_declarations(item))
+                # The line break after the brace is part of the whitespace that follows
+                emitter.write("\n}")
+            elif isinstance(item, EditableBlock):
+                if item.children is None:
+                    emitter.raw(item.node)
+                else:
+                    emitter.write(f"@{item.at_keyword} {item.prelude} {{")
+                    self._serialize_items(item.children, emitter)
+                    emitter.write("}")
+            else:
+                emitter.raw(item)
+
+
+def _decode(value: Any) -> Any:
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+
+def _edit_add_property(sheet: EditableStylesheet, selector: str, property_name: str,
+                       property_value: str, important: bool = False) -> None:
+    matches = sheet.matching(selector)
+    for item in matches:
+        declarations = sheet.declarations(item)
+        for i, decl in enumerate(declarations):
+            if decl.type == "declaration" and decl.name == property_name:
+                # Replace the existing property
+                declarations[i] = make_declaration(property_name, property_value, important)
+                break
+        else:
+            # Add the property if it doesn't exist
+            if not sheet.ends_line(declarations):
+                declarations.append(tinycss2.ast.WhitespaceToken(line=0, column=0, value='\n    '))
+            declarations.append(make_declaration(property_name, property_value, important))
+
+    # Create the selector if it doesn't exist
+    sheet.format_rules(append=None if matches else (
+        selector, f"    {property_name}: {property_value}{' !important' if important else ''};"
+    ))
+
+
+def _edit_remove_property(sheet: EditableStylesheet, selector: str, property_name: str) -> None:
+    for item in sheet.matching(selector):
+        item.declarations = [
+            decl for decl in sheet.current_declarations(item)
+            if not (decl.type == "declaration" and decl.name == property_name)
+        ]
+    # Rules left without declarations are dropped, whichever their selector
+    sheet.format_rules(prune=True)
+
+
+def _edit_modify_property(sheet: EditableStylesheet, selector: str, property_name: str,
+                          new_value: str, important: Optional[bool] = None) -> None:
+    matches = sheet.matching(selector)
+    property_found = any(
+        decl.type == "declaration" and decl.name == property_name
+        for item in matches
+        for decl in sheet.current_declarations(item)
+    )
+    for item in matches:
+        declarations = sheet.declarations(item)
+        if property_found:
+            for i, decl in enumerate(declarations):
+                if decl.type == "declaration" and decl.name == property_name:
+                    # Use existing important flag if not specified
+                    is_important = important if important is not None else decl.important
+                    declarations[i] = make_declaration(property_name, new_value, is_important)
+        else:
+            # Property wasn't found but selector exists, so add the property
+            if not sheet.ends_line(declarations):
+                declarations.append(tinycss2.ast.WhitespaceToken(line=0, column=0, value='\n    '))
+            declarations.append(make_declaration(property_name, new_value, important or False))
+
+    # If neither the property nor the selector was found, add a new rule
+    sheet.format_rules(append=None if matches or not selector else (
+        selector, f"    {property_name}: {new_value}{' !important' if important else ''};"
+    ))
+
+
+def _edit_remove_selector(sheet: EditableStylesheet, selector: str) -> None:
+    sheet.check_syntax()
+    sheet.check_parse_errors()
+    sheet.remove_rules(selector)
+
+
+def _edit_replace_selector_rule(sheet: EditableStylesheet, selector: str, new_declarations: str) -> None:
+    sheet.check_syntax()
+    try:
+        sheet.check_parse_errors()
+    except Exception as e:
+        raise Exception(f"Failed to parse CSS: {str(e)}")
+
+    # Validate new declarations syntax - ensure each declaration has a colon
+    declarations_list = [d.strip() for d in new_declarations.split(';') if d.strip()]
+    for decl in declarations_list:
+        if ':' not in decl:
+            raise Exception(f"Invalid declaration syntax: Missing colon in '{decl}'")
+
+    # Written like replace_selector_rule writes them, one per line
+    new_declarations = '; '.join(declarations_list) + ';'
+    sheet.replace_rules(selector, "\n".join(f"    {decl};" for decl in new_declarations.split(';') if decl.strip()))
+
+
+# Maps edit operation names to their implementation; the names and keyword
+# arguments are those of the single-edit functions in this module
+EDIT_OPERATIONS = {
+    "add_property_to_selector": _edit_add_property,
+    "remove_property_from_selector": _edit_remove_property,
+    "modify_property_value": _edit_modify_property,
+    "remove_selector": _edit_remove_selector,
+    "replace_selector_rule": _edit_replace_selector_rule,
+}
+
+
+def apply_edits(css: Union[str, bytes, CssDocument], edits: List[Any]) -> str:
+    """
+    Apply an ordered list of edits to one parsed stylesheet and serialize once.
+
+    Each edit is either a dict with an "op" key plus the keyword arguments of
+    the matching single-edit function, or an `(op, kwargs)` pair:
+
+        apply_edits(css, [
+            {"op": "add_property_to_selector", "selector": ".a",
+             "property_name": "display", "property_value": "none"},
+            ("remove_selector", {"selector": ".legacy"}),
+        ])
+
+    Supported operations are add_property_to_selector,
+    remove_property_from_selector, modify_property_value, remove_selector
+    and replace_selector_rule. The result is exactly what calling those
+    functions one after the other returns, each on the output of the
+    previous one, down to the whitespace they write and the rules they
+    drop, but the stylesheet is parsed and serialized a single time.
+
+    Args:
+        css: The CSS code as string or bytes, or a CssDocument
+        edits: Ordered list of edit operations
+
+    Returns:
+        Modified CSS as a string; the CSS itself when there are no edits
+
+    Raises:
+        Exception: If an operation is unknown, or when the single-edit
+                   functions would raise, such as on unbalanced braces
+    """
+    doc = as_document(css)
+
+    operations = []
+    for edit in edits:
+        if isinstance(edit, dict):
+            arguments = {_decode(key): _decode(value) for key, value in edit.items()}
+            op = arguments.pop("op", None)
+        else:
+            op, arguments = _decode(edit[0]), {_decode(key): _decode(value) for key, value in edit[1].items()}
+
+        if op not in EDIT_OPERATIONS:
+            raise Exception(f"Unknown edit operation: {op}")
+        operations.append((EDIT_OPERATIONS[op], arguments))
+
+    if not operations:
+        return doc.text
+
+    sheet = EditableStylesheet(doc)
+    for operation, arguments in operations:
+        sheet.begin_edit()
+        operation(sheet, **arguments)
 
-    return flattened_css.strip()
+    return sheet.serialize()
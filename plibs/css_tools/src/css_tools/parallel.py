@@ -0,0 +1,257 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Run css_tools operations over many stylesheets on a process pool."""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from .parser import CssDocument, analyze_stylesheet, as_document
+from .extractor import extract_all
+from .minifier import minify_css
+from .usage_index import TEMPLATE_EXTENSIONS, UsageCache, UsageIndex, find_templates, scan_file
+from . import modifier
+
+# One input: CSS as string or bytes, a CssDocument, or a path to a CSS file
+CssInput = Union[str, bytes, CssDocument, "os.PathLike[str]"]
+
+
+def _load(css: CssInput) -> Union[str, bytes, CssDocument]:
+    # Paths are read in the worker so file contents never cross the pool
+    if isinstance(css, os.PathLike):
+        with open(css, 'rb') as file:
+            return file.read()
+    return css
+
+
+def _parse(css: CssInput) -> CssDocument:
+    return as_document(_load(css))
+
+
+def _analyze(css: CssInput) -> Dict[str, Any]:
+    return analyze_stylesheet(_load(css))
+
+
+def _extract(css: CssInput, extractors: List[str], options: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    return extract_all(_load(css), extractors, options)
+
+
+def _minify(css: CssInput) -> str:
+    return minify_css(_load(css))
+
+
+def _merge_records(css: CssInput, group_identical: bool = False) -> List[modifier.MergeRecord]:
+    return modifier.merge_records(_load(css), group_identical)
+
+
+# Maps operation names to the functions run on each input
+OPERATIONS: Dict[str, Callable[..., Any]] = {
+    "parse": _parse,
+    "analyze": _analyze,
+    "extract": _extract,
+    "minify": _minify,
+    "merge_records": _merge_records,
+    "scan_usage": scan_file,
+}
+
+
+def _run_task(task: Tuple[str, int, CssInput, Dict[str, Any]]) -> Tuple[int, Any, Optional[str]]:
+    """Run one operation in a worker, returning errors instead of raising them."""
+    operation, index, css, options = task
+    try:
+        return index, OPERATIONS[operation](css, **options), None
+    except Exception as e:
+        return index, None, str(e)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_config: Optional[Tuple[int, Optional[str]]] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int, python_executable: Optional[str]) -> Executor:
+    """Return the shared pool, recreating it if the configuration changed."""
+    global _pool, _pool_config
+    with _pool_lock:
+        if _pool is None or _pool_config != (workers, python_executable):
+            if _pool is not None:
+                _pool.shutdown()
+            context = multiprocessing.get_context("spawn")
+            if python_executable:
+                # Embedded interpreters cannot spawn themselves, so workers
+                # need to be started from a regular Python executable
+                context.set_executable(python_executable)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            _pool_config = (workers, python_executable)
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the shared worker processes, if they were started."""
+    global _pool, _pool_config
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = None
+        _pool_config = None
+
+
+def default_workers() -> int:
+    """Number of workers used when none is given: one per available CPU."""
+    if hasattr(os, 'sched_getaffinity'):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+
+def run_parallel(
+    operation: str,
+    inputs: List[CssInput],
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    python_executable: Optional[str] = None,
+    **options: Any
+) -> List[Any]:
+    """
+    Run an operation over many stylesheets on a process pool.
+
+    Results are returned in the order of `inputs`, whatever order the
+    workers finish in. With a single worker or a single input the
+    operation runs in the calling process, without starting a pool.
+
+    Args:
+        operation: One of "parse", "analyze", "extract", "minify",
+                   "merge_records" (see modifier.merge_records) or
+                   "scan_usage" (template paths, see usage_index.scan_file)
+        inputs: Stylesheets as strings, bytes, CssDocuments or file paths
+        workers: Number of worker processes (default: one per CPU)
+        chunksize: Number of inputs sent to a worker at a time (default:
+                   enough for about four chunks per worker)
+        python_executable: Python interpreter used to start workers, needed
+                           when running inside an embedded interpreter
+        **options: Keyword arguments of the operation, e.g. `extractors`
+
+    Returns:
+        List with the result for each input, in input order
+
+    Raises:
+        Exception: If the operation is unknown or fails on any input
+    """
+    if operation not in OPERATIONS:
+        raise Exception(f"Unknown parallel operation: {operation}")
+
+    workers = workers or default_workers()
+    tasks = [(operation, index, css, options) for index, css in enumerate(inputs)]
+
+    if workers == 1 or len(tasks) <= 1:
+        outcomes = [_run_task(task) for task in tasks]
+    else:
+        if chunksize is None:
+            chunksize = max(1, len(tasks) // (workers * 4))
+        pool = _get_pool(workers, python_executable)
+        outcomes = list(pool.map(_run_task, tasks, chunksize=chunksize))
+
+    results = []
+    for index, result, error in outcomes:
+        if error is not None:
+            raise Exception(f"Failed to {operation} input {index}: {error}")
+        results.append(result)
+    return results
+
+
+def parse_all(inputs: List[CssInput], **pool_options: Any) -> List[CssDocument]:
+    """Parse every input into a CssDocument, see run_parallel for the options."""
+    return run_parallel("parse", inputs, **pool_options)
+
+
+def analyze_all(inputs: List[CssInput], **pool_options: Any) -> List[Dict[str, Any]]:
+    """Run analyze_stylesheet on every input, see run_parallel for the options."""
+    return run_parallel("analyze", inputs, **pool_options)
+
+
+def extract_all_parallel(
+    inputs: List[CssInput],
+    extractors: List[str],
+    options: Optional[Dict[str, Dict[str, Any]]] = None,
+    **pool_options: Any
+) -> List[Dict[str, Any]]:
+    """Run extract_all with the same extractors on every input, see run_parallel for the options."""
+    return run_parallel("extract", inputs, extractors=extractors, options=options, **pool_options)
+
+
+def minify_all(inputs: List[CssInput], **pool_options: Any) -> List[str]:
+    """Minify every input, see run_parallel for the options."""
+    return run_parallel("minify", inputs, **pool_options)
+
+
+def merge_stylesheets(inputs: List[CssInput], group_identical: bool = False, **pool_options: Any) -> str:
+    """
+    Merge stylesheets like css_tools.modifier.merge_stylesheets, parsing them in parallel.
+
+    Each worker parses its inputs and returns only their merge records
+    (selector and declaration texts, see css_tools.modifier.merge_records)
+    rather than the parsed documents, which are many times larger than the
+    source and would cost more to send back than to parse. The records
+    are merged in input order in the calling process, so the result is
+    the same as the sequential merge.
+
+    Args:
+        inputs: Stylesheets as strings, bytes, CssDocuments or file paths
+        group_identical: Fold rules with identical declaration blocks, see
+                         css_tools.modifier.merge_stylesheets
+        **pool_options: workers, chunksize and python_executable, see run_parallel
+
+    Returns:
+        Merged CSS as a string
+    """
+    records = run_parallel("merge_records", inputs, group_identical=group_identical, **pool_options)
+    return modifier.merge_from_records(records, group_identical)
+
+
+def build_usage_index(
+    root: str,
+    extensions: Iterable[str] = TEMPLATE_EXTENSIONS,
+    cache_path: Optional[str] = None,
+    **pool_options: Any
+) -> UsageIndex:
+    """
+    Index the class and id names used by every template under a directory.
+
+    Files are scanned on the pool. With a `cache_path`, the result of each
+    file is stored on disk with its mtime and size, and only new or changed
+    files are scanned again on the next build.
+
+    Args:
+        root: Directory to scan, e.g. the root of a Phoenix app
+        extensions: File extensions to scan
+        cache_path: Optional JSON file caching the per-file results
+        **pool_options: workers, chunksize and python_executable, see run_parallel
+
+    Returns:
+        A UsageIndex for extract_unused_selectors
+    """
+    paths = find_templates(root, extensions)
+    cache = UsageCache(cache_path) if cache_path else None
+    index = UsageIndex()
+
+    stale = []
+    stamps = {}
+    for path in paths:
+        stamps[path] = UsageCache.stamp(path)
+        usage = cache.get(path, stamps[path]) if cache else None
+        if usage is None:
+            stale.append(path)
+        else:
+            index.add(usage)
+
+    for path, usage in zip(stale, run_parallel("scan_usage", stale, **pool_options)):
+        index.add(usage)
+        if cache:
+            cache.put(path, stamps[path], usage)
+
+    if cache:
+        cache.prune(paths)
+        cache.save()
+    return index
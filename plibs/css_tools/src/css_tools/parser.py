@@ -4,23 +4,721 @@
 
 """CSS parsing utilities using tinycss2."""
 
+import codecs
+import hashlib
+import heapq
+import mmap
+import os
+import re
+import threading
 import tinycss2
-from typing import Dict, List, Any, Tuple, Optional, Union
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, Iterable, Iterator, List, Any, Tuple, Optional, Union
+from . import instrumentation
+from .colors import NAME_PROPERTIES, Color, find_colors
+from .selector_index import SelectorIndex
+from .spans import SpanIndex
+from .traversal import child_rules, rule_declarations, walk
+from .visitors import Visitor, register_visitor, run_visitors
+
+# Memory held by a cached document per byte of its CSS source, as charged
+# against the parse cache budget. A parsed document holds 12-52 times its
+# source size in tinycss2 nodes, and 33-118 times once its derived views
+# (declarations, values, selector index, ...) have been cached, depending
+# on how the stylesheet is written.
+RETAINED_BYTES_PER_SOURCE_BYTE = 100
+
+# Default budget of the parse cache, in bytes of estimated retained memory;
+# about 2.5 MB of CSS source
+DEFAULT_PARSE_CACHE_BYTES = 256 * 1024 * 1024
+
+# Default number of bytes read at a time when streaming a stylesheet
+DEFAULT_STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+class CssDocument:
+    """
+    A CSS stylesheet that is parsed once and caches its derived views.
+
+    Every public function in css_tools accepts a CssDocument wherever it
+    accepts CSS code, so chaining several queries over the same file only
+    tokenizes it once. Views are computed on first access and then reused.
+
+    Args:
+        css: The CSS code as string or bytes
+    """
+
+    # Whether the rules are css_tools.compact records rather than tokens
+    compact = False
+
+    def __init__(self, css: Union[str, bytes]):
+        self._size_bytes = None
+        if isinstance(css, bytes):
+            self._size_bytes = len(css)
+            with instrumentation.phase("decode"):
+                css = css.decode('utf-8')
+        self.text = css
+        with instrumentation.phase("tokenize"):
+            self.rules = tinycss2.parse_stylesheet(css, skip_whitespace=False, skip_comments=False)
+        instrumentation.count("parses")
+        instrumentation.count("parsed_chars", len(css))
+        self._spans = None
+        self._reset_caches()
+
+    @classmethod
+    def from_rules(cls, text: str, rules: List[Any], spans: Optional[SpanIndex] = None) -> "CssDocument":
+        """
+        Build a document from an already parsed rule list, without tokenizing.
+
+        Args:
+            text: The CSS source of the rules
+            rules: Top-level nodes as parse_stylesheet returns them for `text`
+            spans: Offsets of the rules in `text`, when the nodes' own source
+                positions no longer match it
+
+        Returns:
+            A CssDocument with empty caches
+        """
+        doc = cls.__new__(cls)
+        doc._size_bytes = None
+        doc.text = text
+        doc.rules = rules
+        doc._spans = spans
+        doc._reset_caches()
+        return doc
+
+    def _reset_caches(self) -> None:
+        # Per-node caches are keyed by id() and keep the node alive next to
+        # the cached value, so an id can never be reused for another node
+        self._selectors: Dict[int, Tuple[Any, str]] = {}
+        self._declarations: Dict[int, Tuple[Any, List[Any]]] = {}
+        self._children: Dict[int, Tuple[Any, List[Any]]] = {}
+        self._values: Dict[int, Tuple[Any, str]] = {}
+        self._colors: Dict[int, Tuple[Any, List[Color]]] = {}
+        self._views: Dict[str, Any] = {}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The per-node caches are keyed by id(), which does not survive
+        # pickling, so documents sent to other processes travel without them
+        return {"text": self.text, "rules": self.rules, "_size_bytes": self._size_bytes, "_spans": self._spans}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._reset_caches()
+
+    @property
+    def size_bytes(self) -> int:
+        """Size of the CSS source in UTF-8 bytes, encoding the text only if needed."""
+        if self._size_bytes is None:
+            self._size_bytes = len(self.text.encode('utf-8', 'surrogatepass'))
+        return self._size_bytes
+
+    def selector(self, rule: Any) -> str:
+        """Return the cached selector text of a rule."""
+        entry = self._selectors.get(id(rule))
+        if entry is None or entry[0] is not rule:
+            entry = (rule, get_selector_text(rule))
+            self._selectors[id(rule)] = entry
+        return entry[1]
+
+    def declarations(self, rule: Any) -> List[Any]:
+        """
+        Return the cached declaration list of a rule.
+
+        The list is shared between callers and must not be modified; copy it
+        before editing.
+        """
+        entry = self._declarations.get(id(rule))
+        if entry is None or entry[0] is not rule:
+            entry = (rule, get_rule_declarations(rule))
+            self._declarations[id(rule)] = entry
+        return entry[1]
+
+    def value(self, declaration: Any) -> str:
+        """Return the cached, stripped value text of a declaration."""
+        entry = self._values.get(id(declaration))
+        if entry is None or entry[0] is not declaration:
+            with instrumentation.phase("serialize"):
+                entry = (declaration, tinycss2.serialize(declaration.value).strip())
+            self._values[id(declaration)] = entry
+        return entry[1]
+
+    def colors(self, declaration: Any) -> List[Color]:
+        """Return the cached colors found in a declaration's value tokens."""
+        entry = self._colors.get(id(declaration))
+        if entry is None or entry[0] is not declaration:
+            if declaration.lower_name in NAME_PROPERTIES:
+                entry = (declaration, [])
+            else:
+                entry = (declaration, find_colors(declaration.value))
+            self._colors[id(declaration)] = entry
+        return entry[1]
+
+    def children(self, rule: Any) -> List[Any]:
+        """Return the cached list of rules nested in a block at-rule or rule."""
+        entry = self._children.get(id(rule))
+        if entry is None or entry[0] is not rule:
+            entry = (rule, child_rules(rule))
+            self._children[id(rule)] = entry
+        return entry[1]
+
+    def walk(self, descend: Optional[Callable[[Any], bool]] = None) -> Iterator[Tuple[Any, Tuple[Any, ...]]]:
+        """
+        Walk the document's rule tree depth first, reusing cached nested rules.
+
+        See css_tools.traversal.walk for the meaning of `descend` and of the
+        yielded (node, ancestors) pairs.
+        """
+        return walk(self.rules, self.children, descend)
+
+    @property
+    def selectors(self) -> List[str]:
+        """Selector text of every top-level qualified rule, in source order."""
+        if 'selectors' not in self._views:
+            self._views['selectors'] = [
+                self.selector(rule) for rule in self.rules if rule.type == "qualified-rule"
+            ]
+        return self._views['selectors']
+
+    @property
+    def media_blocks(self) -> List[Tuple[str, List[Any]]]:
+        """(condition, nested rules) for every top-level @media rule."""
+        if 'media_blocks' not in self._views:
+            self._views['media_blocks'] = [
+                (self.selector(rule), self.children(rule))
+                for rule in self.rules
+                if rule.type == "at-rule" and rule.lower_at_keyword == "media"
+            ]
+        return self._views['media_blocks']
+
+    @property
+    def selector_index(self) -> SelectorIndex:
+        """Index of the qualified rules by selector, built on first access."""
+        if 'selector_index' not in self._views:
+            self._views['selector_index'] = SelectorIndex(self)
+        return self._views['selector_index']
+
+    @property
+    def spans(self) -> SpanIndex:
+        """Source offsets of the top-level nodes, computed on first access."""
+        if self._spans is None:
+            self._spans = SpanIndex.build(self)
+        return self._spans
+
+    @property
+    def comments(self) -> List[str]:
+        """
+        Comments found outside of any block, in source order.
+
+        These are the comments a component-value tokenization of the whole
+        sheet yields: standalone comments plus those inside rule preludes.
+        """
+        if 'comments' not in self._views:
+            self._views['comments'] = run_visitors(self, {"comments": CommentsVisitor(self)})["comments"]
+        return self._views['comments']
+
+    def cached(self, key: str, builder: Callable[[], Any]) -> Any:
+        """Return a named view, building it with `builder` on first access."""
+        if key not in self._views:
+            self._views[key] = builder()
+        return self._views[key]
+
+
+class ParseCache:
+    """
+    LRU cache of parsed documents keyed by a hash of the CSS bytes.
+
+    The budget is expressed in bytes of memory held by the cached documents,
+    estimated as RETAINED_BYTES_PER_SOURCE_BYTE times the size of their CSS
+    source; the least recently used documents are evicted once the estimate
+    exceeds it. A budget of 0 disables caching.
+
+    Args:
+        max_bytes: Maximum estimated memory held by the cached documents
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_PARSE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[bytes, Tuple[CssDocument, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(data: bytes) -> bytes:
+        """Return the cache key of some CSS bytes."""
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[CssDocument]:
+        """Return the cached document for a key, marking it as recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: bytes, doc: CssDocument, size: int) -> None:
+        """
+        Store a document, evicting older ones to stay within the budget.
+
+        Args:
+            key: The cache key of the CSS bytes
+            doc: The parsed document
+            size: Size of the CSS source in bytes
+        """
+        size *= RETAINED_BYTES_PER_SOURCE_BYTE
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (doc, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def resize(self, max_bytes: int) -> None:
+        """Change the budget, evicting documents that no longer fit."""
+        with self._lock:
+            self.max_bytes = max_bytes
+            while self._entries and self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every cached document and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return the cache counters and current usage."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+# Documents parsed from raw CSS, shared by every function in css_tools
+_parse_cache = ParseCache()
+
+
+def configure_parse_cache(max_bytes: int) -> None:
+    """
+    Set the byte budget of the module-level parse cache.
+
+    Args:
+        max_bytes: Maximum estimated memory held by cached documents (see
+                   RETAINED_BYTES_PER_SOURCE_BYTE), 0 to disable
+    """
+    _parse_cache.resize(max_bytes)
+
+
+def clear_parse_cache() -> None:
+    """Drop every document from the module-level parse cache."""
+    _parse_cache.clear()
+
+
+def parse_cache_stats() -> Dict[str, int]:
+    """
+    Return the counters of the module-level parse cache.
+
+    Returns:
+        Dictionary with hits, misses, evictions, entries, bytes (estimated
+        memory held by the cached documents) and max_bytes
+    """
+    return _parse_cache.stats()
+
+
+def as_document(css: Union[str, bytes, CssDocument], allow_compact: bool = False) -> CssDocument:
+    """
+    Return `css` as a CssDocument, parsing it only if it is raw CSS.
 
+    Raw CSS is looked up in the module-level parse cache first, so repeated
+    calls on unchanged content skip decoding and tokenization entirely.
+
+    Args:
+        css: The CSS code as string or bytes, or an existing CssDocument
+        allow_compact: Whether the caller only reads the document through
+                       its accessors, so a css_tools.compact.CompactDocument
+                       can be used as it is; otherwise its text is parsed
+
+    Returns:
+        A CssDocument for the given CSS
+    """
+    if isinstance(css, CssDocument):
+        if not css.compact or allow_compact:
+            return css
+        # The records have no tokens, so work on a parse of the source
+        css = css.text
+    if _parse_cache.max_bytes <= 0:
+        return CssDocument(css)
+
+    with instrumentation.phase("cache_lookup"):
+        data = css if isinstance(css, bytes) else css.encode('utf-8', 'surrogatepass')
+        key = ParseCache.key(data)
+        doc = _parse_cache.get(key)
+    instrumentation.count("parse_cache_misses" if doc is None else "parse_cache_hits")
+    if doc is None:
+        doc = CssDocument(css)
+        # The source was just encoded for the key, so its size is known
+        doc._size_bytes = len(data)
+        _parse_cache.put(key, doc, len(data))
+    return doc
+
+
+class _RuleSplitter:
+    """
+    Split CSS text fed in chunks at the end of each top-level rule.
+
+    Only strings, comments, escapes, unquoted url() arguments and braces
+    are tracked, which is enough to find where a top-level rule ends
+    without tokenizing the rule itself. At most one unfinished rule is
+    buffered between calls.
+    """
+
+    _SPECIAL = re.compile(r'[{};"\'/\\(]')
+    _SPECIAL_OR_START = re.compile(r'[{};"\'/\\(]|\S')
+    _STRING_END = {'"': re.compile(r'["\\\n]'), "'": re.compile(r"['\\\n]")}
+    _URL_END = re.compile(r'[)\\]')
+    _URL_SPACE = re.compile(r'[ \t\r\n\f]*')
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.kind = None  # "at-rule" or "qualified-rule" once the rule has started
+        self.quote = None
+        self.in_comment = False
+        self.in_url = False
+        self.unbalanced = False
+
+    def feed(self, text: str, final: bool = False) -> List[str]:
+        """Add text and return the complete top-level rules it finished."""
+        buf = self.buffer + text
+        pos = self.pos
+        start = 0
+        segments = []
+
+        while True:
+            if self.in_comment:
+                end = buf.find("*/", pos)
+                if end < 0:
+                    # Keep a trailing "*" in case the next chunk starts with "/"
+                    pos = max(pos, len(buf) - 1)
+                    break
+                pos = end + 2
+                self.in_comment = False
+                continue
+
+            if self.quote:
+                match = self._STRING_END[self.quote].search(buf, pos)
+                if match is None:
+                    pos = len(buf)
+                    break
+                if match.group() == "\\":
+                    if match.end() >= len(buf) and not final:
+                        pos = match.start()
+                        break
+                    pos = match.end() + 1
+                    continue
+                # A closing quote or a newline ends the string
+                self.quote = None
+                pos = match.end()
+                continue
+
+            if self.in_url:
+                match = self._URL_END.search(buf, pos)
+                if match is None:
+                    pos = len(buf)
+                    break
+                if match.group() == "\\":
+                    if match.end() >= len(buf) and not final:
+                        pos = match.start()
+                        break
+                    pos = match.end() + 1
+                    continue
+                self.in_url = False
+                pos = match.end()
+                continue
+
+            pattern = self._SPECIAL_OR_START if self.kind is None else self._SPECIAL
+            match = pattern.search(buf, pos)
+            if match is None:
+                pos = len(buf)
+                break
+
+            char = match.group()
+            pos = match.start()
+
+            if char == "/":
+                if pos + 1 >= len(buf) and not final:
+                    break
+                if buf.startswith("/*", pos):
+                    self.in_comment = True
+                    pos += 2
+                    continue
+            if self.kind is None:
+                self.kind = "at-rule" if char == "@" else "qualified-rule"
+
+            if char == "\\":
+                if pos + 1 >= len(buf) and not final:
+                    break
+                pos += 2
+            elif char in "\"'":
+                self.quote = char
+                pos += 1
+            elif char == "(":
+                pos += 1
+                if buf[max(pos - 4, 0):pos - 1].lower() == "url" and (
+                    pos < 5 or not (buf[pos - 5].isalnum() or buf[pos - 5] in "-_\\")
+                ):
+                    # An unquoted url() argument may hold braces, quotes and ';'
+                    argument = self._URL_SPACE.match(buf, pos).end()
+                    if argument >= len(buf) and not final:
+                        pos -= 1
+                        break
+                    if argument < len(buf) and buf[argument] not in "\"'":
+                        self.in_url = True
+                        pos = argument
+            elif char == "{":
+                self.depth += 1
+                pos += 1
+            elif char == "}":
+                pos += 1
+                if self.depth == 0:
+                    self.unbalanced = True
+                else:
+                    self.depth -= 1
+                    if self.depth == 0:
+                        segments.append(buf[start:pos])
+                        start = pos
+                        self.kind = None
+            elif char == ";" and self.depth == 0 and self.kind == "at-rule":
+                pos += 1
+                segments.append(buf[start:pos])
+                start = pos
+                self.kind = None
+            else:
+                pos += 1
+
+        self.buffer = buf[start:]
+        self.pos = pos - start
+
+        if final:
+            if self.buffer:
+                segments.append(self.buffer)
+            self.buffer = ""
+            self.pos = 0
+            if self.depth != 0:
+                self.unbalanced = True
+        return segments
+
+
+class RuleStream:
+    """
+    Top-level rules of a stylesheet read incrementally from a file or buffer.
+
+    The source is read `chunk_size` bytes at a time and decoded
+    incrementally; each top-level rule is parsed as soon as its end has
+    been read, so memory use is bounded by the largest top-level rule
+    rather than by the size of the stylesheet.
+
+    Args:
+        source: A path, a file object opened in binary or text mode, or a
+                bytes-like object such as an mmap
+        chunk_size: Number of bytes or characters read at a time
+        encoding: Encoding of binary sources
+
+    Attributes:
+        bytes_read: Size of the source consumed so far, in bytes
+        unbalanced: Whether the braces read so far did not balance; an
+                    unclosed block is only detected at the end of the source
+    """
+
+    def __init__(
+        self,
+        source: Union[str, "os.PathLike[str]", bytes, memoryview, mmap.mmap, Any],
+        chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+        encoding: str = 'utf-8'
+    ):
+        self.source = source
+        self.chunk_size = chunk_size
+        self.encoding = encoding
+        self.bytes_read = 0
+        self.unbalanced = False
+
+    def _chunks(self) -> Iterator[Union[bytes, str]]:
+        source = self.source
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as file:
+                while True:
+                    chunk = file.read(self.chunk_size)
+                    if not chunk:
+                        return
+                    yield chunk
+        elif isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+            view = memoryview(source)
+            for offset in range(0, len(view), self.chunk_size):
+                yield view[offset:offset + self.chunk_size].tobytes()
+        else:
+            while True:
+                chunk = source.read(self.chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def segments(self) -> Iterator[str]:
+        """Yield the source text of each top-level rule, with the whitespace and comments before it."""
+        decoder = codecs.getincrementaldecoder(self.encoding)()
+        splitter = _RuleSplitter()
+
+        for chunk in self._chunks():
+            if isinstance(chunk, bytes):
+                self.bytes_read += len(chunk)
+                with instrumentation.phase("decode"):
+                    chunk = decoder.decode(chunk)
+            else:
+                self.bytes_read += len(chunk.encode(self.encoding, 'surrogatepass'))
+            with instrumentation.phase("split"):
+                segments = splitter.feed(chunk)
+            self.unbalanced = splitter.unbalanced
+            yield from segments
+
+        with instrumentation.phase("split"):
+            segments = splitter.feed(decoder.decode(b"", final=True), final=True)
+        self.unbalanced = splitter.unbalanced
+        yield from segments
+
+    def __iter__(self) -> Iterator[Any]:
+        for segment in self.segments():
+            with instrumentation.phase("tokenize"):
+                rules = tinycss2.parse_stylesheet(segment, skip_whitespace=False, skip_comments=False)
+            instrumentation.count("parses")
+            instrumentation.count("parsed_chars", len(segment))
+            yield from rules
+
+
+def iter_rules(
+    source: Union[str, "os.PathLike[str]", bytes, memoryview, mmap.mmap, Any],
+    chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+    encoding: str = 'utf-8'
+) -> Iterator[Any]:
+    """
+    Yield the top-level rules of a stylesheet one at a time.
+
+    Unlike parse_stylesheet, the whole stylesheet is never held in memory:
+    the source is decoded incrementally and each rule is parsed as soon as
+    it is complete. Line numbers of the yielded nodes are relative to the
+    start of their own rule.
+
+    Args:
+        source: A path, a file object, or a bytes-like object such as an mmap
+        chunk_size: Number of bytes read at a time
+        encoding: Encoding of binary sources
+
+    Yields:
+        tinycss2 nodes, including whitespace and comments, in source order
+    """
+    return iter(RuleStream(source, chunk_size, encoding))
+
+
+class StreamedDocument(CssDocument):
+    """
+    A CssDocument whose top-level rules are read from a stream on demand.
+
+    `rules` can be iterated only once. Cached views of a top-level rule are
+    released when the next one is read, so visitors run over the document
+    with memory bounded by the largest rule. Views over the whole sheet,
+    such as `text` or `selector_index`, are not available.
+
+    Args:
+        source: A path, a file object, or a bytes-like object such as an mmap
+        chunk_size: Number of bytes read at a time
+        encoding: Encoding of binary sources
+        strict: Raise on parse errors and unbalanced braces, with the same
+                messages as the checks run on in-memory stylesheets
+    """
 
-def parse_stylesheet(css: Union[str, bytes]) -> List[Any]:
+    def __init__(
+        self,
+        source: Union[str, "os.PathLike[str]", bytes, memoryview, mmap.mmap, Any],
+        chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+        encoding: str = 'utf-8',
+        strict: bool = True
+    ):
+        self.text = None
+        self._spans = None
+        self.stream = RuleStream(source, chunk_size, encoding)
+        self.strict = strict
+        self._consumed = False
+        self._reset_caches()
+
+    @property
+    def size_bytes(self) -> int:
+        """Size of the source read so far, in bytes."""
+        return self.stream.bytes_read
+
+    @property
+    def rules(self) -> Iterator[Any]:
+        if self._consumed:
+            raise Exception("A streamed document can only be traversed once")
+        self._consumed = True
+        return self._read_rules()
+
+    def _read_rules(self) -> Iterator[Any]:
+        for rule in self.stream:
+            self._reset_caches()
+            if self.strict and rule.type == 'error':
+                # Unbalanced braces are the more precise diagnosis, as in analyze_stylesheet
+                if self.stream.unbalanced:
+                    raise Exception("CSS syntax error: Unbalanced braces")
+                raise Exception(f"Failed to parse CSS: CSS parse error: {getattr(rule, 'message', 'Unknown error')}")
+            yield rule
+        self._reset_caches()
+        if self.strict and self.stream.unbalanced:
+            raise Exception("CSS syntax error: Unbalanced braces")
+
+
+def parse_stylesheet(css: Union[str, bytes, CssDocument]) -> List[Any]:
     """
     Parse a CSS stylesheet into a list of rules.
 
+    The nodes are parsed for this call and belong to the caller, who may
+    modify them; use as_document(css).rules to share the cached nodes of a
+    document without modifying them.
+
     Args:
-        css: The CSS code as string or bytes
+        css: The CSS code as string or bytes, or a CssDocument
 
     Returns:
         List of tinycss2 nodes representing the stylesheet
     """
+    if isinstance(css, CssDocument):
+        css = css.text
     if isinstance(css, bytes):
-        css = css.decode('utf-8')
-    return tinycss2.parse_stylesheet(css, skip_whitespace=False, skip_comments=False)
+        with instrumentation.phase("decode"):
+            css = css.decode('utf-8')
+    with instrumentation.phase("tokenize"):
+        rules = tinycss2.parse_stylesheet(css, skip_whitespace=False, skip_comments=False)
+    instrumentation.count("parses")
+    return rules
 
 
 def parse_declarations(declarations_str: str) -> List[Any]:
@@ -48,7 +746,9 @@ def serialize_stylesheet(rules: List[Any]) -> str:
     Returns:
         CSS code as string
     """
-    return tinycss2.serialize(rules)
+    instrumentation.count("serializes")
+    with instrumentation.phase("serialize"):
+        return tinycss2.serialize(rules)
 
 
 def serialize_declarations(declarations: List[Any]) -> str:
@@ -61,7 +761,9 @@ def serialize_declarations(declarations: List[Any]) -> str:
     Returns:
         CSS declarations as string
     """
-    return tinycss2.serialize(declarations)
+    instrumentation.count("serializes")
+    with instrumentation.phase("serialize"):
+        return tinycss2.serialize(declarations)
 
 
 def get_rule_declarations(rule: Any) -> List[Any]:
@@ -74,19 +776,8 @@ def get_rule_declarations(rule: Any) -> List[Any]:
     Returns:
         List of declarations
     """
-    if not hasattr(rule, 'content'):
-        return []
-
-    # Ensure content is properly serialized before parsing
-    content = rule.content
-    if isinstance(content, str):
-        return tinycss2.parse_declaration_list(content, skip_whitespace=False, skip_comments=False)
-    else:
-        # Serialize the content if it's not a string
-        serialized_content = tinycss2.serialize(content)
-        # Remove any surrounding braces if present
-        serialized_content = serialized_content.strip('{}')
-        return tinycss2.parse_declaration_list(serialized_content, skip_whitespace=False, skip_comments=False)
+    # The block tokens are parsed as they are, without a text round trip
+    return rule_declarations(rule)
 
 
 def get_selector_text(rule: Any) -> str:
@@ -104,31 +795,79 @@ def get_selector_text(rule: Any) -> str:
     return tinycss2.serialize(rule.prelude).strip()
 
 
-def extract_rules_by_selector(css: Union[str, bytes], selector_pattern: str) -> List[Any]:
+def extract_rules_by_selector(css: Union[str, bytes, CssDocument], selector_pattern: str) -> List[Any]:
     """
     Extract all rules that match a given selector pattern.
 
     Args:
-        css: The CSS code as string or bytes
+        css: The CSS code as string or bytes, or a CssDocument
         selector_pattern: The selector pattern to match (can be partial)
 
     Returns:
         List of matching rules
     """
-    rules = parse_stylesheet(css)
+    doc = as_document(css)
+    matches: Dict[str, bool] = {}
     matching_rules = []
 
-    for rule in rules:
+    # The pattern is matched against the selector as written, once per
+    # distinct selector rather than once per rule
+    for rule in doc.rules:
         if rule.type == "qualified-rule":
-            selector = get_selector_text(rule)
-            if selector_pattern in selector:
+            selector = doc.selector(rule)
+            found = matches.get(selector)
+            if found is None:
+                found = matches[selector] = selector_pattern in selector
+            if found:
                 matching_rules.append(rule)
 
     return matching_rules
 
 
-def extract_comments(css: Union[str, bytes]) -> List[str]:
+def selector_exists(css: Union[str, bytes, CssDocument], selector: Union[str, bytes]) -> bool:
+    """
+    Check whether a top-level rule uses exactly the given selector.
+
+    Args:
+        css: The CSS code as string or bytes, or a CssDocument
+        selector: The CSS selector to look for
+
+    Returns:
+        True if the selector exists, False otherwise
+    """
+    return bool(as_document(css).selector_index.lookup(selector, top_level=True))
+
+
+def get_selector_properties(
+    css: Union[str, bytes, CssDocument],
+    selector: Union[str, bytes]
+) -> Optional[Dict[str, str]]:
+    """
+    Get the properties of the first top-level rule using the given selector.
+
+    Args:
+        css: The CSS code as string or bytes, or a CssDocument
+        selector: The CSS selector to look for
+
+    Returns:
+        Dictionary mapping property names to values, or None if not found
+    """
+    doc = as_document(css)
+    entries = doc.selector_index.lookup(selector, top_level=True)
+    if not entries:
+        return None
+
+    properties = {}
+    for decl in doc.declarations(entries[0][1]):
+        if decl.type == "declaration":
+            properties[decl.name] = doc.value(decl)
+    return properties
+
+
+def extract_comments(css: Union[str, bytes, CssDocument]) -> List[str]:
     """Extract all comments from CSS code."""
+    if isinstance(css, CssDocument):
+        return list(css.comments)
     if isinstance(css, bytes):
         css = css.decode('utf-8')
 
@@ -157,96 +896,418 @@ def extract_colors_and_fonts(value: str, property_name: str) -> Tuple[List[str],
     return colors, fonts
 
 
-def process_declaration(declaration, properties, colors, fonts,
-                       selector_properties, selector, parent_media, media_query_details):
-    """Process a single CSS declaration."""
-    if declaration.type != "declaration":
-        return [], []
+@register_visitor("comments")
+class CommentsVisitor(Visitor):
+    """Collect comments outside of any block, like extract_comments."""
+
+    def __init__(self, doc):
+        super().__init__(doc)
+        self.comments = []
+
+    def visit_comment(self, comment, ancestors):
+        if not ancestors:
+            self.comments.append(comment.value)
+
+    def visit_rule(self, rule, ancestors):
+        if not ancestors:
+            self.comments.extend(token.value for token in rule.prelude if token.type == 'comment')
+
+    visit_at_rule = visit_rule
+
+    def result(self):
+        return self.comments
+
+
+# Fields of the analyze_stylesheet result, in result order, with the part
+# of the analysis each one needs
+ANALYSIS_FIELDS: Dict[str, str] = {
+    "selectors": "selectors",
+    "selectors_count": "selectors",
+    "unique_selectors": "selectors",
+    "properties_count": "properties",
+    "unique_properties": "properties",
+    "most_used_properties": "properties",
+    "colors_used": "colors",
+    "colors": "colors",
+    "normalized_colors": "normalized_colors",
+    "fonts_used": "fonts",
+    "fonts": "fonts",
+    "media_queries_count": "media_queries",
+    "media_queries": "media_queries",
+    "media_query_details": "media_query_details",
+    "comments_count": "comments",
+    "comments": "comments",
+    "file_size_bytes": "file_size",
+    "selector_properties": "selector_properties",
+    "imports": "imports",
+    "imports_count": "imports",
+    "import_media_queries": "imports",
+}
+
+# The counts of the analysis, returned for fields="summary"; none of them
+# needs the per-selector or per-media maps
+SUMMARY_FIELDS = (
+    "selectors_count", "unique_selectors", "properties_count", "unique_properties", "most_used_properties",
+    "colors_used", "fonts_used", "media_queries_count", "comments_count", "file_size_bytes", "imports_count",
+)
+
+
+def _analysis_fields(fields: Union[None, str, bytes, Iterable[Union[str, bytes]]]) -> Optional[Tuple[str, ...]]:
+    """Normalize a fields argument to known field names in result order, or None for all."""
+    if fields is None:
+        return None
+    if isinstance(fields, bytes):
+        fields = fields.decode('utf-8')
+    if fields == "summary":
+        return SUMMARY_FIELDS
+    if isinstance(fields, str):
+        fields = [fields]
+    wanted = {field.decode('utf-8') if isinstance(field, bytes) else field for field in fields}
+    unknown = sorted(wanted.difference(ANALYSIS_FIELDS))
+    if unknown:
+        raise Exception(f"Unknown analysis fields: {', '.join(unknown)}")
+    return tuple(field for field in ANALYSIS_FIELDS if field in wanted)
+
+
+def _project(result: Dict[str, Any], fields: Optional[Tuple[str, ...]]) -> Dict[str, Any]:
+    return result if fields is None else {field: result[field] for field in fields}
+
+
+@register_visitor("analysis")
+class AnalysisVisitor(Visitor):
+    """
+    Collect the statistics of analyze_stylesheet in one traversal.
+
+    Rules are analyzed at top level and inside (possibly nested) @media
+    blocks; comments and imports are taken from the top level. With
+    `fields`, only the parts of the analysis those fields need are
+    collected, and only those fields are returned.
+    """
 
-    property_name = declaration.name
-    value = tinycss2.serialize(declaration.value).strip()
+    def __init__(self, doc, fields=None):
+        super().__init__(doc)
+        self.fields = _analysis_fields(fields)
+        self.sections = set(ANALYSIS_FIELDS.values() if self.fields is None else map(ANALYSIS_FIELDS.get, self.fields))
+        self.selectors = []
+        self.properties = {}
+        self.colors = []
+        self.normalized_colors = []
+        self.fonts = []
+        self.media_query_list = []
+        self.media_query_details = {}
+        self.selector_properties = {}
+        self.comments = CommentsVisitor(doc)
+        self.imports = []
+        self.import_media_queries = {}
+        self.media_conditions = {}  # Maps id of a visited @media rule to its condition
+
+    def descend(self, node):
+        return node.type == "at-rule" and node.at_keyword.lower() == "media" and bool(node.content)
+
+    def visit_at_rule(self, rule, ancestors):
+        if "comments" in self.sections:
+            self.comments.visit_at_rule(rule, ancestors)
+        if not ancestors and rule.lower_at_keyword == "import" and "imports" in self.sections:
+            imports, import_media_queries = extract_imports([rule])
+            self.imports.extend(imports)
+            self.import_media_queries.update(import_media_queries)
+        if self.descend(rule):
+            media_query = self.doc.selector(rule)
+            self.media_conditions[id(rule)] = media_query
+            self.media_query_list.append(media_query)
+
+    def visit_comment(self, comment, ancestors):
+        if "comments" in self.sections:
+            self.comments.visit_comment(comment, ancestors)
+
+    def visit_rule(self, rule, ancestors):
+        sections = self.sections
+        if "comments" in sections:
+            self.comments.visit_rule(rule, ancestors)
+        if not sections.intersection(("selectors", "media_query_details", "selector_properties")):
+            return
+        selector = self.doc.selector(rule)
+        parent_media = self.media_conditions[id(ancestors[-1])] if ancestors else None
+
+        # Track media query relationship
+        if parent_media and "media_query_details" in sections:
+            if parent_media not in self.media_query_details:
+                self.media_query_details[parent_media] = {
+                    "selectors": [],
+                    "properties": {}
+                }
+            self.media_query_details[parent_media]["selectors"].append(selector)
+
+        if "selectors" in sections:
+            self.selectors.append(selector)
+
+        # Initialize selector_properties entry
+        if selector not in self.selector_properties and "selector_properties" in sections:
+            self.selector_properties[selector] = {}
+
+    def visit_declaration(self, declaration, rule, ancestors):
+        sections = self.sections
+        property_name = declaration.name
+
+        # Track property usage
+        if property_name not in self.properties:
+            self.properties[property_name] = 0
+        self.properties[property_name] += 1
+
+        # Track property in media query if applicable
+        parent_media = self.media_conditions[id(ancestors[-1])] if ancestors else None
+        if parent_media and "media_query_details" in sections:
+            media_properties = self.media_query_details[parent_media]["properties"]
+            if property_name not in media_properties:
+                media_properties[property_name] = 0
+            media_properties[property_name] += 1
+
+        # Store the property value for this selector
+        if "selector_properties" in sections:
+            self.selector_properties[self.doc.selector(rule)][property_name] = self.doc.value(declaration)
+
+        # Extract colors and fonts as written
+        if sections.intersection(("colors", "fonts")):
+            new_colors, new_fonts = extract_colors_and_fonts(self.doc.value(declaration), property_name)
+            if "colors" in sections:
+                self.colors.extend(new_colors)
+            if "fonts" in sections:
+                self.fonts.extend(new_fonts)
+
+        # Colors recognized in the value tokens, normalized
+        if "normalized_colors" in sections:
+            self.normalized_colors.extend(color.value for color in self.doc.colors(declaration))
+
+    def result(self):
+        selectors = self.selectors
+        properties = self.properties
+        # Distinct values in first-seen order, as AnalysisState lists them
+        colors = list(dict.fromkeys(self.colors))
+        normalized_colors = list(dict.fromkeys(self.normalized_colors))
+        fonts = list(dict.fromkeys(self.fonts))
+        all_comments = self.comments.result()
+
+        return _project({
+            "selectors": selectors,
+            "selectors_count": len(selectors),
+            "unique_selectors": len(set(selectors)),
+            "properties_count": sum(properties.values()),
+            "unique_properties": len(properties),
+            "most_used_properties": heapq.nlargest(10, properties.items(), key=lambda x: x[1]),
+            "colors_used": len(colors),
+            "colors": colors,
+            "normalized_colors": normalized_colors,
+            "fonts_used": len(fonts),
+            "fonts": fonts,
+            "media_queries_count": len(self.media_query_list),
+            "media_queries": self.media_query_list,
+            "media_query_details": self.media_query_details,
+            "comments_count": len(all_comments),
+            "comments": all_comments,
+            "file_size_bytes": self.doc.size_bytes,
+            "selector_properties": self.selector_properties,
+            "imports": self.imports,
+            "imports_count": len(self.imports),
+            "import_media_queries": self.import_media_queries
+        }, self.fields)
+
+
+class _RulesView:
+    """A document restricted to some of its top-level nodes, sharing its caches."""
+
+    def __init__(self, doc, rules):
+        self.doc = doc
+        self.rules = rules
+
+    def __getattr__(self, name):
+        return getattr(self.doc, name)
+
+
+class PartitionedAnalysisVisitor(Visitor):
+    """
+    Run one AnalysisVisitor per top-level node.
 
-    # Track property usage
-    if property_name not in properties:
-        properties[property_name] = 0
-    properties[property_name] += 1
+    Keeping each top-level rule's contribution apart lets AnalysisState
+    replace the contributions of edited rules without revisiting the rest.
+    """
 
-    # Track property in media query if applicable
-    if parent_media:
-        if property_name not in media_query_details[parent_media]["properties"]:
-            media_query_details[parent_media]["properties"][property_name] = 0
-        media_query_details[parent_media]["properties"][property_name] += 1
+    def __init__(self, doc):
+        super().__init__(doc)
+        self.partials = {}  # Maps id of a top-level node to (node, AnalysisVisitor)
 
-    # Store the property value for this selector
-    selector_properties[selector][property_name] = value
+    def descend(self, node):
+        return AnalysisVisitor.descend(None, node)
 
-    # Extract colors and fonts
-    new_colors, new_fonts = extract_colors_and_fonts(value, property_name)
+    def _partial(self, top):
+        entry = self.partials.get(id(top))
+        if entry is None:
+            entry = (top, AnalysisVisitor(self.doc))
+            self.partials[id(top)] = entry
+        return entry[1]
 
-    return new_colors, new_fonts
+    def visit_at_rule(self, rule, ancestors):
+        self._partial(ancestors[0] if ancestors else rule).visit_at_rule(rule, ancestors)
 
+    def visit_comment(self, comment, ancestors):
+        self._partial(ancestors[0] if ancestors else comment).visit_comment(comment, ancestors)
 
-def process_qualified_rule(rule, parent_media, selectors, properties, colors, fonts,
-                          selector_properties, media_query_details):
-    """Process a qualified CSS rule (selector with declarations)."""
-    selector = get_selector_text(rule)
+    def visit_rule(self, rule, ancestors):
+        self._partial(ancestors[0] if ancestors else rule).visit_rule(rule, ancestors)
 
-    # Track media query relationship
-    if parent_media:
-        if parent_media not in media_query_details:
-            media_query_details[parent_media] = {
-                "selectors": [],
-                "properties": {}
-            }
-        media_query_details[parent_media]["selectors"].append(selector)
-
-    selectors.append(selector)
-
-    # Initialize selector_properties entry
-    if selector not in selector_properties:
-        selector_properties[selector] = {}
-
-    declarations = get_rule_declarations(rule)
-    for decl in declarations:
-        new_colors, new_fonts = process_declaration(
-            decl, properties, colors, fonts,
-            selector_properties, selector, parent_media, media_query_details
-        )
-        colors.extend(new_colors)
-        fonts.extend(new_fonts)
-
-
-def process_media_rule(rule, media_query_list, media_query_details,
-                      selectors, properties, colors, fonts, selector_properties):
-    """Process a media query rule."""
-    if not rule.content:
-        return
-
-    media_query = tinycss2.serialize(rule.prelude).strip()
-    media_query_list.append(media_query)
-
-    # Process rules inside the media query
-    inner_rules = parse_stylesheet(tinycss2.serialize(rule.content))
-    process_rule_block(
-        inner_rules, media_query, selectors, properties,
-        colors, fonts, media_query_list, media_query_details, selector_properties
-    )
+    def visit_declaration(self, declaration, rule, ancestors):
+        self._partial(ancestors[0] if ancestors else rule).visit_declaration(declaration, rule, ancestors)
 
+    def result(self):
+        return self.partials
 
-def process_rule_block(rule_block, parent_media, selectors, properties,
-                      colors, fonts, media_query_list, media_query_details, selector_properties):
-    """Process a block of CSS rules, handling nested structures."""
-    for rule in rule_block:
-        if rule.type == "qualified-rule":
-            process_qualified_rule(
-                rule, parent_media, selectors, properties, colors, fonts,
-                selector_properties, media_query_details
-            )
-        elif rule.type == "at-rule" and rule.at_keyword.lower() == "media":
-            process_media_rule(
-                rule, media_query_list, media_query_details,
-                selectors, properties, colors, fonts, selector_properties
-            )
+
+class AnalysisState:
+    """
+    The statistics of analyze_stylesheet, kept per top-level node.
+
+    Counters (property, color, font and per-media property counts) are
+    aggregated over the whole sheet, so replacing a few rules only applies
+    their deltas. Ordered views such as the selector list are concatenated
+    from the cached per-rule contributions when a result is requested.
+
+    Args:
+        partials: Maps id of a top-level node to (node, AnalysisVisitor)
+    """
+
+    def __init__(self, partials: Dict[int, Tuple[Any, "AnalysisVisitor"]]):
+        self.partials = partials
+        self.properties: Counter = Counter()
+        self.colors: Counter = Counter()
+        self.normalized_colors: Counter = Counter()
+        self.fonts: Counter = Counter()
+        self.media_properties: Dict[str, Counter] = {}
+        for _, partial in partials.values():
+            self._apply(partial, 1)
+
+    @classmethod
+    def build(cls, doc: CssDocument, rules: Optional[List[Any]] = None) -> "AnalysisState":
+        """Analyze `rules` (by default every top-level node) of a document."""
+        view = doc if rules is None else _RulesView(doc, rules)
+        return cls(run_visitors(view, {"analysis": PartitionedAnalysisVisitor(view)})["analysis"])
+
+    def _apply(self, partial: "AnalysisVisitor", sign: int) -> None:
+        for name, count in partial.properties.items():
+            self.properties[name] += sign * count
+        for color in partial.colors:
+            self.colors[color] += sign
+        for color in partial.normalized_colors:
+            self.normalized_colors[color] += sign
+        for font in partial.fonts:
+            self.fonts[font] += sign
+        for condition, details in partial.media_query_details.items():
+            counter = self.media_properties.setdefault(condition, Counter())
+            for name, count in details["properties"].items():
+                counter[name] += sign * count
+
+    def replace(self, doc: CssDocument, removed: List[Any], added: List[Any]) -> "AnalysisState":
+        """
+        Return the state of a document in which `removed` became `added`.
+
+        Args:
+            doc: The document holding the `added` top-level nodes
+            removed: Top-level nodes that were dropped
+            added: Top-level nodes that were parsed in their place
+
+        Returns:
+            A new AnalysisState; this one is left unchanged
+        """
+        state = AnalysisState.__new__(AnalysisState)
+        state.partials = dict(self.partials)
+        state.properties = Counter(self.properties)
+        state.colors = Counter(self.colors)
+        state.normalized_colors = Counter(self.normalized_colors)
+        state.fonts = Counter(self.fonts)
+        state.media_properties = {condition: Counter(counter) for condition, counter in self.media_properties.items()}
+
+        for node in removed:
+            entry = state.partials.pop(id(node), None)
+            if entry is not None:
+                state._apply(entry[1], -1)
+        fresh = AnalysisState.build(doc, added).partials
+        for _, partial in fresh.values():
+            state._apply(partial, 1)
+        state.partials.update(fresh)
+        return state
+
+    def result(self, doc: CssDocument, fields: Optional[Tuple[str, ...]] = None) -> Dict[str, Any]:
+        """
+        Assemble the analyze_stylesheet result for a document.
+
+        Args:
+            doc: The analyzed document
+            fields: Fields to return, as normalized by _analysis_fields
+                    (default: all); the others are not assembled
+        """
+        sections = set(ANALYSIS_FIELDS.values() if fields is None else map(ANALYSIS_FIELDS.get, fields))
+        selectors = []
+        property_order = {}
+        media_query_list = []
+        media_query_details = {}
+        selector_properties = {}
+        all_comments = []
+        imports = []
+        import_media_queries = {}
+
+        for node in doc.rules:
+            entry = self.partials.get(id(node))
+            if entry is None or entry[0] is not node:
+                continue
+            partial = entry[1]
+            if "selectors" in sections:
+                selectors.extend(partial.selectors)
+            property_order.update(dict.fromkeys(partial.properties))
+            media_query_list.extend(partial.media_query_list)
+            if "media_query_details" in sections:
+                for condition, details in partial.media_query_details.items():
+                    merged = media_query_details.setdefault(condition, {"selectors": [], "properties": {}})
+                    merged["selectors"].extend(details["selectors"])
+                    merged["properties"].update(dict.fromkeys(details["properties"]))
+            if "selector_properties" in sections:
+                for selector, values in partial.selector_properties.items():
+                    selector_properties.setdefault(selector, {}).update(values)
+            if "comments" in sections:
+                all_comments.extend(partial.comments.result())
+            if "imports" in sections:
+                imports.extend(partial.imports)
+                import_media_queries.update(partial.import_media_queries)
+
+        properties = {name: self.properties[name] for name in property_order}
+        for condition, details in media_query_details.items():
+            counter = self.media_properties[condition]
+            details["properties"] = {name: counter[name] for name in details["properties"]}
+        colors = [color for color, count in self.colors.items() if count > 0]
+        normalized_colors = [color for color, count in self.normalized_colors.items() if count > 0]
+        fonts = [font for font, count in self.fonts.items() if count > 0]
+
+        return _project({
+            "selectors": selectors,
+            "selectors_count": len(selectors),
+            "unique_selectors": len(set(selectors)),
+            "properties_count": sum(properties.values()),
+            "unique_properties": len(properties),
+            # Same order as a stable sort by decreasing count, without sorting them all
+            "most_used_properties": heapq.nlargest(10, properties.items(), key=lambda x: x[1]),
+            "colors_used": len(colors),
+            "colors": colors,
+            "normalized_colors": normalized_colors,
+            "fonts_used": len(fonts),
+            "fonts": fonts,
+            "media_queries_count": len(media_query_list),
+            "media_queries": media_query_list,
+            "media_query_details": media_query_details,
+            "comments_count": len(all_comments),
+            "comments": all_comments,
+            "file_size_bytes": doc.size_bytes,
+            "selector_properties": selector_properties,
+            "imports": imports,
+            "imports_count": len(imports),
+            "import_media_queries": import_media_queries
+        }, fields)
 
 
 def extract_imports(rules):
@@ -279,8 +1340,7 @@ def extract_imports(rules):
                 # Handle url token
                 if token.type == "function" and token.lower_name == "url":
                     # Extract URL from inside the url() function
-                    url_content = tinycss2.parse_component_value_list(tinycss2.serialize(token.arguments))
-                    for arg in url_content:
+                    for arg in token.arguments:
                         if arg.type in ["string", "ident"]:
                             import_url = arg.value
                             break
@@ -311,84 +1371,88 @@ def extract_imports(rules):
     return imports, import_media_queries
 
 
-def analyze_stylesheet(css: Union[str, bytes]) -> Dict[str, Any]:
+def analyze_stylesheet(
+    css: Union[str, bytes, CssDocument],
+    fields: Union[None, str, Iterable[str]] = None
+) -> Dict[str, Any]:
     """
     Analyze a CSS stylesheet and return various statistics.
 
+    Only the requested fields are computed and returned, so asking for
+    counts skips building the selector list, the per-selector and
+    per-media maps and the comment bodies:
+
+        analyze_stylesheet(css, fields=["selectors_count", "imports"])
+        analyze_stylesheet(css, fields="summary")  # SUMMARY_FIELDS
+
+    "colors" holds the values of color properties, and of any property
+    with a hex color, as written; "normalized_colors" the colors found in
+    any value, normalized as by css_tools.colors.
+
     Args:
-        css: The CSS code as string or bytes
+        css: The CSS code as string or bytes, or a CssDocument
+        fields: Names from ANALYSIS_FIELDS, or "summary" for the counts
+                (default: every field)
 
     Returns:
         Dictionary with statistics and detailed information about the stylesheet
 
     Raises:
-        Exception: If the CSS cannot be properly parsed
+        Exception: If the CSS cannot be properly parsed or a field is unknown
     """
-    if isinstance(css, bytes):
-        css = css.decode('utf-8')
+    fields = _analysis_fields(fields)
+    doc = as_document(css, allow_compact=True)
 
     # Validate CSS syntax before proceeding
     # Check for unbalanced braces - a common CSS error
-    if css.count('{') != css.count('}'):
+    from .validation import braces_balanced  # validation imports this module
+    if not braces_balanced(doc.text):
         raise Exception("CSS syntax error: Unbalanced braces")
 
-    # Extract all comments using the existing function
-    all_comments = extract_comments(css)
-
     try:
-        # Parse CSS for further analysis
-        rules = parse_stylesheet(css)
-
         # Check for parse errors
-        for rule in rules:
+        for rule in doc.rules:
             if hasattr(rule, 'type') and rule.type == 'error':
                 raise Exception(f"CSS parse error: {getattr(rule, 'message', 'Unknown error')}")
 
-        # Extract imports using AST approach
-        imports, import_media_queries = extract_imports(rules)
-
     except Exception as e:
         # Re-raise any parsing exceptions with a clear message
         raise Exception(f"Failed to parse CSS: {str(e)}")
 
-    # Initialize data structures
-    selectors = []
-    properties = {}
-    colors = []
-    fonts = []
-    media_query_list = []
-    media_query_details = {}
-    selector_properties = {}
-
-    # Process CSS rules
+    # Collect rules, comments and imports in a single traversal; the
+    # per-rule state is kept so update() can patch it instead of starting over.
+    # A projection on a document without that state only collects its fields.
     try:
-        process_rule_block(
-            rules, None, selectors, properties, colors, fonts,
-            media_query_list, media_query_details, selector_properties
-        )
+        if fields is not None and "analysis_state" not in doc._views:
+            return run_visitors(doc, {"analysis": AnalysisVisitor(doc, fields)})["analysis"]
+        return doc.cached("analysis_state", lambda: AnalysisState.build(doc)).result(doc, fields)
     except Exception as e:
         raise Exception(f"Error analyzing CSS structure: {str(e)}")
 
-    # Return the analysis results
-    return {
-        "selectors": selectors,
-        "selectors_count": len(selectors),
-        "unique_selectors": len(set(selectors)),
-        "properties_count": sum(properties.values()),
-        "unique_properties": len(properties),
-        "most_used_properties": sorted(properties.items(), key=lambda x: x[1], reverse=True)[:10],
-        "colors_used": len(set(colors)),
-        "colors": list(set(colors)),
-        "fonts_used": len(set(fonts)),
-        "fonts": list(set(fonts)),
-        "media_queries_count": len(media_query_list),
-        "media_queries": media_query_list,
-        "media_query_details": media_query_details,
-        "comments_count": len(all_comments),
-        "comments": all_comments,
-        "file_size_bytes": len(css.encode('utf-8')),
-        "selector_properties": selector_properties,
-        "imports": imports,
-        "imports_count": len(imports),
-        "import_media_queries": import_media_queries
-    }
+
+def analyze_stylesheet_stream(
+    source: Union[str, "os.PathLike[str]", bytes, memoryview, mmap.mmap, Any],
+    chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+    fields: Union[None, str, Iterable[str]] = None
+) -> Dict[str, Any]:
+    """
+    Analyze a stylesheet read from a file or buffer without loading it whole.
+
+    Returns the same statistics as analyze_stylesheet. Syntax errors are
+    reported once the rule containing them has been read, and unbalanced
+    braces once the whole source has been read.
+
+    Args:
+        source: A path, a file object, or a bytes-like object such as an mmap
+        chunk_size: Number of bytes read at a time
+        fields: Fields to compute and return, as for analyze_stylesheet
+
+    Returns:
+        Dictionary with statistics and detailed information about the stylesheet
+
+    Raises:
+        Exception: If the CSS cannot be properly parsed
+    """
+    fields = _analysis_fields(fields)
+    doc = StreamedDocument(source, chunk_size)
+    return run_visitors(doc, {"analysis": AnalysisVisitor(doc, fields)})["analysis"]
@@ -0,0 +1,467 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Run optimization passes over one parsed stylesheet and serialize it once.
+
+Chaining add_prefixes, remove_duplicates, sort_properties and minify_css
+parses and writes the whole stylesheet once per step, and the pretty text
+written by one step is only parsed again by the next. A PassManager parses
+the stylesheet into a small mutable tree, lets every pass edit that tree
+and writes it once at the end:
+
+    optimize_css(css, ["prefix", "remove_duplicates", "sort_properties", "minify"])
+
+A pass is a name, or a `(name, options)` pair or a dict with a "pass" key
+plus the options, like the operations of css_tools.dispatch:
+
+    prefix             add_prefixes, with its property_prefixes and
+                       value_prefixes options
+    add_property       add_property_to_selector, with its selector,
+                       property_name, property_value and important options
+    remove_duplicates  remove_duplicates
+    sort_properties    sort_properties
+    minify             minify_css
+
+Each pass does what the function it is named after does to the stylesheet,
+so the minified result of a pipeline is the result of chaining the
+functions. The tree is written minified once the minify pass has run, and
+like beautify_css otherwise; with no passes the text is returned as is.
+
+run_passes() also reports the time each pass took. With measure=True it
+reports the bytes each pass saved too, measured on the tree as it would be
+written after the pass; that writes the whole tree once more per pass, so
+it is off by default.
+"""
+
+import time
+import tinycss2
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from .dispatch import _decode
+from .emitter import Emitter
+from .minifier import RULE_BLOCK_AT_RULES, _SELECTOR_SPACE, _minify_value
+from .parser import CssDocument, as_document
+from .prefixer import DEFAULT_PROPERTY_PREFIXES, DEFAULT_VALUE_PREFIXES, _property_table, _value_table
+from .selector_index import normalize_selector
+
+# Passes run by default, in the order of a production build
+DEFAULT_PASSES = ("prefix", "remove_duplicates", "sort_properties", "minify")
+
+# Options accepted by each pass
+PASS_OPTIONS: Dict[str, Tuple[str, ...]] = {
+    "prefix": ("property_prefixes", "value_prefixes"),
+    "add_property": ("selector", "property_name", "property_value", "important"),
+    "remove_duplicates": (),
+    "sort_properties": (),
+    "minify": (),
+}
+
+# Options a pass cannot run without
+_REQUIRED_OPTIONS = {"add_property": ("selector", "property_name", "property_value")}
+
+
+class _Declaration:
+    __slots__ = ("name", "value", "important")
+
+    def __init__(self, name: str, value: str, important: bool):
+        self.name = name
+        self.value = value
+        self.important = important
+
+
+class _Comment:
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _Rule:
+    """A block of declarations and comments, under a selector or an at-rule header such as @font-face."""
+    __slots__ = ("header", "items", "at_rule", "source")
+
+    def __init__(self, header: str, items: List[Any], at_rule: bool = False, source: Any = None):
+        self.header = header
+        self.items = items
+        self.at_rule = at_rule
+        self.source = source  # The parsed rule, None for rules added by a pass
+
+
+class _Block:
+    """An at-rule whose block holds rules, such as @media or @keyframes."""
+    __slots__ = ("keyword", "prelude", "children")
+
+    def __init__(self, keyword: str, prelude: str, children: List[Any]):
+        self.keyword = keyword
+        self.prelude = prelude
+        self.children = children
+
+
+class _Statement:
+    __slots__ = ("keyword", "prelude")
+
+    def __init__(self, keyword: str, prelude: str):
+        self.keyword = keyword
+        self.prelude = prelude
+
+
+class _Tree:
+    """The rules of a stylesheet, as edited by the passes."""
+
+    def __init__(self, doc: CssDocument):
+        self.doc = doc
+        self.nodes = _build(doc, doc.rules)
+        self.minified = False
+
+    def emit(self) -> Emitter:
+        emitter = Emitter("minified" if self.minified else "pretty")
+        _emit(self.nodes, emitter)
+        return emitter
+
+    def size(self) -> int:
+        """Size in bytes of the tree as it would be written now."""
+        return sum(len(part) if part.isascii() else len(part.encode('utf-8')) for part in self.emit().parts)
+
+
+def _items(doc: CssDocument, declarations: List[Any]) -> List[Any]:
+    items = []
+    for item in declarations:
+        if item.type == "declaration":
+            items.append(_Declaration(item.name, doc.value(item), item.important))
+        elif item.type == "comment":
+            items.append(_Comment(item.value))
+    return items
+
+
+def _build(doc: CssDocument, rule_list: Iterable[Any]) -> List[Any]:
+    """Convert parsed rules into tree nodes, keeping what the serializers of css_tools.minifier write."""
+    nodes = []
+    for rule in rule_list:
+        if rule.type == "qualified-rule":
+            nodes.append(_Rule(doc.selector(rule), _items(doc, doc.declarations(rule)), source=rule))
+        elif rule.type == "at-rule":
+            prelude = tinycss2.serialize(rule.prelude).strip()
+            if rule.lower_at_keyword in RULE_BLOCK_AT_RULES:
+                nodes.append(_Block(rule.lower_at_keyword, prelude, _build(doc, doc.children(rule))))
+            elif rule.content is not None:
+                header = f"@{rule.lower_at_keyword} {prelude}".strip()
+                nodes.append(_Rule(header, _items(doc, doc.declarations(rule)), True, rule))
+            else:
+                nodes.append(_Statement(rule.lower_at_keyword, prelude))
+        elif rule.type == "comment":
+            nodes.append(_Comment(rule.value))
+    return nodes
+
+
+def _emit(nodes: List[Any], emitter: Emitter, depth: int = 0) -> None:
+    """Write tree nodes like minifier._emit_rules writes parsed rules."""
+    for node in nodes:
+        if isinstance(node, _Rule):
+            header = node.header
+            if emitter.style != "minified" and not node.at_rule and ',' in header:
+                header = (',\n' + emitter.indent * depth).join(s.strip() for s in header.split(','))
+            emitter.rule_start(header, depth)
+            for item in node.items:
+                if isinstance(item, _Declaration):
+                    emitter.declaration(item.name, item.value, item.important, depth)
+                else:
+                    emitter.comment(item.text, depth + 1)
+            emitter.rule_end(depth)
+        elif isinstance(node, _Block):
+            emitter.block_start(node.keyword, node.prelude, depth)
+            _emit(node.children, emitter, depth + 1)
+            emitter.block_end(depth)
+        elif isinstance(node, _Statement):
+            emitter.statement(node.keyword, node.prelude, depth)
+        elif emitter.style != "minified":
+            emitter.comment(node.text, depth)
+            emitter.write("\n")
+
+
+def _qualified_rules(nodes: List[Any]) -> Iterable[_Rule]:
+    """Every rule under a selector, at any depth."""
+    for node in nodes:
+        if isinstance(node, _Rule):
+            if not node.at_rule:
+                yield node
+        elif isinstance(node, _Block):
+            yield from _qualified_rules(node.children)
+
+
+def _prefix(tree: _Tree, property_prefixes: Any = None, value_prefixes: Any = None) -> None:
+    properties = _property_table(DEFAULT_PROPERTY_PREFIXES if property_prefixes is None else property_prefixes)
+    values = _value_table(DEFAULT_VALUE_PREFIXES if value_prefixes is None else value_prefixes)
+    if not properties and not values:
+        return
+
+    for rule in _qualified_rules(tree.nodes):
+        declarations = [item for item in rule.items if isinstance(item, _Declaration)]
+        present_names = {declaration.name.lower() for declaration in declarations}
+        present_values = {(declaration.name.lower(), declaration.value.lower()) for declaration in declarations}
+
+        items = []
+        for item in rule.items:
+            if isinstance(item, _Declaration):
+                name = item.name.lower()
+                for prefix in properties.get(name, ()):
+                    prefixed_name = f"{prefix}{name}"
+                    if prefixed_name not in present_names:
+                        present_names.add(prefixed_name)
+                        items.append(_Declaration(prefixed_name, item.value, item.important))
+                for variant in values.get(name, {}).get(item.value.lower(), ()):
+                    if (name, variant.lower()) not in present_values:
+                        present_values.add((name, variant.lower()))
+                        items.append(_Declaration(item.name, variant, item.important))
+            items.append(item)
+        rule.items = items
+
+
+def _add_property(
+    tree: _Tree,
+    selector: str,
+    property_name: str,
+    property_value: str,
+    important: bool = False
+) -> None:
+    key = normalize_selector(selector)
+    source_ids = tree.doc.selector_index.rule_ids(selector, top_level=True)
+    found = False
+    for node in tree.nodes:
+        if not isinstance(node, _Rule) or node.at_rule:
+            continue
+        if node.source is not None:
+            matches = id(node.source) in source_ids
+        else:
+            matches = normalize_selector(node.header) == key
+        if not matches:
+            continue
+        found = True
+        declaration = _Declaration(property_name, property_value, important)
+        for i, item in enumerate(node.items):
+            if isinstance(item, _Declaration) and item.name == property_name:
+                node.items[i] = declaration
+                break
+        else:
+            node.items.append(declaration)
+
+    if not found:
+        tree.nodes.append(_Rule(selector.strip(), [_Declaration(property_name, property_value, important)]))
+
+
+def _unique_declarations(rule: _Rule) -> None:
+    # The last value of each property wins, sorted by name, then the comments
+    unique_props = {}
+    comments = []
+    for item in rule.items:
+        if isinstance(item, _Declaration):
+            unique_props[item.name] = item
+        else:
+            comments.append(item)
+    rule.items = sorted(unique_props.values(), key=lambda d: d.name) + comments
+
+
+def _remove_duplicates(tree: _Tree) -> None:
+    selectors = set()
+    media_blocks = {}  # Maps media query conditions to their first block
+    nodes = []
+    for node in tree.nodes:
+        if isinstance(node, _Rule) and not node.at_rule:
+            # Later rules for a selector are dropped
+            if node.header in selectors:
+                continue
+            selectors.add(node.header)
+        elif isinstance(node, _Block) and node.keyword == "media":
+            first = media_blocks.get(node.prelude)
+            if first is not None:
+                # Rules for selectors new to the first block are moved into it
+                existing = {child.header for child in first.children if isinstance(child, _Rule) and not child.at_rule}
+                first.children.extend(
+                    child for child in node.children
+                    if isinstance(child, _Rule) and not child.at_rule and child.header not in existing
+                )
+                continue
+            media_blocks[node.prelude] = node
+        nodes.append(node)
+
+    for node in nodes:
+        if isinstance(node, _Rule) and not node.at_rule:
+            _unique_declarations(node)
+        elif isinstance(node, _Block) and node.keyword == "media":
+            for child in node.children:
+                if isinstance(child, _Rule) and not child.at_rule:
+                    _unique_declarations(child)
+    tree.nodes = nodes
+
+
+def _sort_properties(tree: _Tree) -> None:
+    for node in tree.nodes:
+        if isinstance(node, _Rule) and not node.at_rule:
+            declarations = [item for item in node.items if isinstance(item, _Declaration)]
+            comments = [item for item in node.items if not isinstance(item, _Declaration)]
+            node.items = sorted(declarations, key=lambda d: d.name) + comments
+
+
+def _minify_nodes(nodes: List[Any]) -> List[Any]:
+    kept = []
+    for node in nodes:
+        if isinstance(node, _Rule):
+            node.items = [
+                _Declaration(item.name, _minify_value(item.value), item.important)
+                for item in node.items if isinstance(item, _Declaration)
+            ]
+            if not node.at_rule:
+                node.header = _SELECTOR_SPACE.sub(r'\1', node.header)
+                # Rules without declarations are dropped
+                if not node.items:
+                    continue
+        elif isinstance(node, _Block):
+            node.children = _minify_nodes(node.children)
+        elif isinstance(node, _Comment):
+            continue
+        kept.append(node)
+    return kept
+
+
+def _minify(tree: _Tree) -> None:
+    tree.nodes = _minify_nodes(tree.nodes)
+    tree.minified = True
+
+
+_PASSES = {
+    "prefix": _prefix,
+    "add_property": _add_property,
+    "remove_duplicates": _remove_duplicates,
+    "sort_properties": _sort_properties,
+    "minify": _minify,
+}
+
+
+def _split_pass(spec: Any) -> Tuple[str, Dict[str, Any]]:
+    spec = _decode(spec)
+    if isinstance(spec, str):
+        name, options = spec, {}
+    elif isinstance(spec, dict):
+        options = dict(spec)
+        name = options.pop("pass", None)
+    else:
+        name, options = spec[0], spec[1] if len(spec) > 1 else {}
+    if name not in PASS_OPTIONS:
+        raise Exception(f"Unknown pass: {name}")
+    if not isinstance(options, dict):
+        raise Exception(f"Options of pass {name} must be a dict")
+    unknown = [option for option in options if option not in PASS_OPTIONS[name]]
+    if unknown:
+        raise Exception(f"Unknown options for pass {name}: {', '.join(map(str, unknown))}")
+    missing = [option for option in _REQUIRED_OPTIONS.get(name, ()) if option not in options]
+    if missing:
+        raise Exception(f"Pass {name} needs the options: {', '.join(missing)}")
+    return name, options
+
+
+class PassManager:
+    """
+    A configured list of passes, run over one parse of a stylesheet.
+
+    The passes are checked when the manager is created, so a bad
+    configuration fails before any stylesheet is parsed. A PassManager
+    can run any number of stylesheets.
+
+    Args:
+        passes: Names of the passes, or `(name, options)` pairs or dicts
+                with a "pass" key, in order (default: DEFAULT_PASSES)
+        measure: Report the bytes saved by each pass, which writes the tree
+                 into a buffer after every pass (default: False)
+
+    Raises:
+        Exception: If a pass or one of its options is unknown, or a
+                   required option is missing
+    """
+
+    def __init__(self, passes: Optional[Iterable[Any]] = None, measure: bool = False):
+        self.passes = [_split_pass(spec) for spec in (DEFAULT_PASSES if passes is None else passes)]
+        self.measure = measure
+
+    def run(self, css: Union[str, bytes, CssDocument]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Run the passes over a stylesheet.
+
+        Args:
+            css: The CSS code as string or bytes, or a CssDocument
+
+        Returns:
+            Tuple of (optimized CSS, report). The report holds total_seconds,
+            parse_seconds, serialize_seconds, input_bytes, output_bytes and
+            "passes", one {"name", "seconds"} dict per pass, with
+            bytes_before, bytes_after and bytes_saved when measuring
+        """
+        start = time.perf_counter()
+        doc = as_document(css)
+        input_bytes = len(doc.text.encode('utf-8'))
+        if not self.passes:
+            return doc.text, {
+                "total_seconds": time.perf_counter() - start, "parse_seconds": time.perf_counter() - start,
+                "serialize_seconds": 0.0, "input_bytes": input_bytes, "output_bytes": input_bytes, "passes": [],
+            }
+
+        tree = _Tree(doc)
+        parse_seconds = time.perf_counter() - start
+        size = tree.size() if self.measure else None
+
+        passes = []
+        for name, options in self.passes:
+            pass_start = time.perf_counter()
+            _PASSES[name](tree, **options)
+            entry = {"name": name, "seconds": time.perf_counter() - pass_start}
+            if self.measure:
+                new_size = tree.size()
+                entry.update(bytes_before=size, bytes_after=new_size, bytes_saved=size - new_size)
+                size = new_size
+            passes.append(entry)
+
+        serialize_start = time.perf_counter()
+        result = tree.emit().getvalue()
+        end = time.perf_counter()
+        report = {
+            "total_seconds": end - start,
+            "parse_seconds": parse_seconds,
+            "serialize_seconds": end - serialize_start,
+            "input_bytes": input_bytes,
+            "output_bytes": len(result.encode('utf-8')),
+            "passes": passes,
+        }
+        return result, report
+
+
+def run_passes(
+    css: Union[str, bytes, CssDocument],
+    passes: Optional[Iterable[Any]] = None,
+    measure: bool = False
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Run optimization passes over a stylesheet and report what each one did.
+
+    Args:
+        css: The CSS code as string or bytes, or a CssDocument
+        passes: Passes to run, in order (default: DEFAULT_PASSES)
+        measure: Report the bytes saved by each pass, at the cost of writing
+                 the tree after every pass
+
+    Returns:
+        Tuple of (optimized CSS, report), see PassManager.run
+    """
+    return PassManager(passes, measure).run(css)
+
+
+def optimize_css(css: Union[str, bytes, CssDocument], passes: Optional[Iterable[Any]] = None) -> str:
+    """
+    Run optimization passes over a stylesheet, parsing and writing it once.
+
+    Args:
+        css: The CSS code as string or bytes, or a CssDocument
+        passes: Passes to run, in order (default: DEFAULT_PASSES)
+
+    Returns:
+        Optimized CSS as a string
+    """
+    return PassManager(passes).run(css)[0]
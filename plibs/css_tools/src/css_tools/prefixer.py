@@ -0,0 +1,182 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Add vendor-prefixed declarations from a table, in one pass over a stylesheet.
+
+Two tables drive the prefixer. Property prefixes repeat a declaration under
+prefixed names:
+
+    {"user-select": ["-webkit-", "-moz-"]}
+    # user-select: none  ->  -webkit-user-select: none; -moz-user-select: none; user-select: none
+
+Value prefixes repeat a declaration with other values, for keywords whose
+prefixed form is not just the keyword with a prefix:
+
+    {"display": {"flex": ["-webkit-box", "-ms-flexbox"]}}
+    # display: flex  ->  display: -webkit-box; display: -ms-flexbox; display: flex
+
+Prefixed declarations are inserted right before the declaration they come
+from, so the standard one still wins, and a prefixed declaration already
+present in the same block is not added again. Rules nested in @media,
+@supports and the other grouping at-rules, and in @keyframes, are
+prefixed too.
+
+Every insertion is spliced into the source text, so the rest of the
+stylesheet keeps its formatting and comments.
+"""
+
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+from .parser import CssDocument, as_document
+from .spans import line_starts
+from .traversal import has_nested_rules
+
+# Property prefixes applied by default
+DEFAULT_PROPERTY_PREFIXES: Dict[str, List[str]] = {
+    "user-select": ["-webkit-", "-moz-", "-ms-"],
+    "appearance": ["-webkit-", "-moz-"],
+    "backdrop-filter": ["-webkit-"],
+    "text-size-adjust": ["-webkit-", "-ms-"],
+    "font-smoothing": ["-webkit-", "-moz-osx-"],
+}
+
+# Value prefixes applied by default, by property and then by value
+DEFAULT_VALUE_PREFIXES: Dict[str, Dict[str, List[str]]] = {
+    "display": {
+        "flex": ["-webkit-box", "-ms-flexbox"],
+        "inline-flex": ["-webkit-inline-box", "-ms-inline-flexbox"],
+    },
+    "position": {
+        "sticky": ["-webkit-sticky"],
+    },
+}
+
+# At-rules whose block holds rules that get prefixed, besides the grouping ones
+_KEYFRAMES = {"keyframes", "-webkit-keyframes", "-moz-keyframes", "-o-keyframes"}
+
+
+def _text(value: Any) -> str:
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+
+def _items(table: Union[Mapping[Any, Any], Iterable[Tuple[Any, Any]]]) -> Iterable[Tuple[Any, Any]]:
+    # Tables arrive as dicts, or from Elixir as lists of {key, value} tuples
+    return table.items() if isinstance(table, Mapping) else table
+
+
+def _property_table(table: Union[Mapping[Any, Any], Iterable[Tuple[Any, Any]]]) -> Dict[str, List[str]]:
+    return {_text(name).lower(): [_text(prefix) for prefix in prefixes] for name, prefixes in _items(table)}
+
+
+def _value_table(table: Union[Mapping[Any, Any], Iterable[Tuple[Any, Any]]]) -> Dict[str, Dict[str, List[str]]]:
+    return {
+        _text(name).lower(): {
+            _text(value).lower(): [_text(variant) for variant in variants] for value, variants in _items(values)
+        }
+        for name, values in _items(table)
+    }
+
+
+def _separator(text: str, offset: int) -> str:
+    """The text to put between inserted declarations: the line break and indentation before `offset`."""
+    start = offset
+    while start > 0 and text[start - 1] in " \t":
+        start -= 1
+    if start == 0 or text[start - 1] not in "\r\n\f":
+        return " "
+    newline = "\r\n" if text[start - 2:start] == "\r\n" else text[start - 1]
+    return newline + text[start:offset]
+
+
+def _block_insertions(
+    doc: CssDocument,
+    declarations: List[Any],
+    properties: Dict[str, List[str]],
+    values: Dict[str, Dict[str, List[str]]],
+    starts: List[int]
+) -> List[Tuple[int, str]]:
+    """(offset, text) insertions adding the prefixed declarations of one block."""
+    present_names = set()
+    present_values = set()
+    for declaration in declarations:
+        if declaration.type == "declaration":
+            present_names.add(declaration.lower_name)
+            present_values.add((declaration.lower_name, doc.value(declaration).lower()))
+
+    insertions = []
+    for declaration in declarations:
+        if declaration.type != "declaration":
+            continue
+        name = declaration.lower_name
+        prefixes = properties.get(name)
+        variants = values.get(name)
+        if prefixes is None and variants is None:
+            continue
+
+        value = doc.value(declaration)
+        important = " !important" if declaration.important else ""
+        added = []
+        for prefix in prefixes or ():
+            prefixed_name = f"{prefix}{name}"
+            if prefixed_name not in present_names:
+                present_names.add(prefixed_name)
+                added.append(f"{prefixed_name}: {value}{important};")
+        for variant in (variants or {}).get(value.lower(), ()):
+            if (name, variant.lower()) not in present_values:
+                present_values.add((name, variant.lower()))
+                added.append(f"{declaration.name}: {variant}{important};")
+
+        if added:
+            offset = starts[declaration.source_line - 1] + declaration.source_column - 1
+            separator = _separator(doc.text, offset)
+            insertions.append((offset, separator.join(added) + separator))
+    return insertions
+
+
+def add_prefixes(
+    css: Union[str, bytes, CssDocument],
+    property_prefixes: Optional[Union[Mapping[Any, Any], Iterable[Tuple[Any, Any]]]] = None,
+    value_prefixes: Optional[Union[Mapping[Any, Any], Iterable[Tuple[Any, Any]]]] = None
+) -> str:
+    """
+    Add the prefixed declarations of the given tables throughout a stylesheet.
+
+    Args:
+        css: The CSS code as string or bytes, or a CssDocument
+        property_prefixes: Maps property names to the prefixes to add
+                           (default: DEFAULT_PROPERTY_PREFIXES)
+        value_prefixes: Maps property names to maps of values to the values
+                        to add (default: DEFAULT_VALUE_PREFIXES)
+
+    Returns:
+        Modified CSS as a string
+    """
+    doc = as_document(css)
+    properties = _property_table(DEFAULT_PROPERTY_PREFIXES if property_prefixes is None else property_prefixes)
+    values = _value_table(DEFAULT_VALUE_PREFIXES if value_prefixes is None else value_prefixes)
+    if not properties and not values:
+        return doc.text
+
+    def descend(node: Any) -> bool:
+        return has_nested_rules(node) or (
+            node.type == "at-rule" and node.content is not None and node.lower_at_keyword in _KEYFRAMES
+        )
+
+    starts = line_starts(doc.text)
+    insertions = []
+    for node, _ in doc.walk(descend):
+        if node.type == "qualified-rule":
+            insertions.extend(_block_insertions(doc, doc.declarations(node), properties, values, starts))
+    if not insertions:
+        return doc.text
+
+    # Insertions are found in source order, so the text is rebuilt in one join
+    parts = []
+    position = 0
+    for offset, text in insertions:
+        parts.append(doc.text[position:offset])
+        parts.append(text)
+        position = offset
+    parts.append(doc.text[position:])
+    return "".join(parts)
@@ -0,0 +1,151 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Index of the rules of a stylesheet by selector."""
+
+import tinycss2
+from typing import Any, Dict, List, Set, Tuple, Union
+from .traversal import has_nested_rules
+
+# (position in document order, rule, ancestors) of an indexed rule
+IndexEntry = Tuple[int, Any, Tuple[Any, ...]]
+
+
+# Combinators and separators around which whitespace carries no meaning
+_SEPARATORS = {",", ">", "+", "~"}
+
+
+def _is_separator(token: Any) -> bool:
+    return token.type == "literal" and token.value in _SEPARATORS
+
+
+def _normalized_tokens(tokens: List[Any]) -> List[Any]:
+    normalized = []
+    for token in tokens:
+        if token.type == "comment":
+            continue
+        if token.type == "whitespace":
+            if normalized and normalized[-1].type != "whitespace" and not _is_separator(normalized[-1]):
+                normalized.append(tinycss2.ast.WhitespaceToken(line=0, column=0, value=" "))
+            continue
+        if _is_separator(token) and normalized and normalized[-1].type == "whitespace":
+            normalized.pop()
+        normalized.append(token)
+    return normalized
+
+
+def _key(tokens: List[Any]) -> str:
+    # serialize() separates tokens that would otherwise merge, so dropping
+    # comments cannot change what the selector means
+    return tinycss2.serialize(tokens).strip()
+
+
+def normalize_selector(selector: Union[str, bytes, List[Any]]) -> str:
+    """
+    Normalize selector text for comparison.
+
+    Comments are dropped, runs of whitespace become a single space and
+    whitespace around combinators and commas is removed, so `.a  >  .b`
+    and `.a>.b` share a key while strings such as `[title="a  b"]` are
+    left untouched.
+
+    Args:
+        selector: Selector text, or the prelude tokens of a rule
+
+    Returns:
+        The normalized selector text
+    """
+    if isinstance(selector, bytes):
+        selector = selector.decode('utf-8')
+    if isinstance(selector, str):
+        selector = tinycss2.parse_component_value_list(selector)
+    return _key(_normalized_tokens(selector))
+
+
+def selector_members(selector: Union[str, bytes, List[Any]]) -> List[str]:
+    """
+    Split a selector list into its normalized members.
+
+    Args:
+        selector: Selector text, or the prelude tokens of a rule
+
+    Returns:
+        Normalized text of each comma-separated selector, in order
+    """
+    if isinstance(selector, bytes):
+        selector = selector.decode('utf-8')
+    if isinstance(selector, str):
+        selector = tinycss2.parse_component_value_list(selector)
+
+    members = []
+    current = []
+    for token in _normalized_tokens(selector):
+        if token.type == "literal" and token.value == ",":
+            members.append(current)
+            current = []
+        else:
+            current.append(token)
+    members.append(current)
+    return [key for key in (_key(member) for member in members) if key]
+
+
+class SelectorIndex:
+    """
+    Maps normalized selectors to the qualified rules that use them.
+
+    Rules are indexed at top level and inside grouping at-rules such as
+    @media and @supports, under their full selector and under each member
+    of their selector list. The index is built in one pass and every
+    lookup after that is a dictionary access.
+
+    Args:
+        doc: The CssDocument to index
+    """
+
+    def __init__(self, doc: Any):
+        self.by_selector: Dict[str, List[IndexEntry]] = {}
+        self.by_member: Dict[str, List[IndexEntry]] = {}
+
+        for position, (node, ancestors) in enumerate(doc.walk(descend=has_nested_rules)):
+            if node.type != "qualified-rule":
+                continue
+            entry = (position, node, ancestors)
+            self.by_selector.setdefault(normalize_selector(node.prelude), []).append(entry)
+            for member in dict.fromkeys(selector_members(node.prelude)):
+                self.by_member.setdefault(member, []).append(entry)
+
+    def lookup(self, selector: Union[str, bytes], top_level: bool = False) -> List[IndexEntry]:
+        """
+        Return the rules whose whole selector matches, in document order.
+
+        Args:
+            selector: The selector to look up
+            top_level: Only return rules that are not nested in an at-rule
+
+        Returns:
+            List of (position, rule, ancestors) entries
+        """
+        entries = self.by_selector.get(normalize_selector(selector), [])
+        return [entry for entry in entries if not entry[2]] if top_level else list(entries)
+
+    def lookup_member(self, selector: Union[str, bytes], top_level: bool = False) -> List[IndexEntry]:
+        """
+        Return the rules whose selector list contains the selector.
+
+        Args:
+            selector: A single selector, such as ".button"
+            top_level: Only return rules that are not nested in an at-rule
+
+        Returns:
+            List of (position, rule, ancestors) entries
+        """
+        entries = self.by_member.get(normalize_selector(selector), [])
+        return [entry for entry in entries if not entry[2]] if top_level else list(entries)
+
+    def rule_ids(self, selector: Union[str, bytes], top_level: bool = False) -> Set[int]:
+        """Return the ids of the rules whose whole selector matches."""
+        return {id(rule) for _, rule, _ in self.lookup(selector, top_level)}
+
+    def __contains__(self, selector: Union[str, bytes]) -> bool:
+        return normalize_selector(selector) in self.by_selector
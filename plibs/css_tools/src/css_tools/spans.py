@@ -0,0 +1,103 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Source offsets of the top-level rules of a stylesheet."""
+
+import bisect
+import re
+import tinycss2
+from typing import Any, Iterator, List, Tuple
+
+# Newlines as the CSS tokenizer counts them
+_NEWLINE = re.compile(r'\r\n|[\r\n\f]')
+
+
+def line_starts(text: str) -> List[int]:
+    """Return the offset at which each line of `text` starts."""
+    return [0] + [match.end() for match in _NEWLINE.finditer(text)]
+
+
+def node_offsets(nodes: List[Any], text: str, base: int = 0) -> List[int]:
+    """
+    Return the start offset of each node parsed from `text`.
+
+    Args:
+        nodes: Top-level tinycss2 nodes parsed from `text`
+        text: The source the nodes were parsed from
+        base: Offset of `text` in a larger source, added to every result
+
+    Returns:
+        List of character offsets, one per node
+    """
+    starts = line_starts(text)
+    offsets = []
+    for node in nodes:
+        if node.type == "error":
+            # A rule cut off by the end of the input is reported at its last
+            # token; it really starts where the previous node ends
+            offsets.append(_error_start(offsets, nodes, text, base))
+        else:
+            offsets.append(base + starts[node.source_line - 1] + node.source_column - 1)
+    return offsets
+
+
+def _error_start(offsets: List[int], nodes: List[Any], text: str, base: int) -> int:
+    index = len(offsets)
+    if index == 0:
+        return base
+    previous = nodes[index - 1]
+    if previous.type == "whitespace":
+        return offsets[-1] + len(previous.value)
+    if previous.type == "comment":
+        return offsets[-1] + len(previous.value) + 4
+    # Directly after a rule, whose end is not recorded: the rule ends with
+    # its block or semicolon, and the next component value starts the error
+    start = offsets[-1] - base
+    rest = text[start:]
+    tokens = tinycss2.parse_component_value_list(rest)
+    for token, following in zip(tokens, tokens[1:]):
+        if token.type == "{} block" or (previous.type == "at-rule" and token == ";"):
+            return offsets[-1] + line_starts(rest)[following.source_line - 1] + following.source_column - 1
+    return offsets[-1]
+
+
+class SpanIndex:
+    """
+    Start and end offsets of every top-level node of a document.
+
+    Every node, including whitespace and comments, owns the text from its
+    start up to the start of the next node, so the spans tile the source
+    without gaps. Offsets are character positions in `CssDocument.text`.
+
+    Args:
+        starts: Start offset of each top-level node, in document order
+        length: Length of the source text
+    """
+
+    def __init__(self, starts: List[int], length: int):
+        self.starts = starts
+        self.length = length
+
+    @classmethod
+    def build(cls, doc: Any) -> "SpanIndex":
+        """Compute the spans of a document parsed from its whole text."""
+        return cls(node_offsets(doc.rules, doc.text), len(doc.text))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def span(self, index: int) -> Tuple[int, int]:
+        """Return the (start, end) offsets of the node at `index`."""
+        end = self.starts[index + 1] if index + 1 < len(self.starts) else self.length
+        return self.starts[index], end
+
+    def node_at(self, offset: int) -> int:
+        """Return the index of the node whose span contains `offset`."""
+        return max(0, bisect.bisect_right(self.starts, offset) - 1)
+
+    def rule_spans(self, doc: Any) -> Iterator[Tuple[Any, int, int]]:
+        """Yield (rule, start, end) for every top-level rule and at-rule."""
+        for index, node in enumerate(doc.rules):
+            if node.type in ("qualified-rule", "at-rule"):
+                yield (node,) + self.span(index)
@@ -0,0 +1,101 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Shared traversal of nested CSS rule trees using tinycss2."""
+
+import tinycss2
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+from . import instrumentation
+
+# At-rules whose block holds rules rather than declarations
+NESTING_AT_RULES = {
+    "media", "supports", "container", "layer", "document", "-moz-document", "scope", "starting-style"
+}
+
+
+def child_rules(rule: Any) -> List[Any]:
+    """
+    Parse the block of a rule or at-rule into a list of nested rules.
+
+    The content tokens are handed to tinycss2 as they are, so nesting never
+    costs a serialize and retokenize of the block.
+
+    Args:
+        rule: A tinycss2 node, usually an at-rule such as @media
+
+    Returns:
+        List of tinycss2 nodes nested in the block, or an empty list
+    """
+    content = getattr(rule, 'content', None)
+    if not content:
+        return []
+    instrumentation.count("nested_reparses")
+    with instrumentation.phase("reparse"):
+        return tinycss2.parse_stylesheet(content, skip_whitespace=False, skip_comments=False)
+
+
+def rule_declarations(rule: Any) -> List[Any]:
+    """
+    Parse the block of a rule into its declaration list.
+
+    Args:
+        rule: A tinycss2.ast.QualifiedRule or at-rule with a block
+
+    Returns:
+        List of declarations, comments and whitespace tokens
+    """
+    content = getattr(rule, 'content', None)
+    if content is None:
+        return []
+    instrumentation.count("nested_reparses")
+    with instrumentation.phase("reparse"):
+        return tinycss2.parse_declaration_list(content, skip_whitespace=False, skip_comments=False)
+
+
+def has_block(rule: Any) -> bool:
+    """Whether a node is an at-rule followed by a {} block."""
+    return rule.type == "at-rule" and rule.content is not None
+
+
+def has_nested_rules(rule: Any) -> bool:
+    """Whether a node is a grouping at-rule, such as @media, whose block holds rules."""
+    return has_block(rule) and rule.lower_at_keyword in NESTING_AT_RULES
+
+
+def walk(
+    rules: List[Any],
+    children: Callable[[Any], List[Any]] = child_rules,
+    descend: Optional[Callable[[Any], bool]] = None
+) -> Iterator[Tuple[Any, Tuple[Any, ...]]]:
+    """
+    Walk a rule tree depth first, in source order.
+
+    The walk is iterative, so deeply nested stylesheets cannot hit the
+    interpreter's recursion limit.
+
+    Args:
+        rules: Top-level list of tinycss2 nodes
+        children: Function returning the nested rules of a node
+        descend: Predicate selecting the nodes whose block is entered
+                 (default: at-rules with a block)
+
+    Yields:
+        (node, ancestors) pairs, where ancestors runs from the outermost
+        enclosing rule to the direct parent
+    """
+    if descend is None:
+        descend = has_block
+
+    stack = [(iter(rules), ())]
+    while stack:
+        iterator, ancestors = stack[-1]
+        node = next(iterator, None)
+        if node is None:
+            stack.pop()
+            continue
+
+        yield node, ancestors
+
+        if descend(node):
+            stack.append((iter(children(node)), ancestors + (node,)))
@@ -0,0 +1,216 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Index of the class and id names used by templates and Elixir sources."""
+
+import json
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# File extensions scanned by default
+TEMPLATE_EXTENSIONS = (".html", ".heex", ".ex", ".eex")
+
+# Directories never scanned: build output, dependencies and VCS metadata
+SKIPPED_DIRECTORIES = frozenset({"_build", "deps", "node_modules", ".git", ".elixir_ls"})
+
+# Version of the on-disk cache format
+CACHE_VERSION = 1
+
+# class="..." / id='...' attributes, or the start of a HEEx {...} expression
+_ATTRIBUTE = re.compile(r'''(?<![\w-])(class|id)\s*=\s*(?:"([^"]*)"|'([^']*)'|(\{))''')
+# Elixir keyword arguments: class: "..." or class: [...]
+_KEYWORD = re.compile(r'''(?<![\w-])(class|id):\s*(?:"((?:[^"\\]|\\.)*)"|(\[))''')
+# String literals and ~w sigils inside an Elixir expression
+_LITERAL = re.compile(r'''"((?:[^"\\]|\\.)*)"|'((?:[^'\\]|\\.)*)'|~w[(\[{"]([^)\]}"]*)[)\]}"]''')
+# EEx tags and Elixir interpolations, whose value is only known at runtime
+_DYNAMIC = re.compile(r'<%.*?%>|#\{[^}]*\}', re.S)
+
+_CLOSING = {"{": "}", "[": "]"}
+
+# (classes, ids, class prefixes) found in one file
+Usage = Tuple[Set[str], Set[str], Set[str]]
+
+
+def _balanced(text: str, start: int) -> str:
+    """Return the text between the bracket at `start` and its closing bracket."""
+    opening = text[start]
+    closing = _CLOSING[opening]
+    depth = 0
+    for position in range(start, len(text)):
+        char = text[position]
+        if char == opening:
+            depth += 1
+        elif char == closing:
+            depth -= 1
+            if depth == 0:
+                return text[start + 1:position]
+    return text[start + 1:]
+
+
+def _add_names(value: str, names: Set[str], prefixes: Set[str]) -> None:
+    """Split an attribute value into names; dynamic names only give a prefix."""
+    for name in _DYNAMIC.sub("\0", value).split():
+        if "\0" in name:
+            prefix = name.split("\0", 1)[0]
+            if prefix:
+                prefixes.add(prefix)
+        else:
+            names.add(name)
+
+
+def _add_expression(expression: str, names: Set[str], prefixes: Set[str]) -> None:
+    """Collect the names of every string literal in an Elixir expression."""
+    for match in _LITERAL.finditer(expression):
+        _add_names(next(group for group in match.groups() if group is not None), names, prefixes)
+
+
+def scan_text(text: str) -> Usage:
+    """
+    Find the class and id names used in a template or Elixir source.
+
+    Recognizes HTML and EEx attributes (`class="a b"`), HEEx expressions
+    (`class={["a", @on && "b"]}`) and keyword arguments (`class: "a"`).
+    Names built at runtime, such as `btn-#{@size}`, are recorded as class
+    prefixes instead.
+
+    Args:
+        text: Contents of one file
+
+    Returns:
+        Tuple of (classes, ids, class prefixes)
+    """
+    classes: Set[str] = set()
+    ids: Set[str] = set()
+    prefixes: Set[str] = set()
+
+    for pattern in (_ATTRIBUTE, _KEYWORD):
+        for match in pattern.finditer(text):
+            names = classes if match.group(1) == "class" else ids
+            literal = next((group for group in match.groups()[1:-1] if group is not None), None)
+            if literal is not None:
+                _add_names(literal, names, prefixes)
+            else:
+                _add_expression(_balanced(text, match.start(match.lastindex)), names, prefixes)
+    return classes, ids, prefixes
+
+
+def scan_file(path: str) -> Usage:
+    """Scan one file, see scan_text."""
+    with open(path, 'rb') as file:
+        return scan_text(file.read().decode('utf-8', 'replace'))
+
+
+def find_templates(root: str, extensions: Iterable[str] = TEMPLATE_EXTENSIONS) -> List[str]:
+    """Return the paths of all files under `root` with one of the extensions, sorted."""
+    extensions = tuple(extensions)
+    paths = []
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories[:] = [name for name in subdirectories if name not in SKIPPED_DIRECTORIES]
+        paths.extend(os.path.join(directory, name) for name in files if name.endswith(extensions))
+    paths.sort()
+    return paths
+
+
+class UsageIndex:
+    """
+    The class and id names used anywhere in a set of templates.
+
+    Checking a selector is a few set lookups, whatever the size of the
+    templates. Class prefixes come from names built at runtime: a class
+    starting with one of them is considered used.
+
+    Args:
+        classes: Class names
+        ids: Id names
+        class_prefixes: Static prefixes of dynamic class names
+    """
+
+    def __init__(
+        self,
+        classes: Optional[Set[str]] = None,
+        ids: Optional[Set[str]] = None,
+        class_prefixes: Optional[Set[str]] = None
+    ):
+        self.classes = classes if classes is not None else set()
+        self.ids = ids if ids is not None else set()
+        self.class_prefixes = class_prefixes if class_prefixes is not None else set()
+
+    @classmethod
+    def from_text(cls, text: str) -> "UsageIndex":
+        """Index the names used in one template or HTML string."""
+        return cls(*scan_text(text))
+
+    def add(self, usage: Usage) -> None:
+        """Add the names found in one file."""
+        classes, ids, prefixes = usage
+        self.classes.update(classes)
+        self.ids.update(ids)
+        self.class_prefixes.update(prefixes)
+
+    def uses_class(self, name: str) -> bool:
+        """Whether a class name is used, directly or through a dynamic prefix."""
+        if name in self.classes:
+            return True
+        return any(name.startswith(prefix) for prefix in self.class_prefixes)
+
+    def uses_id(self, name: str) -> bool:
+        """Whether an id is used."""
+        return name in self.ids
+
+
+class UsageCache:
+    """
+    On-disk cache of per-file scan results, keyed by path, mtime and size.
+
+    Args:
+        path: JSON file holding the cache; created on save()
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(path, encoding='utf-8') as file:
+                data = json.load(file)
+            if data.get("version") == CACHE_VERSION:
+                self.entries = data.get("files", {})
+        except (OSError, ValueError):
+            self.entries = {}
+
+    @staticmethod
+    def stamp(path: str) -> Tuple[int, int]:
+        """Return the (mtime_ns, size) that a cached entry must match."""
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, path: str, stamp: Tuple[int, int]) -> Optional[Usage]:
+        """Return the cached usage of a file, if it has not changed since."""
+        entry = self.entries.get(path)
+        if entry is None or (entry["mtime_ns"], entry["size"]) != stamp:
+            return None
+        return set(entry["classes"]), set(entry["ids"]), set(entry["prefixes"])
+
+    def put(self, path: str, stamp: Tuple[int, int], usage: Usage) -> None:
+        """Store the usage of a file."""
+        classes, ids, prefixes = usage
+        self.entries[path] = {
+            "mtime_ns": stamp[0],
+            "size": stamp[1],
+            "classes": sorted(classes),
+            "ids": sorted(ids),
+            "prefixes": sorted(prefixes),
+        }
+
+    def prune(self, paths: Iterable[str]) -> None:
+        """Drop the entries of files that are not in `paths` anymore."""
+        keep = set(paths)
+        self.entries = {path: entry for path, entry in self.entries.items() if path in keep}
+
+    def save(self) -> None:
+        """Write the cache atomically."""
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump({"version": CACHE_VERSION, "files": self.entries}, file)
+        os.replace(temporary, self.path)
@@ -0,0 +1,229 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Find every syntax problem of a stylesheet, with its position.
+
+find_css_errors() reports all problems at once, each as a dict:
+
+    {"kind": "unbalanced-braces", "severity": "error",
+     "message": "CSS syntax error: Unexpected '}'",
+     "line": 3, "column": 1, "offset": 27, "byte_offset": 27}
+
+Lines and columns start at 1 and count newlines like the CSS tokenizer
+does. `offset` is a character offset into the text and `byte_offset` the
+same position in its UTF-8 encoding, as Elixir binaries count it.
+
+Errors of severity "error" are the problems validate_css rejects a
+stylesheet for; "warning"s, such as a declaration that does not parse or
+an unclosed comment, are reported but browsers recover from them.
+
+Every check is linear in the size of the stylesheet: braces are matched
+in one scan of the text, and the other checks read the parsed document
+once, so very long values or many errors cannot make validation slow.
+"""
+
+import bisect
+import re
+from typing import Any, Dict, List, Optional, Union
+from .parser import CssDocument, as_document
+from .spans import line_starts
+from .traversal import has_nested_rules
+
+# Functions whose arguments may contain colons
+_COLON_FUNCTIONS = ('calc(', 'url(', 'var(', 'rgb(', 'rgba(', 'hsl(', 'hsla(')
+
+# Text that may hold braces without opening or closing a block: comments
+# (unclosed ones run to the end), strings (a newline ends a bad string),
+# unquoted url() arguments and escapes. Every alternative is unambiguous,
+# so matching is linear even on adversarial input.
+_BRACE_SCAN = re.compile(r"""
+    (?P<comment>/\*[^*]*\*+(?:[^/*][^*]*\*+)*/)
+  | (?P<open_comment>/\*[\s\S]*)
+  | "[^"\\\r\n\f]*(?:\\[\s\S][^"\\\r\n\f]*)*"?
+  | '[^'\\\r\n\f]*(?:\\[\s\S][^'\\\r\n\f]*)*'?
+  | (?<![\w-])[uU][rR][lL]\([ \t\r\n\f]*(?=[^"' \t\r\n\f])[^)\\]*(?:\\[\s\S][^)\\]*)*\)?
+  | \\[\s\S]
+  | (?P<brace>[{}])
+""", re.VERBOSE)
+
+_SEVERITY_ORDER = {"error": 0, "warning": 1}
+
+
+class _Positions:
+    """Turn character offsets into line, column and byte offset."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.starts = line_starts(text)
+        self.ascii = text.isascii()
+
+    def offset(self, line: int, column: int) -> int:
+        return self.starts[line - 1] + column - 1
+
+    def error(self, offset: int, kind: str, message: str, severity: str = "error") -> Dict[str, Any]:
+        line = bisect.bisect_right(self.starts, offset)
+        return {
+            "kind": kind,
+            "severity": severity,
+            "message": message,
+            "line": line,
+            "column": offset - self.starts[line - 1] + 1,
+            "offset": offset,
+            "byte_offset": offset,
+        }
+
+    def add_byte_offsets(self, errors: List[Dict[str, Any]]) -> None:
+        # Errors are sorted by offset, so each stretch of text is encoded once
+        if self.ascii:
+            return
+        position = byte_offset = 0
+        for error in errors:
+            byte_offset += len(self.text[position:error["offset"]].encode('utf-8', 'surrogatepass'))
+            position = error["offset"]
+            error["byte_offset"] = byte_offset
+
+
+def _brace_errors(positions: _Positions) -> List[Dict[str, Any]]:
+    errors = []
+    open_braces = []
+    for match in _BRACE_SCAN.finditer(positions.text):
+        if match.lastgroup == "brace":
+            if match.group() == "{":
+                open_braces.append(match.start())
+            elif open_braces:
+                open_braces.pop()
+            else:
+                errors.append(positions.error(match.start(), "unbalanced-braces", "CSS syntax error: Unexpected '}'"))
+        elif match.lastgroup == "open_comment":
+            errors.append(positions.error(match.start(), "unclosed-comment", "Unclosed comment", "warning"))
+    for offset in open_braces:
+        errors.append(positions.error(offset, "unbalanced-braces", "CSS syntax error: Unclosed '{'"))
+    return errors
+
+
+def braces_balanced(text: str) -> bool:
+    """
+    Whether every brace of a stylesheet opens or closes a block in order.
+
+    Braces in comments, strings, url() arguments and escapes are ignored,
+    so `content: "{"` is balanced.
+
+    Args:
+        text: The CSS code
+
+    Returns:
+        True if no '}' comes before its '{' and every '{' is closed
+    """
+    depth = 0
+    for match in _BRACE_SCAN.finditer(text):
+        if match.lastgroup == "brace":
+            if match.group() == "{":
+                depth += 1
+            elif depth:
+                depth -= 1
+            else:
+                return False
+    return depth == 0
+
+
+def missing_semicolon(name: str, value: str) -> Optional[str]:
+    """
+    Return an error message if a declaration value looks like two declarations.
+
+    A value such as "red font-size: 16px" is what a missing semicolon
+    leaves behind. Values using functions that may contain colons, such as
+    url() or var(), are never reported.
+
+    Args:
+        name: The property name
+        value: The stripped value text
+
+    Returns:
+        The error message, or None
+    """
+    if not value or ':' not in value:
+        return None
+    lowered = value.lower()
+    if any(function in lowered for function in _COLON_FUNCTIONS):
+        return None
+    parts = value.split()
+    # Position of the first occurrence of each part, looked up instead of
+    # searching the list again for every part
+    first = {}
+    for index, part in enumerate(parts):
+        first.setdefault(part, index)
+    for part in parts[1:]:
+        following = first[part] + 1
+        if part.endswith(':') or (following < len(parts) and parts[following].startswith(':')):
+            return f"CSS syntax error: Missing semicolon after '{name}: {parts[0]}'"
+    return None
+
+
+def _value_errors(tokens: List[Any]) -> List[Any]:
+    """Bad string and bad url tokens anywhere in a list of component values."""
+    found = []
+    stack = [iter(tokens)]
+    while stack:
+        token = next(stack[-1], None)
+        if token is None:
+            stack.pop()
+        elif token.type == "error":
+            found.append(token)
+        elif token.type == "function":
+            stack.append(iter(token.arguments))
+        elif token.type in ("() block", "[] block", "{} block"):
+            stack.append(iter(token.content))
+    return found
+
+
+def find_css_errors(css: Union[str, bytes, CssDocument]) -> List[Dict[str, Any]]:
+    """
+    Find all syntax errors and warnings of a stylesheet.
+
+    Args:
+        css: The CSS code as string or bytes, or a CssDocument
+
+    Returns:
+        List of error dicts (kind, severity, message, line, column, offset,
+        byte_offset), ordered by position
+    """
+    doc = as_document(css)
+    positions = _Positions(doc.text)
+    errors = _brace_errors(positions)
+
+    # Rules that do not parse, from the start of the rule
+    starts = doc.spans.starts
+    for index, rule in enumerate(doc.rules):
+        if rule.type == "error":
+            errors.append(positions.error(starts[index], "parse-error", f"CSS parse error: {rule.message}"))
+
+    for node, ancestors in doc.walk(has_nested_rules):
+        severity = "error" if not ancestors else "warning"
+        if node.type == "error" and ancestors:
+            offset = positions.offset(node.source_line, node.source_column)
+            errors.append(positions.error(offset, "parse-error", f"CSS parse error: {node.message}", "warning"))
+        if node.type != "qualified-rule":
+            continue
+        for decl in doc.declarations(node):
+            if decl.type == "error":
+                offset = positions.offset(decl.source_line, decl.source_column)
+                errors.append(positions.error(offset, "invalid-declaration", f"CSS parse error: {decl.message}", "warning"))
+                continue
+            if decl.type != "declaration":
+                continue
+            offset = positions.offset(decl.source_line, decl.source_column)
+            message = missing_semicolon(decl.name, doc.value(decl))
+            if message is not None:
+                # Only top-level rules are rejected for it, as validate_css always did
+                errors.append(positions.error(offset, "missing-semicolon", message, severity))
+            for token in _value_errors(decl.value):
+                errors.append(positions.error(
+                    positions.offset(token.source_line, token.source_column),
+                    "invalid-value", f"CSS parse error: {token.message}", "warning"
+                ))
+
+    errors.sort(key=lambda error: (error["offset"], _SEVERITY_ORDER[error["severity"]]))
+    positions.add_byte_offsets(errors)
+    return errors
@@ -0,0 +1,144 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Visitor registry for running several extractors in a single traversal."""
+
+from typing import Any, Callable, Dict, List, Tuple
+from . import instrumentation
+
+# Maps extractor names to the factories building their visitors
+VISITORS: Dict[str, Callable[..., "Visitor"]] = {}
+
+HOOKS = ("visit_rule", "visit_declaration", "visit_at_rule", "visit_comment")
+
+
+class Visitor:
+    """
+    Base class for extractors that run inside a shared traversal.
+
+    Subclasses override the hooks they need; hooks that are not overridden
+    are never called. `ancestors` always runs from the outermost enclosing
+    rule to the direct parent, so an empty tuple means top level.
+
+    Args:
+        doc: The CssDocument being traversed
+    """
+
+    def __init__(self, doc: Any):
+        self.doc = doc
+
+    def descend(self, node: Any) -> bool:
+        """Whether this visitor wants to see the rules nested in `node`."""
+        return False
+
+    def visit_rule(self, rule: Any, ancestors: Tuple[Any, ...]) -> None:
+        """Called for every qualified rule, before its declarations."""
+
+    def visit_declaration(self, declaration: Any, rule: Any, ancestors: Tuple[Any, ...]) -> None:
+        """Called for every declaration of a qualified rule."""
+
+    def visit_at_rule(self, rule: Any, ancestors: Tuple[Any, ...]) -> None:
+        """Called for every at-rule, before its nested rules."""
+
+    def visit_comment(self, comment: Any, ancestors: Tuple[Any, ...]) -> None:
+        """Called for every comment found between rules."""
+
+    def result(self) -> Any:
+        """Return the extracted data once the traversal is done."""
+        raise NotImplementedError
+
+
+def register_visitor(name: str) -> Callable[[Callable[..., Visitor]], Callable[..., Visitor]]:
+    """
+    Register a visitor factory under an extractor name.
+
+    The factory is called as `factory(doc, **options)` and must return a
+    Visitor. Registering a name again replaces the previous factory.
+
+    Args:
+        name: The extractor name used by extract_all and run_visitors callers
+
+    Returns:
+        Decorator registering the factory and returning it unchanged
+    """
+    def decorator(factory: Callable[..., Visitor]) -> Callable[..., Visitor]:
+        VISITORS[name] = factory
+        return factory
+
+    return decorator
+
+
+def create_visitor(name: str, doc: Any, **options: Any) -> Visitor:
+    """
+    Build the registered visitor for an extractor name.
+
+    Raises:
+        Exception: If no visitor is registered under the name
+    """
+    if name not in VISITORS:
+        raise Exception(f"Unknown extractor: {name}")
+    return VISITORS[name](doc, **options)
+
+
+def _overrides(visitor: Visitor, hook: str) -> bool:
+    return getattr(type(visitor), hook) is not getattr(Visitor, hook)
+
+
+def run_visitors(doc: Any, visitors: Dict[str, Visitor]) -> Dict[str, Any]:
+    """
+    Feed all visitors from one depth-first traversal of a document.
+
+    A node's block is entered only for the visitors whose `descend` accepts
+    it, so each visitor sees exactly the part of the tree it asked for while
+    the document is walked once.
+
+    Args:
+        doc: The CssDocument to traverse
+        visitors: Mapping of result names to visitors
+
+    Returns:
+        Dictionary mapping the same names to each visitor's result
+    """
+    hooks = {hook: [v for v in visitors.values() if _overrides(v, hook)] for hook in HOOKS}
+
+    def active(hook: str, scope: List[Visitor]) -> List[Visitor]:
+        return [v for v in hooks[hook] if v in scope]
+
+    top_level = list(visitors.values())
+    stack = [(iter(doc.rules), (), top_level, {hook: active(hook, top_level) for hook in HOOKS})]
+
+    instrumentation.count("traversals")
+    with instrumentation.phase("traverse"):
+        while stack:
+            iterator, ancestors, scope, scoped_hooks = stack[-1]
+            node = next(iterator, None)
+            if node is None:
+                stack.pop()
+                continue
+
+            if node.type == "qualified-rule":
+                for visitor in scoped_hooks["visit_rule"]:
+                    visitor.visit_rule(node, ancestors)
+                if scoped_hooks["visit_declaration"]:
+                    for declaration in doc.declarations(node):
+                        if declaration.type == "declaration":
+                            for visitor in scoped_hooks["visit_declaration"]:
+                                visitor.visit_declaration(declaration, node, ancestors)
+            elif node.type == "at-rule":
+                for visitor in scoped_hooks["visit_at_rule"]:
+                    visitor.visit_at_rule(node, ancestors)
+            elif node.type == "comment":
+                for visitor in scoped_hooks["visit_comment"]:
+                    visitor.visit_comment(node, ancestors)
+
+            entering = [v for v in scope if v.descend(node)]
+            if entering:
+                stack.append((
+                    iter(doc.children(node)),
+                    ancestors + (node,),
+                    entering,
+                    {hook: active(hook, entering) for hook in HOOKS}
+                ))
+
+    return {name: visitor.result() for name, visitor in visitors.items()}
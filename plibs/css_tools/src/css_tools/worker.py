@@ -0,0 +1,168 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Serve css_tools operations to another process over stdin and stdout.
+
+An embedded interpreter has one GIL, so concurrent callers wait for each
+other. Started as its own process,
+
+    python -m css_tools.worker [--framing lines|length] [--no-warmup]
+
+a worker reads requests on stdin and writes one response per request on
+stdout, and a pool of such processes (e.g. Elixir Ports) runs CSS work on
+every core.
+
+Each request is a JSON object:
+
+    {"id": 1,
+     "documents": {"app": ".a { color: red; }"},
+     "ops": [["remove_selector", {"doc": "app", "selector": ".a"}],
+             ["analyze_stylesheet", {"doc": "app"}]],
+     "drop": ["old"],
+     "stop_on_error": false}
+
+All keys are optional. `documents` adds or replaces documents, `drop`
+forgets them, and `ops` are run like css_tools.dispatch.run runs them, with
+the same operation names. Documents stay parsed between requests, so a
+caller sends a stylesheet once and runs any number of requests on it. The
+response echoes the id:
+
+    {"id": 1, "status": "ok", "results": [...], "documents": {"app": "..."}}
+
+or, for a request that cannot be read, {"id": ..., "status": "error",
+"message": "..."}; such a request changes no document.
+
+Framing "lines" (the default) puts one JSON document per line. Framing
+"length" prefixes each message with its size as a 4-byte big-endian
+integer, which is what an Erlang Port opened with `{:packet, 4}` sends
+and expects. The worker exits when stdin is closed.
+"""
+
+import argparse
+import contextlib
+import json
+import struct
+import sys
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+from .dispatch import Dispatcher
+
+FRAMINGS = ("lines", "length")
+
+_LENGTH = struct.Struct(">I")
+
+
+def _read_lines(stream: BinaryIO) -> Iterator[bytes]:
+    for line in stream:
+        if line.strip():
+            yield line
+
+
+def _read_length_prefixed(stream: BinaryIO) -> Iterator[bytes]:
+    while True:
+        header = stream.read(_LENGTH.size)
+        if len(header) < _LENGTH.size:
+            return
+        (size,) = _LENGTH.unpack(header)
+        message = stream.read(size)
+        if len(message) < size:
+            return
+        yield message
+
+
+def _encode(response: Dict[str, Any], framing: str) -> bytes:
+    data = json.dumps(response, ensure_ascii=False, separators=(",", ":")).encode("utf-8", "surrogatepass")
+    if framing == "length":
+        return _LENGTH.pack(len(data)) + data
+    # JSON escapes newlines inside strings, so a response is a single line
+    return data + b"\n"
+
+
+def handle(dispatcher: Dispatcher, message: bytes) -> Dict[str, Any]:
+    """
+    Answer one request.
+
+    Args:
+        dispatcher: Holds the documents kept between requests
+        message: The JSON request
+
+    Returns:
+        The response, ready to be encoded as JSON
+    """
+    request_id = None
+    try:
+        request = json.loads(message)
+        if not isinstance(request, dict):
+            raise Exception("a request must be a JSON object")
+        request_id = request.get("id")
+        # The whole request is checked before any document changes, so an
+        # invalid request leaves the documents as they were
+        drop = request.get("drop") or []
+        if not isinstance(drop, list) or not all(isinstance(name, str) for name in drop):
+            raise Exception("drop must be a list of document names")
+        documents = request.get("documents") or {}
+        if not isinstance(documents, dict) or not all(isinstance(css, str) for css in documents.values()):
+            raise Exception("documents must be an object mapping names to CSS text")
+        ops = request.get("ops") or []
+        if not isinstance(ops, list):
+            raise Exception("ops must be a list")
+    except Exception as e:
+        return {"id": request_id, "status": "error", "message": f"Invalid request: {str(e)}"}
+
+    for name in drop:
+        dispatcher.remove_document(name)
+    for name, css in documents.items():
+        dispatcher.set_document(name, css)
+    batch = dispatcher.run(ops, bool(request.get("stop_on_error")))
+    return {"id": request_id, "status": "ok", **batch}
+
+
+def serve(input_stream: BinaryIO, output_stream: BinaryIO, framing: str = "lines") -> None:
+    """
+    Answer requests until the input is closed.
+
+    Args:
+        input_stream: Binary stream the requests are read from
+        output_stream: Binary stream the responses are written to
+        framing: "lines" or "length", see the module docstring
+
+    Raises:
+        Exception: If the framing is unknown
+    """
+    if framing not in FRAMINGS:
+        raise Exception(f"Unknown framing: {framing}")
+    messages = _read_length_prefixed(input_stream) if framing == "length" else _read_lines(input_stream)
+    dispatcher = Dispatcher()
+    for message in messages:
+        # Anything an operation prints would corrupt the protocol
+        with contextlib.redirect_stdout(sys.stderr):
+            response = handle(dispatcher, message)
+        try:
+            data = _encode(response, framing)
+        except (TypeError, ValueError) as e:
+            data = _encode({"id": response["id"], "status": "error", "message": f"Invalid response: {str(e)}"}, framing)
+        output_stream.write(data)
+        output_stream.flush()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run a worker on the standard streams."""
+    parser = argparse.ArgumentParser(prog="python -m css_tools.worker", description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--framing", choices=FRAMINGS, default="lines", help="message framing on stdin and stdout")
+    parser.add_argument("--no-warmup", action="store_true", help="skip importing and warming up css_tools at start")
+    args = parser.parse_args(argv)
+
+    if not args.no_warmup:
+        import css_tools
+        css_tools.warmup()
+
+    try:
+        serve(sys.stdin.buffer, sys.stdout.buffer, args.framing)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
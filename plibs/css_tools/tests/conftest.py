@@ -0,0 +1,59 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Shared fixtures of the css_tools tests."""
+
+import pytest
+from css_tools import parser
+
+# A stylesheet touching most of what css_tools reads: comments, imports,
+# selector lists, !important, colors, fonts, @media and @keyframes blocks
+SAMPLE_CSS = """/* Header styles */
+@import url("theme.css") screen;
+
+.header, .nav > a {
+  color: #336699;
+  background-color: rgba(0, 0, 0, 0.5);
+  font-family: "Helvetica Neue", sans-serif;
+}
+
+.button {
+  color: white;
+  margin: 0 auto !important;
+}
+
+@media (max-width: 768px) {
+  .header {
+    font-size: 14px;
+  }
+
+  .sidebar {
+    display: none;
+  }
+}
+
+@keyframes spin {
+  from { transform: rotate(0deg); }
+  to { transform: rotate(360deg); }
+}
+
+.spinner {
+  animation: spin 1s linear infinite;
+}
+"""
+
+
+@pytest.fixture
+def sample_css():
+    return SAMPLE_CSS
+
+
+@pytest.fixture(autouse=True)
+def fresh_parse_cache():
+    """Start every test with an empty parse cache at its default budget."""
+    budget = parser.parse_cache_stats()["max_bytes"]
+    parser.clear_parse_cache()
+    yield
+    parser.configure_parse_cache(budget)
+    parser.clear_parse_cache()
@@ -0,0 +1,109 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Tests of analyze_stylesheet(fields=...) against the full analysis."""
+
+import io
+import pytest
+from css_tools.compact import CompactDocument
+from css_tools.incremental import update
+from css_tools.parser import (
+    ANALYSIS_FIELDS, SUMMARY_FIELDS, CssDocument, analyze_stylesheet, analyze_stylesheet_stream,
+)
+
+EXTRA_CSS = """@import url("print.css") print;
+@import "base.css";
+/* brand */
+.a, .b:hover { color: #FFF; font: 12px/1.5 "Open Sans", serif; border: 1px solid red; }
+@media (min-width: 600px) and (max-width: 900px) {
+  .a { color: rgb(0, 0, 0); }
+  @supports (display: grid) { .grid { display: grid; } }
+}
+@media print { .a { font-family: Georgia; } }
+.c { background: hsl(120, 50%, 50%); color: currentColor; }
+"""
+
+PROJECTIONS = [
+    *([field] for field in ANALYSIS_FIELDS),
+    ["selectors", "colors", "imports_count"],
+    ["media_query_details", "selector_properties", "normalized_colors"],
+    list(ANALYSIS_FIELDS),
+]
+
+
+def _projection(full, fields):
+    return {field: full[field] for field in ANALYSIS_FIELDS if field in fields}
+
+
+@pytest.fixture(params=["sample", "extra"])
+def css(request, sample_css):
+    return sample_css if request.param == "sample" else EXTRA_CSS
+
+
+def test_fields_cover_the_whole_result(css):
+    assert list(analyze_stylesheet(css)) == list(ANALYSIS_FIELDS)
+
+
+@pytest.mark.parametrize("fields", PROJECTIONS)
+def test_projection_matches_the_full_result(css, fields):
+    full = analyze_stylesheet(css)
+
+    # A fresh document runs only the visitors of the fields
+    assert analyze_stylesheet(CssDocument(css), fields=fields) == _projection(full, fields)
+    # A document with the full analysis cached projects it
+    doc = CssDocument(css)
+    analyze_stylesheet(doc)
+    assert analyze_stylesheet(doc, fields=fields) == _projection(full, fields)
+
+
+@pytest.mark.parametrize("fields", PROJECTIONS[::4])
+def test_streamed_and_compact_projections(css, fields):
+    expected = _projection(analyze_stylesheet(css), fields)
+
+    assert analyze_stylesheet_stream(io.BytesIO(css.encode("utf-8")), chunk_size=64, fields=fields) == expected
+    assert analyze_stylesheet(CompactDocument(css), fields=fields) == expected
+
+
+def test_projection_after_an_incremental_update():
+    doc = CssDocument(EXTRA_CSS)
+    analyze_stylesheet(doc)
+    start = EXTRA_CSS.index("#FFF")
+    updated = update(doc, [(start, start + 4, "blue")])
+    edited = EXTRA_CSS[:start] + "blue" + EXTRA_CSS[start + 4:]
+
+    fields = ["colors", "colors_used", "selector_properties"]
+    assert analyze_stylesheet(updated, fields=fields) == _projection(analyze_stylesheet(edited), fields)
+
+
+def test_summary(css):
+    summary = analyze_stylesheet(css, fields="summary")
+
+    assert list(summary) == list(SUMMARY_FIELDS)
+    assert summary == _projection(analyze_stylesheet(css), SUMMARY_FIELDS)
+    assert analyze_stylesheet(css, fields=b"summary") == summary
+
+
+def test_field_names_may_be_a_string_or_bytes(css):
+    full = analyze_stylesheet(css)
+
+    assert analyze_stylesheet(css, fields="imports") == {"imports": full["imports"]}
+    assert analyze_stylesheet(css, fields=[b"comments_count", "selectors"]) == _projection(
+        full, ["comments_count", "selectors"]
+    )
+
+
+def test_results_are_in_result_order_without_duplicates():
+    result = analyze_stylesheet(EXTRA_CSS, fields=["imports", "selectors", "imports"])
+
+    assert list(result) == ["selectors", "imports"]
+
+
+def test_unknown_fields():
+    with pytest.raises(Exception, match="Unknown analysis fields: nope, other"):
+        analyze_stylesheet(EXTRA_CSS, fields=["selectors", "other", "nope"])
+
+
+def test_errors_are_raised_whatever_the_fields():
+    with pytest.raises(Exception, match="Unbalanced braces"):
+        analyze_stylesheet(".a { color: red", fields=["file_size_bytes"])
@@ -0,0 +1,154 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Tests of apply_edits, the batched form of the modifier functions."""
+
+import pytest
+from css_tools import modifier
+from css_tools.modifier import apply_edits
+from css_tools.parser import CssDocument
+
+EDITS = [
+    {"op": "add_property_to_selector", "selector": ".header", "property_name": "padding", "property_value": "1px"},
+    {"op": "modify_property_value", "selector": ".button", "property_name": "color", "new_value": "black"},
+    {"op": "remove_property_from_selector", "selector": ".spinner", "property_name": "animation"},
+    {"op": "remove_selector", "selector": ".sidebar"},
+    {"op": "replace_selector_rule", "selector": ".nav", "new_declarations": "display: flex; gap: 2px"},
+    {"op": "add_property_to_selector", "selector": ".new", "property_name": "top", "property_value": "0",
+     "important": True},
+]
+
+
+def _chained(css, edits):
+    """Apply the edits one at a time with the single-edit functions."""
+    for edit in edits:
+        arguments = dict(edit)
+        css = getattr(modifier, arguments.pop("op"))(css, **arguments)
+    return css
+
+
+@pytest.mark.parametrize("count", range(1, len(EDITS) + 1))
+def test_matches_chained_single_edits(sample_css, count):
+    edits = EDITS[:count]
+
+    assert apply_edits(sample_css, edits) == _chained(sample_css, edits)
+
+
+@pytest.mark.parametrize("css, edits", [
+    # remove_selector rewrites nested blocks, while later property edits
+    # write them as they are
+    (
+        "/* c */ .a { color: red } @media print { .b { top: 0 } .c { top: 1px } } .d{margin:0}",
+        [{"op": "remove_selector", "selector": ".c"},
+         {"op": "add_property_to_selector", "selector": ".a", "property_name": "top", "property_value": "0"}],
+    ),
+    # An appended rule starts on a line of its own
+    (
+        '@import "x.css";',
+        [{"op": "add_property_to_selector", "selector": ".zz", "property_name": "border",
+          "property_value": "1px solid #000"}],
+    ),
+    # Empty rules are dropped by remove_property_from_selector, whichever their selector
+    (
+        ".e { } .a { color: red; top: 0 }",
+        [{"op": "remove_property_from_selector", "selector": ".a", "property_name": "color"}],
+    ),
+    # A rule appended with an at-rule selector is parsed back as an at-rule
+    (
+        ".a { color: red }",
+        [{"op": "replace_selector_rule", "selector": "@page", "new_declarations": "margin: 0"},
+         {"op": "add_property_to_selector", "selector": "@page", "property_name": "top", "property_value": "0"}],
+    ),
+    # Line breaks as written, nested blocks and comments in rule bodies
+    (
+        ".a{color:red;\r\n  top:0}\r\n@layer base { @media z { .a { q: r } } }\n.c { x: y; /* n\n m */ }",
+        [{"op": "remove_selector", "selector": ".b"},
+         {"op": "modify_property_value", "selector": ".a", "property_name": "top", "new_value": "1px"},
+         {"op": "replace_selector_rule", "selector": ".a", "new_declarations": "a: b; c: d"},
+         {"op": "add_property_to_selector", "selector": ".c", "property_name": "z", "property_value": "0"}],
+    ),
+])
+def test_output_is_exactly_that_of_the_chained_edits(css, edits):
+    assert apply_edits(css, edits) == _chained(css, edits)
+
+
+def test_appended_rule_starts_on_a_new_line():
+    result = apply_edits('@import "x.css";', [
+        {"op": "add_property_to_selector", "selector": ".zz", "property_name": "top", "property_value": "0"},
+    ])
+
+    assert result == '@import "x.css";\n.zz {\n    top: 0;\n}'
+
+
+def test_keeps_other_at_rules_as_written(sample_css):
+    result = apply_edits(sample_css, EDITS[:1])
+
+    assert "@keyframes spin {\n  from { transform: rotate(0deg); }" in result
+    assert "@media (max-width: 768px) {\n  .header {\n    font-size: 14px;\n  }" in result
+    assert '@import url("theme.css") screen;' in result
+
+
+def test_no_edits_returns_the_css(sample_css):
+    assert apply_edits(sample_css, []) == sample_css
+
+
+def test_accepts_pairs_and_bytes(sample_css):
+    as_dicts = apply_edits(sample_css, EDITS[:2])
+    as_pairs = apply_edits(sample_css.encode('utf-8'), [
+        (edit["op"].encode(), {key.encode(): value for key, value in edit.items() if key != "op"})
+        for edit in EDITS[:2]
+    ])
+
+    assert as_pairs == as_dicts
+
+
+def test_later_edits_see_earlier_ones():
+    result = apply_edits(".a { color: red; }", [
+        {"op": "add_property_to_selector", "selector": ".b", "property_name": "top", "property_value": "0"},
+        {"op": "modify_property_value", "selector": ".b", "property_name": "top", "new_value": "1px"},
+        {"op": "remove_selector", "selector": ".a"},
+    ])
+
+    assert result == ".b {\n    top: 1px;\n}"
+
+
+def test_leaves_the_document_unchanged(sample_css):
+    doc = CssDocument(sample_css)
+
+    apply_edits(doc, EDITS)
+
+    assert apply_edits(doc, EDITS[:1]) == _chained(sample_css, EDITS[:1])
+
+
+def test_braces_in_strings():
+    result = apply_edits('.a::before { content: "{"; }', [
+        {"op": "add_property_to_selector", "selector": ".a::before", "property_name": "color", "property_value": "red"},
+    ])
+
+    assert result == '.a::before {\n    content: "{"; color: red;\n}'
+
+
+def test_unknown_operation():
+    with pytest.raises(Exception, match="Unknown edit operation: rename"):
+        apply_edits(".a { color: red }", [{"op": "rename", "selector": ".a"}])
+
+
+@pytest.mark.parametrize("op, arguments", [
+    ("remove_selector", {}),
+    ("replace_selector_rule", {"new_declarations": "top: 0"}),
+])
+def test_unbalanced_braces(op, arguments):
+    edits = [
+        {"op": op, "selector": ".a", **arguments},
+        {"op": "add_property_to_selector", "selector": ".a", "property_name": "top", "property_value": "0"},
+    ]
+
+    with pytest.raises(Exception, match="Unbalanced braces"):
+        apply_edits(".a { color: red", edits)
+
+
+def test_unbalanced_braces_are_kept_by_property_edits():
+    edits = [{"op": "add_property_to_selector", "selector": ".a", "property_name": "top", "property_value": "0"}]
+
+    assert apply_edits(".a { color: red", edits) == _chained(".a { color: red", edits)
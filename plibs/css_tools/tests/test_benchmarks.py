@@ -0,0 +1,64 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Smoke tests of the benchmark suite, so it keeps running against this tree."""
+
+import importlib
+import json
+import os
+import random
+import sys
+import pytest
+
+BENCHMARKS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks")
+sys.path.insert(0, BENCHMARKS)
+
+import cases  # noqa: E402
+import compare  # noqa: E402
+import corpora  # noqa: E402
+import run  # noqa: E402
+
+
+def _small_corpus(kind):
+    rng = random.Random(kind)
+    return corpora.TARGET_RULE + "".join(corpora.KINDS[kind](rng, index) + "\n" for index in range(8))
+
+
+def test_corpora_are_deterministic():
+    for kind in corpora.KINDS:
+        css = corpora.generate(kind, "small")
+
+        assert css == corpora.generate(kind, "small")
+        assert len(css) >= corpora.SIZES["small"]
+        assert corpora.TARGET_RULE in css
+    assert corpora.generate("tailwind", "small", seed=1) != corpora.generate("tailwind", "small")
+
+
+@pytest.mark.parametrize("case", cases.CASES, ids=cases.case_name)
+def test_every_case_runs(case):
+    modules = {name: importlib.import_module(f"css_tools.{name}") for name in run.MODULES}
+    function = cases.resolve(case, modules)
+
+    assert function is not None
+    for kind in ("nested_media", "tailwind"):
+        case.prepare(function, _small_corpus(kind))()
+
+
+def test_run_and_compare(tmp_path, capsys):
+    output = tmp_path / "results.json"
+    arguments = ["--sizes", "small", "--corpora", "comments", "--filter", "minify_css_stream", "--repeat", "1"]
+
+    assert run.main(arguments + ["--skip-memory", "--output", str(output)]) == 0
+    results = json.loads(output.read_text(encoding="utf-8"))
+    timing = results["cases"]["minifier.minify_css_stream"]["comments/small"]
+    assert timing["p50"] > 0 and timing["peak_bytes"] > 0
+
+    slower = json.loads(json.dumps(results))
+    slower["cases"]["minifier.minify_css_stream"]["comments/small"]["p50"] = timing["p50"] * 2
+    slower_path = tmp_path / "slower.json"
+    slower_path.write_text(json.dumps(slower), encoding="utf-8")
+
+    assert compare.main([str(output), str(output)]) == 0
+    assert compare.main([str(output), str(slower_path)]) == 1
+    assert "slower by more than 10%" in capsys.readouterr().out
@@ -0,0 +1,89 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Tests of recognizing colors from value tokens."""
+
+import pytest
+from css_tools.colors import parse_colors
+from css_tools.compact import CompactDocument
+from css_tools.extractor import extract_colors
+from css_tools.parser import CssDocument, analyze_stylesheet
+
+COLORS_CSS = """
+.a { color: #FFF; background: linear-gradient(RED, rgb(0,0,0)); }
+.b { border-color: currentColor; margin: 0; }
+.c { background-color: #abcdef; content: "#fff red"; }
+.d { font-family: Red Hat, serif; animation: tan 1s; }
+@media print { .e { outline: 1px solid HSL(120 , 50% , 50% / .5) } }
+"""
+
+
+@pytest.mark.parametrize("value, colors", [
+    ("#FFF", [("hex", "#ffffff")]),
+    ("#AbCd", [("hex", "#aabbccdd")]),
+    ("#12345678", [("hex", "#12345678")]),
+    ("#12345", []),
+    ("#ggg", []),
+    ("Red", [("named", "red")]),
+    ("currentColor", []),
+    ("RGB( 0 ,0, 0 )", [("function", "rgb(0, 0, 0)")]),
+    ("rgb(0 0 0 / 50%)", [("function", "rgb(0 0 0 / 50%)")]),
+    ("hsl(120DEG 50% 50%)", [("function", "hsl(120deg 50% 50%)")]),
+    ("1px solid #000 , 0 0 2px blue", [("hex", "#000000"), ("named", "blue")]),
+    ("linear-gradient(to right, red, rgba(0,0,0,.5))", [("named", "red"), ("function", "rgba(0, 0, 0, .5)")]),
+    ("var(--x, #fff)", [("hex", "#ffffff")]),
+    ('"#fff red"', []),
+    ("url(red.png)", []),
+])
+def test_parse_colors(value, colors):
+    assert [(color.kind, color.value) for color in parse_colors(value)] == colors
+
+
+def test_text_is_the_color_as_written():
+    assert [color.text for color in parse_colors("#FFF RGB( 0 ,0, 0 )")] == ["#FFF", "RGB( 0 ,0, 0 )"]
+
+
+def _colors_as_before(css):
+    """Analysis colors as they were computed from the value text alone."""
+    doc = CssDocument(css)
+    colors = []
+    for node, _ in doc.walk():
+        for declaration in doc.declarations(node) if node.type == "qualified-rule" else ():
+            if declaration.type != "declaration":
+                continue
+            value = doc.value(declaration)
+            if declaration.name in ["color", "background-color", "border-color"] or "#" in value:
+                colors.append(value)
+    return list(dict.fromkeys(colors))
+
+
+def test_analysis_keeps_colors_as_written(sample_css):
+    for css in (COLORS_CSS, sample_css):
+        assert analyze_stylesheet(css)["colors"] == _colors_as_before(css)
+
+
+def test_analysis_normalized_colors():
+    result = analyze_stylesheet(COLORS_CSS)
+
+    assert result["normalized_colors"] == [
+        "#ffffff", "red", "rgb(0, 0, 0)", "#abcdef", "hsl(120, 50%, 50% / .5)"
+    ]
+
+
+def test_extract_colors():
+    assert extract_colors(COLORS_CSS) == {
+        ".a": ["color: #FFF", "background: linear-gradient(RED, rgb(0,0,0))"],
+        ".b": ["border-color: currentColor"],
+        ".c": ["background-color: #abcdef"],
+        ".e": ["outline: 1px solid HSL(120 , 50% , 50% / .5)"],
+    }
+
+
+def test_font_and_animation_names_are_not_colors():
+    doc = CssDocument(COLORS_CSS)
+    rule = next(rule for rule in doc.rules if rule.type == "qualified-rule" and doc.selector(rule) == ".d")
+    declarations = [node for node in doc.declarations(rule) if node.type == "declaration"]
+
+    assert [doc.colors(declaration) for declaration in declarations] == [[], []]
+    assert extract_colors(CompactDocument(COLORS_CSS)) == extract_colors(COLORS_CSS)
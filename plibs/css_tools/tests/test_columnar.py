@@ -0,0 +1,114 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Tests of the columnar declaration table, with and without NumPy."""
+
+from collections import Counter
+import pytest
+from css_tools import columnar
+from css_tools.columnar import NO_MEDIA, DeclarationTable, declaration_table
+from css_tools.compact import CompactDocument
+from css_tools.parser import analyze_stylesheet
+
+ADMIN_CSS = """
+.a { color: red; margin: 0 !important; }
+.b { color: blue; }
+@media print { .a { color: black; } .c { display: none !important; } }
+@media (min-width: 1px) { .a { color: red; } }
+"""
+
+
+@pytest.fixture(params=["numpy", "counter"])
+def backend(request, monkeypatch):
+    """Run a test with NumPy, when it is installed, and with the Counter fallback."""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(columnar, "numpy", None)
+    return request.param
+
+
+def _rows(table):
+    return [
+        (table.files[file_id], table.properties[prop], table.media_conditions[media], table.values[value], important)
+        for file_id, prop, media, value, important in zip(
+            table.file_ids, table.property_ids, table.media_ids, table.value_ids, table.important
+        )
+    ]
+
+
+def test_statistics_match_row_by_row_counts(backend, sample_css):
+    table = declaration_table([sample_css, ADMIN_CSS], names=["app", "admin"])
+    rows = _rows(table)
+
+    assert table.property_counts() == dict(Counter(prop for _, prop, _, _, _ in rows))
+    assert table.value_counts() == dict(Counter(value for _, _, _, value, _ in rows))
+    assert table.value_counts("color") == dict(Counter(value for _, prop, _, value, _ in rows if prop == "color"))
+    assert table.value_counts("missing") == {}
+    assert table.important_counts() == dict(Counter(prop for _, prop, _, _, important in rows if important))
+    assert table.property_file_counts()["color"] == 2
+    assert table.property_file_counts()["animation"] == 1
+    assert table.file_property_counts()["admin"] == {"color": 4, "margin": 1, "display": 1}
+    assert table.media_property_counts() == {
+        "(max-width: 768px)": {"font-size": 1, "display": 1},
+        "print": {"color": 1, "display": 1},
+        "(min-width: 1px)": {"color": 1},
+    }
+
+
+@pytest.mark.parametrize("css", ["sample", ADMIN_CSS])
+def test_matches_analyze_stylesheet(backend, css, sample_css):
+    css = sample_css if css == "sample" else css
+    analysis = analyze_stylesheet(css)
+    table = declaration_table(css)
+
+    assert len(table) == analysis["properties_count"]
+    assert table.most_used_properties(analysis["unique_properties"]) == analysis["most_used_properties"]
+    assert table.media_property_counts() == {
+        media: details["properties"] for media, details in analysis["media_query_details"].items()
+    }
+
+
+def test_backends_agree(monkeypatch, sample_css):
+    pytest.importorskip("numpy")
+    statistics = ["property_counts", "value_counts", "media_property_counts", "file_property_counts",
+                  "property_file_counts", "important_counts"]
+    table = declaration_table([sample_css, ADMIN_CSS])
+    with_numpy = [getattr(table, name)() for name in statistics] + [table.to_dict()]
+
+    monkeypatch.setattr(columnar, "numpy", None)
+
+    assert [getattr(table, name)() for name in statistics] + [table.to_dict()] == with_numpy
+
+
+def test_rows_are_in_source_order():
+    table = declaration_table(ADMIN_CSS)
+
+    assert _rows(table)[:3] == [
+        ("0", "color", "", "red", False), ("0", "margin", "", "0", True), ("0", "color", "", "blue", False)
+    ]
+    assert table.media_ids[0] == NO_MEDIA
+
+
+def test_accepts_compact_documents(sample_css):
+    assert declaration_table(CompactDocument(sample_css)).to_dict() == declaration_table(sample_css).to_dict()
+
+
+def test_columns(backend):
+    table = declaration_table(ADMIN_CSS)
+
+    columns = table.columns()
+
+    assert set(columns) == set(columnar.ID_COLUMNS) | {"important"}
+    assert list(columns["important"]) == [0, 1, 0, 0, 1, 0]
+
+
+def test_duplicate_and_missing_names():
+    table = DeclarationTable()
+    table.add(".a { top: 0 }", "x")
+
+    with pytest.raises(Exception, match="Duplicate stylesheet name: x"):
+        table.add(".b { top: 0 }", "x")
+    with pytest.raises(Exception, match="Expected 2 stylesheet names, got 1"):
+        declaration_table([".a{}", ".b{}"], names=["a"])
@@ -0,0 +1,88 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Tests of CompactDocument against the full token document."""
+
+import pickle
+import pytest
+from css_tools import extractor, minifier, modifier, parser
+from css_tools.compact import CompactDocument
+from css_tools.parser import CssDocument, as_document
+
+COMPACT_CSS = [
+    ".a{font-size:1px;.b{font-family:x;}}@supports (x){.c{font:y}}",
+    "@media (a){@media (b){.x{color:red;font-size:2px}}.y{color:#abc}}.x{color:blue}",
+    "@keyframes spin{from{transform:rotate(0)}to{transform:rotate(1turn)}}.s{animation:spin 1s}",
+    "/* top */ .a /* in prelude */ { /* inner */ color: red } @import url('x.css') print; /* end */",
+    ".a,.b , .c{color:red}.b{margin:0}@media print{.a{color:blue}.d,.a{top:0}}",
+    ".h{color:red;color:blue !important;margin:1px 2px}.h{padding:0}",
+    ".a{color:red;;x}",
+    "@media x{ .a{color:red} foo }",
+    "@font-face{font-family:x} .a{b:c /* x */ d}",
+    "",
+]
+
+EXTRACTORS = ["analysis", "colors", "fonts", "animations", "media_queries", "comments", "selectors_by_property"]
+
+
+def _outcome(function, *arguments):
+    try:
+        return function(*arguments)
+    except Exception as e:
+        return f"raised: {e}"
+
+
+def _calls(doc):
+    return {
+        "analyze": _outcome(parser.analyze_stylesheet, doc),
+        "comments": _outcome(parser.extract_comments, doc),
+        "properties": _outcome(parser.get_selector_properties, doc, ".a"),
+        "colors": _outcome(extractor.extract_colors, doc),
+        "media_queries": _outcome(extractor.extract_media_queries, doc),
+        "animations": _outcome(extractor.extract_animations, doc),
+        "fonts": _outcome(extractor.extract_fonts, doc),
+        "by_property": _outcome(extractor.extract_selectors_by_property, doc, "color"),
+        "unused": _outcome(extractor.extract_unused_selectors, doc, '<div class="a">'),
+        "validate": _outcome(extractor.validate_css, doc),
+        "all": _outcome(extractor.extract_all, doc, EXTRACTORS, {"selectors_by_property": {"property_name": "color"}}),
+        "minify": _outcome(minifier.minify_css, doc),
+        "add": _outcome(modifier.add_property_to_selector, doc, ".a", "top", "0"),
+    }
+
+
+@pytest.mark.parametrize("css", COMPACT_CSS)
+def test_matches_the_token_document(css):
+    assert _calls(CompactDocument(css)) == _calls(CssDocument(css))
+
+
+def test_matches_the_token_document_on_the_sample(sample_css):
+    assert _calls(CompactDocument(sample_css)) == _calls(CssDocument(sample_css))
+    assert _calls(CompactDocument.from_document(CssDocument(sample_css))) == _calls(CssDocument(sample_css))
+
+
+def test_is_smaller_than_the_token_document(sample_css):
+    assert len(pickle.dumps(CompactDocument(sample_css))) < len(pickle.dumps(CssDocument(sample_css))) / 2
+
+
+def test_interns_repeated_text():
+    doc = CompactDocument(".alpha-selector { color: red } .alpha-selector { color: red }")
+    first, second = [rule for rule in doc.rules if rule.type == "qualified-rule"]
+
+    assert doc.selector(first) is doc.selector(second)
+    assert doc.declarations(first)[0].value is doc.declarations(second)[0].value
+
+
+def test_token_functions_parse_the_text_again(sample_css):
+    doc = CompactDocument(sample_css)
+
+    full = as_document(doc)
+
+    assert not full.compact and full.text == sample_css
+    assert as_document(doc, allow_compact=True) is doc
+
+
+@pytest.mark.parametrize("attribute", ["selector_index", "spans"])
+def test_token_views_are_unavailable(attribute):
+    with pytest.raises(Exception, match="use as_document"):
+        getattr(CompactDocument(".a { color: red }"), attribute)
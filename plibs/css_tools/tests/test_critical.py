@@ -0,0 +1,94 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Tests of splitting a stylesheet into critical and non-critical CSS."""
+
+import pytest
+from css_tools.critical import partition
+from css_tools.minifier import minify_css
+from css_tools.modifier import remove_selector
+from css_tools.parser import CssDocument
+
+FLAT_CSS = """
+@import "base.css";
+/* layout */
+.header { color: red; }
+.nav { display: flex; }
+.footer { margin: 0; }
+.header { padding: 1px; }
+@keyframes spin { from { top: 0; } }
+"""
+
+
+def _partition_as_before(css, selectors):
+    """Critical CSS as it was built by one lookup and remove_selector per selector."""
+    critical = []
+    rest = css
+    for selector in selectors:
+        doc = CssDocument(rest)
+        for rule in doc.rules:
+            if rule.type == "qualified-rule" and doc.selector(rule) == selector:
+                critical.append(rule.serialize())
+        rest = remove_selector(rest, selector)
+    return "\n".join(critical), rest
+
+
+@pytest.mark.parametrize("selectors", [[], [".header"], [".nav", ".footer"], [".missing"]])
+def test_matches_the_selector_by_selector_split(selectors):
+    critical, rest = partition(FLAT_CSS, selectors)
+    old_critical, old_rest = _partition_as_before(FLAT_CSS, selectors)
+
+    assert minify_css(critical) == minify_css(old_critical)
+    assert minify_css(rest) == minify_css(old_rest)
+
+
+def test_splits_selector_lists():
+    critical, rest = partition(".a, .b > .c, .d { color: red; }", [".b>.c", ".a"])
+
+    assert critical == ".a, .b > .c {\n    color: red;\n}"
+    assert rest == ".d {\n    color: red;\n}"
+
+
+def test_repeats_grouping_at_rules_on_each_side():
+    css = "@media print { .a { top: 0; } .b { top: 1px; } } @supports (x: y) { .b { left: 0; } }"
+
+    critical, rest = partition(css, [".a"])
+
+    assert minify_css(critical) == "@media print{.a{top:0;}}"
+    assert minify_css(rest) == "@media print{.b{top:1px;}}@supports (x: y){.b{left:0;}}"
+
+
+def test_other_rules_stay_in_the_rest(sample_css):
+    critical, rest = partition(sample_css, [".header"])
+
+    assert "@keyframes spin" in rest and "@import" in rest
+    assert "@keyframes" not in critical
+    assert minify_css(critical) == (
+        '.header{color:#369;background-color:rgba(0, 0, 0, 0.5);font-family:"Helvetica Neue", sans-serif;}'
+        '@media (max-width: 768px){.header{font-size:14px;}}'
+    )
+
+
+def test_accepts_bytes_and_documents():
+    expected = partition(FLAT_CSS, [".nav"])
+
+    assert partition(FLAT_CSS.encode('utf-8'), [b".nav"]) == expected
+    assert partition(CssDocument(FLAT_CSS), iter([".nav"])) == expected
+
+
+def test_braces_in_strings():
+    critical, rest = partition('.a::before { content: "}"; } .b { top: 0 }', [".a::before"])
+
+    assert critical == '.a::before {\n    content: "}";\n}'
+    assert rest == ".b {\n    top: 0 ;\n}"
+
+
+@pytest.mark.parametrize("css, message", [
+    (".a { color: red", "Unbalanced braces"),
+    (".a { color: red } }", "Unbalanced braces"),
+    (".a { color: red } .b", "CSS parse error"),
+])
+def test_invalid_css(css, message):
+    with pytest.raises(Exception, match=message):
+        partition(css, [".a"])
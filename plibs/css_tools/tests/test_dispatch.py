@@ -0,0 +1,135 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Tests of running batches of operations on named documents."""
+
+import pytest
+from css_tools import dispatch
+from css_tools.dispatch import Dispatcher, run
+from css_tools.minifier import minify_css
+from css_tools.modifier import merge_stylesheets, remove_selector
+from css_tools.parser import analyze_stylesheet, selector_exists
+
+
+def test_later_operations_see_earlier_ones(sample_css):
+    batch = run([
+        ("remove_selector", {"doc": "app", "selector": ".button"}),
+        {"op": "selector_exists", "doc": "app", "selector": ".button"},
+        ("analyze_stylesheet", {"doc": "app"}),
+    ], documents={"app": sample_css})
+
+    edited = remove_selector(sample_css, ".button")
+    assert batch == {
+        "results": [
+            {"status": "ok", "result": None},
+            {"status": "ok", "result": selector_exists(edited, ".button")},
+            {"status": "ok", "result": analyze_stylesheet(edited)},
+        ],
+        "documents": {"app": edited},
+    }
+
+
+def test_inline_css_and_into():
+    batch = run([
+        ("minify_css", {"css": ".a { color: red; }", "into": "small"}),
+        ("text", {"doc": "small"}),
+    ])
+
+    assert batch["results"][1] == {"status": "ok", "result": minify_css(".a { color: red; }")}
+    assert batch["documents"] == {"small": minify_css(".a { color: red; }")}
+
+
+def test_merge_takes_document_names():
+    documents = {"a": ".a { top: 0; }", "b": ".a { left: 0; } .b { top: 1px; }"}
+
+    batch = run([("merge_stylesheets", {"docs": ["a", "b"], "into": "merged"})], documents)
+
+    assert batch["documents"] == {"merged": merge_stylesheets(list(documents.values()))}
+
+
+def test_only_changed_documents_are_returned():
+    batch = run([("extract_colors", {"doc": "app"})], documents={"app": ".a { color: red; }", "other": ".b {}"})
+
+    assert batch["documents"] == {}
+
+
+@pytest.mark.parametrize("op, message", [
+    (("rename", {"doc": "app"}), "Unknown operation: rename"),
+    ({"selector": ".a"}, "Unknown operation: None"),
+    (("minify_css", [1]), "Arguments of minify_css must be a dict"),
+    ("minify_css", 'An operation must be an (op, args) pair or a dict with an "op" key, got: \'minify_css\''),
+    (("minify_css", {"doc": "missing"}), "Unknown document: missing"),
+    (("minify_css", {}), "Operation minify_css needs a doc or css argument"),
+    # Errors of the operations name the operation, or say the CSS is invalid
+    (("minify_css", {"doc": "app", "level": 3}), "minify_css failed: "),
+    (("replace_selector_rule", {"doc": "app", "selector": ".a", "new_declarations": "top"}),
+     "replace_selector_rule failed: Invalid declaration syntax: Missing colon in 'top'"),
+    (("remove_selector", {"css": ".a { color: red", "selector": ".a"}),
+     "Failed to parse CSS: CSS syntax error: Unbalanced braces"),
+    (("analyze_stylesheet", {"css": ".a { color: red"}), "Failed to parse CSS: CSS syntax error: Unbalanced braces"),
+])
+def test_error_messages(op, message):
+    [result] = run([op], documents={"app": ".a { color: red; }"})["results"]
+
+    assert result["status"] == "error"
+    assert result["message"].startswith(message)
+    # The parse error prefix is never doubled
+    assert result["message"].count("Failed to parse CSS") <= 1
+
+
+def test_failing_operation_leaves_its_document_unchanged():
+    css = ".a { color: red; }"
+    batch = run([
+        ("replace_selector_rule", {"doc": "app", "selector": ".a", "new_declarations": "top"}),
+        ("text", {"doc": "app"}),
+    ], documents={"app": css})
+
+    assert batch["results"][0]["status"] == "error"
+    assert batch["results"][1] == {"status": "ok", "result": css}
+    assert batch["documents"] == {}
+
+
+@pytest.mark.parametrize("stop_on_error", [False, True])
+def test_stop_on_error(stop_on_error):
+    ops = [
+        ("minify_css", {"doc": "app"}),
+        ("rename", {"doc": "app"}),
+        ("remove_selector", {"doc": "app", "selector": ".a"}),
+    ]
+
+    batch = run(ops, documents={"app": ".a { color: red; } .b { top: 0; }"}, stop_on_error=stop_on_error)
+
+    statuses = [result["status"] for result in batch["results"]]
+    if stop_on_error:
+        assert statuses == ["ok", "error", "error"]
+        assert batch["results"][2]["message"] == "Skipped after an earlier error"
+        assert batch["documents"] == {"app": minify_css(".a { color: red; } .b { top: 0; }")}
+    else:
+        assert statuses == ["ok", "error", "ok"]
+        assert batch["documents"] == {"app": ".b {\n    top:0;\n}"}
+
+
+def test_dispatcher_keeps_documents_between_batches():
+    dispatcher = Dispatcher({"app": ".a { color: red; }"})
+    dispatcher.run([("remove_selector", {"doc": "app", "selector": ".a"})])
+
+    assert dispatcher.run([("text", {"doc": "app"})]) == {"results": [{"status": "ok", "result": ""}], "documents": {}}
+
+    dispatcher.remove_document("app")
+    assert dispatcher.run([("text", {"doc": "app"})])["results"] == [
+        {"status": "error", "message": "Unknown document: app"}
+    ]
+
+
+def test_bytes_are_decoded():
+    batch = run(
+        [(b"selector_exists", {b"doc": b"app", b"selector": b".a"}), {b"op": b"text", b"doc": b"app"}],
+        documents={b"app": b".a { color: red; }"},
+    )
+
+    assert batch["results"] == [{"status": "ok", "result": True}, {"status": "ok", "result": ".a { color: red; }"}]
+
+
+def test_decode():
+    assert dispatch._decode({b"k": [b"v", (b"w", 1)], "s": None}) == {"k": ["v", ["w", 1]], "s": None}
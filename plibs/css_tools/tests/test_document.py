@@ -0,0 +1,133 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Tests of CssDocument and its cached views."""
+
+import pickle
+import pytest
+from css_tools import extractor, minifier, modifier, parser
+from css_tools.parser import CssDocument, analyze_stylesheet, as_document
+
+
+def test_accepts_str_and_bytes(sample_css):
+    from_text = CssDocument(sample_css)
+    from_bytes = CssDocument(sample_css.encode('utf-8'))
+
+    assert from_text.text == from_bytes.text == sample_css
+    assert from_text.size_bytes == from_bytes.size_bytes == len(sample_css.encode('utf-8'))
+
+
+def test_size_bytes_counts_utf8():
+    doc = CssDocument('.a::before { content: "é" }')
+
+    assert doc.size_bytes == len(doc.text) + 1
+
+
+def test_views_are_cached(sample_css):
+    doc = CssDocument(sample_css)
+    rule = next(rule for rule in doc.rules if rule.type == "qualified-rule")
+
+    assert doc.selector(rule) == ".header, .nav > a"
+    assert doc.declarations(rule) is doc.declarations(rule)
+    assert doc.selectors is doc.selectors
+    assert doc.selector_index is doc.selector_index
+    assert doc.spans is doc.spans
+    assert doc.comments == [" Header styles "]
+
+
+def test_value_is_stripped(sample_css):
+    doc = CssDocument(sample_css)
+    button = next(rule for rule in doc.rules if rule.type == "qualified-rule" and doc.selector(rule) == ".button")
+    values = {decl.name: doc.value(decl) for decl in doc.declarations(button) if decl.type == "declaration"}
+
+    assert values == {"color": "white", "margin": "0 auto"}
+
+
+def test_media_blocks(sample_css):
+    doc = CssDocument(sample_css)
+
+    [(condition, children)] = doc.media_blocks
+    assert condition == "(max-width: 768px)"
+    assert [doc.selector(rule) for rule in children if rule.type == "qualified-rule"] == [".header", ".sidebar"]
+
+
+def test_cached_builds_once(sample_css):
+    doc = CssDocument(sample_css)
+    calls = []
+
+    def build():
+        calls.append(1)
+        return len(calls)
+
+    assert doc.cached("view", build) == 1
+    assert doc.cached("view", build) == 1
+    assert calls == [1]
+
+
+def test_pickling_drops_node_caches(sample_css):
+    doc = CssDocument(sample_css)
+    assert doc.selectors
+
+    copy = pickle.loads(pickle.dumps(doc))
+
+    assert copy.text == doc.text
+    assert copy._selectors == {} and copy._views == {}
+    assert copy.selectors == doc.selectors
+
+
+def test_from_rules_does_not_tokenize(sample_css):
+    doc = CssDocument(sample_css)
+
+    copy = CssDocument.from_rules(doc.text, doc.rules)
+
+    assert copy.rules is doc.rules
+    assert copy.selectors == doc.selectors
+
+
+def test_as_document_returns_documents_unchanged(sample_css):
+    doc = CssDocument(sample_css)
+
+    assert as_document(doc) is doc
+
+
+@pytest.mark.parametrize("function, arguments", [
+    (analyze_stylesheet, ()),
+    (parser.extract_comments, ()),
+    (parser.extract_rules_by_selector, (".header",)),
+    (parser.get_selector_properties, (".button",)),
+    (extractor.extract_colors, ()),
+    (extractor.extract_media_queries, ()),
+    (extractor.extract_animations, ()),
+    (extractor.extract_fonts, ()),
+    (modifier.add_property_to_selector, (".button", "padding", "1px")),
+    (modifier.remove_selector, (".sidebar",)),
+    (minifier.minify_css, ()),
+    (minifier.beautify_css, ()),
+])
+def test_document_gives_the_same_result_as_text(sample_css, function, arguments):
+    # Without the parse cache every call on text parses it again
+    parser.configure_parse_cache(0)
+    expected = function(sample_css, *arguments)
+    doc = CssDocument(sample_css)
+
+    first = function(doc, *arguments)
+    second = function(doc, *arguments)
+
+    def comparable(result):
+        if isinstance(result, list) and result and hasattr(result[0], "type"):
+            return [parser.serialize_stylesheet([node]) for node in result]
+        return result
+
+    assert comparable(first) == comparable(second) == comparable(expected)
+
+
+def test_modifiers_leave_the_document_unchanged(sample_css):
+    doc = CssDocument(sample_css)
+    before = minifier.minify_css(doc)
+
+    modifier.add_property_to_selector(doc, ".header", "padding", "1px")
+    modifier.remove_property_from_selector(doc, ".button", "color")
+    modifier.modify_property_value(doc, ".header", "color", "blue")
+
+    assert minifier.minify_css(doc) == before
@@ -0,0 +1,131 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Tests of the buffered emitter shared by the serializers."""
+
+import io
+import pytest
+from css_tools import minifier, modifier
+from css_tools.emitter import Emitter
+
+EMITTED_CSS = (
+    '/* c */\n@import "a.css";\n.b { color: #FFFFFF; margin: 0px }\n'
+    '@media print {\n  .b { color: red !important }\n}\n.a{top:0;color:red;top:1px}\n'
+)
+
+# Output of the serializers before they shared the emitter, except that
+# remove_duplicates now keeps the rules of @media blocks without duplicates
+SERIALIZED = {
+    "minify_css": '@import "a.css";.b{color:#FFF;margin:0px;}@media print{.b{color:red!important;}}'
+                  '.a{top:0;color:red;top:1px;}',
+    "beautify_css": '/*  c  */\n\n@import "a.css";\n\n.b {\n    color: #FFFFFF;\n    margin: 0px;\n}\n\n'
+                    '@media print {\n    .b {\n        color: red !important;\n    }\n\n}\n\n'
+                    '.a {\n    top: 0;\n    color: red;\n    top: 1px;\n}\n\n',
+    "sort_properties": '/* c */\n\n\n@import "a.css";\n\n\n.b {\n    color: #FFFFFF;\n    margin: 0px;\n}\n\n\n\n'
+                       '@media print {\n  .b { color: red !important }\n}\n\n\n'
+                       '.a {\n    color: red;\n    top: 0;\n    top: 1px;\n}\n\n\n\n',
+    "remove_duplicates": '/* c */\n\n\n@import "a.css";\n\n\n.b {\n    color: #FFFFFF;\n    margin: 0px;\n}\n\n\n\n'
+                         '@media print {\n    .b {\n        color: red !important;\n    }\n\n}\n\n\n\n'
+                         '.a {\n    color: red;\n    top: 1px;\n}\n\n\n\n',
+}
+
+
+@pytest.mark.parametrize("function", sorted(SERIALIZED))
+def test_serializers_match_their_previous_output(function):
+    assert getattr(minifier, function)(EMITTED_CSS) == SERIALIZED[function]
+
+
+def test_modifiers_match_their_previous_output():
+    assert modifier.remove_selector(EMITTED_CSS, ".a") == (
+        '/* c */\n@import "a.css";\n.b {\n    color: #FFFFFF; margin: 0px ;\n}\n\n'
+        '@media print {\n\n  .b {\n    color: red !important;\n}\n\n\n}'
+    )
+    assert modifier.merge_stylesheets([EMITTED_CSS, ".b{padding:0}"]) == (
+        '/* c */\n@import "a.css";\n.b {\n    color: #FFFFFF; margin: 0px ;padding:0;\n}\n\n'
+        '@media print {\n  .b { color: red !important }\n}\n.a {\n    top:0;color:red;top:1px;\n}'
+    )
+
+
+def _emit(style):
+    emitter = Emitter(style)
+    emitter.statement("import", '"a.css"')
+    emitter.comment("note")
+    emitter.block_start("media", "print")
+    emitter.rule_start(".a", 1)
+    emitter.declaration("color", "red", depth=1)
+    emitter.declaration("top", "0", important=True, depth=1)
+    emitter.rule_end(1)
+    emitter.block_end()
+    return emitter.getvalue()
+
+
+def test_styles():
+    assert _emit("minified") == '@import "a.css";@media print{.a{color:red;top:0!important;}}'
+    assert _emit("pretty") == (
+        '@import "a.css";\n\n/* note */\n@media print {\n    .a {\n        color: red;\n'
+        '        top: 0 !important;\n    }\n\n}\n\n'
+    )
+    assert _emit("preserve") == (
+        '@import "a.css";\n/* note */\n@media print {\n    .a {\n        color: red;\n'
+        '        top: 0 !important;\n\n    }\n\n}\n'
+    )
+
+
+def test_unknown_style():
+    with pytest.raises(Exception, match="Unknown output style: compact"):
+        Emitter("compact")
+
+
+def test_truncate_to_a_mark():
+    emitter = Emitter("pretty")
+    emitter.write(".a {}")
+    mark = emitter.mark()
+
+    emitter.write("  \n")
+    assert emitter.is_blank_since(mark)
+    emitter.write(".b {}")
+    assert not emitter.is_blank_since(mark)
+
+    emitter.truncate(mark)
+    assert emitter.getvalue() == ".a {}"
+
+
+def test_flush_writes_to_the_sink():
+    sink = io.StringIO()
+    emitter = Emitter("minified", sink=sink)
+
+    emitter.rule_start(".a")
+    emitter.rule_end()
+    emitter.flush()
+    emitter.write(".b{}")
+
+    assert sink.getvalue() == ".a{}"
+    assert emitter.getvalue() == ".b{}"
+    emitter.flush()
+    assert sink.getvalue() == ".a{}.b{}"
+
+
+def test_preserved_text_writes_the_text_as_is():
+    emitter = Emitter("preserve")
+
+    emitter.preserved_text("\n  color: red;\n\n    /* a\n  b */ font: 1px\n  serif\n", 1)
+
+    assert emitter.getvalue() == "  color: red;\n\n    /* a\n  b */ font: 1px\n  serif"
+
+
+def test_preserved_text_indents_a_body_on_the_rule_line():
+    emitter = Emitter("preserve")
+
+    emitter.preserved_text(" color: red; top: 0 ", 1)
+    emitter.preserved_text("  \n ")
+
+    assert emitter.getvalue() == "        color: red; top: 0"
+
+
+def test_merge_writes_multi_line_bodies_as_is():
+    css = ".a {\n  color: red;\n  /* one\n     two */\n  font: 1px\n    serif;\n}\n"
+
+    assert modifier.merge_stylesheets([css, ".a{top:0}"]) == (
+        ".a {\n  color: red;\n  /* one\n     two */\n  font: 1px\n    serif;\ntop:0;\n}"
+    )
@@ -0,0 +1,93 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Tests of extract_all and the pluggable extractor visitors."""
+
+import pytest
+from css_tools import extractor, instrumentation
+from css_tools.extractor import extract_all
+from css_tools.parser import CssDocument, analyze_stylesheet, extract_comments
+from css_tools.visitors import VISITORS, Visitor, register_visitor
+
+
+def test_matches_the_single_extractors(sample_css):
+    html = '<div class="header">'
+
+    result = extract_all(sample_css, [
+        "analysis", "colors", "fonts", "animations", "media_queries", "comments",
+        "selectors_by_property", "unused_selectors",
+    ], {"selectors_by_property": {"property_name": "color"}, "unused_selectors": {"html_content": html}})
+
+    assert result == {
+        "analysis": analyze_stylesheet(sample_css),
+        "colors": extractor.extract_colors(sample_css),
+        "fonts": extractor.extract_fonts(sample_css),
+        "animations": extractor.extract_animations(sample_css),
+        "media_queries": extractor.extract_media_queries(sample_css),
+        "comments": extract_comments(sample_css),
+        "selectors_by_property": extractor.extract_selectors_by_property(sample_css, "color"),
+        "unused_selectors": extractor.extract_unused_selectors(sample_css, html),
+    }
+
+
+def test_walks_the_document_once(sample_css):
+    doc = CssDocument(sample_css)
+
+    with instrumentation.instrument() as recorder:
+        extract_all(doc, ["analysis", "colors", "fonts", "animations", "media_queries"])
+
+    assert recorder.as_dict()["counters"]["traversals"] == 1
+
+
+def test_returns_only_the_requested_extractors(sample_css):
+    assert list(extract_all(sample_css, ["fonts"])) == ["fonts"]
+    assert extract_all(sample_css, []) == {}
+
+
+def test_unknown_extractor():
+    with pytest.raises(Exception, match="Unknown extractor: nope"):
+        extract_all(".a { color: red }", ["nope"])
+
+
+def test_registered_visitors_run_in_the_same_traversal(sample_css):
+    @register_visitor("property_names")
+    class PropertyNamesVisitor(Visitor):
+        def __init__(self, doc, prefix=""):
+            super().__init__(doc)
+            self.prefix = prefix
+            self.names = []
+
+        def visit_declaration(self, declaration, rule, ancestors):
+            if declaration.name.startswith(self.prefix):
+                self.names.append(declaration.name)
+
+        def result(self):
+            return self.names
+
+    try:
+        result = extract_all(sample_css, ["property_names", "colors"], {"property_names": {"prefix": "back"}})
+    finally:
+        VISITORS.pop("property_names")
+
+    assert result["property_names"] == ["background-color"]
+    assert result["colors"] == extractor.extract_colors(sample_css)
+
+
+def test_braces_in_strings_and_comments_are_not_blocks():
+    css = '.a::before { content: "{"; } /* } */ .b { background: url(x{y).png) }'
+
+    result = extract_all(css, ["analysis"])
+
+    assert result["analysis"]["selectors"] == [".a::before", ".b"]
+
+
+@pytest.mark.parametrize("css", [".a { color: red", ".a { color: red } }"])
+def test_unbalanced_braces(css):
+    with pytest.raises(Exception, match="CSS syntax error: Unbalanced braces"):
+        extract_all(css, ["colors"])
+
+
+def test_parse_errors():
+    with pytest.raises(Exception, match="CSS parse error"):
+        extract_all(".a { color: red } ]", ["colors"])
@@ -0,0 +1,153 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Tests of incremental updates against a full re-parse of the edited text."""
+
+import random
+import pytest
+import tinycss2
+from css_tools.incremental import update
+from css_tools.parser import CssDocument, analyze_stylesheet
+from css_tools.spans import SpanIndex, line_starts, node_offsets
+
+BASE_CSS = """/* head */
+.a { color: red; }
+.b { font-family: Arial; }
+@media print {
+  .c { color: #fff; }
+}
+.d { margin: 0 }
+"""
+
+FRAGMENTS = ["", " ", "{", "}", ";", "/*", "*/", "'", "\\", ".x{color:blue}", "@media p{.y{top:0}}", "\n"]
+
+
+def _apply(text, edits):
+    parts = []
+    position = 0
+    for start, end, replacement in sorted(edits):
+        parts.append(text[position:start])
+        parts.append(replacement)
+        position = end
+    parts.append(text[position:])
+    return "".join(parts)
+
+
+def _nodes(doc):
+    return [(rule.type, rule.kind if rule.type == "error" else tinycss2.serialize([rule])) for rule in doc.rules]
+
+
+def _analysis(doc):
+    try:
+        result = analyze_stylesheet(doc)
+    except Exception as e:
+        return str(e)
+    return {key: sorted(value) if isinstance(value, list) else value for key, value in result.items()}
+
+
+def _assert_matches_full_parse(updated, text):
+    fresh = CssDocument(text)
+
+    assert updated.text == text
+    assert _nodes(updated) == _nodes(fresh)
+    assert updated.spans.starts == SpanIndex.build(fresh).starts
+    assert _analysis(updated) == _analysis(fresh)
+
+
+@pytest.mark.parametrize("edits", [
+    [(13, 16, "blue")],
+    [(13, 16, "blue"), (40, 45, "Helvetica")],
+    [(0, 0, ".z { top: 0 }")],
+    [(len(BASE_CSS), len(BASE_CSS), ".z { top: 0 }")],
+    [(11, 30, "")],
+    [(30, 30, "{")],
+    [(30, 30, "/* open")],
+    [(56, 56, "}")],
+])
+def test_matches_a_full_parse(edits):
+    doc = CssDocument(BASE_CSS)
+    _analysis(doc)
+
+    _assert_matches_full_parse(update(doc, edits), _apply(BASE_CSS, edits))
+
+
+def test_random_edit_chains_match_a_full_parse():
+    rng = random.Random(7)
+    for _ in range(60):
+        doc = CssDocument(BASE_CSS)
+        _analysis(doc)
+        for _ in range(3):
+            points = sorted(rng.randint(0, len(doc.text)) for _ in range(4))
+            edits = [(points[0], points[1], rng.choice(FRAGMENTS)), (points[2], points[3], rng.choice(FRAGMENTS))]
+            text = _apply(doc.text, edits)
+            doc = update(doc, edits)
+            _assert_matches_full_parse(doc, text)
+
+
+def test_reuses_untouched_nodes():
+    doc = CssDocument(BASE_CSS)
+
+    updated = update(doc, [(13, 16, "blue")])
+
+    assert updated.rules[0] is doc.rules[0]
+    assert updated.rules[-2] is doc.rules[-2]
+    assert updated.rules[2] is not doc.rules[2]
+    assert doc.text == BASE_CSS
+
+
+
+def test_old_document_still_answers_for_its_own_text():
+    doc = CssDocument(BASE_CSS)
+    before = [tinycss2.serialize(doc.declarations(rule)) for rule in doc.rules if rule.type == "qualified-rule"]
+
+    updated = update(doc, [(13, 16, "blue")])
+    updated.selectors
+
+    assert [tinycss2.serialize(doc.declarations(rule)) for rule in doc.rules if rule.type == "qualified-rule"] == before
+    assert _analysis(doc) == _analysis(CssDocument(BASE_CSS))
+
+def test_accepts_dicts_and_bytes():
+    doc = CssDocument(BASE_CSS)
+
+    updated = update(doc, [{"start": 13, "end": 16, "text": b"blue"}])
+
+    assert updated.text == _apply(BASE_CSS, [(13, 16, "blue")])
+
+
+def test_no_edits_returns_the_document():
+    doc = CssDocument(BASE_CSS)
+
+    assert update(doc, []) is doc
+
+
+@pytest.mark.parametrize("edits, message", [
+    ([(5, 4, "")], "Invalid edit range: 5-4"),
+    ([(0, len(BASE_CSS) + 1, "")], "Invalid edit range"),
+    ([(0, 5, ""), (3, 8, "")], "Overlapping edit ranges: 0-5 and 3-8"),
+])
+def test_invalid_edits(edits, message):
+    with pytest.raises(Exception, match=message):
+        update(BASE_CSS, edits)
+
+
+def test_line_starts_count_css_newlines():
+    assert line_starts("a\r\nb\nc\fd\re") == [0, 3, 5, 7, 9]
+
+
+def test_spans_tile_the_source():
+    doc = CssDocument(BASE_CSS)
+    spans = doc.spans
+
+    assert spans.starts == node_offsets(doc.rules, BASE_CSS)
+    assert "".join(BASE_CSS[slice(*spans.span(index))] for index in range(len(spans))) == BASE_CSS
+    assert [BASE_CSS[start:end].strip() for _, start, end in spans.rule_spans(doc)][1] == ".b { font-family: Arial; }"
+    assert spans.node_at(14) == 2
+
+
+def test_spans_of_an_unclosed_rule():
+    text = ".a { top: 0 } .b .c"
+    doc = CssDocument(text)
+
+    assert doc.rules[-1].type == "error"
+    assert text[doc.spans.span(len(doc.rules) - 1)[0]:] == ".b .c"
@@ -0,0 +1,94 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Tests of the opt-in phase timings and counters."""
+
+import threading
+import time
+import pytest
+from css_tools import instrumentation
+from css_tools.extractor import extract_all
+from css_tools.instrumentation import PHASES, instrument, instrumented
+from css_tools.minifier import minify_css
+from css_tools.parser import analyze_stylesheet, clear_parse_cache
+
+
+@pytest.mark.parametrize("function", [minify_css, analyze_stylesheet])
+def test_results_do_not_depend_on_instrumentation(sample_css, function):
+    plain = function(sample_css)
+    clear_parse_cache()
+
+    result, stats = instrumented(function, sample_css)
+
+    assert result == plain
+    assert set(stats["phases"]) <= set(PHASES)
+    assert stats["counters"]["parses"] == 1
+
+
+def test_phases_are_exclusive(sample_css):
+    _, stats = instrumented(extract_all, sample_css, ["analysis", "colors", "fonts"])
+
+    phase_seconds = sum(phase["seconds"] for phase in stats["phases"].values())
+    assert phase_seconds <= stats["total_seconds"]
+    assert stats["unattributed_seconds"] == pytest.approx(stats["total_seconds"] - phase_seconds)
+    assert stats["phases"]["tokenize"]["calls"] >= 1
+
+
+def test_cache_hits_are_counted(sample_css):
+    minify_css(sample_css)
+
+    _, stats = instrumented(minify_css, sample_css)
+
+    assert "parses" not in stats["counters"]
+    assert stats["counters"]["parse_cache_hits"] == 1
+
+
+def test_nested_phases_charge_the_inner_phase():
+    with instrument() as recorder:
+        with instrumentation.phase("traverse"):
+            time.sleep(0.01)
+            with instrumentation.phase("reparse"):
+                time.sleep(0.02)
+
+    seconds = recorder.as_dict()["phases"]
+    assert seconds["reparse"]["seconds"] >= 0.02
+    assert 0.01 <= seconds["traverse"]["seconds"] < 0.02
+
+
+def test_nested_blocks_record_separately(sample_css):
+    with instrument() as outer:
+        instrumentation.count("outer")
+        with instrument() as inner:
+            instrumentation.count("inner", 2)
+
+    assert outer.as_dict()["counters"] == {"outer": 1}
+    assert inner.as_dict()["counters"] == {"inner": 2}
+
+
+def test_hook_runs_when_the_block_raises():
+    received = []
+
+    with pytest.raises(Exception, match="CSS syntax error"):
+        with instrument(received.append):
+            with instrumentation.phase("split"):
+                analyze_stylesheet(".a { color: red")
+
+    assert len(received) == 1
+    assert received[0]["phases"]["split"]["calls"] == 1
+
+
+def test_nothing_is_recorded_outside_a_block():
+    assert not instrumentation.enabled()
+    assert instrumentation.phase("tokenize") is instrumentation.phase("serialize")
+    instrumentation.count("parses")
+
+
+def test_other_threads_are_not_recorded(sample_css):
+    with instrument() as recorder:
+        thread = threading.Thread(target=minify_css, args=(sample_css,))
+        thread.start()
+        thread.join()
+        assert instrumentation.enabled()
+
+    assert recorder.as_dict()["counters"] == {}
@@ -0,0 +1,59 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Tests of merge_stylesheets and the grouping of identical rule bodies."""
+
+import pytest
+from css_tools.modifier import merge_from_records, merge_records, merge_stylesheets
+
+
+def test_rules_with_the_same_selector_are_merged():
+    merged = merge_stylesheets([".a { color: red; top: 0; }", ".b { x: y; }", ".a { color: blue; left: 0; }"])
+
+    assert merged == ".a {\n    color: blue; top: 0; left: 0;\n}\n.b {\n    x: y;\n}"
+
+
+@pytest.mark.parametrize("sheets, grouped", [
+    # Identical bodies are grouped, however they are spaced
+    ([".a { color: red; }", ".b{color:red}"], ".a, .b {\n    color: red;\n}"),
+    ([".a { color: red; /* c */ }", ".b { color: red; /* c */ }"], ".a, .b {\n    color: red; /* c */\n}"),
+    # Merged bodies are compared, not the rules as written
+    ([".a { color: red; }", ".a { top: 0; }", ".b { color: red; top: 0 }"], ".a, .b {\n    color: red; top: 0;\n}"),
+    # Rules in between are fine when they declare other properties
+    (
+        [".a { color: red; } .c { border-color: blue; }", ".b { color: red; }"],
+        ".a, .b {\n    color: red;\n}\n .c {\n    border-color: blue;\n}",
+    ),
+    # and so are at-rules that do not change the cascade
+    (
+        [".a { color: red; } @font-face { font-family: X }", ".b { color: red; }"],
+        ".a, .b {\n    color: red;\n}\n @font-face { font-family: X }",
+    ),
+])
+def test_identical_bodies_are_grouped(sheets, grouped):
+    assert merge_stylesheets(sheets, group_identical=True) == grouped
+
+
+@pytest.mark.parametrize("sheets", [
+    # A rule in between declares the same property, so moving .b up would
+    # let .c win over it
+    [".a { color: red; } .c { color: blue; }", ".b { color: red; }"],
+    [".a { color: red; }", ".b { all: unset; }", ".c { color: red; }"],
+    [".a { color: red; } @media print { .x { top: 0 } }", ".b { color: red; }"],
+    # An unknown vendor selector would drop the whole grouped rule
+    [".a { color: red; }", "input::-moz-placeholder { color: red; }"],
+    # Bodies differing in order or importance are not identical
+    [".a { color: red; top: 0 }", ".b { top: 0; color: red }"],
+    [".a { color: red; }", ".b { color: red !important; }"],
+])
+def test_bodies_are_not_grouped_when_it_would_change_the_cascade(sheets):
+    assert merge_stylesheets(sheets, group_identical=True) == merge_stylesheets(sheets)
+
+
+@pytest.mark.parametrize("group_identical", [False, True])
+def test_merge_from_records_matches_merge_stylesheets(sample_css, group_identical):
+    sheets = [sample_css, ".button { color: white; margin: 0 auto !important; } .header { top: 0; }"]
+    records = [merge_records(css, group_identical) for css in sheets]
+
+    assert merge_from_records(records, group_identical) == merge_stylesheets(sheets, group_identical)
@@ -0,0 +1,78 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Tests of the lazily importing package and warmup()."""
+
+import importlib
+import os
+import subprocess
+import sys
+import pytest
+import css_tools
+from css_tools.parser import parse_cache_stats
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(css_tools.__file__)))
+
+
+def _fresh(statement):
+    """Run a statement in a new interpreter and return what it prints."""
+    env = dict(os.environ, PYTHONPATH=SRC)
+    completed = subprocess.run(
+        [sys.executable, "-c", statement], env=env, capture_output=True, text=True, check=True
+    )
+    return completed.stdout.strip()
+
+
+def test_import_loads_no_submodule():
+    loaded = _fresh(
+        "import sys, css_tools; "
+        "print(sorted(name for name in sys.modules if name.startswith(('css_tools.', 'tinycss2', 'typing'))))"
+    )
+
+    assert loaded == "[]"
+
+
+def test_a_function_loads_only_its_modules():
+    loaded = _fresh("import sys, css_tools; css_tools.find_css_errors; print('css_tools.modifier' in sys.modules)")
+
+    assert loaded == "False"
+
+
+def test_submodules_match_the_package_files():
+    files = {name[:-3] for name in os.listdir(os.path.dirname(css_tools.__file__))
+             if name.endswith(".py") and name != "__init__.py"}
+
+    assert set(css_tools.SUBMODULES) == files
+    assert set(css_tools.WARMUP_MODULES) <= files
+
+
+@pytest.mark.parametrize("name, module", sorted(css_tools._EXPORTS.items()))
+def test_exports_are_the_submodule_objects(name, module):
+    assert getattr(css_tools, name) is getattr(importlib.import_module(f"css_tools.{module}"), name)
+    assert name in dir(css_tools)
+
+
+def test_submodule_attributes():
+    assert css_tools.minifier is importlib.import_module("css_tools.minifier")
+
+
+def test_unknown_attribute():
+    with pytest.raises(AttributeError, match="has no attribute 'nope'"):
+        css_tools.nope
+
+
+def test_warmup_leaves_the_parse_cache_untouched():
+    timings = css_tools.warmup()
+
+    assert set(timings) == {f"import.{name}" for name in css_tools.WARMUP_MODULES} | {"run"}
+    assert parse_cache_stats()["entries"] == 0
+
+
+def test_warmup_of_some_modules_only_imports_them():
+    assert list(css_tools.warmup(["colors"])) == ["import.colors"]
+
+
+def test_warmup_of_an_unknown_module():
+    with pytest.raises(Exception, match="Unknown css_tools module: nope"):
+        css_tools.warmup(["nope"])
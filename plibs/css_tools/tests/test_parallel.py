@@ -0,0 +1,79 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Tests of running operations over many stylesheets on a process pool."""
+
+import pickle
+import pytest
+from css_tools import modifier, parallel
+from css_tools.extractor import extract_all
+from css_tools.minifier import minify_css
+from css_tools.parser import CssDocument, analyze_stylesheet
+
+SHEETS = [
+    ".a { color: red; } .b { color: red; }",
+    "/* shared */ .a { margin: 0; } @media print { .a { color: black; } }",
+    ".c { color: red; } .a { color: blue !important; }",
+    ".d { top: 0 } @font-face { font-family: X; src: url(x.woff) }",
+]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def stop_pool():
+    yield
+    parallel.shutdown_pool()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_results_match_sequential_calls(workers):
+    extractors = ["colors", "fonts"]
+
+    assert parallel.analyze_all(SHEETS, workers=workers) == [analyze_stylesheet(css) for css in SHEETS]
+    assert parallel.minify_all(SHEETS, workers=workers) == [minify_css(css) for css in SHEETS]
+    assert parallel.extract_all_parallel(SHEETS, extractors, workers=workers) == [
+        extract_all(css, extractors) for css in SHEETS
+    ]
+
+
+def test_parse_all_returns_documents():
+    documents = parallel.parse_all(SHEETS, workers=2)
+
+    assert all(isinstance(doc, CssDocument) for doc in documents)
+    assert [minify_css(doc) for doc in documents] == [minify_css(css) for css in SHEETS]
+
+
+@pytest.mark.parametrize("group_identical", [False, True])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_merge_matches_the_sequential_merge(group_identical, workers):
+    merged = parallel.merge_stylesheets(SHEETS, group_identical, workers=workers, chunksize=1)
+
+    assert merged == modifier.merge_stylesheets(SHEETS, group_identical)
+
+
+def test_merge_records_are_smaller_than_documents(sample_css):
+    records = modifier.merge_records(sample_css, group_identical=True)
+
+    assert len(pickle.dumps(records)) < len(pickle.dumps(CssDocument(sample_css)))
+    assert modifier.merge_from_records([records], True) == modifier.merge_stylesheets([sample_css], True)
+
+
+def test_reads_paths_in_the_workers(tmp_path):
+    paths = []
+    for index, css in enumerate(SHEETS):
+        path = tmp_path / f"{index}.css"
+        path.write_text(css, encoding='utf-8')
+        paths.append(path)
+
+    assert parallel.minify_all(paths, workers=2) == [minify_css(css) for css in SHEETS]
+    assert parallel.merge_stylesheets(paths, workers=2) == modifier.merge_stylesheets(SHEETS)
+
+
+def test_errors_name_the_failing_input():
+    with pytest.raises(Exception, match="Failed to analyze input 1: Failed to parse CSS"):
+        parallel.analyze_all([".a { color: red }", ".a { color: red } ]"], workers=2)
+
+
+def test_unknown_operation():
+    with pytest.raises(Exception, match="Unknown parallel operation: nope"):
+        parallel.run_parallel("nope", SHEETS)
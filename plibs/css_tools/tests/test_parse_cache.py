@@ -0,0 +1,98 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Tests of the content-hash keyed parse cache."""
+
+import pytest
+from css_tools import extractor, minifier, modifier, parser
+from css_tools.parser import (
+    RETAINED_BYTES_PER_SOURCE_BYTE, CssDocument, ParseCache, analyze_stylesheet, as_document,
+    parse_cache_stats, parse_stylesheet, serialize_stylesheet,
+)
+
+
+def test_same_content_is_parsed_once(sample_css):
+    first = as_document(sample_css)
+    second = as_document(sample_css.encode('utf-8'))
+
+    assert second is first
+    stats = parse_cache_stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_different_content_is_parsed_again():
+    assert as_document(".a { color: red }") is not as_document(".a { color: blue }")
+    assert parse_cache_stats()["misses"] == 2
+
+
+def test_budget_counts_estimated_retained_memory(sample_css):
+    as_document(sample_css)
+
+    size = len(sample_css.encode('utf-8'))
+    assert parse_cache_stats()["bytes"] == size * RETAINED_BYTES_PER_SOURCE_BYTE
+
+
+def test_least_recently_used_documents_are_evicted():
+    css = [f".a{i} {{ color: red }}" for i in range(3)]
+    cache = ParseCache(max_bytes=2 * len(css[0]) * RETAINED_BYTES_PER_SOURCE_BYTE)
+    keys = [ParseCache.key(text.encode()) for text in css]
+
+    cache.put(keys[0], CssDocument(css[0]), len(css[0]))
+    cache.put(keys[1], CssDocument(css[1]), len(css[1]))
+    assert cache.get(keys[0]) is not None
+    cache.put(keys[2], CssDocument(css[2]), len(css[2]))
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_documents_larger_than_the_budget_are_not_cached():
+    cache = ParseCache(max_bytes=10 * RETAINED_BYTES_PER_SOURCE_BYTE)
+    text = ".a { color: red }"
+
+    cache.put(ParseCache.key(text.encode()), CssDocument(text), len(text))
+
+    assert cache.stats()["entries"] == 0
+
+
+def test_resize_evicts_and_zero_disables(sample_css):
+    as_document(sample_css)
+    parser.configure_parse_cache(0)
+
+    assert parse_cache_stats()["entries"] == 0
+    assert as_document(sample_css) is not as_document(sample_css)
+    assert parse_cache_stats()["entries"] == 0
+
+
+@pytest.mark.parametrize("function, arguments", [
+    (analyze_stylesheet, ()),
+    (extractor.extract_colors, ()),
+    (extractor.validate_css, ()),
+    (modifier.modify_property_value, (".header", "color", "blue")),
+    (minifier.minify_css, ()),
+    (minifier.sort_properties, ()),
+])
+def test_results_do_not_depend_on_the_cache(sample_css, function, arguments):
+    parser.configure_parse_cache(0)
+    uncached = function(sample_css, *arguments)
+    parser.configure_parse_cache(parser.DEFAULT_PARSE_CACHE_BYTES)
+
+    assert function(sample_css, *arguments) == uncached
+    # The second call is served from the cache
+    assert function(sample_css, *arguments) == uncached
+    assert parse_cache_stats()["hits"] >= 1
+
+
+def test_parse_stylesheet_returns_fresh_nodes(sample_css):
+    as_document(sample_css)
+    rules = parse_stylesheet(sample_css)
+
+    # Changing the returned nodes must not change what the cache serves
+    rules.clear()
+    rules = parse_stylesheet(sample_css)
+    rules[0].value = " changed "
+
+    assert parse_stylesheet(sample_css) is not rules
+    assert serialize_stylesheet(as_document(sample_css).rules) == sample_css
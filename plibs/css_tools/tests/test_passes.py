@@ -0,0 +1,130 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Tests of the pass pipeline against chaining the single functions."""
+
+import itertools
+import pytest
+from css_tools.minifier import beautify_css, minify_css, remove_duplicates, sort_properties
+from css_tools.modifier import add_property_to_selector
+from css_tools.parser import CssDocument
+from css_tools.passes import DEFAULT_PASSES, PassManager, optimize_css, run_passes
+from css_tools.prefixer import add_prefixes
+
+FUNCTIONS = {
+    "prefix": add_prefixes,
+    "remove_duplicates": remove_duplicates,
+    "sort_properties": sort_properties,
+    "minify": minify_css,
+}
+
+# No comments: beautify_css widens the spaces inside a comment every time it
+# writes one, so a chain of pretty-printing functions does not write them
+# the way a single serialization does
+EXTRA_CSS = (
+    ".b { user-select: none; display: flex; color: red } .a { z: 1; color: red; color: blue } .b { top: 0 } "
+    "@media (x) { .a { position: sticky; b: 1 } .a { c: 2 } } @media (x) { .c { d: 1 } .a { e: 1 } } "
+    "@font-face { font-family: X; src: url(x) } @import 'y'; "
+    "@supports (display:grid) { .g { display: grid; user-select: none } } @keyframes k { from { top: 0 } } "
+    ".x , .y > .z { margin : 0 0 0 0 ; color: #FFFFFF } .e {} .a::before { content: \"{ a }\" }"
+)
+
+PIPELINES = [list(p) for n in range(1, 5) for p in itertools.permutations(FUNCTIONS, n)]
+
+
+def _chained(css, passes):
+    for name in passes:
+        css = FUNCTIONS[name](css)
+    return css
+
+
+@pytest.fixture(params=["sample", "extra"])
+def css(request, sample_css):
+    return sample_css if request.param == "sample" else EXTRA_CSS
+
+
+@pytest.mark.parametrize("passes", [p for p in PIPELINES if p[-1] == "minify"])
+def test_minified_pipelines_match_the_chained_functions(css, passes):
+    assert optimize_css(css, passes) == _chained(css, passes)
+
+
+@pytest.mark.parametrize("passes", [p for p in PIPELINES if "minify" in p])
+def test_minify_anywhere_gives_the_minified_chain(css, passes):
+    # The tree stays minified after the minify pass, while the functions
+    # after minify_css in a chain write their output pretty again
+    assert minify_css(optimize_css(css, passes)) == minify_css(_chained(css, passes))
+
+
+@pytest.mark.parametrize("passes", [p for p in PIPELINES if "minify" not in p])
+def test_other_pipelines_are_written_like_beautify_css(passes):
+    assert optimize_css(EXTRA_CSS, passes) == beautify_css(_chained(EXTRA_CSS, passes))
+
+
+@pytest.mark.parametrize("selector", [".a", ".new", ".x, .y>.z", ".header, .nav > a"])
+@pytest.mark.parametrize("before", [[], ["prefix"], ["remove_duplicates"]])
+def test_add_property_matches_add_property_to_selector(css, selector, before):
+    options = {"selector": selector, "property_name": "top", "property_value": "1px solid #000", "important": True}
+    chained = add_property_to_selector(_chained(css, before), **options)
+
+    assert optimize_css(css, before + [("add_property", options), "minify"]) == minify_css(chained)
+
+
+def test_default_passes(css):
+    assert optimize_css(css) == _chained(css, DEFAULT_PASSES)
+    assert optimize_css(CssDocument(css)) == optimize_css(css.encode("utf-8")) == optimize_css(css)
+
+
+def test_no_passes_return_the_text(css):
+    result, report = run_passes(css, [])
+
+    assert result == css
+    assert report["passes"] == [] and report["input_bytes"] == report["output_bytes"]
+
+
+def test_report(css):
+    result, report = run_passes(css)
+
+    assert [entry["name"] for entry in report["passes"]] == list(DEFAULT_PASSES)
+    assert all(set(entry) == {"name", "seconds"} for entry in report["passes"])
+    assert report["input_bytes"] == len(css.encode("utf-8"))
+    assert report["output_bytes"] == len(result.encode("utf-8"))
+    assert report["total_seconds"] >= report["parse_seconds"] + report["serialize_seconds"]
+
+
+def test_measured_report(css):
+    result, report = run_passes(css, measure=True)
+    entries = report["passes"]
+
+    assert result == optimize_css(css)
+    assert all(entry["bytes_saved"] == entry["bytes_before"] - entry["bytes_after"] for entry in entries)
+    assert all(before["bytes_after"] == after["bytes_before"] for before, after in zip(entries, entries[1:]))
+    assert entries[-1]["bytes_after"] == report["output_bytes"]
+
+
+def test_pass_specs():
+    css = ".a { color: red }"
+    passes = [
+        "sort_properties",
+        ("add_property", {"selector": ".b", "property_name": "top", "property_value": "0"}),
+        {"pass": b"minify"},
+    ]
+
+    assert optimize_css(css, passes) == ".a{color:red;}.b{top:0;}"
+
+
+@pytest.mark.parametrize("passes, message", [
+    (["shrink"], "Unknown pass: shrink"),
+    ([("minify", {"level": 2})], "Unknown options for pass minify: level"),
+    ([("minify", [])], "Options of pass minify must be a dict"),
+    ([("add_property", {"selector": ".a"})], "Pass add_property needs the options: property_name, property_value"),
+])
+def test_bad_passes_fail_before_parsing(passes, message):
+    with pytest.raises(Exception, match=message):
+        PassManager(passes)
+
+
+def test_a_manager_runs_many_stylesheets(css):
+    manager = PassManager()
+
+    assert [manager.run(text)[0] for text in (css, EXTRA_CSS)] == [optimize_css(css), optimize_css(EXTRA_CSS)]
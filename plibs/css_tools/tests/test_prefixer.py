@@ -0,0 +1,115 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Tests of the table-driven prefixer."""
+
+import pytest
+from css_tools.parser import CssDocument
+from css_tools.prefixer import add_prefixes
+
+
+@pytest.mark.parametrize("css, prefixed", [
+    # Inserted declarations follow the line breaks and indentation of the block
+    (
+        ".a {\n    user-select: none;\n}",
+        ".a {\n    -webkit-user-select: none;\n    -moz-user-select: none;\n    -ms-user-select: none;\n"
+        "    user-select: none;\n}",
+    ),
+    (
+        ".a {\n\tappearance: none; /* x */\n\tposition: sticky;\n}",
+        ".a {\n\t-webkit-appearance: none;\n\t-moz-appearance: none;\n\tappearance: none; /* x */\n"
+        "\tposition: -webkit-sticky;\n\tposition: sticky;\n}",
+    ),
+    # CRLF line breaks are kept as they are
+    (
+        ".a {\r\n  backdrop-filter: blur(2px);\r\n  display: flex;\r\n}\r\n",
+        ".a {\r\n  -webkit-backdrop-filter: blur(2px);\r\n  backdrop-filter: blur(2px);\r\n"
+        "  display: -webkit-box;\r\n  display: -ms-flexbox;\r\n  display: flex;\r\n}\r\n",
+    ),
+    # On one line, declarations are separated by a space
+    (
+        ".a{user-select:none}",
+        ".a{-webkit-user-select: none; -moz-user-select: none; -ms-user-select: none; user-select:none}",
+    ),
+])
+def test_prefixed_declarations_come_before_the_standard_one(css, prefixed):
+    assert add_prefixes(css) == prefixed
+
+
+def test_important_is_kept():
+    css = ".a { appearance: none !important; display: Inline-Flex!important }"
+
+    assert add_prefixes(css) == (
+        ".a { -webkit-appearance: none !important; -moz-appearance: none !important; appearance: none !important; "
+        "display: -webkit-inline-box !important; display: -ms-inline-flexbox !important; "
+        "display: Inline-Flex!important }"
+    )
+
+
+def test_existing_prefixes_are_not_added_again():
+    css = ".a { -moz-user-select: none; user-select: none; display: -webkit-box; display: flex }"
+
+    assert add_prefixes(css) == (
+        ".a { -moz-user-select: none; -webkit-user-select: none; -ms-user-select: none; user-select: none; "
+        "display: -webkit-box; display: -ms-flexbox; display: flex }"
+    )
+
+
+def test_prefixing_twice_changes_nothing(sample_css):
+    css = sample_css + "\n.z {\n  user-select: none;\n  display: flex;\n  position: sticky;\n}\n"
+    once = add_prefixes(css)
+
+    assert once != css
+    assert add_prefixes(once) == once
+
+
+def test_nested_rules_and_keyframes_are_prefixed():
+    css = (
+        "@media print { .a { user-select: none } } @keyframes k { from { position: sticky } } "
+        "@font-face { user-select: none }"
+    )
+
+    assert add_prefixes(css) == (
+        "@media print { .a { -webkit-user-select: none; -moz-user-select: none; -ms-user-select: none; "
+        "user-select: none } } @keyframes k { from { position: -webkit-sticky; position: sticky } } "
+        "@font-face { user-select: none }"
+    )
+
+
+def test_only_the_first_of_repeated_declarations_is_prefixed():
+    css = ".a { user-select: none; user-select: text }"
+
+    assert add_prefixes(css, {"user-select": ["-x-"]}, {}) == (
+        ".a { -x-user-select: none; user-select: none; user-select: text }"
+    )
+
+
+def test_tables_from_elixir():
+    css = b".a { display: flex; color: red }"
+
+    assert add_prefixes(css, [(b"display", [b"-x-"])], [(b"color", [(b"red", [b"-x-red"])])]) == (
+        ".a { -x-display: flex; display: flex; color: -x-red; color: red }"
+    )
+
+
+@pytest.mark.parametrize("css", [".a { display: block }", "", "/* only */"])
+def test_text_without_insertions_is_returned_as_is(css):
+    assert add_prefixes(css) == css
+
+
+def test_empty_tables_change_nothing():
+    assert add_prefixes(".a { user-select: none }", {}, {}) == ".a { user-select: none }"
+
+
+def test_unclosed_blocks_are_prefixed():
+    css = ".a { user-select: none"
+
+    assert add_prefixes(css, {"user-select": ["-x-"]}) == ".a { -x-user-select: none; user-select: none"
+
+
+def test_documents_are_not_changed():
+    doc = CssDocument(".a { user-select: none }")
+    add_prefixes(doc)
+
+    assert doc.text == ".a { user-select: none }"
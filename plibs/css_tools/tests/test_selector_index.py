@@ -0,0 +1,101 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Tests of the selector index."""
+
+import pytest
+from css_tools.parser import CssDocument, extract_rules_by_selector, get_selector_properties, selector_exists
+from css_tools.selector_index import normalize_selector, selector_members
+from css_tools.traversal import has_nested_rules
+
+INDEXED_CSS = """
+.a, .b > .c { color: red; }
+.a { margin: 0; }
+@media print {
+  .a { color: black; }
+  @supports (display: grid) { .b>.c { display: grid; } }
+}
+@keyframes k { from { top: 0; } }
+"""
+
+
+@pytest.mark.parametrize("selector, normalized", [
+    (".a  >  .b", ".a>.b"),
+    (".a>.b", ".a>.b"),
+    (" .a   .b ", ".a .b"),
+    (".a /* note */ .b", ".a .b"),
+    (".a ,\n .b", ".a,.b"),
+    ('[title="a  b"]', '[title="a  b"]'),
+    (b".a ~ .b", ".a~.b"),
+])
+def test_normalize_selector(selector, normalized):
+    assert normalize_selector(selector) == normalized
+
+
+def test_selector_members():
+    assert selector_members(".a, .b > .c ,.d") == [".a", ".b>.c", ".d"]
+    assert selector_members(":is(.a, .b)") == [":is(.a, .b)"]
+
+
+def _scan(doc, selector, top_level):
+    """Rules found the way they were before the index: comparing every selector."""
+    return [
+        node for node, ancestors in doc.walk(has_nested_rules)
+        if node.type == "qualified-rule"
+        and normalize_selector(doc.selector(node)) == normalize_selector(selector)
+        and not (top_level and ancestors)
+    ]
+
+
+@pytest.mark.parametrize("selector", [".a", ".a, .b > .c", ".b>.c", ".a,.b>.c", ".missing", "from"])
+@pytest.mark.parametrize("top_level", [False, True])
+def test_lookup_matches_a_scan(selector, top_level):
+    doc = CssDocument(INDEXED_CSS)
+
+    found = [rule for _, rule, _ in doc.selector_index.lookup(selector, top_level)]
+
+    assert found == _scan(doc, selector, top_level)
+
+
+def test_lookup_member():
+    doc = CssDocument(INDEXED_CSS)
+
+    found = [doc.selector(rule) for _, rule, _ in doc.selector_index.lookup_member(".b > .c")]
+
+    assert found == [".a, .b > .c", ".b>.c"]
+    assert [doc.selector(rule) for _, rule, _ in doc.selector_index.lookup_member(".a", top_level=True)] == [
+        ".a, .b > .c", ".a"
+    ]
+
+
+def test_entries_keep_document_order_and_ancestors():
+    doc = CssDocument(INDEXED_CSS)
+
+    entries = doc.selector_index.lookup(".a")
+
+    assert [position for position, _, _ in entries] == sorted(position for position, _, _ in entries)
+    assert [[doc.selector(parent) for parent in ancestors] for _, _, ancestors in entries] == [[], ["print"]]
+
+
+def test_contains_and_rule_ids():
+    doc = CssDocument(INDEXED_CSS)
+
+    assert ".a" in doc.selector_index
+    assert ".nope" not in doc.selector_index
+    assert len(doc.selector_index.rule_ids(".a")) == 2
+    assert len(doc.selector_index.rule_ids(".a", top_level=True)) == 1
+
+
+def test_public_helpers_use_normalized_matching():
+    assert selector_exists(INDEXED_CSS, ".b  >  .c") is False
+    assert selector_exists(INDEXED_CSS, ".a ,.b>.c") is True
+    assert get_selector_properties(INDEXED_CSS, ".a") == {"margin": "0"}
+
+
+@pytest.mark.parametrize("pattern", [".a", ".b > .c", ".b>.c", "c", ".missing"])
+def test_extract_rules_by_selector_matches_the_text_as_written(pattern):
+    doc = CssDocument(INDEXED_CSS)
+    expected = [rule for rule in doc.rules if rule.type == "qualified-rule" and pattern in doc.selector(rule)]
+
+    assert extract_rules_by_selector(doc, pattern) == expected
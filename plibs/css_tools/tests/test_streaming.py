@@ -0,0 +1,102 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Tests of reading stylesheets one top-level rule at a time."""
+
+import io
+import mmap
+import pytest
+import tinycss2
+from css_tools.extractor import extract_all, extract_all_stream
+from css_tools.minifier import minify_css, minify_css_stream
+from css_tools.parser import RuleStream, analyze_stylesheet, analyze_stylesheet_stream, iter_rules
+
+# Rule ends hidden in strings, comments, escapes and url()s, and a
+# multi-byte character, so small chunks split every one of them
+TRICKY_CSS = """/* a } comment */
+.a::before { content: "}"; color: red; }
+.b { background: url(x}y.png); font-family: 'A;B' }
+.c\\}d { color: #fff }
+@import "x.css";
+@media (min-width: 1px) { .é { margin: 0 } .f { top: 0 } }
+/* unclosed at the end is fine */
+"""
+
+CHUNK_SIZES = [1, 2, 7, 64, 1 << 20]
+
+
+def _parse(css):
+    return tinycss2.parse_stylesheet(css, skip_whitespace=False, skip_comments=False)
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_iter_rules_matches_parse_stylesheet(chunk_size, sample_css):
+    for css in (TRICKY_CSS, sample_css):
+        streamed = list(iter_rules(css.encode('utf-8'), chunk_size))
+
+        assert tinycss2.serialize(streamed) == tinycss2.serialize(_parse(css))
+        assert [rule.type for rule in streamed] == [rule.type for rule in _parse(css)]
+
+
+def test_reads_paths_files_and_mmaps(tmp_path):
+    path = tmp_path / "style.css"
+    path.write_bytes(TRICKY_CSS.encode('utf-8'))
+    expected = tinycss2.serialize(_parse(TRICKY_CSS))
+
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        from_mmap = tinycss2.serialize(list(iter_rules(mapped, 16)))
+
+    assert tinycss2.serialize(list(iter_rules(str(path), 16))) == expected
+    assert tinycss2.serialize(list(iter_rules(path, 16))) == expected
+    assert tinycss2.serialize(list(iter_rules(io.BytesIO(TRICKY_CSS.encode('utf-8')), 16))) == expected
+    assert tinycss2.serialize(list(iter_rules(io.StringIO(TRICKY_CSS), 16))) == expected
+    assert from_mmap == expected
+
+
+def test_bytes_read():
+    stream = RuleStream(TRICKY_CSS.encode('utf-8'), 5)
+
+    list(stream)
+
+    assert stream.bytes_read == len(TRICKY_CSS.encode('utf-8'))
+    assert not stream.unbalanced
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_analyze_stream_matches_in_memory(chunk_size, sample_css):
+    for css in (TRICKY_CSS, sample_css):
+        assert analyze_stylesheet_stream(css.encode('utf-8'), chunk_size) == analyze_stylesheet(css)
+
+
+def test_analyze_stream_fields(sample_css):
+    fields = ["selectors_count", "colors"]
+
+    assert analyze_stylesheet_stream(sample_css.encode('utf-8'), 8, fields) == analyze_stylesheet(sample_css, fields)
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_extract_all_stream_matches_in_memory(chunk_size, sample_css):
+    extractors = ["colors", "fonts", "animations", "media_queries", "comments"]
+
+    for css in (TRICKY_CSS, sample_css):
+        assert extract_all_stream(css.encode('utf-8'), extractors, chunk_size=chunk_size) == extract_all(css, extractors)
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_minify_stream_matches_in_memory(chunk_size, sample_css):
+    for css in (TRICKY_CSS, sample_css):
+        assert minify_css_stream(css.encode('utf-8'), chunk_size=chunk_size) == minify_css(css)
+
+
+def test_minify_stream_writes_to_a_file(tmp_path, sample_css):
+    output = tmp_path / "out.css"
+
+    assert minify_css_stream(sample_css.encode('utf-8'), output, 32) is None
+    assert output.read_text(encoding='utf-8') == minify_css(sample_css)
+
+
+@pytest.mark.parametrize("css", [".a { color: red", ".a { color: red } }"])
+def test_unbalanced_braces(css):
+    with pytest.raises(Exception, match="Unbalanced braces"):
+        analyze_stylesheet_stream(css.encode('utf-8'), 4)
@@ -0,0 +1,110 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Tests of the nested rule traversal."""
+
+import tinycss2
+from css_tools import instrumentation
+from css_tools.extractor import extract_colors, extract_fonts
+from css_tools.parser import CssDocument
+from css_tools.traversal import child_rules, has_block, has_nested_rules, rule_declarations, walk
+
+NESTED_CSS = """
+.a { color: red; }
+@media (min-width: 1px) {
+  .b { color: blue; }
+  @supports (display: grid) {
+    .c { color: #fff; font-family: serif; }
+  }
+}
+@font-face { font-family: Icons; }
+"""
+
+
+def _parse(css):
+    return tinycss2.parse_stylesheet(css, skip_whitespace=False, skip_comments=False)
+
+
+def _reparsed(rule):
+    """Nested rules as they were found before, by serializing the block and parsing it again."""
+    return _parse(tinycss2.serialize(rule.content))
+
+
+def test_child_rules_match_a_reparse_of_the_block():
+    media = next(rule for rule in _parse(NESTED_CSS) if rule.type == "at-rule")
+
+    assert tinycss2.serialize(child_rules(media)) == tinycss2.serialize(_reparsed(media))
+
+
+def test_rule_declarations_match_a_reparse_of_the_block():
+    rule = _parse(".a { color: red; /* c */ margin: 0 !important }")[0]
+
+    reparsed = tinycss2.parse_declaration_list(
+        tinycss2.serialize(rule.content), skip_whitespace=False, skip_comments=False
+    )
+    assert tinycss2.serialize(rule_declarations(rule)) == tinycss2.serialize(reparsed)
+    assert [node.type for node in rule_declarations(rule) if node.type != "whitespace"] == [
+        "declaration", "comment", "declaration"
+    ]
+
+
+def test_nodes_without_a_block_have_no_children():
+    statement = _parse("@import 'a.css';")[0]
+
+    assert child_rules(statement) == []
+    assert rule_declarations(statement) == []
+    assert not has_block(statement)
+
+
+def test_has_nested_rules():
+    rules = [rule for rule in _parse(NESTED_CSS) if rule.type == "at-rule"]
+
+    assert [has_nested_rules(rule) for rule in rules] == [True, False]
+    assert all(has_block(rule) for rule in rules)
+
+
+def test_walk_is_depth_first_with_ancestors():
+    doc = CssDocument(NESTED_CSS)
+
+    found = [
+        (doc.selector(node), [doc.selector(parent) for parent in ancestors])
+        for node, ancestors in doc.walk(has_nested_rules)
+        if node.type == "qualified-rule"
+    ]
+
+    assert found == [
+        (".a", []),
+        (".b", ["(min-width: 1px)"]),
+        (".c", ["(min-width: 1px)", "(display: grid)"]),
+    ]
+
+
+def test_walk_handles_deep_nesting():
+    depth = 2000
+    css = "@media x {" * depth + ".deep { color: red }" + "}" * depth
+
+    nodes = [node for node, _ in walk(_parse(css)) if node.type == "qualified-rule"]
+
+    assert len(nodes) == 1
+
+
+def test_nested_blocks_are_parsed_once_per_document():
+    doc = CssDocument(NESTED_CSS)
+    with instrumentation.instrument() as first:
+        extract_colors(doc)
+        extract_fonts(doc)
+
+    with instrumentation.instrument() as second:
+        extract_colors(doc)
+        extract_fonts(doc)
+
+    assert first.as_dict()["counters"]["nested_reparses"] > 0
+    assert "nested_reparses" not in second.as_dict()["counters"]
+
+
+def test_extractors_find_nested_rules():
+    colors = extract_colors(NESTED_CSS)
+
+    assert set(colors) == {".a", ".b", ".c"}
+    assert colors[".c"] == ["color: #fff"]
@@ -0,0 +1,157 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Tests of the template usage index and unused-selector checks."""
+
+import json
+import os
+import re
+import pytest
+from css_tools import parallel
+from css_tools.extractor import extract_unused_selectors
+from css_tools.parser import CssDocument
+from css_tools.usage_index import UsageCache, UsageIndex, find_templates, scan_file, scan_text
+
+UNUSED_CSS = """
+.header, .nav > .item { color: red; }
+#main:hover { margin: 0; }
+.footer::after { content: ""; }
+.md\\:flex { display: flex; }
+.btn-large { padding: 1em; }
+div p { top: 0; }
+@media print { .printed { color: black; } }
+"""
+
+
+@pytest.fixture(scope="module", autouse=True)
+def stop_pool():
+    yield
+    parallel.shutdown_pool()
+
+
+@pytest.mark.parametrize("text, usage", [
+    ('<div class="a b" id="main">', ({"a", "b"}, {"main"}, set())),
+    ("<p class='c'>", ({"c"}, set(), set())),
+    ('<div class={["a", @on && "b c"]}>', ({"a", "b", "c"}, set(), set())),
+    ('<div class={~w(x y)}>', ({"x", "y"}, set(), set())),
+    ('<.link class="btn btn-#{@size}">', ({"btn"}, set(), {"btn-"})),
+    ('<div class="<%= @c %> d">', ({"d"}, set(), set())),
+    ('content_tag(:div, "", class: "e f", id: "g")', ({"e", "f"}, {"g"}, set())),
+    ('<div data-class="nope" xclass="nope">', (set(), set(), set())),
+])
+def test_scan_text(text, usage):
+    assert scan_text(text) == usage
+
+
+def test_usage_index_prefixes():
+    index = UsageIndex.from_text('<a class="btn-#{@kind}" id="x">')
+
+    assert index.uses_class("btn-large")
+    assert not index.uses_class("large")
+    assert index.uses_id("x") and not index.uses_id("y")
+
+
+def _unused_as_before(css, html):
+    """Unused selectors as they were found by searching the HTML for each attribute."""
+    doc = CssDocument(css)
+    parts = []
+    for rule in doc.rules:
+        if rule.type == "qualified-rule":
+            base = re.sub(r'::?[a-zA-Z-]+(\([^)]*\))?', '', doc.selector(rule))
+            for part in re.split(r'\s*[,>+~]\s*', base):
+                part = part.strip()
+                if part and part not in parts:
+                    parts.append(part)
+    unused = []
+    for part in parts:
+        if part.startswith(('.', '#')):
+            attribute = "class" if part[0] == "." else "id"
+            if f'{attribute}="{part[1:]}"' not in html and f"{attribute}='{part[1:]}'" not in html:
+                unused.append(part)
+    return unused
+
+
+@pytest.mark.parametrize("html", [
+    "",
+    '<div class="header"><span class="item"></span></div>',
+    "<main id='main'><footer class='footer'></footer></main>",
+    '<div class="btn-large" id="other"><p class="printed"></p></div>',
+])
+def test_matches_the_attribute_search_for_single_names(html):
+    # The old pseudo-class pattern cut escaped selectors such as .md\:flex
+    css = UNUSED_CSS.replace(".md\\:flex", ".flex")
+
+    assert extract_unused_selectors(css, html) == _unused_as_before(css, html)
+
+
+def test_finds_names_the_attribute_search_missed():
+    html = '<div class="header nav"><a class={["item", "btn-#{@size}"]}></a><b class="md:flex"></b></div>'
+
+    assert extract_unused_selectors(UNUSED_CSS, html) == ["#main", ".footer"]
+
+
+def test_index_gives_the_same_result_as_html(sample_css):
+    html = '<div class="header"><button class="button primary">'
+    index = UsageIndex.from_text(html)
+
+    assert extract_unused_selectors(sample_css, index) == extract_unused_selectors(sample_css, html)
+
+
+def _write_templates(root):
+    files = {
+        "lib/app_web/page.html.heex": '<div class="header" id="main">',
+        "lib/app_web/components.ex": 'link(to: "/", class: "item")',
+        "lib/app_web/ignored.txt": '<div class="footer">',
+        "deps/dep/lib/x.ex": '<div class="footer">',
+        "templates/btn.eex": '<a class="btn-<%= @size %>">',
+    }
+    for name, text in files.items():
+        path = os.path.join(root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(text)
+
+
+def test_find_templates_skips_dependencies(tmp_path):
+    _write_templates(tmp_path)
+
+    found = [os.path.relpath(path, tmp_path) for path in find_templates(str(tmp_path))]
+
+    assert found == ["lib/app_web/components.ex", "lib/app_web/page.html.heex", "templates/btn.eex"]
+    assert scan_file(os.path.join(tmp_path, "templates/btn.eex")) == (set(), set(), {"btn-"})
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_build_usage_index(tmp_path, workers):
+    _write_templates(tmp_path)
+
+    index = parallel.build_usage_index(str(tmp_path), workers=workers)
+
+    assert (index.classes, index.ids, index.class_prefixes) == ({"header", "item"}, {"main"}, {"btn-"})
+    assert extract_unused_selectors(UNUSED_CSS, index) == [".nav", ".footer", ".md\\:flex"]
+
+
+def test_cache_rescans_only_changed_files(tmp_path):
+    templates = tmp_path / "app"
+    _write_templates(templates)
+    cache_path = str(tmp_path / "usage.json")
+
+    parallel.build_usage_index(str(templates), cache_path=cache_path, workers=1)
+    with open(cache_path, encoding='utf-8') as file:
+        assert len(json.load(file)["files"]) == 3
+
+    page = templates / "lib/app_web/page.html.heex"
+    page.write_text('<div class="nav">', encoding='utf-8')
+    (templates / "templates/btn.eex").unlink()
+    index = parallel.build_usage_index(str(templates), cache_path=cache_path, workers=1)
+
+    assert (index.classes, index.class_prefixes) == ({"nav", "item"}, set())
+    assert set(UsageCache(cache_path).entries) == {str(page), str(templates / "lib/app_web/components.ex")}
+
+
+def test_cache_ignores_other_versions(tmp_path):
+    path = tmp_path / "usage.json"
+    path.write_text(json.dumps({"version": 0, "files": {"a": {}}}), encoding='utf-8')
+
+    assert UsageCache(str(path)).entries == {}
@@ -0,0 +1,133 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Tests of find_css_errors positions and of validate_css built on it."""
+
+import pytest
+from css_tools.extractor import validate_css
+from css_tools.parser import CssDocument
+from css_tools.validation import braces_balanced, find_css_errors, missing_semicolon
+
+
+def _positions(css):
+    return [(error["kind"], error["severity"], error["line"], error["column"]) for error in find_css_errors(css)]
+
+
+def _check_offsets(css):
+    """Every offset points at the same place in the text and in its UTF-8 encoding."""
+    encoded = css.encode("utf-8")
+    lines = css.replace("\r\n", "\n").replace("\r", "\n").replace("\f", "\n").split("\n")
+    for error in find_css_errors(css):
+        assert encoded[error["byte_offset"]:].decode("utf-8") == css[error["offset"]:]
+        assert lines[error["line"] - 1][error["column"] - 1:].startswith(css[error["offset"]:error["offset"] + 1])
+
+
+def test_valid_css_has_no_errors(sample_css):
+    assert find_css_errors(sample_css) == []
+    assert validate_css(sample_css) == sample_css
+
+
+def test_reports_every_error_with_its_position():
+    css = ".a { color: red }\n}\n.b { c: red d: 1 }\n.c { x }\n{"
+
+    assert find_css_errors(css) == [
+        {"kind": "unbalanced-braces", "severity": "error", "message": "CSS syntax error: Unexpected '}'",
+         "line": 2, "column": 1, "offset": 18, "byte_offset": 18},
+        {"kind": "missing-semicolon", "severity": "error",
+         "message": "CSS syntax error: Missing semicolon after 'c: red'",
+         "line": 3, "column": 6, "offset": 25, "byte_offset": 25},
+        {"kind": "invalid-declaration", "severity": "warning",
+         "message": "CSS parse error: Expected ':' after declaration name, got EOF",
+         "line": 4, "column": 6, "offset": 44, "byte_offset": 44},
+        {"kind": "unbalanced-braces", "severity": "error", "message": "CSS syntax error: Unclosed '{'",
+         "line": 5, "column": 1, "offset": 48, "byte_offset": 48},
+    ]
+
+
+def test_multibyte_text():
+    css = '.é { content: "ü→"; }\n.ß { c: red d: 1 }\n}'
+    errors = find_css_errors(css)
+
+    assert _positions(css) == [
+        ("missing-semicolon", "error", 2, 6),
+        ("unbalanced-braces", "error", 3, 1),
+        ("parse-error", "error", 3, 1),
+    ]
+    # Columns and offsets count characters, byte offsets count UTF-8 bytes
+    assert [error["offset"] for error in errors] == [27, 41, 41]
+    assert [error["byte_offset"] for error in errors] == [32, 46, 46]
+    _check_offsets(css)
+
+
+@pytest.mark.parametrize("newline", ["\r\n", "\r", "\f"])
+def test_newlines_count_like_the_tokenizer(newline):
+    css = newline.join(["/* ü */", ".a { color: red }", "}", ".b { x; color: red blue: 1 }", "{"])
+
+    assert _positions(css) == [
+        ("unbalanced-braces", "error", 3, 1),
+        ("invalid-declaration", "warning", 4, 6),
+        ("missing-semicolon", "error", 4, 9),
+        ("unbalanced-braces", "error", 5, 1),
+    ]
+    _check_offsets(css)
+
+
+@pytest.mark.parametrize("css", [
+    '.a::before { content: "{"; }',
+    ".a { background: url(data:image/png;base64,{}) }",
+    "/* } */ .a { color: red }",
+    ".a\\{ { color: red }",
+])
+def test_braces_in_strings_comments_and_urls(css):
+    assert braces_balanced(css)
+    assert find_css_errors(css) == []
+
+
+def test_warnings_are_not_rejected():
+    css = '.a { x } .b { content: "x\n; } /* open'
+    kinds = [(error["kind"], error["severity"]) for error in find_css_errors(css)]
+
+    assert ("invalid-declaration", "warning") in kinds
+    assert ("invalid-value", "warning") in kinds
+    assert kinds[-1] == ("unclosed-comment", "warning")
+    assert validate_css(css) == css
+
+
+def test_nested_rules_report_missing_semicolons_as_warnings():
+    css = "@media print { .a { c: red d: 1 } }"
+
+    assert _positions(css) == [("missing-semicolon", "warning", 1, 21)]
+    assert validate_css(css) == css
+
+
+@pytest.mark.parametrize("css, message", [
+    (".a { color: red; }}\n.b { c: red d: 1 }", "CSS syntax error: Unbalanced braces"),
+    (".b { c: red d: 1 }", "CSS syntax error: Missing semicolon after 'c: red'"),
+])
+def test_validate_css_raises_the_first_error(css, message):
+    with pytest.raises(Exception, match=message):
+        validate_css(css)
+
+
+def test_documents_and_bytes():
+    css = ".é { c: red d: 1 }"
+
+    assert find_css_errors(css.encode("utf-8")) == find_css_errors(css) == find_css_errors(CssDocument(css))
+
+
+@pytest.mark.parametrize("value, reported", [
+    ("red font-size: 16px", True),
+    ("url(a:b) no-repeat", False),
+    ("var(--x, a:b)", False),
+    ("1px solid", False),
+])
+def test_missing_semicolon(value, reported):
+    assert (missing_semicolon("color", value) is not None) == reported
+
+
+def test_long_values_stay_linear():
+    css = ".a { x: " + "a " * 50000 + "b: c }"
+
+    [error] = find_css_errors(css)
+    assert error["kind"] == "missing-semicolon"
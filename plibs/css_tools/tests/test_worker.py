@@ -0,0 +1,130 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+"""Tests of the worker protocol, driven over in-memory streams."""
+
+import io
+import json
+import struct
+import pytest
+from css_tools import worker
+from css_tools.modifier import remove_selector
+
+
+def _frame(message, framing):
+    data = message if isinstance(message, bytes) else json.dumps(message).encode("utf-8")
+    if framing == "length":
+        return struct.pack(">I", len(data)) + data
+    return data + b"\n"
+
+
+def _responses(data, framing):
+    if framing == "lines":
+        return [json.loads(line) for line in data.splitlines()]
+    responses = []
+    while data:
+        (size,) = struct.unpack(">I", data[:4])
+        responses.append(json.loads(data[4:4 + size]))
+        data = data[4 + size:]
+    return responses
+
+
+def _serve(messages, framing="lines", tail=b""):
+    """Send the messages to one worker and return its responses."""
+    output = io.BytesIO()
+    worker.serve(io.BytesIO(b"".join(_frame(m, framing) for m in messages) + tail), output, framing)
+    return _responses(output.getvalue(), framing)
+
+
+@pytest.mark.parametrize("framing", worker.FRAMINGS)
+def test_runs_ops_on_documents(framing):
+    css = ".a { color: red; } .b { top: 0; }"
+    [response] = _serve([{
+        "id": 7,
+        "documents": {"app": css},
+        "ops": [
+            ["remove_selector", {"doc": "app", "selector": ".a"}],
+            ["selector_exists", {"doc": "app", "selector": ".b"}],
+        ],
+    }], framing)
+
+    assert response == {
+        "id": 7,
+        "status": "ok",
+        "results": [{"status": "ok", "result": None}, {"status": "ok", "result": True}],
+        "documents": {"app": remove_selector(css, ".a")},
+    }
+
+
+@pytest.mark.parametrize("framing", worker.FRAMINGS)
+def test_keeps_documents_between_requests(framing):
+    responses = _serve([
+        {"id": 1, "documents": {"app": ".a { color: red; }"}},
+        {"id": 2, "ops": [["selector_exists", {"doc": "app", "selector": ".a"}]]},
+        {"id": 3, "drop": ["app"], "ops": [["text", {"doc": "app"}]]},
+    ], framing)
+
+    assert [response["id"] for response in responses] == [1, 2, 3]
+    assert responses[1]["results"] == [{"status": "ok", "result": True}]
+    assert responses[2]["results"] == [{"status": "error", "message": "Unknown document: app"}]
+
+
+@pytest.mark.parametrize("framing", worker.FRAMINGS)
+@pytest.mark.parametrize("message, error", [
+    (b"{not json", "Invalid request: "),
+    (b"[1, 2]", "Invalid request: a request must be a JSON object"),
+    ({"id": 2, "documents": [".a {}"]}, "Invalid request: documents must be an object mapping names to CSS text"),
+    ({"id": 2, "documents": {"app": 1}}, "Invalid request: documents must be an object mapping names to CSS text"),
+    ({"id": 2, "drop": "app"}, "Invalid request: drop must be a list of document names"),
+    ({"id": 2, "ops": {"op": "text"}}, "Invalid request: ops must be a list"),
+])
+def test_malformed_requests(framing, message, error):
+    responses = _serve([message, {"id": 3, "ops": [["text", {"css": ".a{}"}]]}], framing)
+
+    assert responses[0]["status"] == "error"
+    assert responses[0]["message"].startswith(error)
+    # The worker keeps answering after a malformed request
+    assert responses[1] == {"id": 3, "status": "ok", "results": [{"status": "ok", "result": ".a{}"}], "documents": {}}
+
+
+def test_an_invalid_request_changes_no_document():
+    responses = _serve([
+        {"id": 1, "documents": {"app": ".a { color: red; }"}},
+        {"id": 2, "drop": ["app"], "documents": {"new": ".b {}"}, "ops": "remove_selector"},
+        {"id": 3, "ops": [["text", {"doc": "app"}], ["text", {"doc": "new"}]]},
+    ])
+
+    assert responses[1]["status"] == "error"
+    assert responses[2]["results"] == [
+        {"status": "ok", "result": ".a { color: red; }"},
+        {"status": "error", "message": "Unknown document: new"},
+    ]
+
+
+@pytest.mark.parametrize("framing, tail", [
+    ("lines", b'{"id": 2, "ops": ['),
+    ("length", struct.pack(">I", 100) + b'{"id": 2}'),
+    ("length", b"\x00\x00"),
+])
+def test_partial_request_at_end_of_input(framing, tail):
+    responses = _serve([{"id": 1}], framing, tail)
+
+    if framing == "lines":
+        # A line cut short is still a message, and an invalid one
+        assert [response["status"] for response in responses] == ["ok", "error"]
+    else:
+        # A frame cut short is not read at all
+        assert responses == [{"id": 1, "status": "ok", "results": [], "documents": {}}]
+
+
+def test_blank_lines_are_skipped():
+    output = io.BytesIO()
+    worker.serve(io.BytesIO(b'\n  \n{"id": 1}\n\n'), output)
+
+    assert _responses(output.getvalue(), "lines") == [{"id": 1, "status": "ok", "results": [], "documents": {}}]
+
+
+def test_unknown_framing():
+    with pytest.raises(Exception, match="Unknown framing: xml"):
+        worker.serve(io.BytesIO(), io.BytesIO(), "xml")
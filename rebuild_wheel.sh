@@ -6,11 +6,18 @@
 
 # Script to rebuild the Python wheel and ensure the latest version is used
 
-echo "🔧 Rebuilding CSS tools wheel..."
+set -e
 
-# Remove old wheel from priv/python
-echo "📦 Removing old wheel..."
-rm -f priv/python/css_tools-0.1.0-py3-none-any.whl
+# The version comes from pyproject.toml; bump it there, in setup.py and in
+# css_tools.__version__, then update the wheel path in application.ex
+VERSION=$(sed -n 's/^version = "\(.*\)"$/\1/p' plibs/css_tools/pyproject.toml)
+WHEEL="css_tools-${VERSION}-py3-none-any.whl"
+
+echo "🔧 Rebuilding CSS tools wheel ${VERSION}..."
+
+# Remove old wheels from priv/python
+echo "📦 Removing old wheels..."
+rm -f priv/python/css_tools-*-py3-none-any.whl priv/python/css_tools-*-py3-none-any.whl.license
 
 # Navigate to css_tools directory
 cd plibs/css_tools
@@ -29,14 +36,21 @@ rm -rf build/ dist/ src/css_tools.egg-info/
 echo "🏗️ Building new wheel..."
 python -m build
 
+# License files of the build output, which REUSE cannot annotate inline
+for file in dist/*; do
+    printf '%s\n\n%s\n' \
+        "SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs.contributors>" \
+        "SPDX-License-Identifier: MIT" > "${file}.license"
+done
+
 # Copy the new wheel to priv/python
 echo "📋 Copying wheel to priv/python..."
-cp dist/css_tools-0.1.0-py3-none-any.whl ../../priv/python/
+cp "dist/${WHEEL}" "dist/${WHEEL}.license" ../../priv/python/
 
 # Verify the wheel was copied
-if [ -f "../../priv/python/css_tools-0.1.0-py3-none-any.whl" ]; then
+if [ -f "../../priv/python/${WHEEL}" ]; then
     echo "✅ Wheel successfully rebuilt and deployed!"
-    ls -lh ../../priv/python/css_tools-0.1.0-py3-none-any.whl
+    ls -lh "../../priv/python/${WHEEL}"
 else
     echo "❌ Failed to copy wheel to priv/python"
     exit 1
@@ -0,0 +1,58 @@
+# SPDX-FileCopyrightText: 2025 igniter_css contributors <https://github.com/ash-project/igniter_css/graphs/contributors>
+#
+# SPDX-License-Identifier: MIT
+
+defmodule IgniterCssTest.Parsers.Css.CssProcessorTest do
+  use ExUnit.Case
+  alias IgniterCss.CSS.CssProcessor
+
+  describe "extract_critical_css/2" do
+    test "splits rules by selector member, including inside media queries" do
+      # Given: CSS with a selector list, a string holding a brace and a media query
+      css_code = """
+      .header, .footer {
+        color: blue;
+      }
+
+      .content::before {
+        content: "{";
+      }
+
+      @media (max-width: 768px) {
+        .header {
+          font-size: 14px;
+        }
+
+        .sidebar {
+          display: none;
+        }
+      }
+      """
+
+      # When: Extracting the critical CSS
+      {critical, rest} =
+        CssProcessor.extract_critical_css(css_code, [".header", ".content::before"])
+
+      # Then: Critical members should move out, with their media query repeated
+      assert critical =~ ".header {\n    color: blue;\n}"
+      assert critical =~ ".content::before {\n    content: \"{\";\n}"
+      assert critical =~ "@media (max-width: 768px) {\n    .header {\n        font-size: 14px;"
+      refute critical =~ ".footer"
+      refute critical =~ ".sidebar"
+
+      assert rest =~ ".footer {\n    color: blue;\n}"
+      assert rest =~ "@media (max-width: 768px) {\n    .sidebar {\n        display: none;\n    }"
+      refute rest =~ ".header"
+      refute rest =~ ".content::before"
+    end
+
+    test "leaves the critical CSS empty when no selector matches" do
+      # When: Extracting selectors that are not in the CSS
+      {critical, rest} = CssProcessor.extract_critical_css(".a { color: red; }", [".missing"])
+
+      # Then: Everything should stay in the non-critical CSS
+      assert critical == ""
+      assert rest =~ ".a {\n    color: red;\n}"
+    end
+  end
+end
@@ -288,6 +288,50 @@ defmodule IgniterCssTest.Parsers.Css.ParserTest do
     end
   end
 
+  describe "add_prefixes/4" do
+    test "adds every table entry in one pass, including nested rules" do
+      # Given: CSS with prefixable properties at top level and in @media
+      css_code = """
+      .button {
+        user-select: none;
+        display: flex;
+      }
+
+      @media (min-width: 768px) {
+        .panel {
+          appearance: none;
+        }
+      }
+      """
+
+      # When: Adding prefixes from a table
+      {:ok, _, result} =
+        Parser.add_prefixes(
+          css_code,
+          %{"user-select" => ["-webkit-", "-moz-"], "appearance" => ["-webkit-"]},
+          %{"display" => %{"flex" => ["-webkit-box"]}}
+        )
+
+      # Then: Prefixed declarations should come before the standard ones
+      assert result =~
+               "-webkit-user-select: none;\n  -moz-user-select: none;\n  user-select: none;"
+      assert result =~ "display: -webkit-box;\n  display: flex;"
+      assert result =~ "-webkit-appearance: none;\n    appearance: none;"
+    end
+
+    test "does not add prefixes that are already present" do
+      # Given: CSS that already has a prefixed declaration
+      css_code = ".a { -webkit-user-select: none; user-select: none; }"
+
+      # When: Adding prefixes
+      {:ok, _, result} = Parser.add_prefixes(css_code, %{"user-select" => ["-webkit-", "-ms-"]})
+
+      # Then: Only the missing prefix should be added
+      assert result ==
+               ".a { -webkit-user-select: none; -ms-user-select: none; user-select: none; }"
+    end
+  end
+
   describe "analyze_css/1" do
     test "returns analysis for valid CSS with multiple selectors" do
       # Given: CSS with multiple selectors, properties, and values
@@ -486,6 +530,52 @@ defmodule IgniterCssTest.Parsers.Css.ParserTest do
     end
   end
 
+  describe "analyze_css_fields/3" do
+    test "returns only the requested fields" do
+      # Given: CSS with selectors and an import
+      css_code = """
+      @import url("base.css");
+      .header { color: #333; }
+      .footer { color: #000; }
+      """
+
+      # When: Analyzing only some fields
+      {:ok, _, result} = Parser.analyze_css_fields(css_code, ["selectors_count", "imports"])
+
+      # Then: Only those fields should be returned
+      assert result == %{"selectors_count" => 2, "imports" => ["base.css"]}
+    end
+
+    test "returns the counts in summary mode" do
+      # Given: CSS with a media query
+      css_code = """
+      .header { color: #333; }
+      @media (max-width: 768px) {
+        .header { color: #000; }
+      }
+      """
+
+      # When: Analyzing in summary mode
+      {:ok, _, result} = Parser.analyze_css_fields(css_code, :summary)
+
+      # Then: Counts should match the full analysis, without the maps
+      {:ok, _, full} = Parser.analyze_css(css_code)
+      assert result["selectors_count"] == full["selectors_count"]
+      assert result["media_queries_count"] == 1
+      assert result["colors_used"] == full["colors_used"]
+      refute Map.has_key?(result, "selector_properties")
+      refute Map.has_key?(result, "media_query_details")
+    end
+
+    test "rejects unknown fields" do
+      # When: Asking for a field that does not exist
+      {:error, _, message} = Parser.analyze_css_fields(".a { color: red; }", ["nope"])
+
+      # Then: The field should be named in the error
+      assert message =~ "nope"
+    end
+  end
+
   describe "extract_colors/1" do
     test "extracts hex color values" do
       # Given: CSS with hex color values
@@ -1203,6 +1293,112 @@ defmodule IgniterCssTest.Parsers.Css.ParserTest do
           assert String.contains?(merged_css, "color: blue")
       end
     end
+
+    test "groups rules with identical declarations when asked to" do
+      # Given: Two stylesheets with the same declarations under different selectors
+      css_code1 = """
+      .header {
+        color: blue;
+        margin: 0;
+      }
+      """
+
+      css_code2 = """
+      .footer {
+        color: blue;
+        margin: 0;
+      }
+      """
+
+      # When: Merging the stylesheets with grouping
+      {:ok, _, result} = Parser.merge_stylesheets([css_code1, css_code2], group_identical: true)
+
+      # Then: Both selectors should share one rule
+      assert String.contains?(result, ".header, .footer")
+      assert length(String.split(result, "color: blue")) == 2
+    end
+
+    test "does not group rules when a rule in between would lose the cascade" do
+      # Given: A rule between the identical blocks that sets the same property
+      css_code = """
+      .header { color: blue; }
+      .active { color: red; }
+      .footer { color: blue; }
+      """
+
+      # When: Merging the stylesheets with grouping
+      {:ok, _, result} = Parser.merge_stylesheets([css_code], group_identical: true)
+
+      # Then: The rules should stay apart, in order
+      refute String.contains?(result, ".header, .footer")
+      assert String.contains?(result, ".footer")
+    end
+  end
+
+  describe "batch/3" do
+    test "runs operations in order on named stylesheets" do
+      # Given: Two stylesheets and operations on both
+      documents = %{
+        "app" => ".legacy { color: red; }\n.header { color: blue; }",
+        "admin" => ".panel { background: #fff; }"
+      }
+
+      ops = [
+        {"remove_selector", %{"doc" => "app", "selector" => ".legacy"}},
+        {"add_property_to_selector",
+         %{
+           "doc" => "app",
+           "selector" => ".header",
+           "property_name" => "display",
+           "property_value" => "none"
+         }},
+        {"selector_exists", %{"doc" => "app", "selector" => ".legacy"}},
+        {"extract_colors", %{"doc" => "admin"}}
+      ]
+
+      # When: Running the batch
+      {:ok, _, %{"results" => results, "documents" => documents}} = Parser.batch(documents, ops)
+
+      # Then: Later operations should see the earlier edits
+      assert [
+               %{"status" => "ok", "result" => nil},
+               %{"status" => "ok", "result" => nil},
+               %{"status" => "ok", "result" => false},
+               %{"status" => "ok", "result" => colors}
+             ] = results
+
+      assert colors != %{}
+
+      # And: Only the changed stylesheet should be returned
+      assert Map.keys(documents) == ["app"]
+      refute String.contains?(documents["app"], ".legacy")
+      assert String.contains?(documents["app"], "display: none")
+    end
+
+    test "reports failing operations without stopping the batch" do
+      # Given: An unknown operation followed by a valid one
+      ops = [
+        {"unknown_operation", %{"doc" => "app"}},
+        {"minify_css", %{"doc" => "app"}}
+      ]
+
+      # When: Running the batch
+      {:ok, _, %{"results" => [failed, minified]}} =
+        Parser.batch(%{"app" => ".a { color: red; }"}, ops)
+
+      # Then: Only the first operation should fail
+      assert failed["status"] == "error"
+      assert failed["message"] =~ "Unknown operation"
+      assert minified["status"] == "ok"
+
+      # When: Stopping on the first error
+      {:ok, _, %{"results" => [_, skipped], "documents" => documents}} =
+        Parser.batch(%{"app" => ".a { color: red; }"}, ops, stop_on_error: true)
+
+      # Then: The remaining operations should be skipped
+      assert skipped["status"] == "error"
+      assert documents == %{}
+    end
   end
 
   describe "remove_selector/2" do
@@ -2392,6 +2588,92 @@ defmodule IgniterCssTest.Parsers.Css.ParserTest do
       refute String.contains?(result, "background: blue")
       refute String.contains?(result, "content: \"old\"")
     end
+
+    test "keeps the rules of a media query that is not duplicated" do
+      # Given: CSS with a single media query
+      css_code = """
+      @media print {
+        .header {
+          display: none;
+        }
+      }
+      """
+
+      # When: Removing duplicates
+      {:ok, _, result} = Parser.remove_duplicates(css_code)
+
+      # Then: The rules inside the media query should be kept
+      assert String.contains?(result, "@media print")
+      assert String.contains?(result, ".header")
+      assert String.contains?(result, "display: none")
+    end
+  end
+
+  describe "optimize/3" do
+    test "runs the production passes over one parse and reports each pass" do
+      # Given: CSS with duplicates, prefixable properties and long colors
+      css_code = """
+      .button {
+        user-select: none;
+        color: #ffffff;
+      }
+
+      .button {
+        margin: 0;
+      }
+
+      @media (max-width: 768px) {
+        .button {
+          display: flex;
+        }
+      }
+      """
+
+      # When: Running the default passes
+      {:ok, _, %{"css" => result, "report" => report}} = Parser.optimize(css_code)
+
+      # Then: The result should match the chained functions, with a report per pass
+      assert result ==
+               ".button{-moz-user-select:none;-ms-user-select:none;-webkit-user-select:none;" <>
+                 "color:#fff;user-select:none;}@media (max-width: 768px){.button{display:flex;}}"
+
+      assert Enum.map(report["passes"], & &1["name"]) ==
+               ["prefix", "remove_duplicates", "sort_properties", "minify"]
+
+      for pass <- report["passes"] do
+        assert pass["bytes_saved"] == pass["bytes_before"] - pass["bytes_after"]
+      end
+
+      assert report["output_bytes"] == byte_size(result)
+    end
+
+    test "takes pass options and writes pretty CSS without the minify pass" do
+      # When: Running passes with options and no minify pass
+      {:ok, _, %{"css" => result}} =
+        Parser.optimize(".a { user-select: none; }", [
+          {"prefix", %{"property_prefixes" => %{"user-select" => ["-webkit-"]}}},
+          {"add_property",
+           %{
+             "selector" => ".hide-scrollbar",
+             "property_name" => "display",
+             "property_value" => "none"
+           }}
+        ])
+
+      # Then: The tree should be written once, beautified
+      assert result ==
+               ".a {\n    -webkit-user-select: none;\n    user-select: none;\n}\n\n" <>
+                 ".hide-scrollbar {\n    display: none;\n}\n\n"
+    end
+
+    test "returns an error for an unknown pass" do
+      # When: Running an unknown pass
+      result = Parser.optimize(".a { color: red; }", ["inline"])
+
+      # Then: Should return error
+      assert {:error, _, message} = result
+      assert message =~ "Unknown pass: inline"
+    end
   end
 
   describe "validate_css/1" do
@@ -2635,6 +2917,72 @@ defmodule IgniterCssTest.Parsers.Css.ParserTest do
       # When: Validating CSS
       {:ok, _, true} = assert Parser.validate_css(css)
     end
+
+    test "accepts braces inside strings and comments" do
+      # Given: CSS with braces that do not open or close blocks
+      css = """
+      /* { */
+      .icon::before {
+        content: "}";
+      }
+      """
+
+      # When: Validating CSS
+      {:ok, _, true} = assert Parser.validate_css(css)
+    end
+  end
+
+  describe "css_errors/2" do
+    test "returns no errors for valid CSS" do
+      # Given: Valid CSS
+      css = """
+      .header {
+        color: blue;
+      }
+      """
+
+      # When: Finding errors
+      {:ok, _, errors} = Parser.css_errors(css)
+
+      # Then: There should be none
+      assert errors == []
+    end
+
+    test "reports every error with its position" do
+      # Given: CSS with a missing semicolon and a stray closing brace
+      css = """
+      .header {
+        color: blue
+        font-size: 16px;
+      }
+      }
+      """
+
+      # When: Finding errors
+      {:ok, _, errors} = Parser.css_errors(css)
+
+      # Then: Both errors should be reported in order, with positions
+      assert [semicolon, brace | _] = errors
+      assert semicolon["kind"] == "missing-semicolon"
+      assert semicolon["line"] == 2
+      assert semicolon["column"] == 3
+      assert brace["kind"] == "unbalanced-braces"
+      assert brace["line"] == 5
+      assert brace["column"] == 1
+      assert brace["byte_offset"] == brace["offset"]
+    end
+
+    test "counts byte offsets in UTF-8" do
+      # Given: A stray brace after a multi-byte character
+      css = ".é { color: red; }\n}"
+
+      # When: Finding errors
+      {:ok, _, [error | _]} = Parser.css_errors(css)
+
+      # Then: The byte offset should be past the two-byte character
+      assert error["offset"] == 19
+      assert error["byte_offset"] == 20
+    end
   end
 
   describe "replace_selector_rule/4" do